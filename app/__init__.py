@@ -37,6 +37,26 @@ def create_app(config_class=Config):
     from app.scheduler import init_scheduler
     init_scheduler(app)
     
+    # Initialize the bracket JSON cache backend
+    from app.services.bracket_cache import BracketCache
+    BracketCache.init_app(app)
+
+    # Maintain the schedule search index as registrations and names change
+    from app.services.schedule_search import ScheduleSearch
+    ScheduleSearch.init_app(app)
+
+    # Maintain the organizer dashboard's per-tournament registration summary
+    from app.services.dashboard_metrics import DashboardMetrics
+    DashboardMetrics.init_app(app)
+
+    # Deliver outgoing email from the outbox through a pooled worker queue
+    from app.services.email_queue import EmailQueue
+    EmailQueue.init_app(app)
+
+    # Resize uploaded images into their variants in a worker pool instead of the request
+    from app.services.image_pipeline import ImagePipeline
+    ImagePipeline.init_app(app)
+    
     # Ensure the uploads directory exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
@@ -75,6 +95,10 @@ def create_app(config_class=Config):
     # Register error handlers
     from app.errors import register_error_handlers
     register_error_handlers(app)
+
+    # Command-line tools (flask import-registrations ...)
+    from app.commands import register_commands
+    register_commands(app)
     
     # Add the nl2br filter
     @app.template_filter('nl2br')
@@ -82,6 +106,11 @@ def create_app(config_class=Config):
         if not text:
             return ""
         return text.replace('\n', '<br>')
+
+    # Path of a resized upload variant, e.g. image_variant(tournament.logo, 'thumb', 'webp')
+    @app.template_global('image_variant')
+    def image_variant(path, variant='full', ext='jpg'):
+        return ImagePipeline.variant_url_path(path, variant, ext)
     
     @app.errorhandler(413)
     def request_entity_too_large(error):
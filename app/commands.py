@@ -0,0 +1,159 @@
+import click
+from flask import current_app
+from app import db
+from app.models import Tournament, User
+
+
+def register_commands(app):
+    """Add the platform's maintenance commands to `flask`"""
+
+    @app.cli.command('import-registrations')
+    @click.argument('tournament_id', type=int)
+    @click.argument('sheet', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--dry-run', is_flag=True, help='Only check the sheet; import nothing.')
+    @click.option('--organizer-email', help='Record this user as having verified the registrations.')
+    @click.option('--base-url', default='http://localhost:5000', show_default=True,
+                  help='Site address used for links in the confirmation emails.')
+    def import_registrations(tournament_id, sheet, dry_run, organizer_email, base_url):
+        """Import registrations for TOURNAMENT_ID from a CSV or XLSX SHEET."""
+        from app.services.registration_import import RegistrationImport
+
+        tournament = db.session.get(Tournament, tournament_id)
+        if tournament is None:
+            raise click.ClickException(f"Tournament {tournament_id} not found")
+        organizer = None
+        if organizer_email:
+            organizer = User.query.filter_by(email=organizer_email).first()
+            if organizer is None:
+                raise click.ClickException(f"No user with email {organizer_email}")
+
+        # Confirmation emails build absolute links with url_for
+        with current_app.test_request_context(base_url=base_url), open(sheet, 'rb') as stream:
+            try:
+                result = RegistrationImport.run(tournament, stream, sheet, imported_by=organizer, dry_run=dry_run)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+
+        for line, message in result['errors']:
+            click.echo(f"line {line}: {message}", err=True)
+        if result['errors']:
+            raise click.ClickException(f"{len(result['errors'])} problem(s) in {result['rows']} row(s); nothing imported")
+        if dry_run:
+            click.echo(f"{result['rows']} registration(s) checked, ready to import")
+        else:
+            click.echo(f"{result['imported']} registration(s) imported into {tournament.name}")
+
+    @app.cli.command('refresh-dashboard-metrics')
+    @click.argument('tournament_ids', type=int, nargs=-1)
+    def refresh_dashboard_metrics(tournament_ids):
+        """Rebuild the dashboard's registration summary for TOURNAMENT_IDS (default: all)."""
+        from app.services.dashboard_metrics import DashboardMetrics
+
+        metrics = DashboardMetrics.refresh(list(tournament_ids) or None)
+        click.echo(f"Refreshed the registration summary of {len(metrics)} tournament(s)")
+
+    @app.cli.command('rebuild-search-index')
+    @click.argument('tournament_ids', type=int, nargs=-1)
+    def rebuild_search_index(tournament_ids):
+        """Index TOURNAMENT_IDS for schedule search (default: tournaments never indexed)."""
+        from app.services.schedule_search import ScheduleSearch
+
+        indexed = ScheduleSearch.backfill(list(tournament_ids) or None)
+        click.echo(f"Indexed the schedule search of {len(indexed)} tournament(s)")
+
+    @app.cli.command('rebuild-court-boards')
+    @click.argument('tournament_ids', type=int, nargs=-1)
+    def rebuild_court_boards(tournament_ids):
+        """Store the live court board of TOURNAMENT_IDS (default: ongoing tournaments)."""
+        from app.models import TournamentStatus
+        from app.services.court_board import CourtBoard
+
+        if not tournament_ids:
+            tournament_ids = db.session.scalars(
+                db.select(Tournament.id).filter(Tournament.status == TournamentStatus.ONGOING)
+            ).all()
+        for tournament_id in tournament_ids:
+            CourtBoard.rebuild(tournament_id)
+        click.echo(f"Rebuilt the court board of {len(tournament_ids)} tournament(s)")
+
+    @app.cli.command('rebuild-rankings')
+    @click.argument('category', required=False)
+    def rebuild_rankings(category):
+        """Recompute the player rankings of CATEGORY (e.g. mens_singles; default: all) from the points totals."""
+        from app.services.ranking_service import RankingService, POINTS_COLUMNS
+
+        category_type = None
+        if category:
+            category_type = RankingService.category_type(category)
+            if category_type is None:
+                raise click.BadParameter(f"'{category}' is not a ranked category", param_hint='CATEGORY')
+        RankingService.rebuild(category_type)
+        rebuilt = [category_type] if category_type else list(POINTS_COLUMNS)
+        click.echo(f"Rebuilt the rankings of {', '.join(ranked_type.value for ranked_type in rebuilt)}")
+
+    @app.cli.command('rescore-points')
+    @click.argument('category', required=False)
+    @click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Only count tournaments ending on or after this date.')
+    @click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Only count tournaments ending before this date.')
+    @click.option('--tier', 'tiers', multiple=True, metavar='TIER=POINTS',
+                  help='Score tournaments of TIER from POINTS base points (repeatable).')
+    @click.option('--what-if', is_flag=True, help='Only show the totals that would change; write nothing.')
+    def rescore_points(category, since, until, tiers, what_if):
+        """Recompute player points totals of CATEGORY (default: all) from the points ledger."""
+        from sqlalchemy import select, or_
+        from app.models import PlayerProfile
+        from app.services.points_ledger import PointsLedger
+        from app.services.ranking_service import RankingService, POINTS_COLUMNS
+
+        category_type = None
+        if category:
+            category_type = RankingService.category_type(category)
+            if category_type is None:
+                raise click.BadParameter(f"'{category}' is not a ranked category", param_hint='CATEGORY')
+        tier_points = {}
+        for tier in tiers:
+            name, _, points = tier.partition('=')
+            if name.upper() not in {t['name'] for t in current_app.config['TOURNAMENT_TIERS']} or not points.isdigit():
+                raise click.BadParameter(f"expected TIER=POINTS, got '{tier}'", param_hint='--tier')
+            tier_points[name] = int(points)
+
+        if not what_if:
+            PointsLedger.rescore(category_type, since, until, tier_points)
+            click.echo("Rescored the points totals and rebuilt the rankings")
+            return
+
+        for ranked_type in [category_type] if category_type else list(POINTS_COLUMNS):
+            column = RankingService.points_column(ranked_type)
+            totals = PointsLedger.totals(ranked_type, since, until, tier_points)
+            current = dict(db.session.execute(
+                select(PlayerProfile.id, column).where(or_(column > 0, PlayerProfile.id.in_(totals)))
+            ).all())
+            changes = sorted(((player_id, current.get(player_id) or 0, totals.get(player_id, 0))
+                              for player_id in set(current) | set(totals)
+                              if (current.get(player_id) or 0) != totals.get(player_id, 0)),
+                             key=lambda change: -change[2])
+            click.echo(f"{ranked_type.value}: {len(changes)} total(s) would change")
+            for player_id, old, new in changes:
+                click.echo(f"  player {player_id}: {old} -> {new}")
+
+    @app.cli.command('recompute-rankings')
+    @click.argument('category', required=False)
+    @click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']), help='Rank as on this date (default: now).')
+    @click.option('--weeks', type=int, help='Results window in weeks (default: RANKING_WINDOW_WEEKS; 0: no window).')
+    @click.option('--half-life', type=float,
+                  help='Decay half-life in weeks (default: RANKING_DECAY_HALF_LIFE_WEEKS; 0: no decay).')
+    def recompute_rankings(category, as_of, weeks, half_life):
+        """Re-rank CATEGORY (default: all) from the points ledger over the ranking window."""
+        from app.services.ranking_engine import RankingEngine
+        from app.services.ranking_service import RankingService
+
+        category_type = None
+        if category:
+            category_type = RankingService.category_type(category)
+            if category_type is None:
+                raise click.BadParameter(f"'{category}' is not a ranked category", param_hint='CATEGORY')
+        ranked = RankingEngine.run(category_type, as_of, weeks, half_life)
+        for ranked_type, count in ranked.items():
+            click.echo(f"{ranked_type.value}: {count} players ranked")
@@ -1,16 +1,47 @@
 from flask import render_template, current_app
 from flask_mail import Message
-from threading import Thread
+from markupsafe import escape
 from datetime import datetime
-from app import mail
 
-def send_async_email(app, msg):
-    with app.app_context():
-        mail.send(msg)
+# Stands in for the recipient's name while an email shared by many recipients is rendered
+RECIPIENT_PLACEHOLDER = '__recipient_username__'
+
+
+class _PlaceholderUser:
+    username = RECIPIENT_PLACEHOLDER
+
+
+def render_shared_email(template, **context):
+    """
+    Render `template`.txt and `template`.html once for many recipients.
+    
+    Returns (text, html) with a placeholder where the templates greet the
+    user; personalize_messages() fills it in for each recipient.
+    """
+    text = render_template(f'{template}.txt', user=_PlaceholderUser, **context)
+    html = render_template(f'{template}.html', user=_PlaceholderUser, **context)
+    return text, html
+
+
+def personalize_messages(subject, users, text, html):
+    """One Message per user with an email address (anything with username and email)"""
+    messages = []
+    for user in users:
+        if not user.email:
+            continue
+        msg = Message(subject=subject, recipients=[user.email])
+        msg.body = text.replace(RECIPIENT_PLACEHOLDER, user.username)
+        msg.html = html.replace(RECIPIENT_PLACEHOLDER, str(escape(user.username)))
+        messages.append(msg)
+    return messages
+
 
 def send_email(subject, recipients, html_body, text_body=None, sender=None, attachments=None):
     """
-    Send an email asynchronously.
+    Queue an email for delivery through the outbox.
+    
+    The message is added to the caller's transaction; it reaches the email
+    workers when the caller commits.
     
     Args:
         subject (str): The email subject line
@@ -20,8 +51,15 @@ def send_email(subject, recipients, html_body, text_body=None, sender=None, atta
         sender (str, optional): Email sender address (defaults to app config)
         attachments (list, optional): List of (filename, mime_type, file_data) tuples
     """
-    app = current_app._get_current_object()
+    msg = build_email(subject, recipients, html_body, text_body, sender, attachments)
     
+    # Persisted in the outbox with the caller's changes and delivered by the email workers
+    from app.services.email_queue import EmailQueue
+    EmailQueue.enqueue(msg)
+
+
+def build_email(subject, recipients, html_body, text_body=None, sender=None, attachments=None):
+    """The flask_mail Message send_email() queues (same arguments), for callers queueing many at once"""
     # If sender not specified, use the default from config
     if sender is None:
         sender = current_app.config['MAIL_DEFAULT_SENDER']
@@ -37,8 +75,7 @@ def send_email(subject, recipients, html_body, text_body=None, sender=None, atta
             filename, mime_type, file_data = attachment
             msg.attach(filename=filename, content_type=mime_type, data=file_data)
     
-    # Send email asynchronously
-    Thread(target=send_async_email, args=(app, msg)).start()
+    return msg
 
 def send_registration_confirmation_email(registration):
     """Send a registration confirmation email to the player"""
@@ -2,10 +2,76 @@ from datetime import datetime, date
 from flask import current_app
 import random
 import string
-from werkzeug.utils import secure_filename
 from PIL import Image
 import io
-import os
+
+# Longest side of the full-size image kept for each upload folder
+IMAGE_MAX_SIZES = {
+    'tournament_logos': 800,
+    'profile_pics': 800,
+    'sponsor_logos': 800,
+    'tournament_banners': 1500,
+    'banner_pics': 1500,
+    'venue_images': 1200,
+}
+
+
+def max_image_size(subfolder):
+    """Longest side of the full-size variant for an upload folder"""
+    return IMAGE_MAX_SIZES.get(subfolder, 1024)
+
+
+def shape_image(img, subfolder=None):
+    """
+    Convert a decoded image to RGB and apply the per-folder shape
+    (square crop for profile pictures, 3:1 padding for banners)
+    """
+    # Convert to RGB if it's in RGBA mode (for PNG with transparency)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    
+    # Set desired aspect ratios and handling based on image type
+    if subfolder == 'profile_pics':
+        # For profile pictures, crop to square if needed
+        if img.width != img.height:
+            # Take the smaller dimension
+            min_dimension = min(img.width, img.height)
+            # Calculate crop box to create a centered square
+            left = (img.width - min_dimension) // 2
+            top = (img.height - min_dimension) // 2
+            right = left + min_dimension
+            bottom = top + min_dimension
+            # Crop the image to a square
+            img = img.crop((left, top, right, bottom))
+    elif subfolder == 'banner_pics':
+        # For banners, ensure wide format (3:1 ratio)
+        # If it's not wide enough, add padding
+        target_ratio = 3.0  # 3:1 aspect ratio
+        current_ratio = img.width / img.height
+        
+        if current_ratio < target_ratio:
+            # Image is not wide enough, add horizontal padding
+            new_width = int(img.height * target_ratio)
+            new_img = Image.new('RGB', (new_width, img.height), (255, 255, 255))  # White background
+            paste_x = (new_width - img.width) // 2  # Center horizontally
+            new_img.paste(img, (paste_x, 0))
+            img = new_img
+    return img
+
+
+def fit_image(img, max_size):
+    """Scale an image down so that neither side exceeds max_size, keeping its aspect ratio"""
+    if img.width <= max_size and img.height <= max_size:
+        return img
+    # Calculate new dimensions maintaining aspect ratio
+    if img.width > img.height:
+        new_width = max_size
+        new_height = int(img.height * (max_size / img.width))
+    else:
+        new_width = int(img.width * (max_size / img.height))
+        new_height = max_size
+    return img.resize((new_width, new_height), Image.LANCZOS)
+
 
 def resize_image(image_data, max_size=1024, quality=85, subfolder=None):
     """
@@ -22,51 +88,7 @@ def resize_image(image_data, max_size=1024, quality=85, subfolder=None):
     """
     try:
         # Create image from binary data
-        img = Image.open(io.BytesIO(image_data))
-        
-        # Convert to RGB if it's in RGBA mode (for PNG with transparency)
-        if img.mode == 'RGBA':
-            img = img.convert('RGB')
-        
-        # Set desired aspect ratios and handling based on image type
-        if subfolder == 'profile_pics':
-            # For profile pictures, crop to square if needed
-            if img.width != img.height:
-                # Take the smaller dimension
-                min_dimension = min(img.width, img.height)
-                # Calculate crop box to create a centered square
-                left = (img.width - min_dimension) // 2
-                top = (img.height - min_dimension) // 2
-                right = left + min_dimension
-                bottom = top + min_dimension
-                # Crop the image to a square
-                img = img.crop((left, top, right, bottom))
-        elif subfolder == 'banner_pics':
-            # For banners, ensure wide format (3:1 ratio)
-            # If it's not wide enough, add padding
-            target_ratio = 3.0  # 3:1 aspect ratio
-            current_ratio = img.width / img.height
-            
-            if current_ratio < target_ratio:
-                # Image is not wide enough, add horizontal padding
-                new_width = int(img.height * target_ratio)
-                new_img = Image.new('RGB', (new_width, img.height), (255, 255, 255))  # White background
-                paste_x = (new_width - img.width) // 2  # Center horizontally
-                new_img.paste(img, (paste_x, 0))
-                img = new_img
-        
-        # Check if resize is needed
-        if img.width > max_size or img.height > max_size:
-            # Calculate new dimensions maintaining aspect ratio
-            if img.width > img.height:
-                new_width = max_size
-                new_height = int(img.height * (max_size / img.width))
-            else:
-                new_width = int(img.width * (max_size / img.height))
-                new_height = max_size
-                
-            # Resize image
-            img = img.resize((new_width, new_height), Image.LANCZOS)
+        img = fit_image(shape_image(Image.open(io.BytesIO(image_data)), subfolder), max_size)
         
         # Save to memory buffer
         buffer = io.BytesIO()
@@ -118,16 +140,24 @@ def save_payment_proof(proof_file, registration_id):
 
 def save_picture(picture, subfolder='tournament_pics', additional_text=''):
     """
-    Save and resize image with specific handling based on image type
+    Store an uploaded image and queue it for processing
+    
+    The upload is only checked (the header is parsed, the pixels are not
+    decoded) and written as-is under its content hash, so the same file
+    uploaded twice is stored once. The path returned is that of its resized
+    'full' JPEG, so the database never points at the raw upload; the
+    ImagePipeline workers write it and the thumb/card and WebP variants off
+    the request, and the raw upload stands in until they are ready.
     
     Args:
         picture: The uploaded file (from form)
         subfolder: The subfolder to save to (e.g. profile_pics, tournament_logos)
-        additional_text: Additional text to prepend to filename (e.g. user_id)
+        additional_text: Kept for existing callers; content-addressed names no longer include it
         
     Returns:
-        The relative path to the saved file for database storage
+        The relative path to the full variant for database storage
     """
+    from app.services.image_pipeline import ImagePipeline
     try:
         if isinstance(picture, str):
             return picture
@@ -142,37 +172,11 @@ def save_picture(picture, subfolder='tournament_pics', additional_text=''):
             
         # Verify file is an image
         try:
-            Image.open(io.BytesIO(file_data))
+            image_format = Image.open(io.BytesIO(file_data)).format
         except Exception:
             raise ValueError("Uploaded file is not a valid image")
         
-        # Set max size based on image type
-        max_size = 1024  # Default max size
-        if subfolder in ['tournament_logos', 'profile_pics', 'sponsor_logos']:
-            max_size = 800  # Square images for logos/profiles
-        elif subfolder in ['tournament_banners', 'banner_pics']:
-            max_size = 1500  # Larger for banners
-        elif subfolder in ['venue_images']:
-            max_size = 1200  # Medium for venue images
-        
-        # Resize image with appropriate handling based on subfolder
-        resized_data = resize_image(file_data, max_size=max_size, subfolder=subfolder)
-        
-        # Create secure filename
-        original_filename = secure_filename(picture.filename)
-        filename = f"{additional_text}_{int(datetime.utcnow().timestamp())}_{original_filename}"
-        
-        # Create directory if it doesn't exist
-        upload_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], subfolder)
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Save file
-        file_path = os.path.join(upload_dir, filename)
-        with open(file_path, 'wb') as f:
-            f.write(resized_data)
-            
-        # Return relative path for database
-        return os.path.join('uploads', subfolder, filename)
+        return ImagePipeline.store(file_data, subfolder, image_format)
     except Exception as e:
         current_app.logger.error(f"Error saving image: {e}")
         raise ValueError(str(e))
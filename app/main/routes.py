@@ -3,7 +3,7 @@ from flask_login import current_user, login_required
 from app import db
 from app.main import bp
 from app.models import Tournament, TournamentCategory, PlayerProfile, Match, CategoryType, TournamentStatus, PlatformSponsor, Venue, Advertisement
-from app.services import BracketService, PlacingService, PrizeService, RegistrationService
+from app.services import BracketService, PlacingService, PrizeService, RegistrationService, ImagePipeline, RankingService
 from datetime import datetime
 import os
 
@@ -71,6 +71,13 @@ def index():
     return redirect(url_for('tournament.index'))
 
 
+# More specific than the app's /static/<path:filename> rule, so url_for('static', filename=...)
+# links to uploads are served here with their cache policy
+@bp.route('/static/uploads/<path:filename>')
+def uploaded_file(filename):
+    return ImagePipeline.send_upload(filename)
+
+
 @bp.route('/sponsors')
 def sponsors():
     sponsors = PlatformSponsor.query.all()
@@ -164,33 +171,32 @@ def player_detail(id):
 @bp.route('/rankings')
 def rankings():
     category = request.args.get('category', 'mens_singles')
-    
-    if category == 'mens_singles':
-        players = PlayerProfile.query.filter(PlayerProfile.mens_singles_points > 0).order_by(PlayerProfile.mens_singles_points.desc()).all()
-        title = "Men's Singles Rankings"
-    elif category == 'womens_singles':
-        players = PlayerProfile.query.filter(PlayerProfile.womens_singles_points > 0).order_by(PlayerProfile.womens_singles_points.desc()).all()
-        title = "Women's Singles Rankings"
-    elif category == 'mens_doubles':
-        players = PlayerProfile.query.filter(PlayerProfile.mens_doubles_points > 0).order_by(PlayerProfile.mens_doubles_points.desc()).all()
-        title = "Men's Doubles Rankings"
-    elif category == 'womens_doubles':
-        players = PlayerProfile.query.filter(PlayerProfile.womens_doubles_points > 0).order_by(PlayerProfile.womens_doubles_points.desc()).all()
-        title = "Women's Doubles Rankings"
-    elif category == 'mixed_doubles':
-        players = PlayerProfile.query.filter(PlayerProfile.mixed_doubles_points > 0).order_by(PlayerProfile.mixed_doubles_points.desc()).all()
-        title = "Mixed Doubles Rankings"
-    else:
+    category_type = RankingService.category_type(category)
+    if category_type is None:
         # Default to men's singles
-        players = PlayerProfile.query.filter(PlayerProfile.mens_singles_points > 0).order_by(PlayerProfile.mens_singles_points.desc()).all()
-        title = "Men's Singles Rankings"
-    
-    # Add rank to each player
-    for i, player in enumerate(players):
-        player.rank = i + 1
-    
+        category, category_type = 'mens_singles', CategoryType.MENS_SINGLES
+    title = f"{category_type.value} Rankings"
+
+    # Pages follow the ranking order by cursor; ?player=<id> opens the page starting at that player
+    after, include_after = None, False
+    player_id = request.args.get('player', type=int)
+    if player_id:
+        entry = RankingService.entry(category_type, player_id)
+        if entry:
+            after, include_after = (entry.rank, entry.player_id), True
+    else:
+        cursor = request.args.get('after', '')
+        rank, _, cursor_player_id = cursor.partition('-')
+        if rank.isdigit() and cursor_player_id.isdigit():
+            after = (int(rank), int(cursor_player_id))
+
+    rankings, next_cursor = RankingService.page(category_type, after, include_after=include_after)
+
     return render_template('main/rankings.html',
                            title=title,
-                           players=players,
+                           rankings=rankings,
+                           latest_version=RankingService.latest_version(category_type),
+                           next_after=f"{next_cursor[0]}-{next_cursor[1]}" if next_cursor else None,
+                           is_first_page=after is None,
                            current_category=category,
                            categories=current_app.config['TOURNAMENT_CATEGORIES'])
@@ -1,19 +1,24 @@
 # Import all enums
 from .enums import (
     UserRole, TournamentTier, TournamentFormat, TournamentStatus,
-    CategoryType, MatchStage, SponsorTier, PrizeType, TicketType, TicketStatus
+    CategoryType, MatchStage, SponsorTier, PrizeType, TicketType, TicketStatus, JobStatus,
+    EmailStatus
 )
 
 # Import all models and association tables
 from .user_models import User, PlayerProfile, load_user
-from .tournament_models import Tournament, TournamentCategory, partnerships
+from .tournament_models import Tournament, TournamentCategory, ParticipantSearchToken, partnerships
 from .match_models import Team, Group, GroupStanding, Match, MatchScore
-from .registration_models import Registration
+from .registration_models import Registration, RegistrationSummary
 from .venue_sponsor_models import Venue, VenueImage, PlatformSponsor, PlayerSponsor, tournament_sponsors
 from .support_models import SupportTicket, TicketResponse
 from .feedback_models import Feedback  # Import the new Feedback model
 from .prize_models import Prize
 from .misc_models import Equipment, Advertisement
+from .job_models import BracketGenerationJob, AnnouncementJob, SchedulerLock
+from .court_models import CourtState
+from .email_models import EmailOutbox
+from .ranking_models import PlayerRanking, PointsLedgerEntry
 
 # You might want to define __all__ for explicit exports, though not strictly necessary
 # __all__ = [
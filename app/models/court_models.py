@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy.types import JSON
+from app import db
+
+class CourtState(db.Model):
+    """
+    Live board entry for one court of a tournament.
+
+    Maintained by CourtBoard as matches are scheduled, started and completed,
+    so the live courts views read one row per court instead of scanning every
+    court-assigned match.
+    """
+    __tablename__ = 'court_state'
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
+    court = db.Column(db.String(50), nullable=False)
+
+    # Match now playing and when it took the court
+    current_match_id = db.Column(db.Integer, db.ForeignKey('match.id', ondelete='SET NULL'), nullable=True)
+    current_since = db.Column(db.DateTime, nullable=True)
+
+    # Pending match ids in playing order, and the estimated start of the first one
+    queue = db.Column(JSON, default=list)
+    next_eta = db.Column(db.DateTime, nullable=True)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('tournament_id', 'court', name='uq_court_state_tournament_court'),
+    )
+
+    @property
+    def next_match_id(self):
+        return self.queue[0] if self.queue else None
+
+    def to_dict(self):
+        return {
+            'court': self.court,
+            'current_match_id': self.current_match_id,
+            'current_since': self.current_since.isoformat() if self.current_since else None,
+            'next_match_id': self.next_match_id,
+            'next_eta': self.next_eta.isoformat() if self.next_eta else None,
+            'queue': list(self.queue or []),
+        }
+
+    def __repr__(self):
+        return f'<CourtState {self.tournament_id}:{self.court} current={self.current_match_id}>'
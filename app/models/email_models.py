@@ -0,0 +1,80 @@
+import base64
+from datetime import datetime
+from email.utils import formataddr
+from flask_mail import Message
+from sqlalchemy import Enum
+from sqlalchemy.types import JSON
+from app import db
+from app.models.enums import EmailStatus
+
+
+def _address(address):
+    """Store (name, address) pairs as a single header-style string"""
+    return formataddr(address) if isinstance(address, tuple) else address
+
+
+class EmailOutbox(db.Model):
+    """
+    Outgoing email, written before any delivery attempt.
+
+    EmailQueue workers deliver pending rows and record the outcome here, so
+    mail accepted by the application survives a restart and failed
+    deliveries are retried with backoff.
+    """
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False, default='')
+    sender = db.Column(db.String(255), nullable=True)
+    recipients = db.Column(JSON, default=list)
+    cc = db.Column(JSON, default=list)
+    bcc = db.Column(JSON, default=list)
+    body = db.Column(db.Text, nullable=True)
+    html = db.Column(db.Text, nullable=True)
+    # [{'filename', 'content_type', 'data' (base64)}]
+    attachments = db.Column(JSON, default=list)
+
+    status = db.Column(Enum(EmailStatus), default=EmailStatus.PENDING, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_due', 'status', 'next_attempt_at'),
+    )
+
+    @classmethod
+    def from_message(cls, message):
+        """Outbox row holding everything needed to rebuild a flask_mail Message"""
+        attachments = []
+        for attachment in message.attachments:
+            data = attachment.data.encode('utf-8') if isinstance(attachment.data, str) else attachment.data
+            attachments.append({
+                'filename': attachment.filename,
+                'content_type': attachment.content_type,
+                'data': base64.b64encode(data or b'').decode('ascii')
+            })
+        return cls(
+            subject=message.subject or '',
+            sender=_address(message.sender),
+            recipients=[_address(r) for r in message.recipients],
+            cc=[_address(r) for r in message.cc],
+            bcc=[_address(r) for r in message.bcc],
+            body=message.body,
+            html=message.html,
+            attachments=attachments
+        )
+
+    def to_message(self):
+        message = Message(self.subject, sender=self.sender, recipients=list(self.recipients or []),
+                          cc=list(self.cc or []), bcc=list(self.bcc or []), body=self.body, html=self.html)
+        for attachment in self.attachments or []:
+            message.attach(filename=attachment['filename'], content_type=attachment['content_type'],
+                           data=base64.b64decode(attachment['data']))
+        return message
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.status.value if self.status else None}>'
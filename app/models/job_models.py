@@ -0,0 +1,119 @@
+from datetime import datetime
+from sqlalchemy import Enum
+from sqlalchemy.types import JSON
+from app import db
+from app.models.enums import JobStatus
+
+class BracketGenerationJob(db.Model):
+    """
+    Progress of an organizer's "generate all brackets" run.
+
+    Stored in the database so any worker process can answer the status
+    endpoint while the run executes in the background.
+    """
+    __tablename__ = 'bracket_generation_job'
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
+    requested_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    status = db.Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+
+    # Options passed to the bracket builder
+    use_seeding = db.Column(db.Boolean, default=True)
+    third_place_match = db.Column(db.Boolean, default=True)
+
+    # Progress (categories to plan / planned so far) and outcome as lists of category ids
+    # phase is 'planning' while categories are planned, then 'writing' while every plan is saved
+    phase = db.Column(db.String(20), nullable=True)
+    total_categories = db.Column(db.Integer, default=0)
+    completed_categories = db.Column(db.Integer, default=0)
+    succeeded = db.Column(JSON, default=list)
+    failed = db.Column(JSON, default=list)
+    skipped = db.Column(JSON, default=list)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # Heartbeat: bumped by every progress commit, so a run whose process died can be told apart
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    tournament = db.relationship('Tournament')
+
+    @property
+    def is_finished(self):
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tournament_id': self.tournament_id,
+            'status': self.status.value,
+            'phase': self.phase,
+            'total_categories': self.total_categories or 0,
+            'completed_categories': self.completed_categories or 0,
+            'succeeded': self.succeeded or [],
+            'failed': self.failed or [],
+            'skipped': self.skipped or [],
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<BracketGenerationJob {self.id} tournament={self.tournament_id} {self.status.value}>'
+
+
+
+class AnnouncementJob(db.Model):
+    """
+    Progress of a tournament announcement broadcast.
+
+    Recipients are sent in user id order; last_user_id is the checkpoint
+    committed together with each chunk of queued messages, so a broadcast
+    interrupted by a crash resumes after the last queued recipient.
+    """
+    __tablename__ = 'announcement_job'
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    # Explicit user ids, or None for every approved participant of the tournament
+    recipient_ids = db.Column(JSON, nullable=True)
+    status = db.Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+
+    last_user_id = db.Column(db.Integer, default=0, nullable=False)
+    queued_count = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    # Touched with every checkpoint: a running job that stops updating was abandoned
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    tournament = db.relationship('Tournament')
+
+    @property
+    def is_finished(self):
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def __repr__(self):
+        return f'<AnnouncementJob {self.id} tournament={self.tournament_id} {self.status.value}>'
+
+
+class SchedulerLock(db.Model):
+    """
+    Lease naming the one process allowed to run scheduled jobs.
+
+    Every process keeps a paused scheduler on the shared job store; the
+    holder of an unexpired lease runs the jobs and keeps renewing it.
+    """
+    __tablename__ = 'scheduler_lock'
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(120), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchedulerLock {self.name} owner={self.owner} until={self.expires_at}>'
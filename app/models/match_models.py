@@ -1,8 +1,45 @@
 from datetime import datetime
-from sqlalchemy import Enum, Column, Integer, ForeignKey, String, Boolean, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Enum, Column, Integer, ForeignKey, String, Boolean, DateTime, event
+from sqlalchemy.orm import relationship, object_session
 from app import db
 from app.models.enums import MatchStage, CategoryType # Import necessary enums
+from app.models.tournament_models import TournamentCategory
+
+DOUBLES_CATEGORY_TYPES = frozenset({
+    CategoryType.MENS_DOUBLES, CategoryType.WOMENS_DOUBLES, CategoryType.MIXED_DOUBLES
+})
+
+# Session.info keys of the per-session lookups used by Match properties
+_CATEGORY_TYPES = 'match_category_types'
+_GROUP_NAMES = 'match_group_names'
+
+
+def _session_lookup(instance, name):
+    """
+    A dict kept in the instance's session info, or a throwaway one when detached.
+
+    Match properties resolve their category type and group name through it
+    once per category/group per session, instead of walking the category and
+    group relationships on every access (a lazy load whenever they are not
+    loaded or were expired by a commit).
+    """
+    session = object_session(instance)
+    if session is None:
+        return {}
+    lookup = session.info.get(name)
+    if lookup is None:
+        lookup = session.info[name] = {}
+    return lookup
+
+
+def _forget(name):
+    """Attribute 'set' listener dropping an object's entry from a session lookup when the value changes"""
+    def listener(target, value, oldvalue, initiator):
+        session = object_session(target)
+        if session is not None and target.id is not None:
+            session.info.get(name, {}).pop(target.id, None)
+    return listener
+
 
 class Team(db.Model):
     __tablename__ = 'team'
@@ -88,7 +125,7 @@ class Match(db.Model):
     match_order = db.Column(db.Integer)  # Order within the round/group
 
     # Scheduling info
-    court = db.Column(db.String(50), nullable=True) # Field exists and is properly named
+    court = db.Column(db.String(50), nullable=True, index=True) # Field exists and is properly named
     scheduled_time = db.Column(db.DateTime, nullable=True) # Field exists and is properly named
     livestream_url = db.Column(db.String(255), nullable=True) # Added from requirements
 
@@ -119,6 +156,9 @@ class Match(db.Model):
     player1_code = db.Column(db.String(10), nullable=True)
     player2_code = db.Column(db.String(10), nullable=True)
 
+    # Tournament feed version of the last score/participant change, for live deltas
+    score_version = db.Column(db.Integer, default=0, nullable=False, index=True)
+
     # Relationships (use strings)
     scores = db.relationship('MatchScore', backref='match', lazy='dynamic', cascade='all, delete-orphan')
     # category relationship defined in TournamentCategory model via backref
@@ -140,21 +180,44 @@ class Match(db.Model):
     team1 = db.relationship('Team', foreign_keys=[team1_id], backref=db.backref('matches_as_team1_alt', lazy='dynamic'))
     team2 = db.relationship('Team', foreign_keys=[team2_id], backref=db.backref('matches_as_team2_alt', lazy='dynamic'))
 
+    @property
+    def category_type(self):
+        """CategoryType of the match's category, resolved once per category per session"""
+        category_id = self.category_id
+        types = _session_lookup(self, _CATEGORY_TYPES)
+        if category_id in types:
+            return types[category_id]
+        # Many-to-one on the primary key: served from the identity map when the category is loaded
+        category = self.category
+        category_type = category.category_type if category is not None else None
+        if category_id is not None:
+            types[category_id] = category_type
+        return category_type
+
     @property
     def is_doubles(self):
         """Check if this is a doubles match based on category type"""
-        # Ensure category is loaded if accessed this way
-        if not self.category:
-            # Attempt to load category if not already loaded (might incur DB hit)
-            # Or handle cases where category might not be set yet
-             return False # Or raise an error, depending on expected state
-        return self.category.is_doubles()
+        # Matches without a category (not set yet) count as singles
+        return self.category_type in DOUBLES_CATEGORY_TYPES
+
+    @property
+    def group_name(self):
+        """Name of the match's group, resolved once per group per session ('' outside groups)"""
+        group_id = self.group_id
+        names = _session_lookup(self, _GROUP_NAMES)
+        if group_id in names:
+            return names[group_id]
+        group = self.group
+        name = group.name if group is not None else ''
+        if group_id is not None:
+            names[group_id] = name
+        return name
 
     @property
     def round_name(self):
         """Get human-readable round name based on round number"""
         if self.stage == MatchStage.GROUP:
-            group_name = self.group.name if self.group else ''
+            group_name = self.group_name
             # Include round number for group stage if available
             if self.round:
                 return f"Group {group_name} Round {self.round}"
@@ -215,6 +278,11 @@ class Match(db.Model):
         return f'<Match {self.id} - Category {self.category_id} - Round {self.round}>'
 
 
+# Keep the session lookups in step with edits to a category's type or a group's name
+event.listen(TournamentCategory.category_type, 'set', _forget(_CATEGORY_TYPES))
+event.listen(Group.name, 'set', _forget(_GROUP_NAMES))
+
+
 class MatchScore(db.Model):
     __tablename__ = 'match_score'
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,81 @@
+from datetime import datetime
+from sqlalchemy import Enum
+from app import db
+from app.models.enums import CategoryType
+
+
+class PlayerRanking(db.Model):
+    """
+    A player's place in the ranking of one category type.
+
+    Maintained by RankingService as points are awarded, so /rankings pages
+    through (rank, player_id) ranges and a player's rank is one indexed
+    lookup instead of sorting every profile per request. Ranks are
+    competition ranks: tied players share a rank and the next one skips
+    (1, 2, 2, 4). Each call that moves players is a ranking event with a
+    new version; previous_rank is where the player stood before the event
+    that last moved them.
+    """
+    __tablename__ = 'player_ranking'
+    id = db.Column(db.Integer, primary_key=True)
+    category_type = db.Column(Enum(CategoryType), nullable=False)
+    player_id = db.Column(db.Integer, db.ForeignKey('player_profile.id'), nullable=False)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    rank = db.Column(db.Integer, nullable=False)
+    previous_rank = db.Column(db.Integer, nullable=True)  # None for players new to the ranking
+    version = db.Column(db.Integer, nullable=False, default=0)  # ranking event that last moved the player
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    player = db.relationship('PlayerProfile')
+
+    __table_args__ = (
+        db.UniqueConstraint('category_type', 'player_id', name='uq_player_ranking_player'),
+        db.Index('ix_player_ranking_order', 'category_type', 'rank', 'player_id'),
+        db.Index('ix_player_ranking_points', 'category_type', 'points'),
+        db.Index('ix_player_ranking_version', 'category_type', 'version'),
+    )
+
+    def movement(self, latest_version):
+        """Places gained (negative: lost) in the latest ranking event, or None for a new entry"""
+        if self.version != latest_version:
+            return 0
+        if self.previous_rank is None:
+            return None
+        return self.previous_rank - self.rank
+
+    def __repr__(self):
+        return f'<PlayerRanking {self.category_type.name} #{self.rank} player {self.player_id}>'
+
+
+class PointsLedgerEntry(db.Model):
+    """
+    Points one player earned for one placing in one category.
+
+    Written in bulk when a category's points are awarded, so player totals,
+    season re-scoring and tier what-ifs are grouped queries over this table
+    instead of walks over every category's matches. share is the percentage
+    of the category's base points the place earned; points is the share of
+    base_points as awarded.
+    """
+    __tablename__ = 'points_ledger'
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('player_profile.id'), nullable=False)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id', ondelete='CASCADE'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('tournament_category.id', ondelete='CASCADE'), nullable=False)
+    category_type = db.Column(Enum(CategoryType), nullable=False)
+    place = db.Column(db.Integer, nullable=False)
+    share = db.Column(db.Float, nullable=False, default=0.0)
+    base_points = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    awarded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    player = db.relationship('PlayerProfile')
+
+    __table_args__ = (
+        db.UniqueConstraint('category_id', 'player_id', name='uq_points_ledger_player'),
+        db.Index('ix_points_ledger_player', 'category_type', 'player_id'),
+        db.Index('ix_points_ledger_tournament', 'tournament_id'),
+    )
+
+    def __repr__(self):
+        return f'<PointsLedgerEntry category {self.category_id} player {self.player_id} place {self.place}: {self.points}>'
@@ -208,103 +208,10 @@ class Registration(db.Model):
 
     def create_user_accounts(self):
         """Create user accounts for players if they don't exist."""
-        # Import models locally to avoid circular imports at module level
-        from app.models.user_models import User, PlayerProfile
-        from app.helpers.registration import generate_temp_password
-
-        user1 = None
-        profile1 = None
-        if self.player1_email and not self.player_id:
-            user1 = User.query.filter_by(email=self.player1_email).first()
-            if not user1:
-                self.player1_temp_password = generate_temp_password()
-                user1 = User(
-                    username=self.player1_email.split('@')[0] + str(db.session.query(User).count() + 1), # Basic unique username
-                    email=self.player1_email,
-                    full_name=self.player1_name,
-                    phone=self.player1_phone,
-                    role='PLAYER', # Use string or UserRole enum if imported
-                    ic_number=self.player1_ic_number
-                )
-                user1.set_password(self.player1_temp_password)
-                db.session.add(user1)
-                self.player1_account_created = True
-                db.session.flush() # Get user1.id
-
-                profile1 = PlayerProfile(
-                    user_id=user1.id,
-                    full_name=self.player1_name,
-                    country=self.player1_nationality,
-                    age=calculate_age(self.player1_date_of_birth) if self.player1_date_of_birth else None,
-                    dupr_id=self.player1_dupr_id,
-                    date_of_birth=self.player1_date_of_birth,
-                )
-                db.session.add(profile1)
-                db.session.flush() # Get profile1.id
-                self.player_id = profile1.id
-            elif user1.player_profile:
-                 self.player_id = user1.player_profile.id
-            # Handle case where user exists but profile doesn't (less likely but possible)
-            elif not user1.player_profile:
-                 # Create profile with available data from registration
-                 profile1 = PlayerProfile(
-                     user_id=user1.id,
-                     full_name=self.player1_name,
-                     country=self.player1_nationality,
-                     age=calculate_age(self.player1_date_of_birth) if self.player1_date_of_birth else None,
-                     dupr_id=self.player1_dupr_id,
-                     date_of_birth=self.player1_date_of_birth
-                 )
-                 db.session.add(profile1)
-                 db.session.flush() # Get profile1.id
-                 self.player_id = profile1.id
-
-
-        user2 = None
-        profile2 = None
-        if self.is_team_registration and self.player2_email and not self.partner_id:
-            user2 = User.query.filter_by(email=self.player2_email).first()
-            if not user2:
-                self.player2_temp_password = generate_temp_password()
-                user2 = User(
-                    username=self.player2_email.split('@')[0] + str(db.session.query(User).count() + 1), # Basic unique username
-                    email=self.player2_email,
-                    full_name=self.player2_name,
-                    phone=self.player2_phone,
-                    role='PLAYER', # Use string or UserRole enum if imported
-                    ic_number=self.player2_ic_number
-                )
-                user2.set_password(self.player2_temp_password)
-                db.session.add(user2)
-                self.player2_account_created = True
-                db.session.flush() # Get user2.id
-
-                profile2 = PlayerProfile(
-                    user_id=user2.id,
-                    full_name=self.player2_name,
-                    country=self.player2_nationality,
-                    age=calculate_age(self.player2_date_of_birth) if self.player2_date_of_birth else None,
-                    dupr_id=self.player2_dupr_id,
-                    date_of_birth=self.player2_date_of_birth,
-                )
-                db.session.add(profile2)
-                db.session.flush() # Get profile2.id
-                self.partner_id = profile2.id
-            elif user2.player_profile:
-                self.partner_id = user2.player_profile.id
-            elif not user2.player_profile:
-                 # Create profile with available data from registration
-                 profile2 = PlayerProfile(
-                     user_id=user2.id,
-                     full_name=self.player2_name,
-                     country=self.player2_nationality,
-                     age=calculate_age(self.player2_date_of_birth) if self.player2_date_of_birth else None,
-                     dupr_id=self.player2_dupr_id,
-                     date_of_birth=self.player2_date_of_birth
-                 )
-                 db.session.add(profile2)
-                 db.session.flush() # Get profile2.id
-                 self.partner_id = profile2.id
+        # Import locally to avoid circular imports at module level
+        from app.services.account_provisioning import AccountProvisioning
+
+        AccountProvisioning.for_registration(self)
 
         # Commit changes if any accounts/profiles were created
         if self.player1_account_created or self.player2_account_created:
@@ -320,12 +227,26 @@ class Registration(db.Model):
     def send_confirmation_emails(self):
         """Send confirmation emails to players, including temp passwords if accounts were created."""
         # Import locally
-        from app.helpers.email_utils import send_email
+        from app.services.email_queue import EmailQueue
+
+        messages = self.confirmation_messages()
+        try:
+            EmailQueue.enqueue(*messages)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to queue confirmation emails for registration {self.id}: {e}")
+
+    def confirmation_messages(self):
+        """Confirmation emails for the players (flask_mail Messages), including temp passwords if accounts were created."""
+        # Import locally
+        from app.helpers.email_utils import build_email
 
+        messages = []
         # Ensure category and tournament are loaded
         if not self.category or not self.tournament:
              current_app.logger.error(f"Cannot send confirmation for registration {self.id}: Missing category or tournament info.")
-             return
+             return messages
 
         subject = f"Registration Confirmation - {self.tournament.name}"
         login_url = url_for('auth.login', _external=True) # Assuming url_for is available or imported
@@ -366,10 +287,7 @@ class Registration(db.Model):
 
             # Use a proper HTML email template structure
             full_html_p1 = f"<html><body>{html_body_p1}<p>Regards,<br>SportsSync Team</p></body></html>" # Basic structure
-            try:
-                send_email(subject, [player1_email_to_send], full_html_p1)
-            except Exception as e:
-                 current_app.logger.error(f"Failed to send confirmation email to {player1_email_to_send}: {e}")
+            messages.append(build_email(subject, [player1_email_to_send], full_html_p1))
 
 
         # --- Email for Player 2 (if applicable) ---
@@ -406,14 +324,33 @@ class Registration(db.Model):
                      """
 
                 full_html_p2 = f"<html><body>{html_body_p2}<p>Regards,<br>SportsSync Team</p></body></html>" # Basic structure
-                try:
-                    send_email(subject, [player2_email_to_send], full_html_p2)
-                except Exception as e:
-                     current_app.logger.error(f"Failed to send confirmation email to {player2_email_to_send}: {e}")
+                messages.append(build_email(subject, [player2_email_to_send], full_html_p2))
+
+        return messages
 
 
     def __repr__(self):
         return f'<Registration {self.id} - Category {self.category_id} - Team {self.team_name}>'
 
+
+class RegistrationSummary(db.Model):
+    """
+    Registration and payment totals of one tournament.
+
+    A materialized copy of DashboardMetrics.aggregate, to which every flush
+    of the tournament's registrations adds the difference it makes, so the
+    organizer dashboard reads one row per tournament.
+    """
+    __tablename__ = 'registration_summary'
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id', ondelete='CASCADE'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    pending = db.Column(db.Integer, nullable=False, default=0)     # proof uploaded, not verified
+    approved = db.Column(db.Integer, nullable=False, default=0)    # payment verified
+    revenue = db.Column(db.Float, nullable=False, default=0.0)     # fees of verified paid registrations
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RegistrationSummary tournament {self.tournament_id}: {self.total}>'
+
 # Need to import url_for for email links
 from flask import url_for
\ No newline at end of file
@@ -53,6 +53,13 @@ class Tournament(db.Model):
     door_gifts = db.Column(db.Text, nullable=True)
     door_gifts_image = db.Column(db.String(255), nullable=True)
 
+    # Set once the schedule search index is complete: on creation, as it is maintained on flush from
+    # then on, or by the rebuild-search-index command for tournaments created before the index
+    search_indexed_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
+
+    # Last version handed out by the live score feed (see Match.score_version)
+    score_version = db.Column(db.Integer, default=0, nullable=False)
+
     # Relationships (use strings)
     categories = db.relationship('TournamentCategory', backref='tournament', lazy='dynamic', cascade='all, delete-orphan')
     support_tickets = db.relationship('SupportTicket', backref='tournament', lazy='dynamic')
@@ -80,8 +87,8 @@ class Tournament(db.Model):
     @property
     def winners_by_category(self):
         """Return a dictionary of winners for each category in this tournament."""
-        # This requires Match model, consider moving to a service layer or keeping but ensuring Match is imported
-        from app.models.match_models import Match # Local import to avoid circular dependency at module level
+        # Placings are cached per category by PlacingService; local import to avoid a circular dependency
+        from app.services.placing_service import PlacingService
 
         if self.status != TournamentStatus.COMPLETED:
             return {}
@@ -90,42 +97,15 @@ class Tournament(db.Model):
         for category in self.categories:
             category_results = {}
 
-            # Find the final match (round 1) for this category
-            final_match = Match.query.filter_by(
-                category_id=category.id,
-                round=1
-            ).first()
-
-            if final_match:
-                is_doubles = category.category_type in [
-                    CategoryType.MENS_DOUBLES,
-                    CategoryType.WOMENS_DOUBLES,
-                    CategoryType.MIXED_DOUBLES
-                ]
-
-                # Get winners (1st place)
-                if is_doubles:
-                    if final_match.winner:
-                        category_results[1] = [
-                            final_match.winner.player1,
-                            final_match.winner.player2
-                        ]
-                else:
-                    if final_match.winner:
-                        category_results[1] = final_match.winner
-
-                # Get runners-up (2nd place)
-                if is_doubles:
-                    if final_match.loser:
-                        category_results[2] = [
-                            final_match.loser.player1,
-                            final_match.loser.player2
-                        ]
+            # Champion and runner-up: a player, or a team's two players
+            for placing in PlacingService.get_placings(category.id):
+                participant = placing['participant']
+                if placing['place'] not in (1, 2) or participant is None:
+                    continue
+                if placing['is_team']:
+                    category_results[placing['place']] = [participant.player1, participant.player2]
                 else:
-                    if final_match.loser:
-                        category_results[2] = final_match.loser
-
-                # TODO: Handle semifinalists (3rd/4th place) - requires querying previous rounds or playoff matches
+                    category_results[placing['place']] = participant
 
             # Only add categories that have winners
             if category_results:
@@ -179,9 +159,14 @@ class TournamentCategory(db.Model):
     teams_per_group = db.Column(db.Integer, default=0)  # Teams per group
     teams_advancing_per_group = db.Column(db.Integer, default=0)  # Teams advancing to knockout
 
+    # Group tiebreak criteria applied after matches won, as a JSON list
+    # e.g. ["h2h_wins", "h2h_point_diff", "point_diff"]; None uses TiebreakEngine.DEFAULT_ORDER
+    tiebreak_order = db.Column(JSON, nullable=True)
+
     # Custom point distribution as JSON
     # Structure: {"1": 100, "2": 70, "3-4": 50, "5-8": 25, etc.} (Percentages of points_awarded)
     points_distribution = db.Column(JSON, default={})
+    points_awarded_at = db.Column(db.DateTime, nullable=True)  # When placing points were posted to the rankings
 
     # Custom prize distribution as JSON
     # Structure: {"1": 50, "2": 25, "3-4": 12.5, "5-8": 6.25, etc.} (Percentages of prize_money)
@@ -346,4 +331,26 @@ class TournamentCategory(db.Model):
         return result
 
     def __repr__(self):
-        return f'<TournamentCategory {self.name} ({self.category_type.value})>'
\ No newline at end of file
+        return f'<TournamentCategory {self.name} ({self.category_type.value})>'
+
+
+class ParticipantSearchToken(db.Model):
+    """
+    One normalized word of a participant's name, per tournament.
+
+    Backs the schedule player search: name lookups become indexed prefix
+    matches on (tournament_id, token) instead of scanning every match.
+    """
+    __tablename__ = 'participant_search_token'
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
+    player_id = db.Column(db.Integer, db.ForeignKey('player_profile.id'), nullable=False)
+    token = db.Column(db.String(100), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_participant_search_token_lookup', 'tournament_id', 'token'),
+        db.Index('ix_participant_search_token_player', 'player_id', 'tournament_id'),
+    )
+
+    def __repr__(self):
+        return f'<ParticipantSearchToken {self.tournament_id}:{self.token}>'
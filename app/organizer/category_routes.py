@@ -7,6 +7,7 @@ from app.organizer import bp # Import the blueprint
 from app.models import (Tournament, TournamentCategory, Registration, Match, Group,
                        CategoryType, TournamentFormat, TournamentStatus)
 from app.decorators import organizer_required, referee_or_organizer_required
+from app.services import BracketService, TiebreakEngine
 # Import helpers if needed for bracket generation logic called from here
 from app.helpers.tournament import (
     _generate_group_stage,
@@ -294,6 +295,24 @@ def manage_category(id, category_id):
                  flash(f'Error updating points distribution: {e}', 'danger')
                  db.session.rollback()
 
+        # --- Update Group Tiebreak Order ---
+        elif action == 'update_tiebreak_order':
+            try:
+                criteria = [c.strip() for c in request.form.get('tiebreak_order', '').split(',') if c.strip()]
+                TiebreakEngine.normalize_order(criteria)
+                category.tiebreak_order = criteria or None
+                db.session.commit()
+                # Re-rank the existing groups under the new order
+                for group in Group.query.filter_by(category_id=category.id).all():
+                    BracketService.update_group_standings(group.id)
+                flash('Tiebreak order updated successfully.', 'success')
+            except ValueError as e:
+                 flash(f'Invalid tiebreak order: {e}', 'danger')
+                 db.session.rollback()
+            except Exception as e:
+                 flash(f'Error updating tiebreak order: {e}', 'danger')
+                 db.session.rollback()
+
         # --- Generate Bracket ---
         elif action == 'generate_bracket':
             category.group_count = int(request.form.get('group_count', category.group_count or 4))
@@ -351,4 +370,6 @@ def manage_category(id, category_id):
                           prize_dist_data=prize_dist_data,
                           points_dist_data=points_dist_data,
                           default_placements=default_placements,
+                          tiebreak_criteria=TiebreakEngine.HEAD_TO_HEAD_CRITERIA + tuple(TiebreakEngine.STANDING_CRITERIA),
+                          tiebreak_default=TiebreakEngine.DEFAULT_ORDER,
                           is_referee_only=is_referee_only)
\ No newline at end of file
@@ -106,6 +106,15 @@ class TournamentForm(FlaskForm):
             (venue.id, venue.name) for venue in venues
         ]
 
+class RegistrationImportForm(FlaskForm):
+    """Upload a sheet of registrations (one row per registration)"""
+    sheet = FileField('Registrations Sheet', validators=[
+        DataRequired(message='Please choose a CSV or XLSX file.'),
+        FileAllowed(['csv', 'xlsx'], 'CSV or XLSX files only!')
+    ])
+    dry_run = BooleanField('Only check the sheet (import nothing)', default=False)
+    submit = SubmitField('Import Registrations')
+
 class SeedingForm(FlaskForm):
     player_id = IntegerField('Player ID', validators=[DataRequired()])
     seed = IntegerField('Seed', validators=[NumberRange(min=1)])
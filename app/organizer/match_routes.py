@@ -6,10 +6,10 @@ from flask_socketio import emit
 from app import db, socketio
 from app.organizer import bp # Import the blueprint
 # Import necessary models using the new structure
-from app.models import Tournament, TournamentCategory, Match, MatchScore, TournamentStatus, TournamentFormat, Registration, UserRole
+from app.models import Tournament, TournamentCategory, Match, MatchScore, TournamentStatus, TournamentFormat, Registration, UserRole, JobStatus
 from app.decorators import organizer_required, referee_required, referee_or_organizer_required
 # Import services or helpers needed for bracket generation, placing, etc.
-from app.services import BracketService, PlacingService
+from app.services import BracketService, PlacingService, BracketCache, BracketGenerationService, LiveScoreFeed, CourtBoard
 from app.helpers.tournament import (
     _generate_group_stage,
     _generate_knockout_from_groups,
@@ -69,6 +69,9 @@ def update_match(id, match_id):
 
     if form.validate_on_submit():
         try:
+            # Court the match was on, so the court board can move it off that court
+            previous_court = match.court
+
             # --- Update Scheduling Info ---
             # Referees can't update scheduling info
             if not is_referee_only:
@@ -106,6 +109,12 @@ def update_match(id, match_id):
             player1_sets_won = 0
             player2_sets_won = 0
 
+            # Remember what this match contributed to group standings before it changes
+            previous_contribution = {}
+            if match.group_id:
+                previous_contribution = BracketService.get_match_contribution(match)
+            previous_result = _match_result(match)
+
             # Clear existing scores for this match before adding new ones
             MatchScore.query.filter_by(match_id=match_id).delete()
 
@@ -186,7 +195,9 @@ def update_match(id, match_id):
                 match.player_verified = form.player_verified.data
 
             # --- Commit Changes ---
+            LiveScoreFeed.touch(match)
             db.session.commit()
+            BracketCache.invalidate(match.category_id)
 
             # --- Post-Commit Actions ---
             # Emit socket.io event with match update
@@ -206,24 +217,30 @@ def update_match(id, match_id):
                 'set_number': len(new_scores)
             }, room=f'match_{match.id}')
             
-            # Emit court update for live courts view
-            if match.court:
-                socketio.emit('court_update', {
-                    'court': match.court,
-                    'match_id': match.id,
-                    'tournament_id': match.category.tournament_id,
-                    'status': 'completed' if match.completed else 'in_progress'
-                }, room=f'courts_view_{match.category.tournament_id}')
-
-            # If winner determined, update standings/brackets
-            if winner_determined:
-                # If this is a group match, update group standings
-                if match.group_id:
+            # Update the court board and emit court updates for the live courts view
+            CourtBoard.publish(tournament.id, [previous_court, match.court], match=match)
+
+            # Push the new scores to live score subscribers
+            LiveScoreFeed.broadcast(match)
+
+            # If this is a group match, apply the result change to the group standings
+            if match.group_id and (previous_contribution or match.completed):
+                if current_app.config.get('GROUP_STANDINGS_INCREMENTAL', True):
+                    BracketService.apply_match_to_standings(match, previous_contribution)
+                else:
                     BracketService.update_group_standings(match.group_id)
 
-                # If knockout, advance winner to next match
-                elif match.next_match_id:
-                    BracketService.advance_winner(match)
+            # If winner determined in a knockout match, advance winner to next match
+            elif winner_determined and match.next_match_id:
+                BracketService.advance_winner(match)
+
+            # The category's last knockout result posts its placing points to the rankings; a knockout
+            # result changed after that takes them back and posts the corrected placings
+            if not match.group_id:
+                if match.category.points_awarded_at and _match_result(match) != previous_result:
+                    PlacingService.repost_points(match.category_id)
+                elif winner_determined and not match.next_match_id:
+                    PlacingService.award_points(match.category_id)
             
             flash('Match updated successfully.', 'success')
             return redirect(url_for('organizer.update_match', id=tournament.id, match_id=match.id))
@@ -245,6 +262,12 @@ def update_match(id, match_id):
                           is_referee_only=is_referee_only)  # Pass permission flag to template
 
 
+def _match_result(match):
+    """Completion and winner/loser columns of a match, to tell whether an edit changed its result"""
+    return (match.completed, match.winning_player_id, match.winning_team_id,
+            match.losing_player_id, match.losing_team_id)
+
+
 # --- Bracket & Placing Routes ---
 
 @bp.route('/tournament/<int:id>/generate_all_brackets', methods=['POST'])
@@ -263,53 +286,50 @@ def generate_all_brackets(id):
          flash('Brackets can only be generated for upcoming tournaments.', 'warning')
          return redirect(url_for('organizer.tournament_detail', id=id))
 
-    success_count = 0
-    fail_count = 0
-    skipped_count = 0
-    try:
-        for category in tournament.categories:
-            # Check if brackets already exist for this category
-            if Match.query.filter_by(category_id=category.id).count() > 0:
-                 current_app.logger.info(f"Skipping bracket generation for category {category.id} - matches already exist.")
-                 skipped_count += 1
-                 continue
-
-            category_format = category.format or tournament.format # Use category format override if available
-            success = False
-            use_seeding = True  # Default to use seeding
-            third_place_match = True  # Default to include 3rd place match
-            
-            if category_format == TournamentFormat.GROUP_KNOCKOUT:
-                # Requires group stage generation first
-                success = _generate_group_stage(category)
-                if success:
-                     current_app.logger.info(f"Generated group stage for category {category.id}")
-                else:
-                     current_app.logger.error(f"Failed to generate group stage for category {category.id}")
+    use_seeding = True  # Default to use seeding
+    third_place_match = True  # Default to include 3rd place match
 
-            elif category_format == TournamentFormat.SINGLE_ELIMINATION:
-                success = _generate_single_elimination(category, use_seeding, third_place_match)
-                
-            # Add support for other formats as needed
-            else:
-                 current_app.logger.warning(f"Bracket generation not implemented for format {category_format.value} in category {category.id}")
+    # Categories are planned from one registration snapshot and written in one transaction,
+    # in the background unless BRACKET_GENERATION_ASYNC is disabled
+    job = BracketGenerationService.start(tournament, use_seeding, third_place_match, requested_by=current_user)
+    status_url = url_for('organizer.bracket_generation_status', id=id, job_id=job.id)
 
-            if success:
-                success_count += 1
-            else:
-                fail_count += 1
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        return jsonify(dict(job.to_dict(), status_url=status_url)), 202
 
-        # Commit all generated matches (if helpers don't commit individually)
-        db.session.commit()
+    if job.status == JobStatus.FAILED:
+        flash(f'An error occurred during bracket generation: {job.error}', 'danger')
+    elif job.status == JobStatus.COMPLETED:
+        for category_id in job.skipped:
+            current_app.logger.info(f"Skipping bracket generation for category {category_id} - matches already exist.")
+        for category_id in job.failed:
+            current_app.logger.error(f"Failed to generate bracket for category {category_id}")
+
+        success_count = len(job.succeeded)
+        fail_count = len(job.failed)
+        skipped_count = len(job.skipped)
         flash_message = f"Bracket generation attempted: {success_count} succeeded, {fail_count} failed, {skipped_count} skipped (already exist)."
         flash(flash_message, 'success' if fail_count == 0 else 'warning')
-
-    except Exception as e:
-        db.session.rollback()
-        flash(f'An error occurred during bracket generation: {e}', 'danger')
+    else:
+        flash('Bracket generation started. Brackets will appear as soon as every category has been generated.', 'info')
 
     return redirect(url_for('organizer.tournament_detail', id=id))
 
+@bp.route('/tournament/<int:id>/bracket_generation/<int:job_id>', methods=['GET'])
+@login_required
+@organizer_required
+def bracket_generation_status(id, job_id):
+    """Progress of a generate_all_brackets run as JSON"""
+    tournament = Tournament.query.get_or_404(id)
+
+    if not current_user.is_admin() and tournament.organizer_id != current_user.id:
+        return jsonify({'error': 'Permission denied'}), 403
+
+    status = BracketGenerationService.get_status(job_id, tournament_id=tournament.id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status)
+
 @bp.route('/tournament/<int:id>/category/<int:category_id>/update_seeds', methods=['POST'])
 @login_required
 @organizer_required
@@ -508,6 +528,7 @@ def confirm_bulk_edit(id, category_id):
     try:
         matches_updated = 0
         schedule_changed_matches = []
+        changed_courts = set()
         
         # Format datetime from stored date and time
         scheduled_datetime = None
@@ -522,6 +543,7 @@ def confirm_bulk_edit(id, category_id):
             if match and match.category_id == category_id:
                 old_court = match.court
                 old_time = match.scheduled_time
+                changed_courts.update([old_court, match.court])
                 
                 # Update court if provided
                 if data.get('court'):
@@ -548,6 +570,11 @@ def confirm_bulk_edit(id, category_id):
         # Commit changes
         db.session.commit()
         
+        # Move rescheduled matches on the live court board
+        if matches_updated:
+            BracketCache.invalidate(category_id)
+            CourtBoard.publish(tournament.id, changed_courts | {data.get('court')})
+        
         # Send notifications for schedule changes
         if schedule_changed_matches:
             from app.tasks.email_tasks import send_schedule_change_email
@@ -7,6 +7,8 @@ from app import db, socketio
 from app.organizer import bp # Import the blueprint
 from app.models import (Tournament, TournamentCategory, Registration, User) # Use new import path
 from app.decorators import organizer_required
+from app.organizer.forms import RegistrationImportForm
+from app.services.registration_import import RegistrationImport
 
 @bp.route('/registrations')
 @login_required
@@ -90,6 +92,42 @@ def view_registrations():
                           all_tournaments=tournaments,
                           categories=categories) # Pass all accessible tournaments and categories for the filter dropdowns
 
+@bp.route('/tournament/<int:id>/registrations/import', methods=['GET', 'POST'])
+@login_required
+@organizer_required
+def import_registrations(id):
+    tournament = Tournament.query.get_or_404(id)
+
+    # Ensure the tournament belongs to this organizer or user is admin
+    if not current_user.is_admin() and tournament.organizer_id != current_user.id:
+        flash('You do not have permission to import registrations for this tournament.', 'danger')
+        return redirect(url_for('organizer.view_registrations'))
+
+    form = RegistrationImportForm()
+    result = None
+    if form.validate_on_submit():
+        sheet = form.sheet.data
+        try:
+            result = RegistrationImport.run(tournament, sheet.stream, sheet.filename,
+                                            imported_by=current_user, dry_run=form.dry_run.data)
+        except ValueError as e:
+            flash(f'Could not read the sheet: {e}', 'danger')
+        else:
+            if result['errors']:
+                flash(f"{len(result['errors'])} problem(s) found; nothing was imported.", 'danger')
+            elif form.dry_run.data:
+                flash(f"{result['rows']} registration(s) checked, ready to import.", 'info')
+            else:
+                flash(f"{result['imported']} registration(s) imported.", 'success')
+                return redirect(url_for('organizer.view_registrations', tournament=tournament.id, status='approved'))
+
+    return render_template('organizer/import_registrations.html',
+                          title='Import Registrations',
+                          tournament=tournament,
+                          categories=tournament.categories.all(),
+                          form=form,
+                          result=result)
+
 @bp.route('/registration/<int:id>')
 @login_required
 @organizer_required
@@ -9,6 +9,7 @@ from app.models import (Tournament, TournamentCategory, Registration, Tournament
                        TournamentTier, TournamentFormat) # Use new import path
 from app.decorators import organizer_required, referee_or_organizer_required
 from app.helpers.registration import save_picture # Assuming this helper handles image saving
+from app.services import BracketCache, DashboardMetrics
 
 # --- Dashboard Routes ---
 
@@ -32,45 +33,30 @@ def dashboard():
     ongoing_tournaments = []
     completed_tournaments = []
 
-    # Get registration and payment data aggregates
+    # Get registration and payment data aggregates, for every tournament at once
     total_registrations = 0
     pending_payments = 0
     approved_payments = 0
     total_revenue = 0.0 # Use float for currency
+    metrics = DashboardMetrics.for_tournaments(tournaments)
 
     for tournament in tournaments:
-        # Get category IDs for this tournament efficiently
-        category_ids = [c.id for c in tournament.categories] # Assumes categories relationship is efficient enough or use query
-
-        # Get registration counts efficiently
-        regs_query = Registration.query.filter(Registration.category_id.in_(category_ids))
-
-        total_regs_count = regs_query.count()
-        pending_count = regs_query.filter(Registration.payment_status == 'uploaded', Registration.payment_verified == False).count()
-        approved_count = regs_query.filter(Registration.payment_verified == True).count()
-        # free_count = regs_query.filter(Registration.payment_status == 'free').count() # If needed
-
-        registration_counts = {
-            'total': total_regs_count,
-            'pending': pending_count,
-            'approved': approved_count,
-            # 'free': free_count
-        }
-        tournament.registration_counts = registration_counts # Attach counts to object for template
-
-        # Calculate revenue for completed tournaments
-        revenue = 0.0
+        tournament_metrics = metrics[tournament.id]
+        tournament.registration_counts = {
+            'total': tournament_metrics['total'],
+            'pending': tournament_metrics['pending'],
+            'approved': tournament_metrics['approved'],
+        } # Attach counts to object for template
+
+        # Revenue (fees of paid and verified registrations) for completed tournaments
         if tournament.status == TournamentStatus.COMPLETED:
-             # Sum registration fees for paid/verified registrations
-             paid_regs = regs_query.filter(Registration.payment_status == 'paid', Registration.payment_verified == True).all()
-             revenue = sum(reg.registration_fee or 0.0 for reg in paid_regs) # Handle potential None fee
-             tournament.revenue = revenue
-             total_revenue += revenue
+             tournament.revenue = tournament_metrics['revenue']
+             total_revenue += tournament.revenue
 
         # Update overall stats
-        total_registrations += total_regs_count
-        pending_payments += pending_count
-        approved_payments += approved_count
+        total_registrations += tournament_metrics['total']
+        pending_payments += tournament_metrics['pending']
+        approved_payments += tournament_metrics['approved']
 
         # Split tournaments by status
         if tournament.status == TournamentStatus.UPCOMING:
@@ -292,6 +278,8 @@ def edit_tournament(id):
 
         try:
             db.session.commit()
+            # Status and format both change the public bracket payload
+            BracketCache.invalidate_tournament(tournament)
             flash('Tournament details updated successfully!', 'success')
             # Redirect back to the detail/management page, or maybe category edit?
             return redirect(url_for('organizer.edit_tournament', id=id))
@@ -4,7 +4,7 @@ from flask_wtf.file import FileField, FileAllowed, FileRequired
 from wtforms import StringField, TextAreaField, IntegerField, SelectField, SubmitField, HiddenField, EmailField, PasswordField, BooleanField, DecimalField, TelField, DateField
 from wtforms.validators import DataRequired, Email, Length, NumberRange, Optional, URL, EqualTo, Regexp, ValidationError
 from datetime import datetime, date
-from app.models import Tournament, TournamentCategory, Registration, PlayerProfile, User, UserRole
+from app.models import Tournament, TournamentCategory, PlayerProfile, User, UserRole
 import re
 
 def validate_file_size(max_size_mb=5):
@@ -192,24 +192,6 @@ class RegistrationForm(FlaskForm):
                            
             raise ValidationError('This IC/Passport number is already registered in the system. Please log in to your account.')
 
-    def validate_category_id(self, field):
-        """Validate the selected category exists in this tournament"""
-        category = TournamentCategory.query.filter_by(
-            id=field.data, tournament_id=self.tournament.id
-        ).first()
-        
-        if not category:
-            raise ValidationError('Invalid category selection')
-        
-        # Check if category is full
-        if category.max_participants:
-            current_registrations = Registration.query.filter_by(
-                category_id=category.id, payment_status='paid'
-            ).count()
-            
-            if current_registrations >= category.max_participants:
-                raise ValidationError('This category is already full')
-    
     def validate_player1_date_of_birth(self, field):
         """Validate player 1 date of birth"""
         if field.data > date.today():
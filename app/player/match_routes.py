@@ -7,6 +7,7 @@ from app import db, socketio
 from app.player import bp  # Import the blueprint
 from app.models import Match, Tournament, TournamentCategory, PlayerProfile, Team
 from app.helpers.tournament import _format_match_for_api
+from app.services import BracketCache, LiveScoreFeed, CourtBoard
 
 @bp.route('/match/<int:match_id>/verify', methods=['POST'])
 @login_required
@@ -69,7 +70,11 @@ def verify_match(match_id):
         # Update match verification status
         match.player_verified = True
         match.completed = True
+        LiveScoreFeed.touch(match)
         db.session.commit()
+        BracketCache.invalidate(match.category_id)
+        LiveScoreFeed.broadcast(match)
+        CourtBoard.publish(match.category.tournament_id, [match.court], match=match)
         
         # Emit socket.io event for real-time updates
         socketio.emit('match_updated', {
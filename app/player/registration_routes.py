@@ -10,6 +10,7 @@ from app.models import (Tournament, TournamentCategory, Registration, PlayerProf
 from app.player.forms import PaymentForm, RegistrationForm # Import relevant forms
 # Import helpers
 from app.helpers.registration import generate_payment_reference, save_payment_proof
+from app.services import RegistrationService
 
 # --- Tournament Registration ---
 
@@ -71,19 +72,11 @@ def register_tournament(tournament_id):
     # Sort categories by display_order for the form
     categories = tournament.categories.order_by(TournamentCategory.display_order).all()
 
-    # Get counts of *approved* registrations for capacity checks
+    # Places taken by registrations that are not rejected, for capacity display, in one query
+    places_taken = RegistrationService.places_taken(categories)
     category_counts = {}
     for category in categories:
-        approved_regs = Registration.query.filter(
-            Registration.category_id == category.id,
-            Registration.payment_verified == True # Count only verified/paid
-        ).count()
-
-        if category.is_doubles():
-            current_participants = approved_regs * 2
-        else:
-            current_participants = approved_regs
-
+        current_participants = places_taken[category.id]
         category_counts[category.id] = {
             'current': current_participants,
             'max': category.max_participants,
@@ -111,19 +104,11 @@ def register_tournament(tournament_id):
             form.player1_dupr_id.data = profile.dupr_id
 
     if form.validate_on_submit():
-        category = TournamentCategory.query.get(form.category_id.data)
-        if not category or category.tournament_id != tournament.id:
+        category = next((c for c in categories if c.id == form.category_id.data), None)
+        if not category:
              flash('Invalid category selected.', 'danger')
              return redirect(url_for('player.register_tournament', tournament_id=tournament_id))
 
-        # --- Capacity Check ---
-        if category.max_participants is not None:
-            current_count = category_counts[category.id]['current']
-            needed = 2 if category.is_doubles() else 1
-            if (current_count + needed) > category.max_participants:
-                flash(f'Sorry, the category "{category.name}" is full or does not have enough space.', 'error')
-                return redirect(url_for('player.register_tournament', tournament_id=tournament_id))
-
         is_doubles = category.is_doubles()
 
         # --- Player 1 Validation ---
@@ -177,25 +162,21 @@ def register_tournament(tournament_id):
                          return redirect(url_for('player.register_tournament', tournament_id=tournament_id))
 
 
-        # --- Check Existing Registrations ---
-        # Check if Player 1 is already in this category
-        if player1_id and Registration.query.filter(
-                (Registration.player_id == player1_id) | (Registration.partner_id == player1_id),
-                Registration.category_id == category.id).count() > 0:
-            flash('You (Player 1) are already registered for this category.', 'error')
+        # --- Eligibility, Existing Registrations and Capacity ---
+        # Checked under the category lock and inserted in the same transaction,
+        # so simultaneous submissions cannot oversubscribe the category
+        RegistrationService.lock_categories([category.id])
+        is_valid, error = RegistrationService.validate_registration(
+            player1_id, category.id, player2_id,
+            player={'date_of_birth': form.player1_date_of_birth.data, 'email': form.player1_email.data},
+            partner={'date_of_birth': form.player2_date_of_birth.data, 'email': form.player2_email.data}
+            if is_doubles and not player2_id else None
+        )
+        if not is_valid:
+            db.session.rollback()
+            flash(error, 'error')
             return redirect(url_for('player.register_tournament', tournament_id=tournament_id))
 
-        # Check if Player 2 is already in this category (if doubles)
-        if is_doubles and player2_id and Registration.query.filter(
-                (Registration.player_id == player2_id) | (Registration.partner_id == player2_id),
-                Registration.category_id == category.id).count() > 0:
-            flash('Your selected partner (Player 2) is already registered for this category.', 'error')
-            return redirect(url_for('player.register_tournament', tournament_id=tournament_id))
-
-        # Warn about potential conflicts (optional)
-        # ... (query other registrations for player1_id and player2_id in the same tournament) ...
-        # if conflicts_found: flash(...)
-
         # --- Create Registration Object ---
         try:
             registration = Registration(
@@ -239,15 +220,18 @@ def register_tournament(tournament_id):
             # Fetch DUPR ratings (placeholder - needs real implementation)
             # registration.fetch_dupr_ratings()
 
-            db.session.add(registration)
-            db.session.commit()
-
-            # If registration fee is zero, approve immediately and create accounts
+            # If registration fee is zero, approve immediately; a free registration
+            # takes its place as it is committed, while the category is locked
             if registration.registration_fee <= 0:
                  registration.payment_status = 'free'
                  registration.payment_verified = True
                  registration.is_approved = True
                  registration.payment_verified_at = datetime.utcnow()
+
+            db.session.add(registration)
+            db.session.commit()
+
+            if registration.registration_fee <= 0:
                  # Create accounts if needed (will also send emails)
                  registration.create_user_accounts() # Handles commit internally
                  flash('Registration successful! No payment required.', 'success')
@@ -1,33 +1,236 @@
+import atexit
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
 from flask_apscheduler import APScheduler
-from app.tasks.match_tasks import check_upcoming_matches
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import SchedulerLock
+from app.tasks.match_tasks import reconcile_group_standings, sync_match_reminders
+from app.tasks.email_tasks import resume_announcements
+from app.tasks.ranking_tasks import recompute_rankings
 
 scheduler = APScheduler()
 
+
+class SchedulerLeader:
+    """
+    Leader election for the shared job store.
+
+    Each process tries to take or renew a lease row in scheduler_lock every
+    lease/3 seconds. The holder resumes its scheduler and runs the jobs;
+    every other process keeps its scheduler paused, so it can still add jobs
+    to the shared store without running them. A leader that dies stops
+    renewing and another process takes over once the lease expires.
+    """
+
+    LOCK_NAME = 'apscheduler'
+
+    def __init__(self, app, scheduler, lease_seconds=60):
+        # scheduler: the underlying APScheduler BackgroundScheduler
+        self.app = app
+        self.scheduler = scheduler
+        self.lease = timedelta(seconds=lease_seconds)
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def try_acquire(self):
+        """Take the lease if it is free or expired, or renew it if already held; True when held"""
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(SchedulerLock).where(
+                SchedulerLock.name == self.LOCK_NAME,
+                or_(SchedulerLock.owner == self.owner, SchedulerLock.expires_at < now)
+            ).values(
+                owner=self.owner,
+                expires_at=now + self.lease,
+                acquired_at=case((SchedulerLock.owner == self.owner, SchedulerLock.acquired_at), else_=now)
+            )
+        )
+        if result.rowcount:
+            db.session.commit()
+            return True
+        if db.session.get(SchedulerLock, self.LOCK_NAME) is not None:
+            db.session.rollback()
+            return False
+        # First process ever: create the lock row, racing the other processes for it
+        db.session.add(SchedulerLock(name=self.LOCK_NAME, owner=self.owner, expires_at=now + self.lease,
+                                     acquired_at=now))
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    def release(self):
+        if not self.is_leader:
+            return
+        db.session.execute(update(SchedulerLock).where(
+            SchedulerLock.name == self.LOCK_NAME, SchedulerLock.owner == self.owner
+        ).values(expires_at=datetime.utcnow()))
+        db.session.commit()
+        self.is_leader = False
+
+    def tick(self):
+        """Renew or contest the lease and pause/resume job processing to match"""
+        with self.app.app_context():
+            try:
+                held = self.try_acquire()
+            except Exception:
+                self.app.logger.exception("Scheduler leader election failed")
+                held = False
+        if held and not self.is_leader:
+            self.app.logger.info(f"Scheduler leadership acquired by {self.owner}")
+            self.scheduler.resume()
+        elif not held and self.is_leader:
+            self.app.logger.warning(f"Scheduler leadership lost by {self.owner}")
+            self.scheduler.pause()
+        elif held:
+            # Pick up jobs other processes added to the store since the last check
+            self.scheduler.wakeup()
+        self.is_leader = held
+        return held
+
+    def start(self):
+        if self._thread is not None:
+            return
+        interval = max(self.lease.total_seconds() / 3, 1)
+
+        def run():
+            while not self._stopping.is_set():
+                self.tick()
+                self._stopping.wait(interval)
+
+        self._thread = threading.Thread(target=run, name='scheduler-leader', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stopping.set()
+        try:
+            with self.app.app_context():
+                self.release()
+        except Exception:
+            pass
+
+
+def next_interval_run(target, job_id, interval):
+    """
+    When a fixed-id interval job should next run, keeping its stored schedule.
+
+    Every process start re-adds the job with replace_existing; without an
+    explicit next run time that resets it to now + interval, so a job whose
+    interval is longer than the time between deploys would never run. The
+    run time kept in a persistent job store is used instead, brought forward
+    when the configured interval has been shortened.
+    """
+    latest = datetime.now().astimezone() + interval
+    job = target.get_job(job_id)
+    if job is not None and job.next_run_time is not None:
+        return min(job.next_run_time, latest)
+    return latest
+
+
 def init_scheduler(app):
     """
     Initialize and configure the APScheduler instance with the provided Flask app.
-    
+
+    With SCHEDULER_JOBSTORE = 'sqlalchemy' jobs live in the database shared by
+    every process and only the SchedulerLeader runs them; 'memory' keeps the
+    previous per-process scheduler.
+
     Args:
         app: Flask application instance
     """
+    if not app.config.get('SCHEDULER_ENABLED', True):
+        return
+
+    durable = app.config.get('SCHEDULER_JOBSTORE', 'memory') == 'sqlalchemy'
+    if durable and not app.config.get('SCHEDULER_JOBSTORES'):
+        from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+        url = app.config.get('SCHEDULER_JOBSTORE_URL') or app.config['SQLALCHEMY_DATABASE_URI']
+        app.config['SCHEDULER_JOBSTORES'] = {'default': SQLAlchemyJobStore(url=url, tablename='apscheduler_jobs')}
+
     # Configure the scheduler with Flask app
     if not scheduler.running:
         scheduler.init_app(app)
-    
-    # Add scheduled jobs
-    # if not scheduler.get_job('check_upcoming_matches'):
-    #     scheduler.add_job(
-    #         id='check_upcoming_matches',
-    #         func=check_upcoming_matches,
-    #         trigger='interval',
-    #         hours=1,  # Run every hour
-    #         replace_existing=True
-    #     )
-    
-    # Start the scheduler
+
+    # Start the scheduler; a durable one only runs jobs once this process is elected
     if not scheduler.running:
-        scheduler.start()
-    
+        scheduler.start(paused=durable)
+
+    # Add scheduled jobs (the job ids are fixed, so every process replaces the same jobs)
+    # check_upcoming_matches is kept for manual runs: the per-match reminder jobs kept in
+    # sync below send the same reminders, and running both would send them twice
+    if not app.config.get('TESTING'):
+        # Rebuild reminder jobs from Match.scheduled_time now, then keep them in sync
+        sync_minutes = app.config.get('SCHEDULER_REMINDER_SYNC_MINUTES', 15)
+        if sync_minutes:
+            scheduler.add_job(
+                id='sync_match_reminders',
+                func=sync_match_reminders,
+                trigger='interval',
+                minutes=sync_minutes,
+                next_run_time=datetime.now().astimezone(),
+                # Still run when this process is only elected after the start time
+                misfire_grace_time=None,
+                coalesce=True,
+                replace_existing=True
+            )
+
+        # Finish announcement broadcasts interrupted by a crash or deploy
+        scheduler.add_job(
+            id='resume_announcements',
+            func=resume_announcements,
+            trigger='interval',
+            minutes=10,
+            next_run_time=datetime.now().astimezone(),
+            misfire_grace_time=None,
+            coalesce=True,
+            replace_existing=True
+        )
+
+    # Periodically reconcile incrementally-updated group standings
+    reconcile_minutes = app.config.get('STANDINGS_RECONCILE_MINUTES', 0)
+    if reconcile_minutes and not app.config.get('TESTING'):
+        scheduler.add_job(
+            id='reconcile_group_standings',
+            func=reconcile_group_standings,
+            trigger='interval',
+            minutes=reconcile_minutes,
+            next_run_time=next_interval_run(scheduler, 'reconcile_group_standings',
+                                            timedelta(minutes=reconcile_minutes)),
+            misfire_grace_time=None,
+            coalesce=True,
+            replace_existing=True
+        )
+
+    # Windowed rankings change as results age, not only when points are awarded
+    recompute_hours = app.config.get('RANKING_RECOMPUTE_HOURS', 24)
+    windowed = app.config.get('RANKING_WINDOW_WEEKS') or app.config.get('RANKING_DECAY_HALF_LIFE_WEEKS')
+    if windowed and recompute_hours and not app.config.get('TESTING'):
+        scheduler.add_job(
+            id='recompute_rankings',
+            func=recompute_rankings,
+            trigger='interval',
+            hours=recompute_hours,
+            next_run_time=next_interval_run(scheduler, 'recompute_rankings', timedelta(hours=recompute_hours)),
+            misfire_grace_time=None,
+            coalesce=True,
+            replace_existing=True
+        )
+
+    if durable and scheduler.running and not app.config.get('TESTING'):
+        leader = SchedulerLeader(app, scheduler.scheduler, app.config.get('SCHEDULER_LEADER_LEASE_SECONDS', 60))
+        leader.start()
+        app.extensions['scheduler_leader'] = leader
+
     app.scheduler = scheduler
-    
+
     app.logger.info("APScheduler initialized and started")
@@ -1,5 +1,24 @@
 # app/services/__init__.py
+from app.services.score_loader import ScoreLoader
+from app.services.bracket_snapshot import BracketSnapshot
+from app.services.bracket_cache import BracketCache
+from app.services.tiebreak_service import TiebreakEngine
+from app.services.live_score_feed import LiveScoreFeed
+from app.services.court_board import CourtBoard
+from app.services.email_queue import EmailQueue
+from app.services.match_recipients import MatchRecipients
+from app.services.announcement_service import AnnouncementService
+from app.services.account_provisioning import AccountProvisioning
+from app.services.image_pipeline import ImagePipeline
+from app.services.bracket_builder import BracketBuilder, BracketPlan
+from app.services.bracket_generation import BracketGenerationService
 from app.services.bracket_service import BracketService
+from app.services.schedule_search import ScheduleSearch
+from app.services.ranking_service import RankingService
+from app.services.points_ledger import PointsLedger
+from app.services.ranking_engine import RankingEngine
 from app.services.placing_service import PlacingService
 from app.services.prize_service import PrizeService
 from app.services.registration_service import RegistrationService
+from app.services.registration_import import RegistrationImport
+from app.services.dashboard_metrics import DashboardMetrics
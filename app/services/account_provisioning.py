@@ -0,0 +1,201 @@
+import re
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, PlayerProfile, UserRole
+from app.helpers.registration import generate_temp_password, calculate_age
+
+# Registration columns holding each player's details, by slot
+PLAYER_FIELDS = ('name', 'email', 'phone', 'ic_number', 'nationality', 'date_of_birth', 'dupr_id')
+
+
+class AccountProvisioning:
+    """
+    User accounts and player profiles for people registered by email.
+
+    Existing users (and their profiles) are resolved for a whole batch in one
+    query. New usernames are the email's local part, or the local part plus a
+    random suffix when that is taken, checked with one indexed IN query
+    instead of counting the user table. New users and profiles are written in
+    a single flush inside a savepoint: when a concurrent registration wins a
+    username or email first, the savepoint is rolled back and the batch is
+    resolved again, picking up the other registration's user. Callers that
+    hold locks while provisioning can hash the new accounts' passwords
+    beforehand with hash_passwords().
+    """
+
+    MAX_ATTEMPTS = 5
+    USERNAME_SUFFIX_DIGITS = 6
+
+    @staticmethod
+    def player_details(registration, slot):
+        """Details of player 1 or 2 of a registration, as accepted by provision()"""
+        return {field: getattr(registration, f'player{slot}_{field}') for field in PLAYER_FIELDS}
+
+    @staticmethod
+    def for_registration(registration):
+        """
+        Link a registration's players to profiles by email, creating accounts as needed.
+
+        Flushes but does not commit. Sets player_id/partner_id, and the
+        account_created flag and temp password of each player whose account
+        was created. Returns True when any account was created.
+        """
+        slots = []
+        if registration.player1_email and not registration.player_id:
+            slots.append(1)
+        if registration.is_team_registration and registration.player2_email and not registration.partner_id:
+            slots.append(2)
+        if not slots:
+            return False
+
+        results = AccountProvisioning.provision(
+            [AccountProvisioning.player_details(registration, slot) for slot in slots]
+        )
+        created = False
+        for slot, (profile, temp_password) in zip(slots, results):
+            if slot == 1:
+                registration.player_id = profile.id
+            else:
+                registration.partner_id = profile.id
+            if temp_password:
+                setattr(registration, f'player{slot}_temp_password', temp_password)
+                setattr(registration, f'player{slot}_account_created', True)
+                created = True
+        return created
+
+    @staticmethod
+    def provision(players, passwords=None):
+        """
+        Resolve or create the profile of each player (dicts of PLAYER_FIELDS, 'email' required).
+
+        Returns a (profile, temp_password) pair per player, in order; the
+        password is None unless the user account was created here. Players
+        sharing an email share one account. New accounts whose email is in
+        passwords (from hash_passwords) use that password instead of hashing one.
+        """
+        for attempt in range(AccountProvisioning.MAX_ATTEMPTS):
+            try:
+                return AccountProvisioning._provision_once(players, attempt > 0, passwords or {})
+            except IntegrityError:
+                # Lost a race for an email or username; the next attempt sees the winner's rows
+                if attempt == AccountProvisioning.MAX_ATTEMPTS - 1:
+                    raise
+
+    @staticmethod
+    def hash_passwords(emails):
+        """
+        Mapping of email -> (temp password, password hash) for the emails without an account yet.
+
+        Only reads: the slow hashing can run before the caller takes any lock,
+        and the result is passed to provision().
+        """
+        emails = set(emails)
+        existing = {email for email, in db.session.query(User.email).filter(User.email.in_(emails))}
+        temp_passwords = {email: generate_temp_password() for email in emails - existing}
+        hashes = AccountProvisioning._hash(list(temp_passwords.values()))
+        return {email: (temp_password, password_hash)
+                for (email, temp_password), password_hash in zip(temp_passwords.items(), hashes)}
+
+    @staticmethod
+    def allocate_usernames(emails, suffix_all=False):
+        """Mapping of email -> unused username, using one lookup for the whole batch"""
+        bases = {email: AccountProvisioning._username_base(email) for email in emails}
+        taken = set()
+        if not suffix_all:
+            taken = {row.username for row in db.session.query(User.username).filter(
+                User.username.in_(set(bases.values()))
+            )}
+
+        usernames = {}
+        for email, base in bases.items():
+            username = base
+            if suffix_all or username in taken:
+                username = AccountProvisioning._suffixed(base)
+            while username in taken:
+                username = AccountProvisioning._suffixed(base)
+            taken.add(username)
+            usernames[email] = username
+        return usernames
+
+    @staticmethod
+    def _provision_once(players, suffix_all, passwords):
+        emails = list(dict.fromkeys(player['email'] for player in players))
+        found = {user.email: (user, profile) for user, profile in db.session.query(User, PlayerProfile).outerjoin(
+            PlayerProfile, PlayerProfile.user_id == User.id
+        ).filter(User.email.in_(emails))}
+        usernames = AccountProvisioning.allocate_usernames(
+            [email for email in emails if email not in found], suffix_all
+        )
+
+        resolved = {}
+        new_profiles = []
+        new_users = []
+        for player in players:
+            email = player['email']
+            if email in resolved:
+                continue
+            user, profile = found.get(email, (None, None))
+            temp_password = None
+            if user is None:
+                temp_password, password_hash = passwords.get(email, (generate_temp_password(), None))
+                user = User(
+                    username=usernames[email],
+                    email=email,
+                    full_name=player.get('name'),
+                    phone=player.get('phone'),
+                    role=UserRole.PLAYER,
+                    ic_number=player.get('ic_number'),
+                    password_hash=password_hash
+                )
+                if password_hash is None:
+                    new_users.append((user, temp_password))
+            if profile is None:
+                date_of_birth = player.get('date_of_birth')
+                profile = PlayerProfile(
+                    user=user,
+                    full_name=player.get('name'),
+                    country=player.get('nationality'),
+                    age=calculate_age(date_of_birth) if date_of_birth else None,
+                    dupr_id=player.get('dupr_id'),
+                    date_of_birth=date_of_birth
+                )
+                new_profiles.append(profile)
+            resolved[email] = (profile, temp_password)
+
+        AccountProvisioning._set_passwords(new_users)
+        if new_profiles:
+            # One flush for every new user and profile; a conflict only undoes this savepoint
+            with db.session.begin_nested():
+                db.session.add_all(new_profiles)
+        return [resolved[player['email']] for player in players]
+
+    @staticmethod
+    def _set_passwords(users):
+        hashes = AccountProvisioning._hash([password for _, password in users])
+        for (user, _), password_hash in zip(users, hashes):
+            user.password_hash = password_hash
+
+    @staticmethod
+    def _hash(passwords):
+        # Password hashing is deliberately slow and dominates large batches; hashlib releases
+        # the GIL, so a thread pool spreads it over the available cores
+        workers = min(len(passwords), current_app.config.get('ACCOUNT_PASSWORD_HASH_WORKERS', 4))
+        if workers <= 1:
+            return [generate_password_hash(password) for password in passwords]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(generate_password_hash, passwords))
+
+    @staticmethod
+    def _username_base(email):
+        local_part = re.sub(r'[^A-Za-z0-9._-]', '', email.split('@')[0])
+        max_length = User.username.type.length - AccountProvisioning.USERNAME_SUFFIX_DIGITS
+        return (local_part or 'player')[:max_length]
+
+    @staticmethod
+    def _suffixed(base):
+        digits = AccountProvisioning.USERNAME_SUFFIX_DIGITS
+        return f'{base}{secrets.randbelow(10 ** digits):0{digits}d}'
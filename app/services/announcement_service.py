@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+from app import db
+from app.models import AnnouncementJob, JobStatus, Tournament, TournamentCategory, Registration, User, PlayerProfile
+from app.helpers.email_utils import render_shared_email, personalize_messages
+from app.services.email_queue import EmailQueue
+
+
+class AnnouncementService:
+    """
+    Tournament announcements sent as a resumable, chunked broadcast.
+
+    The announcement body is rendered once per run and only the greeting is
+    filled in per recipient. Recipients are read in user id order one chunk
+    at a time (id, username and email only), so memory stays flat however
+    large the tournament. Each chunk's outbox rows and the job's checkpoint
+    are committed together: after a crash the job resumes from the
+    checkpoint without sending anyone the announcement twice.
+    """
+
+    # A running job whose checkpoint is older than this was abandoned by its process
+    STALE_AFTER = timedelta(minutes=10)
+
+    @staticmethod
+    def start(tournament_id, subject, message, recipients=None):
+        """Create an announcement job and run it before returning"""
+        job = AnnouncementJob(
+            tournament_id=tournament_id,
+            subject=subject,
+            message=message,
+            recipient_ids=list(recipients) if recipients else None,
+            status=JobStatus.PENDING
+        )
+        db.session.add(job)
+        db.session.commit()
+        return AnnouncementService.run(job.id)
+
+    @staticmethod
+    def run(job_id, chunk_size=None):
+        """Send (or resume) a job from its checkpoint; a job running elsewhere or finished is left alone"""
+        if not AnnouncementService._claim(job_id):
+            return db.session.get(AnnouncementJob, job_id)
+        job = db.session.get(AnnouncementJob, job_id)
+        chunk_size = chunk_size or current_app.config.get('ANNOUNCEMENT_CHUNK_SIZE', 500)
+
+        try:
+            tournament = db.session.get(Tournament, job.tournament_id)
+            if tournament is None:
+                raise ValueError(f"Tournament {job.tournament_id} not found")
+            subject = f"{tournament.name}: {job.subject}"
+            text, html = render_shared_email('email/announcement', tournament=tournament, message=job.message)
+
+            while True:
+                chunk = AnnouncementService._next_recipients(job, chunk_size)
+                if not chunk:
+                    break
+                messages = personalize_messages(subject, chunk, text, html)
+                # The checkpoint commits together with the chunk's outbox rows
+                job.last_user_id = chunk[-1].id
+                job.queued_count += len(messages)
+                if messages:
+                    EmailQueue.enqueue(*messages)
+                db.session.commit()
+
+            job.status = JobStatus.COMPLETED
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            current_app.logger.info(f"Announcement {job.id} queued for {job.queued_count} recipient(s)")
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(AnnouncementJob, job_id)
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            current_app.logger.error(f"Announcement {job_id} failed after {job.queued_count} recipient(s): {e}")
+        return job
+
+    @staticmethod
+    def resume_unfinished():
+        """Resume every pending or abandoned job; returns the jobs that were run"""
+        job_ids = [row.id for row in db.session.query(AnnouncementJob.id).filter(
+            AnnouncementService._claimable(datetime.utcnow())
+        ).order_by(AnnouncementJob.id)]
+        return [AnnouncementService.run(job_id) for job_id in job_ids]
+
+    @staticmethod
+    def recipients_query(job):
+        """(id, username, email) of a job's recipients in user id order"""
+        query = db.session.query(User.id, User.username, User.email).filter(User.email.isnot(None))
+        if job.recipient_ids:
+            return query.filter(User.id.in_(job.recipient_ids)).order_by(User.id)
+
+        # Users behind either player of an approved registration in the tournament
+        in_tournament = and_(
+            Registration.category_id == TournamentCategory.id,
+            TournamentCategory.tournament_id == job.tournament_id,
+            Registration.is_approved == True
+        )
+        profile_ids = select(Registration.player_id).where(in_tournament).union(
+            select(Registration.partner_id).where(in_tournament)
+        )
+        return query.filter(User.id.in_(
+            select(PlayerProfile.user_id).where(PlayerProfile.id.in_(profile_ids))
+        )).order_by(User.id)
+
+    @staticmethod
+    def _next_recipients(job, chunk_size):
+        # Keyset page after the checkpoint: no cursor is held open across the per-chunk commits
+        return AnnouncementService.recipients_query(job).filter(
+            User.id > job.last_user_id
+        ).limit(chunk_size).all()
+
+    @staticmethod
+    def _claimable(now):
+        return or_(
+            AnnouncementJob.status == JobStatus.PENDING,
+            and_(AnnouncementJob.status == JobStatus.RUNNING,
+                 AnnouncementJob.updated_at < now - AnnouncementService.STALE_AFTER)
+        )
+
+    @staticmethod
+    def _claim(job_id):
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(AnnouncementJob).where(
+                AnnouncementJob.id == job_id,
+                # A failed job is only resumed on request, never by resume_unfinished()
+                or_(AnnouncementService._claimable(now), AnnouncementJob.status == JobStatus.FAILED)
+            )
+            .values(status=JobStatus.RUNNING, error=None, updated_at=now,
+                    started_at=db.func.coalesce(AnnouncementJob.started_at, now))
+        )
+        db.session.commit()
+        return bool(result.rowcount)
@@ -0,0 +1,572 @@
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+from app import db
+from app.models import Registration, Match, MatchStage, Team, Group, GroupStanding, TournamentFormat, CourtState
+
+# Columns written for every generated match, so all rows of a batch share one INSERT shape
+MATCH_COLUMNS = (
+    'category_id', 'group_id', 'stage', 'round', 'match_order', 'next_match_id',
+    'player1_id', 'player2_id', 'team1_id', 'team2_id', 'player1_code', 'player2_code'
+)
+
+
+def _distribute_byes_in_bracket(participants, bracket_size):
+    """
+    Distribute participants in a bracket following standard seeding with byes allocated
+    to top seeds.
+
+    Args:
+        participants: List of participant dictionaries (sorted by seed)
+        bracket_size: Size of the bracket (power of 2)
+
+    Returns:
+        List of participants with optimal bye distribution (None for empty slots)
+    """
+    num_participants = len(participants)
+    num_byes = bracket_size - num_participants
+
+    if num_byes <= 0:
+        # No byes needed, just return the original list
+        return participants
+
+    # Create a list of positions in the bracket (0 to bracket_size-1)
+    positions = list(range(bracket_size))
+
+    # Apply the standard seeding pattern to these positions
+    seeded_positions = _apply_standard_seeding(positions, bracket_size)
+
+    # Create the result array (all None initially)
+    result = [None] * bracket_size
+
+    # First, assign the actual participants to their positions
+    # We assign participants to all positions EXCEPT the first num_byes positions in the seeded order
+    participant_positions = seeded_positions[num_byes:]
+    for i, pos in enumerate(participant_positions):
+        if i < len(participants):
+            result[pos] = participants[i]
+
+    return result
+
+
+def _apply_standard_seeding(positions, bracket_size):
+    """
+    Apply the standard seeding pattern to a list of positions.
+
+    This implements the standard tournament seeding algorithm:
+    - Seed 1 plays the lowest seed
+    - Seed 2 plays the second lowest seed
+    - Etc.
+
+    The pattern ensures top seeds only meet in later rounds if both advance.
+
+    Args:
+        positions: List of positions to reorder
+        bracket_size: Size of the bracket (power of 2)
+
+    Returns:
+        Reordered list of positions following standard seeding
+    """
+    if bracket_size <= 1:
+        return positions
+
+    # Split the list in half
+    half_size = bracket_size // 2
+    top_half = positions[:half_size]
+    bottom_half = positions[half_size:]
+
+    # Recursively apply seeding to each half
+    seeded_top = _apply_standard_seeding(top_half, half_size)
+    seeded_bottom = _apply_standard_seeding(bottom_half, half_size)
+
+    # Interleave the results following standard seeding pattern
+    result = []
+    for i in range(half_size):
+        result.append(seeded_top[i])
+        result.append(seeded_bottom[half_size - 1 - i])
+
+    return result
+
+
+class BracketPlan:
+    """
+    A category's bracket computed in memory, ready for BracketBuilder.persist.
+
+    Knockout matches are plain row dicts with a local 'key' and the 'next_key'
+    of the match their winner advances to; database ids are only assigned when
+    the plan is written. Groups carry their own standings and match rows.
+    """
+
+    # What persist clears before writing: every match, the group stage, or the knockout stage
+    SCOPE_ALL = 'all'
+    SCOPE_GROUPS = 'groups'
+    SCOPE_KNOCKOUT = 'knockout'
+
+    __slots__ = ('category_id', 'scope', 'is_doubles', 'groups', 'matches')
+
+    def __init__(self, category_id, scope, is_doubles):
+        self.category_id = category_id
+        self.scope = scope
+        self.is_doubles = is_doubles
+        self.groups = []
+        self.matches = []
+
+    def match_row(self, **values):
+        row = dict.fromkeys(MATCH_COLUMNS)
+        row['category_id'] = self.category_id
+        row.update(values)
+        return row
+
+    def participant_fields(self, side, participant_id):
+        """Column values placing a player/team id on side 1 or 2 of a match"""
+        prefix = 'team' if self.is_doubles else 'player'
+        return {f'{prefix}{side}_id': participant_id}
+
+
+class BracketBuilder:
+    """
+    Builds brackets in memory and writes them with batched inserts.
+
+    Registrations (and any missing doubles teams) for any number of categories
+    are resolved up front with a fixed number of queries. Planning is pure
+    Python over those entries, and persist() writes every plan with one
+    multi-row INSERT per table, plus one batched UPDATE that links knockout
+    matches to the match their winner advances to.
+    """
+
+    @staticmethod
+    def load_entries(categories):
+        """
+        Resolve the approved entries of several categories.
+
+        Returns a dict of category id -> list of (participant_id, seed) in
+        registration order. participant_id is the player profile id for
+        singles and the team id for doubles (None for a doubles registration
+        without a partner). Missing doubles teams are created in one batch.
+        """
+        categories = list(categories)
+        entries = {category.id: [] for category in categories}
+        if not categories:
+            return entries
+
+        registrations = Registration.query.filter(
+            Registration.category_id.in_(list(entries)),
+            Registration.is_approved == True
+        ).order_by(Registration.id).with_entities(
+            Registration.category_id, Registration.player_id, Registration.partner_id, Registration.seed
+        ).all()
+
+        doubles_ids = {category.id for category in categories if category.is_doubles()}
+        teams = {}
+        if doubles_ids:
+            existing = Team.query.filter(Team.category_id.in_(doubles_ids)).order_by(Team.id).with_entities(
+                Team.id, Team.category_id, Team.player1_id, Team.player2_id
+            ).all()
+            for team in existing:
+                teams.setdefault((team.category_id, team.player1_id, team.player2_id), team.id)
+
+            missing = []
+            for reg in registrations:
+                key = (reg.category_id, reg.player_id, reg.partner_id)
+                if reg.category_id in doubles_ids and reg.partner_id and key not in teams:
+                    teams[key] = None
+                    missing.append(key)
+
+            if missing:
+                created = db.session.execute(
+                    insert(Team).returning(Team.id, Team.category_id, Team.player1_id, Team.player2_id),
+                    [{'category_id': c, 'player1_id': p1, 'player2_id': p2} for c, p1, p2 in missing]
+                ).all()
+                for team in created:
+                    teams[(team.category_id, team.player1_id, team.player2_id)] = team.id
+
+        for reg in registrations:
+            if reg.category_id in doubles_ids:
+                participant_id = teams.get((reg.category_id, reg.player_id, reg.partner_id)) if reg.partner_id else None
+            else:
+                participant_id = reg.player_id
+            entries[reg.category_id].append((participant_id, reg.seed))
+
+        return entries
+
+    @staticmethod
+    def configure_group_stage(category, registration_count):
+        """Apply the default group count and group size used when they are not set"""
+        if not category.group_count:
+            category.group_count = 4  # Default to 4 groups
+        if not category.teams_per_group:
+            # Calculate teams per group if not specified
+            if registration_count > 0 and category.group_count > 0:
+                category.teams_per_group = (registration_count + category.group_count - 1) // category.group_count
+            else:
+                category.teams_per_group = 4  # Default to 4 teams per group
+
+    @staticmethod
+    def plan_group_stage(category_id, entries, group_count, is_doubles):
+        """
+        Plan groups, standings and round-robin matches (snake seeding by seed).
+
+        Returns None when there are fewer than two entries per group.
+        """
+        if len(entries) < group_count * 2:  # Need at least 2 teams per group
+            return None
+
+        plan = BracketPlan(category_id, BracketPlan.SCOPE_GROUPS, is_doubles)
+
+        # Sort by seed if available
+        sorted_entries = sorted(entries, key=lambda e: e[1] if e[1] is not None else 999)
+        participants = [participant_id for participant_id, _ in sorted_entries if participant_id is not None]
+
+        # Distribute participants to groups using snake seeding
+        group_participants = [[] for _ in range(group_count)]
+        for i, participant_id in enumerate(participants):
+            group_index = i % group_count
+            # Reverse direction on even passes
+            if (i // group_count) % 2 == 1:
+                group_index = group_count - 1 - group_index
+            group_participants[group_index].append(participant_id)
+
+        id_field = 'team_id' if is_doubles else 'player_id'
+        for i, members in enumerate(group_participants):
+            name = chr(65 + i)  # A, B, C, etc.
+            plan.groups.append({
+                'name': name,
+                # Initial positions follow the seeding order (position codes A1, A2, ...)
+                'standings': [{id_field: participant_id, 'position': j + 1} for j, participant_id in enumerate(members)],
+                'matches': BracketBuilder._plan_round_robin(plan, name, members)
+            })
+
+        return plan
+
+    @staticmethod
+    def _plan_round_robin(plan, group_name, members):
+        """Round robin (circle method) match rows for one group"""
+        # Codes refer to the participant's slot in the group, e.g. A1, B2
+        codes = {participant_id: f"{group_name}{j + 1}" for j, participant_id in enumerate(members)}
+        slots = list(members)
+        if len(slots) < 2:
+            return []
+        if len(slots) % 2 == 1:
+            slots.append(None)  # Dummy participant for odd number
+        n = len(slots)
+
+        rows = []
+        for round_num in range(n - 1):
+            for i in range(n // 2):
+                side1, side2 = slots[i], slots[n - 1 - i]
+                if side1 is None or side2 is None:
+                    continue
+                row = plan.match_row(
+                    stage=MatchStage.GROUP,
+                    round=round_num + 1,
+                    match_order=(round_num * 10) + i,  # Ensures unique ordering
+                    player1_code=codes[side1],
+                    player2_code=codes[side2]
+                )
+                row.update(plan.participant_fields(1, side1))
+                row.update(plan.participant_fields(2, side2))
+                rows.append(row)
+
+            # Rotate participants (keep first participant fixed)
+            slots = [slots[0]] + [slots[-1]] + slots[1:-1]
+
+        return rows
+
+    @staticmethod
+    def plan_single_elimination(category_id, entries, is_doubles, use_seeding=True, third_place_match=True):
+        """Plan a single elimination draw from entries, or None if there are none"""
+        if not entries:
+            return None
+
+        entries = [(participant_id, seed) for participant_id, seed in entries if participant_id is not None]
+        if use_seeding:
+            ordered = sorted(entries, key=lambda e: e[1] if e[1] is not None else 999)
+            slots = [
+                {'participant_id': participant_id, 'code': f"S{seed}" if seed is not None else None}
+                for participant_id, seed in ordered
+            ]
+        else:
+            slots = [
+                {'participant_id': participant_id, 'code': f"P{i+1}"}  # Player/team number as code
+                for i, (participant_id, _) in enumerate(entries)
+            ]
+
+        # Determine bracket size (next power of 2)
+        bracket_size = 1
+        while bracket_size < len(slots):
+            bracket_size *= 2
+
+        slots = _distribute_byes_in_bracket(slots, bracket_size)
+
+        plan = BracketPlan(category_id, BracketPlan.SCOPE_ALL, is_doubles)
+        BracketBuilder.plan_knockout(plan, slots, third_place_match)
+        return plan
+
+    @staticmethod
+    def round_codes(round_number, index):
+        """Position codes for a match fed by the previous round (index = first feeder's order)"""
+        if round_number == 1:  # Finals
+            return "SF1", "SF2"  # Winners of the semifinals
+        if round_number == 2:  # Semifinals
+            return ("QF1", "QF2") if index == 0 else ("QF3", "QF4")
+        if round_number == 3:  # Quarterfinals
+            return f"R16-{index*2+1}", f"R16-{index*2+2}"  # Round of 16 winners
+        if round_number == 4:  # Round of 16
+            return f"R32-{index*2+1}", f"R32-{index*2+2}"
+        if round_number == 5:  # Round of 32
+            return f"R64-{index*2+1}", f"R64-{index*2+2}"
+        # Generic code for deeper rounds
+        return f"R{round_number+1}-{index*2+1}", f"R{round_number+1}-{index*2+2}"
+
+    @staticmethod
+    def plan_knockout(plan, slots, third_place_match=True):
+        """
+        Add a knockout tree to a plan.
+
+        Args:
+            plan: BracketPlan to add matches to
+            slots: bracket slots (power of 2), each None for a bye or a dict
+                   with 'participant_id' and 'code'
+            third_place_match: whether to add a playoff for the semifinal losers
+        """
+        n = len(slots)
+        if n < 2:
+            return plan
+
+        # Determine number of rounds
+        round_count = 0
+        temp = n
+        while temp > 1:
+            temp //= 2
+            round_count += 1
+
+        # First round: participants and their codes
+        first_round = round_count
+        previous_round = []
+        for i in range(0, n, 2):
+            row = plan.match_row(stage=MatchStage.KNOCKOUT, round=first_round, match_order=i // 2)
+            for side, slot_index in ((1, i), (2, i + 1)):
+                slot = slots[slot_index]
+                code = slot.get('code') if slot else None
+                if slot and slot.get('participant_id'):
+                    row.update(plan.participant_fields(side, slot['participant_id']))
+                # Always set the code
+                row[f'player{side}_code'] = code if code else f"R{first_round}-{slot_index+1}"
+            previous_round.append(BracketBuilder._add_knockout_match(plan, row))
+
+        # Later rounds: codes refer to the feeding matches, feeders link forward
+        for r in range(first_round - 1, 0, -1):
+            current_round = []
+            for i in range(0, len(previous_round), 2):
+                code1, code2 = BracketBuilder.round_codes(r, i)
+                row = plan.match_row(
+                    stage=MatchStage.KNOCKOUT, round=r, match_order=i // 2,
+                    player1_code=code1, player2_code=code2
+                )
+                match_key = BracketBuilder._add_knockout_match(plan, row)
+                for feeder in previous_round[i:i + 2]:
+                    plan.matches[feeder]['next_key'] = match_key
+                current_round.append(match_key)
+            previous_round = current_round
+
+        # Create 3rd place match if needed (at least a semifinal round exists)
+        if third_place_match and round_count >= 2:
+            BracketBuilder._add_knockout_match(plan, plan.match_row(
+                stage=MatchStage.PLAYOFF,
+                round=1.5,  # Between final and semifinal
+                match_order=0,
+                player1_code="L-SF1",  # Loser of first semifinal
+                player2_code="L-SF2"   # Loser of second semifinal
+            ))
+
+        return plan
+
+    @staticmethod
+    def _add_knockout_match(plan, row):
+        row['key'] = len(plan.matches)
+        row['next_key'] = None
+        plan.matches.append(row)
+        return row['key']
+
+    @staticmethod
+    def category_specs(tournament, categories, entries):
+        """
+        Snapshot what planning needs from each category as plain dicts.
+
+        Group stage settings are defaulted on the category objects here, so
+        the specs can afterwards be planned without touching the session
+        (e.g. in worker threads).
+        """
+        specs = []
+        for category in categories:
+            category_format = category.format or tournament.format  # Use category format override if available
+            category_entries = entries.get(category.id, [])
+
+            if category_format == TournamentFormat.GROUP_KNOCKOUT:
+                BracketBuilder.configure_group_stage(category, len(category_entries))
+            elif category_format != TournamentFormat.SINGLE_ELIMINATION:
+                current_app.logger.warning(
+                    f"Bracket generation not implemented for format {category_format.value} in category {category.id}"
+                )
+
+            specs.append({
+                'category_id': category.id,
+                'format': category_format,
+                'is_doubles': category.is_doubles(),
+                'group_count': category.group_count,
+                'entries': tuple(category_entries)
+            })
+        return specs
+
+    @staticmethod
+    def plan_category(spec, use_seeding=True, third_place_match=True):
+        """Plan the first stage of one category spec, or None if it cannot be generated"""
+        if spec['format'] == TournamentFormat.GROUP_KNOCKOUT:
+            return BracketBuilder.plan_group_stage(
+                spec['category_id'], spec['entries'], spec['group_count'], spec['is_doubles']
+            )
+        if spec['format'] == TournamentFormat.SINGLE_ELIMINATION:
+            return BracketBuilder.plan_single_elimination(
+                spec['category_id'], spec['entries'], spec['is_doubles'], use_seeding, third_place_match
+            )
+        return None
+
+    @staticmethod
+    def plan_tournament(specs, use_seeding=True, third_place_match=True, on_planned=None):
+        """
+        Plan several category specs.
+
+        Args:
+            specs: dicts from category_specs
+            on_planned: optional callback(spec, plan) run as each category finishes
+
+        Returns (plans, failed_category_ids), both in spec order.
+        """
+        results = {}
+        for spec in specs:
+            results[spec['category_id']] = plan = BracketBuilder.plan_category(spec, use_seeding, third_place_match)
+            if on_planned:
+                on_planned(spec, plan)
+
+        plans = [results[spec['category_id']] for spec in specs if results[spec['category_id']]]
+        failed = [spec['category_id'] for spec in specs if not results[spec['category_id']]]
+        return plans, failed
+
+    @staticmethod
+    def existing_match_counts(category_ids):
+        """Number of matches already generated per category, in one grouped query"""
+        if not category_ids:
+            return {}
+        rows = db.session.query(Match.category_id, func.count(Match.id)).filter(
+            Match.category_id.in_(category_ids)
+        ).group_by(Match.category_id).all()
+        return dict(rows)
+
+    @staticmethod
+    def persist(plans):
+        """
+        Replace the affected stages of each plan's category and insert the plans.
+
+        Runs in the current transaction; the caller commits and invalidates
+        the bracket cache.
+        """
+        plans = [plan for plan in plans if plan is not None]
+        if not plans:
+            return
+
+        BracketBuilder._clear_existing(plans)
+
+        # Groups, then their standings and matches, each as one multi-row insert
+        group_plans = [(plan, group) for plan in plans for group in plan.groups]
+        if group_plans:
+            created = db.session.execute(
+                insert(Group).returning(Group.id, Group.category_id, Group.name),
+                [{'category_id': plan.category_id, 'name': group['name']} for plan, group in group_plans]
+            ).all()
+            group_ids = {(row.category_id, row.name): row.id for row in created}
+
+            standing_rows = []
+            match_rows = []
+            for plan, group in group_plans:
+                group_id = group_ids[(plan.category_id, group['name'])]
+                for standing in group['standings']:
+                    standing_rows.append(dict(standing, group_id=group_id))
+                for row in group['matches']:
+                    match_rows.append(dict(row, group_id=group_id))
+
+            if standing_rows:
+                db.session.execute(insert(GroupStanding), standing_rows)
+            if match_rows:
+                db.session.execute(insert(Match), match_rows, execution_options={'render_nulls': True})
+
+        # Every knockout match in one insert, then the next-match links in one batched update.
+        # RETURNING rows are matched back by their natural key (category, stage, round,
+        # order) because batched inserts do not guarantee they come back in input order.
+        # The integer round column may round the 3rd place match's 1.5, so playoff rows
+        # (one per category) are keyed without their round.
+        knockout = [(plan, row) for plan in plans for row in plan.matches]
+        if not knockout:
+            return
+
+        created = db.session.execute(
+            insert(Match).returning(Match.id, Match.category_id, Match.stage, Match.round, Match.match_order),
+            [{column: row[column] for column in MATCH_COLUMNS} for _, row in knockout],
+            execution_options={'render_nulls': True}
+        ).all()
+        created_ids = {BracketBuilder._returned_key(m.category_id, m.stage, m.round, m.match_order): m.id
+                       for m in created}
+
+        match_ids = {
+            (plan.category_id, row['key']): created_ids[
+                BracketBuilder._returned_key(plan.category_id, row['stage'], row['round'], row['match_order'])
+            ]
+            for plan, row in knockout
+        }
+        links = [
+            {'id': match_ids[(plan.category_id, row['key'])],
+             'next_match_id': match_ids[(plan.category_id, row['next_key'])]}
+            for plan, row in knockout if row['next_key'] is not None
+        ]
+        if links:
+            db.session.execute(update(Match), links)
+
+    @staticmethod
+    def _returned_key(category_id, stage, round, match_order):
+        if stage == MatchStage.PLAYOFF:
+            round = None
+        return category_id, stage, round, match_order
+
+    @staticmethod
+    def _clear_existing(plans):
+        by_scope = defaultdict(list)
+        for plan in plans:
+            by_scope[plan.scope].append(plan.category_id)
+
+        if by_scope[BracketPlan.SCOPE_ALL]:
+            BracketBuilder._delete_matches(Match.category_id.in_(by_scope[BracketPlan.SCOPE_ALL]))
+
+        if by_scope[BracketPlan.SCOPE_KNOCKOUT]:
+            BracketBuilder._delete_matches(
+                Match.category_id.in_(by_scope[BracketPlan.SCOPE_KNOCKOUT]),
+                Match.stage.in_([MatchStage.KNOCKOUT, MatchStage.PLAYOFF])
+            )
+
+        if by_scope[BracketPlan.SCOPE_GROUPS]:
+            group_ids = db.session.scalars(
+                db.select(Group.id).filter(Group.category_id.in_(by_scope[BracketPlan.SCOPE_GROUPS]))
+            ).all()
+            if group_ids:
+                BracketBuilder._delete_matches(Match.group_id.in_(group_ids))
+                GroupStanding.query.filter(GroupStanding.group_id.in_(group_ids)).delete(synchronize_session=False)
+                Group.query.filter(Group.id.in_(group_ids)).delete(synchronize_session=False)
+
+    @staticmethod
+    def _delete_matches(*criteria):
+        """Bulk-delete matches, first taking them off any court they are playing on"""
+        db.session.execute(
+            update(CourtState)
+            .where(CourtState.current_match_id.in_(select(Match.id).where(*criteria)))
+            .values(current_match_id=None, current_since=None)
+            .execution_options(synchronize_session=False)
+        )
+        Match.query.filter(*criteria).delete(synchronize_session=False)
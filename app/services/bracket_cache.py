@@ -0,0 +1,192 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from flask import current_app
+
+
+class MemoryBracketCacheBackend:
+    """In-process LRU cache. Suitable for a single worker (the default)."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        # Version of categories never invalidated in this process; random so a restart never reuses old ETags
+        self._initial_version = uuid.uuid4().hex[:16]
+        self._lock = threading.Lock()
+
+    def get_version(self, category_id):
+        with self._lock:
+            return self._versions.get(category_id, self._initial_version)
+
+    def bump_version(self, category_id):
+        with self._lock:
+            version = self._versions[category_id] = uuid.uuid4().hex[:16]
+            return version
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._initial_version = uuid.uuid4().hex[:16]
+
+
+class FileSystemBracketCacheBackend:
+    """
+    Cache shared by every worker on a host (e.g. multiple gunicorn workers).
+
+    Versions and payloads are plain files written atomically with os.replace,
+    so readers never see a partially written entry. Categories without a
+    version file share the cache directory's generation, created once.
+    """
+
+    def __init__(self, cache_dir, max_entries=256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+        self._generation = self._read('generation')
+        if self._generation is None:
+            self._generation = uuid.uuid4().hex[:16].encode()
+            self._write('generation', self._generation)
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def _write(self, name, data):
+        tmp_path = self._path(f'.{name}.{uuid.uuid4().hex}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(name))
+
+    def _read(self, name):
+        try:
+            with open(self._path(name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get_version(self, category_id):
+        version = self._read(f'version_{category_id}')
+        return (version or self._generation).decode()
+
+    def bump_version(self, category_id):
+        # Random tokens rather than read-increment-write so concurrent workers never collide
+        version = uuid.uuid4().hex[:16]
+        self._write(f'version_{category_id}', version.encode())
+        return version
+
+    def get(self, key):
+        return self._read(f'entry_{key}')
+
+    def set(self, key, value):
+        self._write(f'entry_{key}', value)
+        self._evict()
+
+    def _evict(self):
+        entries = [e for e in os.scandir(self.cache_dir) if e.name.startswith('entry_')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(('entry_', 'version_')):
+                os.remove(entry.path)
+        self._generation = uuid.uuid4().hex[:16].encode()
+        self._write('generation', self._generation)
+
+
+class BracketCache:
+    """
+    Versioned cache of serialized bracket JSON, keyed per category.
+
+    Every write that changes a category's matches, scores or standings calls
+    invalidate(), which bumps the category version. Cached payloads and ETags
+    are tied to the version, so stale entries are simply never read again.
+    """
+
+    BACKENDS = {
+        'memory': lambda app: MemoryBracketCacheBackend(
+            max_entries=app.config.get('BRACKET_CACHE_MAX_ENTRIES', 256)
+        ),
+        'filesystem': lambda app: FileSystemBracketCacheBackend(
+            app.config['BRACKET_CACHE_DIR'],
+            max_entries=app.config.get('BRACKET_CACHE_MAX_ENTRIES', 256)
+        ),
+    }
+
+    @staticmethod
+    def init_app(app):
+        """Create the configured backend and attach it to the app"""
+        backend_name = app.config.get('BRACKET_CACHE_BACKEND', 'memory')
+        if backend_name not in BracketCache.BACKENDS:
+            raise ValueError(f"Unknown BRACKET_CACHE_BACKEND: {backend_name}")
+        app.extensions['bracket_cache'] = BracketCache.BACKENDS[backend_name](app)
+
+    @staticmethod
+    def _backend():
+        backend = current_app.extensions.get('bracket_cache')
+        if backend is None:
+            BracketCache.init_app(current_app)
+            backend = current_app.extensions['bracket_cache']
+        return backend
+
+    @staticmethod
+    def get_version(category_id):
+        """Current version of a category; reading it never creates one, only invalidate() does"""
+        return BracketCache._backend().get_version(category_id)
+
+    @staticmethod
+    def etag(category_id, version):
+        return f'bracket-{category_id}-{version}'
+
+    @staticmethod
+    def get(category_id, version):
+        """Get the cached payload bytes for a category version, or None"""
+        return BracketCache.get_entry(f'{category_id}_{version}')
+
+    @staticmethod
+    def set(category_id, version, payload):
+        BracketCache.set_entry(f'{category_id}_{version}', payload)
+
+    @staticmethod
+    def get_entry(key):
+        """Get the bytes cached under any key, or None; include get_version() in keys derived from a category"""
+        return BracketCache._backend().get(key)
+
+    @staticmethod
+    def set_entry(key, value):
+        BracketCache._backend().set(key, value)
+
+    @staticmethod
+    def invalidate(*category_ids):
+        """Bump the version of one or more categories after their matches changed"""
+        backend = BracketCache._backend()
+        for category_id in category_ids:
+            if category_id is not None:
+                backend.bump_version(category_id)
+
+    @staticmethod
+    def invalidate_tournament(tournament):
+        """Invalidate every category of a tournament (e.g. after a status/format change)"""
+        BracketCache.invalidate(*[c.id for c in tournament.categories])
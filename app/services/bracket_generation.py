@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta
+from threading import Thread
+from flask import current_app
+from sqlalchemy import and_, or_, update
+from app import db
+from app.models import BracketGenerationJob, JobStatus, Tournament
+from app.services.bracket_builder import BracketBuilder
+from app.services.bracket_cache import BracketCache
+
+
+class BracketGenerationService:
+    """
+    Generates the brackets of every category of a tournament as a tracked job.
+
+    The run pre-fetches all registrations once, plans each category from
+    that snapshot (planning never touches the database), then writes every
+    plan in one batched transaction. Progress is recorded on a
+    BracketGenerationJob row so the request that started the run can return
+    immediately and clients can poll the status endpoint: categories planned
+    out of the total while the job is 'planning', then the 'writing' phase
+    while the plans are saved, which can take longer than the planning.
+
+    A tournament has at most one active job: starting another while one is
+    pending or running returns that job. A running job whose row has not
+    been updated for STALE_AFTER is taken to have died with its process and
+    is marked failed, so a new run can be started.
+    """
+
+    STALE_AFTER = timedelta(minutes=10)
+
+    @staticmethod
+    def start(tournament, use_seeding=True, third_place_match=True, requested_by=None, run_async=None):
+        """
+        Create a job for a tournament and run it, or return its active job.
+
+        Runs in a background thread when BRACKET_GENERATION_ASYNC is enabled
+        (or run_async is True), otherwise before returning.
+        """
+        # Serialize starts for the tournament (a double click), then reuse a live job
+        db.session.execute(
+            update(Tournament).where(Tournament.id == tournament.id)
+            .values(id=Tournament.id).execution_options(synchronize_session=False)
+        )
+        BracketGenerationService._fail_stale(tournament_id=tournament.id)
+        active = BracketGenerationJob.query.filter(
+            BracketGenerationJob.tournament_id == tournament.id,
+            BracketGenerationJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING])
+        ).order_by(BracketGenerationJob.id.desc()).first()
+        if active is not None:
+            db.session.commit()
+            return active
+
+        job = BracketGenerationJob(
+            tournament_id=tournament.id,
+            requested_by_id=requested_by.id if requested_by else None,
+            use_seeding=use_seeding,
+            third_place_match=third_place_match,
+            status=JobStatus.PENDING
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        if run_async is None:
+            run_async = current_app.config.get('BRACKET_GENERATION_ASYNC', True)
+
+        if run_async:
+            app = current_app._get_current_object()
+            Thread(target=BracketGenerationService._run_in_app, args=(app, job.id), daemon=True).start()
+        else:
+            BracketGenerationService.run(job.id)
+        return job
+
+    @staticmethod
+    def _run_in_app(app, job_id):
+        with app.app_context():
+            BracketGenerationService.run(job_id)
+
+    @staticmethod
+    def run(job_id):
+        """Execute a pending job, recording progress and the outcome on the job row"""
+        # Claim the job: of two runners started for it, only one gets to run it
+        claimed = db.session.execute(
+            update(BracketGenerationJob).where(
+                BracketGenerationJob.id == job_id, BracketGenerationJob.status == JobStatus.PENDING
+            ).values(status=JobStatus.RUNNING, started_at=datetime.utcnow(), updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        job = db.session.get(BracketGenerationJob, job_id)
+        if not claimed:
+            return job
+
+        try:
+            tournament = job.tournament
+
+            # Snapshot: one grouped existence check, one registration/team fetch for all categories
+            categories = list(tournament.categories)
+            existing = BracketBuilder.existing_match_counts([c.id for c in categories])
+            pending = [c for c in categories if not existing.get(c.id)]
+            entries = BracketBuilder.load_entries(pending)
+            specs = BracketBuilder.category_specs(tournament, pending, entries)
+
+            job.skipped = [c.id for c in categories if existing.get(c.id)]
+            job.total_categories = len(specs)
+            job.completed_categories = 0
+            job.phase = 'planning'
+            db.session.commit()
+
+            def on_planned(spec, plan):
+                job.completed_categories += 1
+                db.session.commit()
+
+            # Planning is pure Python, so it runs sequentially in this thread
+            plans, failed = BracketBuilder.plan_tournament(
+                specs, job.use_seeding, job.third_place_match, on_planned=on_planned
+            )
+
+            # Single batched write for every category; nothing is written until it commits,
+            # so the phase change is committed first for the status endpoint to report
+            job.phase = 'writing'
+            db.session.commit()
+            BracketBuilder.persist(plans)
+            job.succeeded = [plan.category_id for plan in plans]
+            job.failed = failed
+            job.status = JobStatus.COMPLETED
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            BracketCache.invalidate(*job.succeeded)
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception(f"Bracket generation job {job_id} failed")
+            job = db.session.get(BracketGenerationJob, job_id)
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+        return job
+
+    @staticmethod
+    def get_status(job_id, tournament_id=None):
+        """Status dict for a job, or None if it does not exist (or belongs to another tournament)"""
+        BracketGenerationService._fail_stale(job_id=job_id)
+        db.session.commit()
+        job = db.session.get(BracketGenerationJob, job_id)
+        if job is None or (tournament_id is not None and job.tournament_id != tournament_id):
+            return None
+        return job.to_dict()
+
+    @staticmethod
+    def _stale(now):
+        return and_(BracketGenerationJob.status == JobStatus.RUNNING,
+                    or_(BracketGenerationJob.updated_at.is_(None),
+                        BracketGenerationJob.updated_at < now - BracketGenerationService.STALE_AFTER))
+
+    @staticmethod
+    def _fail_stale(tournament_id=None, job_id=None):
+        """Mark running jobs (of a tournament, or one job) whose process stopped updating them as failed"""
+        now = datetime.utcnow()
+        query = update(BracketGenerationJob).where(BracketGenerationService._stale(now))
+        if tournament_id is not None:
+            query = query.where(BracketGenerationJob.tournament_id == tournament_id)
+        if job_id is not None:
+            query = query.where(BracketGenerationJob.id == job_id)
+        db.session.execute(query.values(
+            status=JobStatus.FAILED, error='Bracket generation stopped before finishing; start it again.',
+            finished_at=now, updated_at=now
+        ).execution_options(synchronize_session=False))
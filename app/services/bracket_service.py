@@ -1,6 +1,11 @@
 from app import db
-from app.models import Tournament, TournamentCategory, Match, MatchScore, Group, GroupStanding, TournamentFormat
-from app.models import MatchStage
+from app.models import Tournament, TournamentCategory, Match, MatchScore, Group, GroupStanding
+from app.models import MatchStage, TournamentStatus
+from app.services.bracket_snapshot import BracketSnapshot
+from app.services.bracket_cache import BracketCache
+from app.services.tiebreak_service import TiebreakEngine
+from app.services.live_score_feed import LiveScoreFeed
+from app.services.court_board import CourtBoard
 from sqlalchemy import func
 from collections import defaultdict
 
@@ -8,101 +13,57 @@ class BracketService:
     """Service for generating and managing tournament brackets"""
     
     @staticmethod
-    def get_bracket_data(category_id):
+    def get_bracket_data(category_id, snapshot=None):
         """
         Get comprehensive bracket data for a category
         Returns matches by stage (group/knockout), standings for groups,
-        and other metadata needed for bracket visualization
+        and other metadata needed for bracket visualization.
+
+        All data comes from a single BracketSnapshot so the number of queries
+        does not grow with the size of the draw. The snapshot itself is
+        returned under the 'snapshot' key for callers that need scores.
         """
-        category = TournamentCategory.query.get_or_404(category_id)
-        tournament = category.tournament
+        if snapshot is None:
+            snapshot = BracketSnapshot.load(category_id)
+        tournament = snapshot.tournament
         
         result = {
-            'category': category,
+            'category': snapshot.category,
             'format': tournament.format,
             'group_stage': False,
             'groups': [],
             'knockout_rounds': {},
-            'placings': []
+            'placings': [],
+            'snapshot': snapshot
         }
         
         # Check if this tournament has group stages
-        if tournament.format == TournamentFormat.GROUP_KNOCKOUT:
+        if snapshot.has_group_stage:
             result['group_stage'] = True
-            result['groups'] = BracketService.get_group_data(category_id)
-        
-        # Get all matches for the category
-        all_matches = Match.query.filter_by(category_id=category_id).all()
-        
-        # Organize knockout matches by round
-        knockout_matches = [m for m in all_matches if (
-            hasattr(m, 'stage') and (m.stage == MatchStage.KNOCKOUT or m.stage == MatchStage.PLAYOFF)
-        ) or (
-            not hasattr(m, 'stage') and (not hasattr(m, 'group_id') or m.group_id is None)
-        )]
+            result['groups'] = snapshot.group_data()
         
-        for match in knockout_matches:
-            round_num = match.round
-            if round_num not in result['knockout_rounds']:
-                result['knockout_rounds'][round_num] = []
-            result['knockout_rounds'][round_num].append(match)
-        
-        # Sort matches within each round by match_order
-        for round_num in result['knockout_rounds']:
-            result['knockout_rounds'][round_num].sort(key=lambda m: m.match_order)
+        # Knockout matches are already organized by round and sorted by match_order
+        for round_num, matches in snapshot.knockout_rounds.items():
+            result['knockout_rounds'][round_num] = list(matches)
         
         # Get tournament placings if completed
-        if tournament.status == 'COMPLETED':
-            try:
-                # Try to import PlacingService if it exists
-                from app.services.placing_service import PlacingService
-                result['placings'] = PlacingService.get_placings(category_id)
-            except ImportError:
-                # If PlacingService doesn't exist yet, just return empty placings
-                result['placings'] = []
+        if tournament.status == TournamentStatus.COMPLETED:
+            from app.services.placing_service import PlacingService
+            result['placings'] = PlacingService.get_placings(category_id, snapshot=snapshot)
         
         return result
     
     @staticmethod
     def get_group_data(category_id):
         """Get all group data including standings and matches"""
-        # Get all groups for this category
-        groups = Group.query.filter_by(category_id=category_id).all()
-        
-        group_data = []
-        for group in groups:
-            # Get standings for this group
-            standings = GroupStanding.query.filter_by(group_id=group.id)\
-                .order_by(GroupStanding.position).all()
-            
-            # Get matches for this group
-            group_matches = []
-            
-            # Try using the stage field if it exists in the Match model
-            if hasattr(Match, 'stage'):
-                group_matches = Match.query.filter_by(
-                    group_id=group.id,
-                    stage=MatchStage.GROUP
-                ).order_by(Match.match_order).all()
-            else:
-                # Fallback: just get matches with this group_id
-                group_matches = Match.query.filter_by(
-                    group_id=group.id
-                ).order_by(Match.match_order).all()
-            
-            group_data.append({
-                'group': group,
-                'standings': standings,
-                'matches': group_matches
-            })
-        
-        return group_data
+        return BracketSnapshot.load(category_id).group_data()
     
     @staticmethod
     def update_group_standings(group_id):
         """Update standings for a group based on match results"""
         group = Group.query.get_or_404(group_id)
         category = group.category
+        previous = BracketService._standing_figures(GroupStanding.query.filter_by(group_id=group_id))
         
         # Get ALL matches in this group (both completed and incomplete)
         all_matches = []
@@ -203,11 +164,141 @@ class BracketService:
         
         # Calculate final positions
         standings_list = list(standings.values())
-        BracketService._calculate_group_positions(standings_list)
+        BracketService._calculate_group_positions(standings_list, category.tiebreak_order)
+        changed = BracketService._standing_figures(standings_list) != previous
+        
+        db.session.commit()
+        # Recomputing an unchanged group (as reconciliation mostly does) keeps cached brackets valid
+        if changed:
+            BracketCache.invalidate(group.category_id)
+        return standings_list
+
+    @staticmethod
+    def _standing_figures(standings):
+        """Counters and position of each standing by participant, to compare a group before and after"""
+        return {
+            (standing.team_id, standing.player_id):
+                tuple(getattr(standing, field) for field in BracketService.STANDING_COUNTERS) + (standing.position,)
+            for standing in standings
+        }
+
+    # GroupStanding counters in the order used by match contributions
+    STANDING_COUNTERS = (
+        'matches_played', 'matches_won', 'matches_lost',
+        'sets_won', 'sets_lost', 'points_won', 'points_lost'
+    )
+
+    @staticmethod
+    def get_match_contribution(match, scores=None):
+        """
+        Get what a match contributes to its participants' group standings.
+
+        Returns a dict of participant id (team id for doubles, player id for
+        singles) -> tuple of counters in STANDING_COUNTERS order. Incomplete
+        matches contribute nothing. Uses the same rules as the full recompute
+        in update_group_standings so both paths always agree.
+        """
+        if not match.completed:
+            return {}
+        
+        if scores is None:
+            scores = match.scores.all()
+        
+        if match.is_doubles:
+            sides = ((match.team1_id, True), (match.team2_id, False))
+            winner_id = match.winning_team_id
+        else:
+            sides = ((match.player1_id, True), (match.player2_id, False))
+            winner_id = match.winning_player_id
+        
+        contribution = {}
+        for participant_id, is_side1 in sides:
+            if not participant_id:
+                continue
+            
+            won = 1 if winner_id == participant_id else 0
+            sets_won = sets_lost = points_won = points_lost = 0
+            for score in scores:
+                own, other = (score.player1_score, score.player2_score) if is_side1 \
+                    else (score.player2_score, score.player1_score)
+                if own > other:
+                    sets_won += 1
+                else:
+                    sets_lost += 1
+                points_won += own
+                points_lost += other
+            
+            contribution[participant_id] = (1, won, 1 - won, sets_won, sets_lost, points_won, points_lost)
+        
+        return contribution
+
+    @staticmethod
+    def apply_match_to_standings(match, previous_contribution):
+        """
+        Incrementally update group standings after a single match changed.
+
+        Subtracts the match's previous contribution (from get_match_contribution,
+        captured before the change) and adds its current one, touching only the
+        two participants' rows instead of replaying the whole group. Positions
+        are then re-ranked. Falls back to a full recompute if a participant has
+        no standing row yet.
+        """
+        group_id = match.group_id
+        if not group_id:
+            return None
+        
+        new_contribution = BracketService.get_match_contribution(match)
+        participant_ids = set(previous_contribution) | set(new_contribution)
+        if not participant_ids:
+            return None
+        
+        is_doubles = match.is_doubles
+        id_column = GroupStanding.team_id if is_doubles else GroupStanding.player_id
+        rows = GroupStanding.query.filter(
+            GroupStanding.group_id == group_id,
+            id_column.in_(participant_ids)
+        ).all()
+        standings = {(row.team_id if is_doubles else row.player_id): row for row in rows}
+        
+        if set(standings) != participant_ids:
+            # Participants changed since the group was created - rebuild from scratch
+            return BracketService.update_group_standings(group_id)
+        
+        no_contribution = (0,) * len(BracketService.STANDING_COUNTERS)
+        for participant_id, standing in standings.items():
+            old = previous_contribution.get(participant_id, no_contribution)
+            new = new_contribution.get(participant_id, no_contribution)
+            for field, old_value, new_value in zip(BracketService.STANDING_COUNTERS, old, new):
+                setattr(standing, field, (getattr(standing, field) or 0) - old_value + new_value)
+        
+        # Re-rank the group (counter changes can move any participant)
+        standings_list = GroupStanding.query.filter_by(group_id=group_id).all()
+        BracketService._calculate_group_positions(standings_list, match.category.tiebreak_order)
         
         db.session.commit()
+        BracketCache.invalidate(match.category_id)
         return standings_list
 
+    @staticmethod
+    def reconcile_group_standings(category_id=None):
+        """
+        Fully recompute standings for every group of ongoing tournaments
+        (optionally of one category) to correct any drift from incremental
+        updates. Finished and upcoming tournaments take no results, so their
+        groups are left alone. Returns the number of groups reconciled.
+        """
+        groups_query = Group.query.join(TournamentCategory).join(Tournament).filter(
+            Tournament.status == TournamentStatus.ONGOING
+        )
+        if category_id is not None:
+            groups_query = groups_query.filter(Group.category_id == category_id)
+        
+        group_ids = [g.id for g in groups_query.all()]
+        for group_id in group_ids:
+            BracketService.update_group_standings(group_id)
+        
+        return len(group_ids)
+
     @staticmethod
     def _reset_standing_counters(standing):
         """Reset all counters in a standing to zero"""
@@ -456,136 +547,37 @@ class BracketService:
                 ).delete(synchronize_session=False)
     
     @staticmethod
-    def _calculate_group_positions(standings):
+    def _calculate_group_positions(standings, tiebreak_order=None):
         """
         Sort and assign positions to standings within a group.
         Uses the following tiebreak criteria in order:
         1. Matches won
-        2. Head-to-head record with other tied players
-        3. Point differential
+        2. The category's tiebreak order (default: head-to-head record with
+           other tied players, then point differential)
+
+        All tied clusters are resolved by TiebreakEngine from a single fetch
+        of the group's completed matches.
         """
         if not standings:
             return
         
-        # Step 1: Group standings by matches won (to identify ties)
-        standings_by_wins = {}
-        for standing in standings:
-            wins = standing.matches_won
-            if wins not in standings_by_wins:
-                standings_by_wins[wins] = []
-            standings_by_wins[wins].append(standing)
-        
-        # Step 2: Process each win group, applying tiebreakers where needed
-        final_standings = []
-        
-        # Process win groups in descending order (most wins first)
-        for wins in sorted(standings_by_wins.keys(), reverse=True):
-            tied_standings = standings_by_wins[wins]
-            
-            # If only one participant with this win count, no tiebreaker needed
-            if len(tied_standings) == 1:
-                final_standings.append(tied_standings[0])
-                continue
-            
-            # We have multiple participants with the same win count
-            # Apply head-to-head tiebreaker
-            sorted_tied = BracketService._apply_tiebreakers(tied_standings)
-            final_standings.extend(sorted_tied)
-        
-        # Assign positions based on final order
-        for i, standing in enumerate(final_standings, 1):
+        engine = TiebreakEngine(standings, tiebreak_order=tiebreak_order)
+        for i, standing in enumerate(engine.rank(), 1):
             standing.position = i
 
     @staticmethod
-    def _apply_tiebreakers(tied_standings):
+    def _apply_tiebreakers(tied_standings, tiebreak_order=None):
         """
         Apply tiebreakers to a group of standings with equal matches won.
         Primary: Head-to-head record
         Secondary: Point differential
+        (or the given tiebreak order)
         """
         if len(tied_standings) <= 1:
             return tied_standings
         
-        # Get group ID (should be the same for all tied standings)
-        group_id = tied_standings[0].group_id
-        
-        # Create a dictionary to track head-to-head records
-        h2h_records = {}
-        
-        # Initialize head-to-head records
-        for s in tied_standings:
-            key = ('player', s.player_id) if s.player_id else ('team', s.team_id)
-            h2h_records[key] = {
-                'h2h_wins': 0,
-                'original_standing': s
-            }
-        
-        # Get all participant IDs for query
-        player_ids = [s.player_id for s in tied_standings if s.player_id is not None]
-        team_ids = [s.team_id for s in tied_standings if s.team_id is not None]
-        
-        # Query matches between tied participants
-        all_h2h_matches = []
-        
-        # Get singles matches between tied players
-        if player_ids:
-            player_matches = Match.query.filter_by(
-                group_id=group_id,
-                completed=True
-            ).filter(
-                Match.player1_id.in_(player_ids),
-                Match.player2_id.in_(player_ids)
-            ).all()
-            all_h2h_matches.extend(player_matches)
-        
-        # Get doubles matches between tied teams
-        if team_ids:
-            team_matches = Match.query.filter_by(
-                group_id=group_id,
-                completed=True
-            ).filter(
-                Match.team1_id.in_(team_ids),
-                Match.team2_id.in_(team_ids)
-            ).all()
-            all_h2h_matches.extend(team_matches)
-        
-        # Process head-to-head matches
-        for match in all_h2h_matches:
-            # Singles match
-            if match.player1_id and match.player2_id and match.player1_id in player_ids and match.player2_id in player_ids:
-                p1_key = ('player', match.player1_id)
-                p2_key = ('player', match.player2_id)
-                
-                # Only count if both players are in tied group (should always be true due to our filter)
-                if p1_key in h2h_records and p2_key in h2h_records:
-                    if match.winning_player_id == match.player1_id:
-                        h2h_records[p1_key]['h2h_wins'] += 1
-                    elif match.winning_player_id == match.player2_id:
-                        h2h_records[p2_key]['h2h_wins'] += 1
-            
-            # Doubles match
-            elif match.team1_id and match.team2_id and match.team1_id in team_ids and match.team2_id in team_ids:
-                t1_key = ('team', match.team1_id)
-                t2_key = ('team', match.team2_id)
-                
-                # Only count if both teams are in tied group (should always be true due to our filter)
-                if t1_key in h2h_records and t2_key in h2h_records:
-                    if match.winning_team_id == match.team1_id:
-                        h2h_records[t1_key]['h2h_wins'] += 1
-                    elif match.winning_team_id == match.team2_id:
-                        h2h_records[t2_key]['h2h_wins'] += 1
-        
-        # Sort by head-to-head wins (primary), then point differential (secondary)
-        sorted_tied = sorted(
-            tied_standings,
-            key=lambda s: (
-                h2h_records[('player', s.player_id) if s.player_id else ('team', s.team_id)]['h2h_wins'],
-                s.points_won - s.points_lost
-            ),
-            reverse=True
-        )
-        
-        return sorted_tied
+        engine = TiebreakEngine(tied_standings, tiebreak_order=tiebreak_order)
+        return [tied_standings[i] for i in engine.order_cluster(range(len(tied_standings)))]
 
     @staticmethod
     def advance_winner(match):
@@ -599,11 +591,15 @@ class BracketService:
             # Match isn't complete yet, can't advance
             return False
         
+        # Matches whose participants change, for the live score feed
+        advanced = []
+        
         # --- First, handle the winner's advancement to the next match ---
         if match.next_match_id:
             # Get the next match
             next_match = Match.query.get(match.next_match_id)
             if next_match:
+                advanced.append(next_match)
                 # Determine whether winner goes to position 1 or 2 in the next match
                 # Usually based on match_order: even goes to position 1, odd to position 2
                 position = 1
@@ -651,6 +647,7 @@ class BracketService:
             ).first()
             
             if third_place_match:
+                advanced.append(third_place_match)
                 # Determine which position this semifinal loser should take in the 3rd place match
                 # First semifinal loser goes to position 1, second to position 2
                 position = 1
@@ -682,7 +679,11 @@ class BracketService:
                             third_place_match.player2_code = match.player2_code
                     
         # Save changes
+        LiveScoreFeed.touch(*advanced)
         db.session.commit()
+        BracketCache.invalidate(match.category_id)
+        LiveScoreFeed.broadcast(*advanced)
+        CourtBoard.publish(match.category.tournament_id, [m.court for m in advanced])
         
         # Emit socket event to update brackets
         try:
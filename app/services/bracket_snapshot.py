@@ -0,0 +1,169 @@
+from types import MappingProxyType
+from collections import defaultdict
+from flask import abort
+from sqlalchemy.orm import joinedload
+from app.models import (
+    TournamentCategory, Match, MatchScore, Group, GroupStanding, Team,
+    TournamentFormat, MatchStage
+)
+
+
+class BracketSnapshot:
+    """
+    Read-only, fully loaded view of a category's bracket.
+
+    Everything a bracket page needs (category, tournament, matches with their
+    players/teams/groups, set scores, groups and standings) is fetched in a
+    fixed number of queries, independent of the draw size. Once loaded,
+    templates, JSON serializers and PlacingService can walk the snapshot
+    without triggering lazy loads.
+    """
+
+    __slots__ = (
+        '_category', '_tournament', '_matches', '_scores', '_groups',
+        '_standings', '_group_matches', '_knockout_rounds'
+    )
+
+    def __init__(self, category, matches, scores, groups, standings):
+        self._category = category
+        self._tournament = category.tournament
+        self._matches = tuple(matches)
+        self._scores = MappingProxyType({
+            match_id: tuple(match_scores) for match_id, match_scores in scores.items()
+        })
+        self._groups = tuple(groups)
+        self._standings = MappingProxyType({
+            group_id: tuple(group_standings) for group_id, group_standings in standings.items()
+        })
+
+        # Index matches once so lookups by group/round are dictionary hits
+        group_matches = defaultdict(list)
+        knockout_rounds = defaultdict(list)
+        for match in self._matches:
+            if match.stage == MatchStage.GROUP and match.group_id is not None:
+                group_matches[match.group_id].append(match)
+            elif match.stage in (MatchStage.KNOCKOUT, MatchStage.PLAYOFF):
+                knockout_rounds[match.round].append(match)
+
+        for matches_list in group_matches.values():
+            matches_list.sort(key=lambda m: (m.match_order is None, m.match_order))
+        for matches_list in knockout_rounds.values():
+            matches_list.sort(key=lambda m: m.match_order)
+
+        self._group_matches = MappingProxyType({k: tuple(v) for k, v in group_matches.items()})
+        self._knockout_rounds = MappingProxyType({k: tuple(v) for k, v in knockout_rounds.items()})
+
+    @classmethod
+    def load(cls, category_id):
+        """
+        Load a snapshot for a category, aborting with 404 if it does not exist.
+
+        Issues five queries regardless of bracket size: category (with
+        tournament), matches (with participants and group), set scores,
+        groups, and group standings (with participants).
+        """
+        category = TournamentCategory.query.options(
+            joinedload(TournamentCategory.tournament)
+        ).filter_by(id=category_id).first()
+        if category is None:
+            abort(404)
+
+        matches = Match.query.options(
+            joinedload(Match.player1),
+            joinedload(Match.player2),
+            joinedload(Match.team1).joinedload(Team.player1),
+            joinedload(Match.team1).joinedload(Team.player2),
+            joinedload(Match.team2).joinedload(Team.player1),
+            joinedload(Match.team2).joinedload(Team.player2),
+            joinedload(Match.group)
+        ).filter(Match.category_id == category_id).all()
+
+        scores = defaultdict(list)
+        if matches:
+            score_rows = MatchScore.query.join(Match, MatchScore.match_id == Match.id).filter(
+                Match.category_id == category_id
+            ).order_by(MatchScore.match_id, MatchScore.set_number).all()
+            for score in score_rows:
+                scores[score.match_id].append(score)
+
+        groups = Group.query.filter_by(category_id=category_id).order_by(Group.id).all()
+
+        standings = defaultdict(list)
+        if groups:
+            standing_rows = GroupStanding.query.options(
+                joinedload(GroupStanding.player),
+                joinedload(GroupStanding.team).joinedload(Team.player1),
+                joinedload(GroupStanding.team).joinedload(Team.player2)
+            ).filter(
+                GroupStanding.group_id.in_([g.id for g in groups])
+            ).order_by(GroupStanding.group_id, GroupStanding.position).all()
+            for standing in standing_rows:
+                standings[standing.group_id].append(standing)
+
+        return cls(category, matches, scores, groups, standings)
+
+    @property
+    def category(self):
+        return self._category
+
+    @property
+    def tournament(self):
+        return self._tournament
+
+    @property
+    def is_doubles(self):
+        return self._category.is_doubles()
+
+    @property
+    def has_group_stage(self):
+        return self._tournament.format == TournamentFormat.GROUP_KNOCKOUT
+
+    @property
+    def matches(self):
+        """All matches in the category"""
+        return self._matches
+
+    @property
+    def scores(self):
+        """Mapping of match id -> tuple of MatchScore ordered by set number"""
+        return self._scores
+
+    @property
+    def groups(self):
+        return self._groups
+
+    @property
+    def knockout_rounds(self):
+        """Mapping of round number -> knockout/playoff matches ordered by match_order"""
+        return self._knockout_rounds
+
+    def scores_for(self, match_id):
+        """Get the set scores for a match (empty tuple if none recorded)"""
+        return self._scores.get(match_id, ())
+
+    def standings_for(self, group_id):
+        """Get the standings for a group ordered by position"""
+        return self._standings.get(group_id, ())
+
+    def matches_for_group(self, group_id):
+        """Get the group-stage matches for a group ordered by match_order"""
+        return self._group_matches.get(group_id, ())
+
+    def is_complete(self):
+        """True when every match in the category has been completed"""
+        return all(m.completed for m in self._matches)
+
+    def group_data(self):
+        """Group data in the shape returned by BracketService.get_group_data"""
+        return [
+            {
+                'group': group,
+                'standings': list(self.standings_for(group.id)),
+                'matches': list(self.matches_for_group(group.id))
+            }
+            for group in self._groups
+        ]
+
+    def scores_dict(self):
+        """Plain dict of match id -> list of scores, as used by the bracket templates"""
+        return {match.id: list(self.scores_for(match.id)) for match in self._matches}
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import exists
+from sqlalchemy.orm import joinedload
+from app import db, socketio
+from app.models import TournamentCategory, Match, MatchScore, CourtState
+from app.services.score_loader import ScoreLoader
+
+
+class CourtBoard:
+    """
+    Per-tournament court board: what is playing on each court and what is next.
+
+    A scheduled match (court and time set) moves through the board as
+    QUEUED -> PLAYING -> gone once completed or moved. A court's playing
+    match keeps the court until then; a free court takes the earliest
+    pending match with scores recorded, otherwise the earliest whose
+    participants are both known. The rest stay queued in scheduled order.
+    Writers call publish() for the courts they touched and only those courts
+    are recomputed; readers get one CourtState row per court. Reads never
+    write: until a writer (or `flask rebuild-court-boards`) has stored a
+    tournament's board, readers get it computed on the fly.
+    """
+
+    @staticmethod
+    def states(tournament_id):
+        """Board rows for a tournament ordered by court, computed without storing them if none exist yet"""
+        states = CourtState.query.filter_by(tournament_id=tournament_id).order_by(CourtState.court).all()
+        if not states:
+            states = CourtBoard._compute(tournament_id, {}, persist=False)
+        return states
+
+    @staticmethod
+    def rebuild(tournament_id):
+        """Recompute and store every court of a tournament (commits)"""
+        existing = {s.court: s for s in CourtState.query.filter_by(tournament_id=tournament_id)}
+        states = CourtBoard._compute(tournament_id, existing)
+        db.session.commit()
+        return states
+
+    @staticmethod
+    def refresh(tournament_id, courts):
+        """Recompute the given courts after their matches changed (commits)"""
+        courts = sorted({court for court in courts if court})
+        if not courts:
+            return []
+        if not db.session.query(exists().where(CourtState.tournament_id == tournament_id)).scalar():
+            # First write for this tournament: store the whole board, not just these courts
+            return [state for state in CourtBoard.rebuild(tournament_id) if state.court in courts]
+        rows = CourtBoard._pending_rows(tournament_id, courts)
+        existing = {s.court: s for s in CourtState.query.filter(
+            CourtState.tournament_id == tournament_id, CourtState.court.in_(courts)
+        )}
+        states = [CourtBoard._apply(tournament_id, court, [r for r in rows if r.court == court], existing.get(court))
+                  for court in courts]
+        db.session.commit()
+        return states
+
+    @staticmethod
+    def publish(tournament_id, courts, match=None):
+        """Refresh courts and push each new state to the courts view room"""
+        states = CourtBoard.refresh(tournament_id, courts)
+        for state in states:
+            payload = {'tournament_id': tournament_id, 'court': state.court, 'board': state.to_dict()}
+            if match is not None:
+                payload['match_id'] = match.id
+                payload['status'] = 'completed' if match.completed else 'in_progress'
+            socketio.emit('court_update', payload, room=f'courts_view_{tournament_id}')
+        return states
+
+    @staticmethod
+    def load_view(tournament_id):
+        """
+        Board rows plus the now-playing and next matches they reference.
+
+        Returns (states, matches by id, scores of the now-playing matches), in
+        a fixed number of queries whatever the number of scheduled matches.
+        """
+        states = CourtBoard.states(tournament_id)
+        current_ids = [s.current_match_id for s in states if s.current_match_id]
+        ids = current_ids + [s.next_match_id for s in states if s.next_match_id]
+        matches = {}
+        if ids:
+            matches = {m.id: m for m in Match.query.filter(Match.id.in_(ids)).options(
+                joinedload(Match.category), *ScoreLoader.participant_options()
+            )}
+        scores = ScoreLoader.load(current_ids)
+        return states, matches, scores
+
+    @staticmethod
+    def _compute(tournament_id, existing, persist=True):
+        """Board rows for every court with pending matches or an existing row"""
+        by_court = {}
+        for row in CourtBoard._pending_rows(tournament_id):
+            by_court.setdefault(row.court, []).append(row)
+        return [CourtBoard._apply(tournament_id, court, by_court.get(court, []), existing.get(court), persist)
+                for court in sorted(set(by_court) | set(existing))]
+
+    @staticmethod
+    def _pending_rows(tournament_id, courts=None):
+        has_scores = exists().where(MatchScore.match_id == Match.id)
+        query = db.session.query(
+            Match.id, Match.court, Match.scheduled_time,
+            Match.player1_id, Match.player2_id, Match.team1_id, Match.team2_id,
+            has_scores.label('started')
+        ).join(TournamentCategory, Match.category_id == TournamentCategory.id).filter(
+            TournamentCategory.tournament_id == tournament_id,
+            Match.court.isnot(None),
+            Match.scheduled_time.isnot(None),
+            Match.completed == False
+        )
+        if courts is not None:
+            query = query.filter(Match.court.in_(courts))
+        return query.order_by(Match.scheduled_time, Match.id).all()
+
+    @staticmethod
+    def _apply(tournament_id, court, rows, state, persist=True):
+        """Move a court to the state implied by its pending matches"""
+        if state is None:
+            state = CourtState(tournament_id=tournament_id, court=court)
+            if persist:
+                db.session.add(state)
+
+        # A match stays on court until it completes or moves, unless another one has started
+        started = next((r for r in rows if r.started), None)
+        previous = next((r for r in rows if r.id == state.current_match_id), None)
+        if previous is not None and (previous.started or (started is None and CourtBoard._is_ready(previous))):
+            current = previous
+        else:
+            current = started or next((r for r in rows if CourtBoard._is_ready(r)), None)
+
+        now = datetime.now()
+        current_id = current.id if current else None
+        if current_id != state.current_match_id:
+            state.current_match_id = current_id
+            state.current_since = now if current_id else None
+        queued = [r for r in rows if r.id != current_id]
+        state.queue = [r.id for r in queued]
+
+        state.next_eta = None
+        if queued:
+            state.next_eta = queued[0].scheduled_time
+            if state.current_since:
+                match_length = timedelta(minutes=current_app.config['COURT_MATCH_MINUTES'])
+                expected_free = state.current_since + match_length
+                state.next_eta = max(state.next_eta, expected_free)
+        return state
+
+    @staticmethod
+    def _is_ready(row):
+        return bool((row.player1_id and row.player2_id) or (row.team1_id and row.team2_id))
@@ -0,0 +1,203 @@
+from datetime import datetime
+from itertools import chain
+from flask import current_app
+from sqlalchemy import event, select, update, insert, func, case, and_, inspect
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Tournament, TournamentCategory, Registration, RegistrationSummary
+
+# Per-tournament figures shown on the organizer dashboard
+METRICS = ('total', 'pending', 'approved', 'revenue')
+# session.info key for the figures of flushed registrations as they were before the flush
+_PREVIOUS_FIGURES = 'dashboard_metrics_previous_figures'
+# Registration attributes the figures depend on (a move may only set the category relationship)
+_FIGURE_ATTRIBUTES = ('category_id', 'category', 'payment_status', 'payment_verified', 'registration_fee')
+
+
+class DashboardMetrics:
+    """
+    Registration and payment figures per tournament for the organizer dashboard.
+
+    aggregate() computes them for any number of tournaments with one GROUP BY
+    over their registrations. With DASHBOARD_SUMMARY_TABLE on, the figures
+    are kept in registration_summary instead: a flush that adds, changes or
+    removes registrations adds the difference it makes to the rows of the
+    tournaments involved (an UPDATE ... SET total = total + :delta, or an
+    upsert of the full aggregate for a tournament without a row yet), so
+    concurrent registrations never rewrite or overwrite each other's rows and
+    the dashboard reads one indexed row per tournament however many
+    registrations there are.
+    """
+
+    @staticmethod
+    def init_app(app):
+        """Keep registration_summary in step with flushed registrations"""
+        if not event.contains(Session, 'before_flush', DashboardMetrics._before_flush):
+            event.listen(Session, 'before_flush', DashboardMetrics._before_flush)
+        if not event.contains(Session, 'after_flush', DashboardMetrics._after_flush):
+            event.listen(Session, 'after_flush', DashboardMetrics._after_flush)
+
+    @staticmethod
+    def for_tournaments(tournaments):
+        """Mapping of tournament id -> dict of METRICS, in one query once the summary is populated"""
+        tournament_ids = [tournament.id for tournament in tournaments]
+        if not tournament_ids:
+            return {}
+        if not current_app.config.get('DASHBOARD_SUMMARY_TABLE', True):
+            return DashboardMetrics.aggregate(tournament_ids)
+
+        metrics = {
+            row.tournament_id: {name: getattr(row, name) for name in METRICS}
+            for row in db.session.execute(
+                select(RegistrationSummary).where(RegistrationSummary.tournament_id.in_(tournament_ids))
+            ).scalars()
+        }
+        missing = [tournament_id for tournament_id in tournament_ids if tournament_id not in metrics]
+        if missing:
+            # Tournaments summarized for the first time (or since the table was enabled)
+            metrics.update(DashboardMetrics.refresh(missing))
+        return metrics
+
+    @staticmethod
+    def aggregate(tournament_ids, connection=None):
+        """Mapping of tournament id -> dict of METRICS computed from the registrations, in one query"""
+        verified_paid = and_(Registration.payment_status == 'paid', Registration.payment_verified == True)
+        query = select(
+            TournamentCategory.tournament_id,
+            func.count(Registration.id),
+            func.count(case((and_(Registration.payment_status == 'uploaded',
+                                  Registration.payment_verified == False), 1))),
+            func.count(case((Registration.payment_verified == True, 1))),
+            func.coalesce(func.sum(case((verified_paid, func.coalesce(Registration.registration_fee, 0.0)),
+                                        else_=0.0)), 0.0),
+        ).join(Registration, Registration.category_id == TournamentCategory.id).where(
+            TournamentCategory.tournament_id.in_(tournament_ids)
+        ).group_by(TournamentCategory.tournament_id)
+
+        metrics = {tournament_id: dict.fromkeys(METRICS, 0) for tournament_id in tournament_ids}
+        for tournament_id, *values in (connection or db.session).execute(query):
+            metrics[tournament_id] = dict(zip(METRICS, values))
+        for figures in metrics.values():
+            figures['revenue'] = float(figures['revenue'])
+        return metrics
+
+    @staticmethod
+    def refresh(tournament_ids=None):
+        """Recompute the summary rows of the given tournaments (all when None) and commit"""
+        if tournament_ids is None:
+            tournament_ids = db.session.execute(select(Tournament.id)).scalars().all()
+        metrics = DashboardMetrics._rewrite(db.session.connection(), tournament_ids)
+        db.session.commit()
+        return metrics
+
+    @staticmethod
+    def _rewrite(connection, tournament_ids):
+        metrics = DashboardMetrics.aggregate(tournament_ids, connection)
+        now = datetime.utcnow()
+        for tournament_id, figures in metrics.items():
+            values = dict(figures, tournament_id=tournament_id, updated_at=now)
+            _upsert(connection, values, {name: values[name] for name in (*METRICS, 'updated_at')})
+        return metrics
+
+    @staticmethod
+    def _before_flush(session, flush_context, instances):
+        if not current_app.config.get('DASHBOARD_SUMMARY_TABLE', True):
+            return
+        # Figures of changed and deleted registrations as stored, read while the rows still have them
+        changed = [obj.id for obj in chain(session.dirty, session.deleted)
+                   if isinstance(obj, Registration) and obj.id
+                   and (obj in session.deleted or _changed(obj, *_FIGURE_ATTRIBUTES))]
+        if changed:
+            previous = session.info.setdefault(_PREVIOUS_FIGURES, {})
+            previous.update(_figures(session.connection(), changed))
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        if not current_app.config.get('DASHBOARD_SUMMARY_TABLE', True):
+            return
+        previous = session.info.pop(_PREVIOUS_FIGURES, {})
+        current_ids = [obj.id for obj in chain(session.new, session.dirty)
+                       if isinstance(obj, Registration) and obj not in session.deleted
+                       and (obj in session.new or obj.id in previous)]
+        if not previous and not current_ids:
+            return
+
+        connection = session.connection()
+        deltas = {}
+        for sign, figures in ((-1, previous), (1, _figures(connection, current_ids) if current_ids else {})):
+            for tournament_id, values in figures.values():
+                delta = deltas.setdefault(tournament_id, dict.fromkeys(METRICS, 0))
+                for name, value in zip(METRICS, values):
+                    delta[name] += sign * value
+        deltas = {tournament_id: delta for tournament_id, delta in deltas.items()
+                  if tournament_id is not None and any(delta.values())}
+        if deltas:
+            DashboardMetrics._apply(connection, deltas)
+
+    @staticmethod
+    def _apply(connection, deltas):
+        """Add {tournament_id: {metric: delta}} to the summary rows, creating missing rows from the aggregate"""
+        table = RegistrationSummary.__table__
+        now = datetime.utcnow()
+        missing = []
+        for tournament_id, delta in deltas.items():
+            updated = connection.execute(
+                update(table).where(table.c.tournament_id == tournament_id).values(
+                    updated_at=now, **{name: table.c[name] + delta[name] for name in METRICS}
+                )
+            ).rowcount
+            if not updated:
+                missing.append(tournament_id)
+        if not missing:
+            return
+
+        # Only tournaments that still exist: a deleted one takes its summary row with it
+        existing = set(connection.execute(select(Tournament.id).where(Tournament.id.in_(missing))).scalars())
+        metrics = DashboardMetrics.aggregate([t for t in missing if t in existing], connection)
+        for tournament_id, figures in metrics.items():
+            # The aggregate already counts this transaction's registrations; if another
+            # transaction created the row meanwhile, add this flush's difference to it
+            _upsert(connection, dict(figures, tournament_id=tournament_id, updated_at=now),
+                    {name: table.c[name] + deltas[tournament_id][name] for name in METRICS})
+
+
+def _figures(connection, registration_ids):
+    """{registration id: (tournament id, figures in METRICS order)} as stored in the database"""
+    rows = connection.execute(
+        select(Registration.id, TournamentCategory.tournament_id, Registration.payment_status,
+               Registration.payment_verified, Registration.registration_fee)
+        .outerjoin(TournamentCategory, TournamentCategory.id == Registration.category_id)
+        .where(Registration.id.in_(registration_ids))
+    )
+    return {
+        registration_id: (tournament_id, (
+            1,
+            int(payment_status == 'uploaded' and not verified),
+            int(bool(verified)),
+            float(fee or 0.0) if payment_status == 'paid' and verified else 0.0,
+        ))
+        for registration_id, tournament_id, payment_status, verified, fee in rows
+    }
+
+
+def _upsert(connection, values, on_conflict):
+    """INSERT a summary row, or apply on_conflict ({column: expression}) to the row already there"""
+    table = RegistrationSummary.__table__
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        statement = (postgresql if dialect == 'postgresql' else sqlite).insert(table).values(values)
+        statement = statement.on_conflict_do_update(index_elements=[table.c.tournament_id], set_=on_conflict)
+    elif dialect in ('mysql', 'mariadb'):
+        statement = mysql.insert(table).values(values).on_duplicate_key_update(on_conflict)
+    else:
+        if not connection.execute(update(table).where(table.c.tournament_id == values['tournament_id'])
+                                  .values(on_conflict)).rowcount:
+            connection.execute(insert(table).values(values))
+        return
+    connection.execute(statement)
+
+
+def _changed(obj, *attributes):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
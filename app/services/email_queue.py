@@ -0,0 +1,307 @@
+import queue
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import BadHeaderError
+from sqlalchemy import and_, event, or_, update
+from sqlalchemy.orm import Session
+from app import db, mail
+from app.models import EmailOutbox, EmailStatus
+
+# session.info key: outbox ids flushed in the current transaction, handed to the workers once it commits
+_QUEUED_IDS = 'email_queue_outbox_ids'
+
+
+class EmailWorkerPool:
+    """
+    Worker threads delivering outbox rows for one app.
+
+    Outbox ids travel through a bounded in-memory queue; a worker takes one,
+    drains up to batch_size more and sends them all over a single SMTP
+    connection. When the queue is full enqueue() does not wait: the row stays
+    pending and an idle worker sweeps it from the outbox, together with rows
+    due for a retry and rows left behind by a previous process.
+    """
+
+    # A row claimed longer ago than this was abandoned by a dead worker
+    CLAIM_TIMEOUT = timedelta(minutes=10)
+
+    def __init__(self, app):
+        self.app = app
+        self.run_async = app.config.get('EMAIL_QUEUE_ASYNC', not app.testing)
+        self.worker_count = app.config.get('EMAIL_QUEUE_WORKERS', 2)
+        self.batch_size = app.config.get('EMAIL_BATCH_SIZE', 50)
+        self.max_attempts = app.config.get('EMAIL_MAX_ATTEMPTS', 5)
+        self.retry_base = app.config.get('EMAIL_RETRY_BASE_SECONDS', 60)
+        self.poll_seconds = app.config.get('EMAIL_QUEUE_POLL_SECONDS', 30)
+        self.queue = queue.Queue(maxsize=app.config.get('EMAIL_QUEUE_MAXSIZE', 1000))
+        self.workers = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ('enqueued', 'overflowed', 'sent', 'retried', 'failed', 'batches', 'connections'), 0
+        )
+        self._send_seconds = 0.0
+
+    def start(self):
+        if not self.run_async or self.workers:
+            return
+        for number in range(self.worker_count):
+            worker = threading.Thread(target=self._work, name=f'email-worker-{number}', daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        for _ in self.workers:
+            try:
+                # Wake workers waiting on an empty queue
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                break
+        for worker in self.workers:
+            worker.join(timeout)
+        self.workers = []
+
+    def submit(self, outbox_ids):
+        self._count('enqueued', len(outbox_ids))
+        if not self.run_async:
+            # A session of its own, as the workers use: the caller's has just committed
+            with self.app.app_context():
+                for start in range(0, len(outbox_ids), self.batch_size):
+                    self.deliver(outbox_ids[start:start + self.batch_size])
+            return
+        for outbox_id in outbox_ids:
+            try:
+                self.queue.put_nowait(outbox_id)
+            except queue.Full:
+                # Still pending in the outbox; the next sweep delivers it
+                self._count('overflowed')
+
+    def join(self, timeout=None):
+        """Wait until every queued id has been processed; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def metrics(self):
+        with self._lock:
+            data = dict(self._counters)
+            send_seconds = self._send_seconds
+        data['queued'] = self.queue.qsize()
+        data['workers'] = sum(1 for worker in self.workers if worker.is_alive())
+        data['send_seconds'] = round(send_seconds, 3)
+        data['throughput_per_second'] = round(data['sent'] / send_seconds, 2) if send_seconds else 0.0
+        return data
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _work(self):
+        # Pick up whatever an earlier process left in the outbox before waiting
+        self._sweep()
+        while not self._stopping.is_set():
+            try:
+                ids = [self.queue.get(timeout=self.poll_seconds)]
+            except queue.Empty:
+                self._sweep()
+                continue
+            while len(ids) < self.batch_size:
+                try:
+                    ids.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if not self._stopping.is_set():
+                    with self.app.app_context():
+                        self.deliver([i for i in ids if i is not None])
+            except Exception:
+                self.app.logger.exception("Email worker failed to deliver a batch")
+            finally:
+                for _ in ids:
+                    self.queue.task_done()
+
+    def _sweep(self):
+        try:
+            with self.app.app_context():
+                while not self._stopping.is_set():
+                    ids = self.due_ids()
+                    if not ids or not self.deliver(ids):
+                        break
+        except Exception:
+            self.app.logger.exception("Email worker failed to sweep the outbox")
+
+    def due_ids(self):
+        """Next batch of outbox rows waiting for delivery, oldest due first"""
+        return [row.id for row in db.session.query(EmailOutbox.id).filter(
+            self._claimable(datetime.utcnow())
+        ).order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(self.batch_size)]
+
+    def _claimable(self, now):
+        return or_(
+            and_(EmailOutbox.status == EmailStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == EmailStatus.SENDING, EmailOutbox.claimed_at < now - self.CLAIM_TIMEOUT)
+        )
+
+    def _claim(self, outbox_ids):
+        """Mark rows as being sent by this worker; rows another worker got first are skipped"""
+        now = datetime.utcnow()
+        claimed = []
+        for outbox_id in outbox_ids:
+            result = db.session.execute(
+                update(EmailOutbox).where(EmailOutbox.id == outbox_id, self._claimable(now))
+                .values(status=EmailStatus.SENDING, claimed_at=now, attempts=EmailOutbox.attempts + 1)
+            )
+            if result.rowcount:
+                claimed.append(outbox_id)
+        db.session.commit()
+        if not claimed:
+            return []
+        return EmailOutbox.query.filter(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id).all()
+
+    def deliver(self, outbox_ids):
+        """Send the given outbox rows over one SMTP connection; returns how many were claimed"""
+        entries = self._claim(outbox_ids)
+        if not entries:
+            return 0
+        started = time.monotonic()
+        try:
+            with mail.connect() as connection:
+                self._count('connections')
+                for entry in entries:
+                    try:
+                        connection.send(entry.to_message())
+                    except Exception as e:
+                        self._failed(entry, e)
+                    else:
+                        entry.status = EmailStatus.SENT
+                        entry.sent_at = datetime.utcnow()
+                        self._count('sent')
+        except Exception as e:
+            # Could not connect, or the connection dropped mid-batch
+            for entry in entries:
+                if entry.status == EmailStatus.SENDING:
+                    self._failed(entry, e)
+        db.session.commit()
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._counters['batches'] += 1
+            self._send_seconds += elapsed
+        current_app.logger.info(f"Email batch: {len(entries)} message(s) in {elapsed:.2f}s")
+        return len(entries)
+
+    def _failed(self, entry, error):
+        entry.last_error = f"{type(error).__name__}: {error}"[:1000]
+        permanent = isinstance(error, (smtplib.SMTPRecipientsRefused, BadHeaderError, AssertionError)) or \
+            getattr(error, 'smtp_code', 0) >= 500
+        if permanent or entry.attempts >= self.max_attempts:
+            entry.status = EmailStatus.FAILED
+            self._count('failed')
+            current_app.logger.error(f"Giving up on email {entry.id} to {entry.recipients}: {entry.last_error}")
+        else:
+            entry.status = EmailStatus.PENDING
+            entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=self.retry_base * 2 ** (entry.attempts - 1))
+            self._count('retried')
+            current_app.logger.warning(f"Email {entry.id} failed (attempt {entry.attempts}), retrying: {entry.last_error}")
+
+
+class EmailQueue:
+    """
+    Outbox-backed delivery of outgoing email.
+
+    enqueue() adds each message to the email_outbox table in the caller's
+    transaction; once that commits the rows are handed to a small pool of
+    workers (EmailWorkerPool) that reuse one SMTP connection per batch, retry
+    failures with exponential backoff and keep throughput counters. With
+    EMAIL_QUEUE_ASYNC disabled (the default under testing) the same delivery
+    path runs in the committing thread.
+
+    Worker threads only run in the process serving the app (wsgi.py, run.py)
+    or where EMAIL_QUEUE_START_WORKERS is set; CLI commands and seed scripts
+    leave their rows pending for those workers to sweep.
+    """
+
+    @staticmethod
+    def init_app(app):
+        """Create the worker pool for the app, starting it if EMAIL_QUEUE_START_WORKERS is set"""
+        if not event.contains(Session, 'after_commit', EmailQueue._after_commit):
+            event.listen(Session, 'after_commit', EmailQueue._after_commit)
+        if not event.contains(Session, 'after_rollback', EmailQueue._after_rollback):
+            event.listen(Session, 'after_rollback', EmailQueue._after_rollback)
+        previous = app.extensions.get('email_queue')
+        if previous is not None:
+            previous.stop()
+        pool = app.extensions['email_queue'] = EmailWorkerPool(app)
+        if app.config.get('EMAIL_QUEUE_START_WORKERS', False):
+            pool.start()
+        return pool
+
+    @staticmethod
+    def start_workers(app):
+        """Start the app's delivery workers; called by the serving process"""
+        pool = app.extensions.get('email_queue') or EmailQueue.init_app(app)
+        pool.start()
+        return pool
+
+    @staticmethod
+    def _pool():
+        pool = current_app.extensions.get('email_queue')
+        if pool is None:
+            pool = EmailQueue.init_app(current_app._get_current_object())
+        return pool
+
+    @staticmethod
+    def enqueue(*messages):
+        """Add flask_mail Messages to the outbox (flushes); they are queued for delivery when the caller commits"""
+        entries = [EmailOutbox.from_message(message) for message in messages]
+        if not entries:
+            return []
+        db.session.add_all(entries)
+        db.session.flush()
+        db.session.info.setdefault(_QUEUED_IDS, []).extend(entry.id for entry in entries)
+        return entries
+
+    @staticmethod
+    def _after_commit(session):
+        outbox_ids = session.info.pop(_QUEUED_IDS, None)
+        if outbox_ids:
+            EmailQueue._pool().submit(outbox_ids)
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop(_QUEUED_IDS, None)
+
+    @staticmethod
+    def deliver_due():
+        """Deliver every outbox row that is due now in the calling thread; returns how many were tried"""
+        pool = EmailQueue._pool()
+        total = 0
+        while True:
+            ids = pool.due_ids()
+            delivered = pool.deliver(ids) if ids else 0
+            if not delivered:
+                return total
+            total += delivered
+
+    @staticmethod
+    def join(timeout=None):
+        return EmailQueue._pool().join(timeout)
+
+    @staticmethod
+    def metrics():
+        """Counters since start: enqueued, sent, retried, failed, overflowed, batches, connections, throughput"""
+        return EmailQueue._pool().metrics()
+
+    @staticmethod
+    def shutdown(timeout=5):
+        """Stop the workers; rows not yet delivered stay pending in the outbox"""
+        pool = current_app.extensions.pop('email_queue', None)
+        if pool is not None:
+            pool.stop(timeout)
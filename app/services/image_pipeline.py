@@ -0,0 +1,262 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+from PIL import Image
+from app.helpers.registration import shape_image, fit_image, max_image_size
+
+# Variant name -> longest side; 'full' uses the upload folder's size (see IMAGE_MAX_SIZES)
+IMAGE_VARIANTS = {'thumb': 160, 'card': 480, 'full': None}
+IMAGE_FORMATS = {'jpg': 'JPEG', 'webp': 'WEBP'}
+# Extensions store() gives the common upload formats, tried first when looking for a raw upload
+ORIGINAL_EXTENSIONS = ('jpg', 'png', 'webp', 'gif')
+# <sha256>.<ext> as written by store(), or <sha256>.<variant>.<ext> as written by the workers
+CONTENT_ADDRESSED_NAME = re.compile(r'^[0-9a-f]{64}(\.[a-z]+)?\.[a-z0-9]+$')
+# Upload subfolders holding personal documents: browsers may keep them, shared caches and CDNs may not
+PRIVATE_UPLOAD_FOLDERS = ('payment_proofs',)
+
+
+class ImageWorkerPool:
+    """
+    Worker threads turning stored uploads into their resized variants for one app.
+
+    Work is keyed by the upload's relative path, which contains its content
+    hash: a path already being processed is not submitted again, and one
+    whose variants are already on disk is skipped.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.run_async = app.config.get('IMAGE_PROCESSING_ASYNC', not app.testing)
+        self.worker_count = app.config.get('IMAGE_PROCESSING_WORKERS', 2)
+        self.quality = app.config.get('IMAGE_QUALITY', 85)
+        self.executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.run_async and self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.worker_count, thread_name_prefix='image-worker')
+
+    def stop(self, wait_for_pending=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait_for_pending)
+            self.executor = None
+
+    def submit(self, path, subfolder):
+        with self._lock:
+            if path in self._pending:
+                return self._pending[path]
+            if not self.run_async or self.executor is None:
+                future = None
+            else:
+                future = self._pending[path] = self.executor.submit(self._process_in_app, path, subfolder)
+        if future is None:
+            self.process(path, subfolder)
+        return future
+
+    def join(self, timeout=None):
+        """Wait for every submitted upload; False on timeout"""
+        with self._lock:
+            futures = list(self._pending.values())
+        return not wait(futures, timeout=timeout).not_done
+
+    def _process_in_app(self, path, subfolder):
+        try:
+            with self.app.app_context():
+                self.process(path, subfolder)
+        except Exception:
+            self.app.logger.exception(f"Error processing image {path}")
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+    def process(self, path, subfolder):
+        """Decode the stored upload once and write every variant, largest first"""
+        source = ImagePipeline.absolute_path(self.app, path)
+        targets = {(variant, ext): ImagePipeline.absolute_path(self.app, ImagePipeline.variant_path(path, variant, ext))
+                   for variant in IMAGE_VARIANTS for ext in IMAGE_FORMATS}
+        if all(os.path.exists(target) for target in targets.values()):
+            return False
+
+        img = Image.open(source)
+        img.load()
+        img = shape_image(img, subfolder)
+        sizes = dict(IMAGE_VARIANTS, full=max_image_size(subfolder))
+        # Each variant is scaled down from the previous (larger) one rather than from the original
+        for variant in sorted(sizes, key=sizes.get, reverse=True):
+            img = fit_image(img, sizes[variant])
+            for ext, image_format in IMAGE_FORMATS.items():
+                self._write(img, targets[(variant, ext)], image_format)
+        return True
+
+    def _write(self, img, target, image_format):
+        # Write beside the target and rename, so readers never see a partial file
+        temp = f'{target}.{uuid.uuid4().hex}.tmp'
+        img.save(temp, format=image_format, quality=self.quality)
+        os.replace(temp, target)
+
+
+class ImagePipeline:
+    """
+    Uploaded images stored by content and processed off the request.
+
+    store() writes the upload untouched as uploads/<folder>/<sha256>.<ext>
+    and returns the path of its <sha256>.full.jpg variant right away, so
+    the database never points at the raw upload; an ImageWorkerPool then
+    writes <sha256>.<variant>.jpg and .webp for each of IMAGE_VARIANTS.
+    Until they exist, image_variant() and the upload route fall back to the
+    raw upload. With IMAGE_PROCESSING_ASYNC disabled (the default under
+    testing) the variants are written before store() returns.
+    """
+
+    @staticmethod
+    def init_app(app):
+        """Create the worker pool for the app and start it"""
+        previous = app.extensions.get('image_pipeline')
+        if previous is not None:
+            previous.stop(wait_for_pending=False)
+        pool = app.extensions['image_pipeline'] = ImageWorkerPool(app)
+        pool.start()
+        return pool
+
+    @staticmethod
+    def _pool():
+        pool = current_app.extensions.get('image_pipeline')
+        if pool is None:
+            pool = ImagePipeline.init_app(current_app._get_current_object())
+        return pool
+
+    @staticmethod
+    def absolute_path(app, path):
+        """Filesystem path of an 'uploads/...' path as stored in the database"""
+        relative = path.split('/', 1)[1] if path.startswith('uploads/') else path
+        return os.path.join(app.config['UPLOAD_FOLDER'], *relative.split('/'))
+
+    @staticmethod
+    def variant_path(path, variant, ext='jpg'):
+        """Path of a variant of a stored upload (or of another of its variants), whether or not it has been written yet"""
+        stem, suffix = os.path.splitext(os.path.splitext(path)[0])
+        if suffix[1:] not in IMAGE_VARIANTS:
+            stem += suffix
+        return f'{stem}.{variant}.{ext}'
+
+    @staticmethod
+    def variant_url_path(path, variant='full', ext='jpg'):
+        """The variant's path once it exists; until then the stored path, or the raw upload while it is processed"""
+        if not path:
+            return path
+        candidate = ImagePipeline.variant_path(path, variant, ext)
+        if os.path.exists(ImagePipeline.absolute_path(current_app, candidate)):
+            return candidate
+        if not os.path.exists(ImagePipeline.absolute_path(current_app, path)):
+            original = ImagePipeline.original_file(ImagePipeline.absolute_path(current_app, path))
+            if original:
+                return posixpath.join(posixpath.dirname(path), os.path.basename(original))
+        return path
+
+    @staticmethod
+    def original_file(variant_file):
+        """Filesystem path of the raw upload a variant file is made from, or None if there is none"""
+        stem = ImagePipeline.variant_path(os.path.basename(variant_file), 'full').split('.', 1)[0]
+        if not CONTENT_ADDRESSED_NAME.match(f'{stem}.jpg'):
+            return None
+        folder = os.path.dirname(variant_file)
+        for ext in ORIGINAL_EXTENSIONS:
+            candidate = os.path.join(folder, f'{stem}.{ext}')
+            if os.path.exists(candidate):
+                return candidate
+        for name in os.listdir(folder) if os.path.isdir(folder) else ():
+            # Any other format: the raw upload is the only <sha256>.<ext> name, variants have two suffixes
+            if name.startswith(f'{stem}.') and name.count('.') == 1:
+                return os.path.join(folder, name)
+        return None
+
+    @staticmethod
+    def store(data, subfolder, image_format):
+        """Write upload bytes under their content hash (once) and queue their variants; returns the full variant's path"""
+        ext = 'jpg' if image_format in (None, 'JPEG', 'MPO') else image_format.lower()
+        filename = f'{hashlib.sha256(data).hexdigest()}.{ext}'
+        path = '/'.join(('uploads', subfolder, filename))
+        target = ImagePipeline.absolute_path(current_app, path)
+
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp = f'{target}.{uuid.uuid4().hex}.tmp'
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.replace(temp, target)
+
+        ImagePipeline._pool().submit(path, subfolder)
+        return ImagePipeline.variant_path(path, 'full')
+
+    @staticmethod
+    def is_content_addressed(path):
+        """True for a stored upload or variant, whose content never changes under its name"""
+        return bool(CONTENT_ADDRESSED_NAME.match(path.rsplit('/', 1)[-1]))
+
+    @staticmethod
+    def send_upload(filename):
+        """
+        Response for a file under UPLOAD_FOLDER (filename relative to it).
+
+        Content-addressed files are cacheable forever (immutable, with their
+        name as a strong ETag), by the browser only for PRIVATE_UPLOAD_FOLDERS
+        such as payment proofs; older timestamp-named uploads keep Flask's
+        default revalidation, as does a variant not written yet, which is
+        answered with its raw upload. With UPLOAD_ACCEL_REDIRECT_PREFIX set the file
+        is handed to nginx through X-Accel-Redirect, and with USE_X_SENDFILE
+        Flask sends an X-Sendfile header instead of the body.
+        """
+        folder = current_app.config['UPLOAD_FOLDER']
+        name = filename.rsplit('/', 1)[-1]
+        immutable = ImagePipeline.is_content_addressed(name)
+        requested = safe_join(folder, filename)
+        if immutable and requested is not None and not os.path.isfile(requested):
+            original = ImagePipeline.original_file(requested)
+            if original is not None:
+                # Still being processed: the raw upload stands in, and must not be cached as the variant
+                name = os.path.basename(original)
+                filename = posixpath.join(posixpath.dirname(filename), name)
+                immutable = False
+        accel_prefix = current_app.config.get('UPLOAD_ACCEL_REDIRECT_PREFIX')
+
+        if accel_prefix:
+            full_path = safe_join(folder, filename)
+            if full_path is None or not os.path.isfile(full_path):
+                abort(404)
+            response = current_app.response_class(
+                mimetype=mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            )
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+            if immutable:
+                response.set_etag(name)
+            response.make_conditional(request)
+        else:
+            response = send_from_directory(folder, filename, etag=name if immutable else True)
+
+        if immutable:
+            response.cache_control.no_cache = None
+            if filename.split('/', 1)[0] in PRIVATE_UPLOAD_FOLDERS:
+                response.cache_control.private = True
+            else:
+                response.cache_control.public = True
+            response.cache_control.max_age = current_app.config.get('UPLOAD_CACHE_MAX_AGE', 31536000)
+            response.cache_control.immutable = True
+        return response
+
+    @staticmethod
+    def join(timeout=None):
+        return ImagePipeline._pool().join(timeout)
+
+    @staticmethod
+    def shutdown(wait_for_pending=True):
+        pool = current_app.extensions.pop('image_pipeline', None)
+        if pool is not None:
+            pool.stop(wait_for_pending)
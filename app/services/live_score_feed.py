@@ -0,0 +1,117 @@
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
+from app import db, socketio
+from app.models import Tournament, TournamentCategory, Match
+from app.services.score_loader import ScoreLoader
+
+
+class LiveScoreFeed:
+    """
+    Push feed of live scores per tournament.
+
+    Every score or participant change stamps the match with the next value of
+    its tournament's score_version. Clients joining the tournament_<id> or
+    match_<id> room get a snapshot carrying the current version, then receive
+    score_delta events; polling clients ask for ?since=<version> and get only
+    the matches changed after it.
+    """
+
+    @staticmethod
+    def touch(*matches):
+        """Stamp changed matches with a new feed version. Call before committing."""
+        versions = {}
+        for match in matches:
+            if match is None:
+                continue
+            tournament_id = match.category.tournament_id
+            if tournament_id not in versions:
+                versions[tournament_id] = db.session.execute(
+                    update(Tournament).where(Tournament.id == tournament_id)
+                    .values(score_version=Tournament.score_version + 1)
+                    .returning(Tournament.score_version)
+                ).scalar_one()
+            match.score_version = versions[tournament_id]
+            ScoreLoader.forget(match.id)
+        return versions
+
+    @staticmethod
+    def broadcast(*matches):
+        """Emit a score_delta for committed matches to their tournament and match rooms"""
+        by_tournament = {}
+        for match in matches:
+            if match is not None:
+                by_tournament.setdefault(match.category.tournament_id, []).append(match)
+
+        for tournament_id, changed in by_tournament.items():
+            scores = ScoreLoader.load([m.id for m in changed])
+            entries = [LiveScoreFeed.entry(m, scores[m.id]) for m in changed]
+            version = max(entry['version'] for entry in entries)
+            socketio.emit('score_delta', {'tournament_id': tournament_id, 'version': version, 'matches': entries},
+                          room=f'tournament_{tournament_id}')
+            for entry in entries:
+                socketio.emit('score_delta', {'tournament_id': tournament_id, 'version': entry['version'],
+                                              'matches': [entry]},
+                              room=f"match_{entry['match_id']}")
+
+    @staticmethod
+    def snapshot(tournament_id, match_id=None):
+        """Current version plus every ongoing match (or just match_id) with its scores"""
+        version = db.session.query(Tournament.score_version).filter(Tournament.id == tournament_id).scalar() or 0
+        query = LiveScoreFeed._tournament_matches(tournament_id)
+        if match_id is not None:
+            query = query.filter(Match.id == match_id)
+        else:
+            query = query.filter(
+                Match.completed == False,
+                ((Match.player1_id.isnot(None) & Match.player2_id.isnot(None)) |
+                 (Match.team1_id.isnot(None) & Match.team2_id.isnot(None)))
+            )
+        return {'version': version, 'full': True, 'matches': LiveScoreFeed._entries(query.all())}
+
+    @staticmethod
+    def delta(tournament_id, since):
+        """Matches changed after version `since`; a client at version 0 gets a snapshot"""
+        if not since:
+            return LiveScoreFeed.snapshot(tournament_id)
+        version = db.session.query(Tournament.score_version).filter(Tournament.id == tournament_id).scalar() or 0
+        if since >= version:
+            return {'version': version, 'full': False, 'matches': []}
+        matches = LiveScoreFeed._tournament_matches(tournament_id).filter(Match.score_version > since).all()
+        return {'version': version, 'full': False, 'matches': LiveScoreFeed._entries(matches)}
+
+    @staticmethod
+    def entry(match, scores):
+        """Compact feed entry, shaped like the legacy /api/<id>/scores items"""
+        data = {
+            'match_id': match.id,
+            'version': match.score_version,
+            'completed': bool(match.completed),
+            'is_doubles': match.is_doubles,
+            'scores': [
+                {'set': s.set_number, 'player1_score': s.player1_score, 'player2_score': s.player2_score}
+                for s in scores
+            ]
+        }
+        if match.is_doubles:
+            for side, team in (('team1', match.team1), ('team2', match.team2)):
+                data[side] = {
+                    'player1': team.player1.full_name if team and team.player1 else 'TBD',
+                    'player2': team.player2.full_name if team and team.player2 else 'TBD'
+                }
+        else:
+            data['player1'] = match.player1.full_name if match.player1 else 'TBD'
+            data['player2'] = match.player2.full_name if match.player2 else 'TBD'
+        return data
+
+    @staticmethod
+    def _tournament_matches(tournament_id):
+        return Match.query.join(TournamentCategory, Match.category_id == TournamentCategory.id).filter(
+            TournamentCategory.tournament_id == tournament_id
+        ).options(
+            joinedload(Match.category), *ScoreLoader.participant_options()
+        ).order_by(Match.id)
+
+    @staticmethod
+    def _entries(matches):
+        scores = ScoreLoader.load([m.id for m in matches])
+        return [LiveScoreFeed.entry(m, scores[m.id]) for m in matches]
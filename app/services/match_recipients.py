@@ -0,0 +1,43 @@
+from sqlalchemy import literal, select, union_all
+from app import db
+from app.models import User, PlayerProfile, Team, Match
+
+
+class MatchRecipients:
+    """
+    Users to notify about matches, resolved for a whole batch at once.
+
+    Every participant slot of the matches (singles players, or both players of
+    each team) becomes a (match, slot, profile) row of one UNION ALL, joined to
+    the profiles' user accounts in a single query.
+    """
+
+    @staticmethod
+    def for_matches(match_ids):
+        """Mapping of match id -> users in slot order (player1/team1 first), without duplicates"""
+        match_ids = list(dict.fromkeys(i for i in match_ids if i is not None))
+        recipients = {match_id: [] for match_id in match_ids}
+        if not match_ids:
+            return recipients
+
+        in_batch = Match.id.in_(match_ids)
+        team1 = db.aliased(Team)
+        team2 = db.aliased(Team)
+        slots = union_all(
+            select(Match.id.label('match_id'), literal(0).label('slot'), Match.player1_id.label('profile_id'))
+            .where(in_batch),
+            select(Match.id, literal(1), Match.player2_id).where(in_batch),
+            select(Match.id, literal(2), team1.player1_id).join(team1, team1.id == Match.team1_id).where(in_batch),
+            select(Match.id, literal(3), team1.player2_id).join(team1, team1.id == Match.team1_id).where(in_batch),
+            select(Match.id, literal(4), team2.player1_id).join(team2, team2.id == Match.team2_id).where(in_batch),
+            select(Match.id, literal(5), team2.player2_id).join(team2, team2.id == Match.team2_id).where(in_batch),
+        ).subquery()
+
+        rows = db.session.query(slots.c.match_id, User).join(
+            PlayerProfile, PlayerProfile.id == slots.c.profile_id
+        ).join(User, User.id == PlayerProfile.user_id).order_by(slots.c.match_id, slots.c.slot).all()
+
+        for match_id, user in rows:
+            if user not in recipients[match_id]:
+                recipients[match_id].append(user)
+        return recipients
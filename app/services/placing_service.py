@@ -1,237 +1,238 @@
+import json
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.orm import joinedload
 from app import db
-from app.models import TournamentCategory, Match, MatchStage, TournamentStatus
-from collections import defaultdict
+from app.models import TournamentCategory, Match, MatchStage, PlayerProfile, Team, TournamentStatus
+from app.services.bracket_cache import BracketCache
+from app.services.points_ledger import PointsLedger
+from app.services.ranking_engine import RankingEngine
+from app.services.ranking_service import RankingService, POINTS_COLUMNS
 
 class PlacingService:
     """Service for determining tournament placings and distributing prizes/points"""
     
     @staticmethod
-    def get_placings(category_id):
+    def get_placings(category_id, snapshot=None):
         """
         Get complete placings for a category
         Returns a list of placements with player/team, place, points earned, prize earned
+
+        The places are worked out in one pass over the category's matches and
+        cached with the category's BracketCache version, so they are only
+        recomputed after a match in the category changes. If a BracketSnapshot
+        is passed, matches and participants are taken from it instead of
+        being queried again.
         """
-        category = TournamentCategory.query.get_or_404(category_id)
-        
-        # Ensure category is completed
-        incomplete_matches = Match.query.filter_by(category_id=category_id, completed=False).count()
-        if incomplete_matches > 0:
-            return []
-        
-        placings = []
-        
-        # Get all knockout stage matches for this category
-        knockout_matches = []
-        
-        # Check if Match model has stage field
-        if hasattr(Match, 'stage'):
-            knockout_matches = Match.query.filter_by(
-                category_id=category_id,
-                stage=MatchStage.KNOCKOUT
-            ).all()
+        if snapshot is not None:
+            category = snapshot.category
+        else:
+            category = TournamentCategory.query.get_or_404(category_id)
 
-            third_place_match = Match.query.filter_by(
-                category_id=category_id,
-                stage=MatchStage.PLAYOFF
-            ).all()
+        places = PlacingService._places(category, snapshot)
+        participants = PlacingService._participants(places, snapshot)
 
-            knockout_matches = knockout_matches + third_place_match
-        else:
-            # Fallback: assume matches without group_id are knockout matches
-            knockout_matches = Match.query.filter_by(
-                category_id=category_id
-            ).filter(Match.group_id.is_(None)).all()
-        
-        # Process the matches by round
-        matches_by_round = defaultdict(list)
-        for match in knockout_matches:
-            matches_by_round[match.round].append(match)
-        
-        # Calculate placings from matches
-        PlacingService._add_final_placings(placings, matches_by_round, category.is_doubles())
-        PlacingService._add_semifinal_placings(placings, matches_by_round, category.is_doubles())
-        PlacingService._add_quarterfinal_placings(placings, matches_by_round, category.is_doubles())
-        PlacingService._add_remaining_placings(placings, matches_by_round, category.is_doubles())
-        
-        # Add points and prize money for each placement
-        for placing in placings:
-            place = placing['place']
-            
-            # Calculate points based on category and place
-            points = PlacingService._calculate_points(category, place)
-            placing['points'] = points
-            
-            # Calculate prize money based on category and place
-            prize = PlacingService._calculate_prize(category, place)
-            placing['prize'] = prize
+        placings = []
+        for place, participant_id, is_team in places:
+            placings.append({
+                'place': place,
+                'participant': participants.get((is_team, participant_id)),
+                'is_team': is_team,
+                # Points and prize money based on category and place
+                'points': PlacingService._calculate_points(category, place),
+                'prize': PlacingService._calculate_prize(category, place)
+            })
         return placings
-    
+
     @staticmethod
-    def _add_final_placings(placings, matches_by_round, is_doubles):
-        """Add 1st and 2nd place from the final"""
-        if 1 in matches_by_round and matches_by_round[1]:
-            final = matches_by_round[1][0]
-            
-            # Add winner (1st place)
-            if is_doubles:
-                if hasattr(final, 'winning_team_id') and final.winning_team_id:
-                    placings.append({
-                        'place': 1,
-                        'participant': final.winner,
-                        'is_team': True
-                    })
-            else:
-                if hasattr(final, 'winning_player_id') and final.winning_player_id:
-                    placings.append({
-                        'place': 1,
-                        'participant': final.winner,
-                        'is_team': False
-                    })
-            
-            # Add runner-up (2nd place)
-            if is_doubles:
-                if hasattr(final, 'losing_team_id') and final.losing_team_id:
-                    placings.append({
-                        'place': 2,
-                        'participant': final.loser,
-                        'is_team': True
-                    })
-            else:
-                if hasattr(final, 'losing_player_id') and final.losing_player_id:
-                    placings.append({
-                        'place': 2,
-                        'participant': final.loser,
-                        'is_team': False
-                    })
-    
+    def _places(category, snapshot=None):
+        """[(place, participant id, is team)] of a category, from the placings cache when current"""
+        key = f'placings_{category.id}_{BracketCache.get_version(category.id)}'
+        cached = BracketCache.get_entry(key)
+        if cached is not None:
+            return [tuple(place) for place in json.loads(cached)]
+
+        is_doubles = category.is_doubles()
+        if snapshot is not None:
+            matches = [
+                (m.stage, m.round, m.match_order, m.completed,
+                 m.winning_team_id if is_doubles else m.winning_player_id,
+                 m.losing_team_id if is_doubles else m.losing_player_id)
+                for m in snapshot.matches
+            ]
+        else:
+            matches = db.session.execute(
+                select(Match.stage, Match.round, Match.match_order, Match.completed,
+                       Match.winning_team_id if is_doubles else Match.winning_player_id,
+                       Match.losing_team_id if is_doubles else Match.losing_player_id)
+                .where(Match.category_id == category.id)
+            ).all()
+
+        places = PlacingService._walk(matches, is_doubles)
+        BracketCache.set_entry(key, json.dumps(places).encode())
+        return places
+
     @staticmethod
-    def _add_semifinal_placings(placings, matches_by_round, is_doubles):
-        """Add 3rd and 4th place from semifinals"""
-        # Check if there's a 3rd place playoff match
-        third_place_match = None
-        for match in matches_by_round.get(1.5, []):
-            if hasattr(match, 'stage') and match.stage == MatchStage.PLAYOFF:
-                third_place_match = match
-                break
-        
-        if third_place_match:
-            # Add 3rd place from playoff match winner
-            if is_doubles:
-                if hasattr(third_place_match, 'winning_team_id') and third_place_match.winning_team_id:
-                    placings.append({
-                        'place': 3,
-                        'participant': third_place_match.winner,
-                        'is_team': True
-                    })
-            else:
-                if hasattr(third_place_match, 'winning_player_id') and third_place_match.winning_player_id:
-                    placings.append({
-                        'place': 3,
-                        'participant': third_place_match.winner,
-                        'is_team': False
-                    })
-            
-            # Add 4th place from playoff match loser
-            if is_doubles:
-                if hasattr(third_place_match, 'losing_team_id') and third_place_match.losing_team_id:
-                    placings.append({
-                        'place': 4,
-                        'participant': third_place_match.loser,
-                        'is_team': True
-                    })
+    def _walk(matches, is_doubles):
+        """
+        Places from (stage, round, match_order, completed, winner id, loser id) rows, in one pass.
+
+        The final decides 1st and 2nd and a third-place playoff 3rd and 4th;
+        without a playoff both semifinal losers share 3rd. Losers of any
+        earlier round r share place 2**(r-1)+1 (5th for quarterfinals, 9th
+        for the round of 16, ...). Returns [] until every match is completed.
+        """
+        places = []
+        semifinal_losers = []
+        has_playoff = False
+        for stage, round_num, match_order, completed, winner_id, loser_id in matches:
+            if not completed:
+                return []
+            order = (round_num or 0, match_order or 0)
+            if stage == MatchStage.PLAYOFF:
+                # Stored with round 1.5, which integer columns may round: the stage identifies it
+                has_playoff = True
+                places += [(3, order, winner_id), (4, order, loser_id)]
+            elif stage != MatchStage.KNOCKOUT or not round_num:
+                continue
+            elif round_num == 1:
+                places += [(1, order, winner_id), (2, order, loser_id)]
+            elif round_num == 2:
+                semifinal_losers.append((3, order, loser_id))
             else:
-                if hasattr(third_place_match, 'losing_player_id') and third_place_match.losing_player_id:
-                    placings.append({
-                        'place': 4,
-                        'participant': third_place_match.loser,
-                        'is_team': False
-                    })
-        elif 2 in matches_by_round:
-            # If no playoff match, both semifinal losers get 3rd place
-            semifinal_losers = []
-            
-            for match in matches_by_round[2]:
-                if is_doubles:
-                    if hasattr(match, 'losing_team_id') and match.losing_team_id:
-                        semifinal_losers.append({
-                            'place': 3,  # Tied for 3rd
-                            'participant': match.loser,
-                            'is_team': True
-                        })
-                else:
-                    if hasattr(match, 'losing_player_id') and match.losing_player_id:
-                        semifinal_losers.append({
-                            'place': 3,  # Tied for 3rd
-                            'participant': match.loser,
-                            'is_team': False
-                        })
-            
-            placings.extend(semifinal_losers)
-    
+                places.append((2 ** (round_num - 1) + 1, order, loser_id))
+
+        if not has_playoff:
+            places += semifinal_losers
+        places.sort(key=lambda place: (place[0], place[1]))
+        return [(place, participant_id, is_doubles) for place, _, participant_id in places if participant_id]
+
     @staticmethod
-    def _add_quarterfinal_placings(placings, matches_by_round, is_doubles):
-        """Add 5th-8th places from quarterfinals"""
-        if 3 in matches_by_round:
-            quarterfinal_losers = []
-            
-            for match in matches_by_round[3]:
-                if is_doubles:
-                    if hasattr(match, 'losing_team_id') and match.losing_team_id:
-                        quarterfinal_losers.append({
-                            'place': 5,  # Tied for 5th
-                            'participant': match.loser,
-                            'is_team': True
-                        })
-                else:
-                    if hasattr(match, 'losing_player_id') and match.losing_player_id:
-                        quarterfinal_losers.append({
-                            'place': 5,  # Tied for 5th
-                            'participant': match.loser,
-                            'is_team': False
-                        })
-            
-            placings.extend(quarterfinal_losers)
-    
+    def _participants(places, snapshot=None):
+        """{(is team, id): PlayerProfile or Team} for the placed participants"""
+        if snapshot is not None:
+            participants = {}
+            for match in snapshot.matches:
+                for player in (match.player1, match.player2):
+                    if player is not None:
+                        participants[(False, player.id)] = player
+                for team in (match.team1, match.team2):
+                    if team is not None:
+                        participants[(True, team.id)] = team
+            return participants
+
+        player_ids = [participant_id for _, participant_id, is_team in places if not is_team]
+        team_ids = [participant_id for _, participant_id, is_team in places if is_team]
+        participants = {}
+        if player_ids:
+            participants.update(
+                ((False, player.id), player)
+                for player in PlayerProfile.query.filter(PlayerProfile.id.in_(player_ids))
+            )
+        if team_ids:
+            participants.update(
+                ((True, team.id), team)
+                for team in Team.query.options(joinedload(Team.player1), joinedload(Team.player2))
+                .filter(Team.id.in_(team_ids))
+            )
+        return participants
+
     @staticmethod
-    def _add_remaining_placings(placings, matches_by_round, is_doubles):
-        """Add remaining places from earlier rounds"""
-        for round_num in sorted(matches_by_round.keys()):
-            # Skip already processed rounds
-            if round_num <= 3 or round_num == 1.5:
+    def award_points(category_id):
+        """
+        Post a completed category's placing points to its players, once.
+
+        Writes one points ledger row per placed player (both players of a
+        team) in a bulk insert, adds the category's points to their running
+        totals for the category type with one grouped UPDATE, moves them in
+        the ranking and marks the category as awarded, all in one commit.
+        Returns the placings awarded, or [] when the category is incomplete,
+        unranked or already awarded.
+        """
+        category = db.session.get(TournamentCategory, category_id)
+        if category is None or category.points_awarded_at or category.category_type not in POINTS_COLUMNS:
+            return []
+        placings = PlacingService.get_placings(category_id)
+        if not placings:
+            return []
+
+        entries = {}
+        for placing in placings:
+            participant = placing['participant']
+            if participant is None:
                 continue
-            
-            # Calculate place for this round's losers
-            place = 2 ** (round_num - 1) + 1
-            
-            round_losers = []
-            for match in matches_by_round[round_num]:
-                if is_doubles:
-                    if hasattr(match, 'losing_team_id') and match.losing_team_id:
-                        round_losers.append({
-                            'place': place,
-                            'participant': match.loser,
-                            'is_team': True
-                        })
-                else:
-                    if hasattr(match, 'losing_player_id') and match.losing_player_id:
-                        round_losers.append({
-                            'place': place,
-                            'participant': match.loser,
-                            'is_team': False
-                        })
-            
-            placings.extend(round_losers)
-    
+            player_ids = [participant.player1_id, participant.player2_id] if placing['is_team'] else [participant.id]
+            for player_id in player_ids:
+                if player_id and player_id not in entries:
+                    entries[player_id] = {
+                        'player_id': player_id,
+                        'place': placing['place'],
+                        'share': PlacingService._points_share(category, placing['place']) or 0.0,
+                        'points': placing['points'] or 0,
+                    }
+
+        try:
+            # Claim the award first: of two results completing the category together, one posts it
+            claimed = db.session.execute(
+                update(TournamentCategory).where(
+                    TournamentCategory.id == category_id, TournamentCategory.points_awarded_at.is_(None)
+                ).values(points_awarded_at=datetime.utcnow()).execution_options(synchronize_session=False)
+            ).rowcount
+            if not claimed:
+                db.session.rollback()
+                return []
+            if entries:
+                PointsLedger.record(category, entries.values())
+                totals = PointsLedger.post(category)
+                if RankingEngine.windowed():
+                    # A windowed ranking counts the players' recent results, not their running totals
+                    totals = RankingEngine.totals(category.category_type, totals)
+                RankingService.apply_points(category.category_type, totals)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return placings
+
+    @staticmethod
+    def repost_points(category_id):
+        """
+        Re-award a category whose knockout results changed after its points were posted.
+
+        Reverses the category's ledger rows off its players' totals and
+        clears the award in one commit, then posts the current placings with
+        award_points (nothing while the category is incomplete again).
+        Returns the placings awarded.
+        """
+        category = db.session.get(TournamentCategory, category_id)
+        if category is None or category.category_type not in POINTS_COLUMNS:
+            return []
+        try:
+            # Claim the reversal: of two edits landing together, one takes the points back
+            claimed = db.session.execute(
+                update(TournamentCategory).where(
+                    TournamentCategory.id == category_id, TournamentCategory.points_awarded_at.isnot(None)
+                ).values(points_awarded_at=None).execution_options(synchronize_session=False)
+            ).rowcount
+            if claimed:
+                totals = PointsLedger.reverse(category)
+                if RankingEngine.windowed():
+                    totals = RankingEngine.totals(category.category_type, totals)
+                RankingService.apply_points(category.category_type, totals)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return PlacingService.award_points(category_id)
+
     @staticmethod
     def _calculate_points(category, place):
         """Calculate points for a specific placing"""
         # Check if category has custom points distribution
         
-        if hasattr(category, 'points_distribution') and category.points_distribution:
-            # Find matching place in distribution
-            for place_range, percentage in category.points_distribution.items():
-                if PlacingService._is_in_place_range(place, place_range):
-                    return int(category.points_awarded * (percentage / 100))
+        percentage = PlacingService._points_share(category, place)
+        if percentage is not None:
+            return int(category.points_awarded * (percentage / 100))
         
         # Default points distribution if none specified
         # if place == 1:
@@ -247,6 +248,16 @@ class PlacingService:
         
         return 0
     
+    @staticmethod
+    def _points_share(category, place):
+        """Percentage of the category's base points earned for a placing, or None if it earns none"""
+        if hasattr(category, 'points_distribution') and category.points_distribution:
+            # Find matching place in distribution
+            for place_range, percentage in category.points_distribution.items():
+                if PlacingService._is_in_place_range(place, place_range):
+                    return percentage
+        return None
+    
     @staticmethod
     def _calculate_prize(category, place):
         """Calculate prize money for a specific placing"""
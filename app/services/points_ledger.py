@@ -0,0 +1,160 @@
+from datetime import datetime
+from sqlalchemy import select, update, insert, delete, func, case, cast, Integer
+from app import db
+from app.models import PlayerProfile, PointsLedgerEntry, Tournament, TournamentTier
+from app.services.ranking_service import RankingService, POINTS_COLUMNS
+
+
+class PointsLedger:
+    """
+    Ranking points as ledger rows: one per player per awarded category.
+
+    A category's rows are written with one bulk insert when its points are
+    awarded, and player totals are derived from the ledger with grouped
+    statements. Re-scoring a season or trying other tier base points is
+    then a query over the ledger, not a walk over every category's
+    matches and placings.
+    """
+
+    @staticmethod
+    def record(category, entries):
+        """Insert a category's ledger rows ({player_id, place, share, points} each) in one statement"""
+        now = datetime.utcnow()
+        db.session.execute(insert(PointsLedgerEntry), [
+            dict(entry, tournament_id=category.tournament_id, category_id=category.id,
+                 category_type=category.category_type, base_points=category.points_awarded or 0, awarded_at=now)
+            for entry in entries
+        ])
+
+    @staticmethod
+    def post(category):
+        """
+        Add a recorded category's points to its players' running totals.
+
+        One UPDATE adds each player's grouped ledger points for the category.
+        Returns {player_id: new total} for the players in the category.
+        """
+        column = RankingService.points_column(category.category_type)
+        players = select(PointsLedgerEntry.player_id).where(PointsLedgerEntry.category_id == category.id)
+        earned = select(func.sum(PointsLedgerEntry.points)).where(
+            PointsLedgerEntry.category_id == category.id, PointsLedgerEntry.player_id == PlayerProfile.id
+        ).scalar_subquery()
+        db.session.execute(
+            update(PlayerProfile).where(PlayerProfile.id.in_(players))
+            .values({column: func.coalesce(column, 0) + earned})
+            .execution_options(synchronize_session=False)
+        )
+        return dict(db.session.execute(select(PlayerProfile.id, column).where(PlayerProfile.id.in_(players))).all())
+
+    @staticmethod
+    def reverse(category):
+        """
+        Take a recorded category's points back off its players' running totals and delete its rows.
+
+        The inverse of record() and post(), for a category whose results
+        changed after it was awarded. Returns {player_id: new total} for the
+        players that were in the category.
+        """
+        column = RankingService.points_column(category.category_type)
+        player_ids = db.session.scalars(
+            select(PointsLedgerEntry.player_id).where(PointsLedgerEntry.category_id == category.id).distinct()
+        ).all()
+        earned = select(func.sum(PointsLedgerEntry.points)).where(
+            PointsLedgerEntry.category_id == category.id, PointsLedgerEntry.player_id == PlayerProfile.id
+        ).scalar_subquery()
+        db.session.execute(
+            update(PlayerProfile).where(PlayerProfile.id.in_(player_ids))
+            .values({column: func.coalesce(column, 0) - earned})
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(delete(PointsLedgerEntry).where(PointsLedgerEntry.category_id == category.id))
+        return dict(db.session.execute(select(PlayerProfile.id, column).where(PlayerProfile.id.in_(player_ids))).all())
+
+    @staticmethod
+    def totals(category_type, since=None, until=None, tier_points=None):
+        """
+        {player_id: points} for a category type from the ledger, in one grouped query.
+
+        since/until limit it to tournaments ending in [since, until), e.g. a
+        season. tier_points ({tier: base points}) is a what-if: rows of
+        tournaments in those tiers are scored from that base instead of
+        their own. Nothing is written.
+        """
+        points = PointsLedger._points(tier_points)
+        query = PointsLedger._window(
+            select(PointsLedgerEntry.player_id, func.sum(points)).where(
+                PointsLedgerEntry.category_type == category_type
+            ), since, until
+        ).group_by(PointsLedgerEntry.player_id)
+        return dict(db.session.execute(query).all())
+
+    @staticmethod
+    def rescore(category_type=None, since=None, until=None, tier_points=None):
+        """
+        Reset player totals of one category type (all when None) to their ledger sums and commit.
+
+        With tier_points, the ledger rows of tournaments in those tiers are
+        first re-scored from the new base points. Each category type's
+        totals are set by one UPDATE over every profile, so players without
+        ledger points in the window drop to zero, and the rankings are
+        rebuilt from the new totals.
+        """
+        if tier_points:
+            base = PointsLedger._tier_base(tier_points)
+            in_tiers = select(Tournament.id).where(Tournament.tier.in_(PointsLedger._tiers(tier_points)))
+            rows = update(PointsLedgerEntry).where(PointsLedgerEntry.tournament_id.in_(in_tiers))
+            if category_type:
+                rows = rows.where(PointsLedgerEntry.category_type == category_type)
+            db.session.execute(rows.values(
+                base_points=select(base).where(Tournament.id == PointsLedgerEntry.tournament_id).scalar_subquery()
+            ).execution_options(synchronize_session=False))
+            db.session.execute(rows.values(
+                points=PointsLedger._scored(PointsLedgerEntry.base_points)
+            ).execution_options(synchronize_session=False))
+
+        for ranked_type in [category_type] if category_type else list(POINTS_COLUMNS):
+            column = RankingService.points_column(ranked_type)
+            total = PointsLedger._window(
+                select(func.sum(PointsLedgerEntry.points)).where(
+                    PointsLedgerEntry.category_type == ranked_type, PointsLedgerEntry.player_id == PlayerProfile.id
+                ), since, until
+            ).scalar_subquery()
+            db.session.execute(
+                update(PlayerProfile).values({column: func.coalesce(total, 0)})
+                .execution_options(synchronize_session=False)
+            )
+        RankingService.rebuild(category_type)
+
+    @staticmethod
+    def _window(query, since, until):
+        """Join a ledger query to the tournaments, limited to those ending in [since, until)"""
+        query = query.join(Tournament, Tournament.id == PointsLedgerEntry.tournament_id)
+        if since is not None:
+            query = query.where(Tournament.end_date >= since)
+        if until is not None:
+            query = query.where(Tournament.end_date < until)
+        return query
+
+    @staticmethod
+    def _points(tier_points):
+        """Points of a ledger row joined to its tournament: as awarded, or scored from the tier base points"""
+        if not tier_points:
+            return PointsLedgerEntry.points
+        return PointsLedger._scored(PointsLedger._tier_base(tier_points))
+
+    @staticmethod
+    def _scored(base):
+        # As PlacingService._calculate_points: int(base * (share / 100)). Points are never negative, so
+        # flooring first gives the same value on every backend, whether CAST truncates or rounds
+        return cast(func.floor(base * (PointsLedgerEntry.share / 100.0)), Integer)
+
+    @staticmethod
+    def _tier_base(tier_points):
+        return case(*[(Tournament.tier == tier, points) for tier, points in PointsLedger._tiers(tier_points).items()],
+                    else_=PointsLedgerEntry.base_points)
+
+    @staticmethod
+    def _tiers(tier_points):
+        """tier_points keyed by TournamentTier, from tiers or their names"""
+        return {tier if isinstance(tier, TournamentTier) else TournamentTier[tier.upper()]: points
+                for tier, points in tier_points.items()}
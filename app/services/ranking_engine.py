@@ -0,0 +1,148 @@
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, update, delete, insert, bindparam
+from app import db
+from app.models import PlayerRanking, PointsLedgerEntry, Tournament
+from app.services.ranking_service import POINTS_COLUMNS
+
+WEEK_SECONDS = 7 * 24 * 3600
+# Rows per DELETE ... WHERE id IN (...) when players drop out of a ranking
+_DELETE_CHUNK = 500
+
+
+class RankingEngine:
+    """
+    Batch recomputation of every ranking from the points ledger.
+
+    A result counts with a weight taken from its tournament's age: 0 once
+    it is RANKING_WINDOW_WEEKS old, and halved every
+    RANKING_DECAY_HALF_LIFE_WEEKS when decay is on. run() reads the ledger
+    once into per-category columns, weighs and sums them in one pass, ranks
+    each category type with one sort and writes player_ranking in bulk:
+    executemany UPDATEs for players whose place or points changed, one
+    INSERT for newcomers and chunked DELETEs for players who dropped out.
+    """
+
+    @staticmethod
+    def windowed():
+        """Whether rankings come from a ledger window instead of the running totals"""
+        config = current_app.config
+        return bool(config.get('RANKING_WINDOW_WEEKS') or config.get('RANKING_DECAY_HALF_LIFE_WEEKS'))
+
+    @staticmethod
+    def weights(as_of=None, window_weeks=None, half_life_weeks=None):
+        """{tournament_id: weight} of the tournaments in the ledger whose results still count at as_of"""
+        config = current_app.config
+        as_of = as_of or datetime.utcnow()
+        if window_weeks is None:
+            window_weeks = config.get('RANKING_WINDOW_WEEKS', 0)
+        if half_life_weeks is None:
+            half_life_weeks = config.get('RANKING_DECAY_HALF_LIFE_WEEKS', 0)
+
+        weights = {}
+        for tournament_id, end_date, start_date in db.session.execute(
+            select(Tournament.id, Tournament.end_date, Tournament.start_date).where(
+                select(PointsLedgerEntry.id).where(PointsLedgerEntry.tournament_id == Tournament.id).exists()
+            )
+        ):
+            played = end_date or start_date
+            # Undated tournaments, and those still running (or dated after as_of), count in full
+            age = max((as_of - played).total_seconds() / WEEK_SECONDS, 0.0) if played else 0.0
+            if window_weeks and age >= window_weeks:
+                continue
+            weights[tournament_id] = 0.5 ** (age / half_life_weeks) if half_life_weeks else 1.0
+        return weights
+
+    @staticmethod
+    def load(category_type, player_ids=None):
+        """The ledger rows of a category type as columns: (player ids, tournament ids, points) arrays"""
+        table = PointsLedgerEntry.__table__
+        query = select(table.c.player_id, table.c.tournament_id, table.c.points).where(
+            table.c.category_type == category_type, table.c.points > 0
+        )
+        if player_ids is not None:
+            query = query.where(table.c.player_id.in_(player_ids))
+        rows = db.session.execute(query).all()
+        if not rows:
+            return array('q'), array('q'), array('q')
+        return tuple(array('q', column) for column in zip(*rows))
+
+    @staticmethod
+    def totals(category_type, player_ids, as_of=None):
+        """{player_id: weighted points} for some players of one category type (0 when nothing counts)"""
+        weights = RankingEngine.weights(as_of)
+        totals = RankingEngine._sum(RankingEngine.load(category_type, list(player_ids)), weights)
+        return {player_id: int(totals.get(player_id, 0)) for player_id in player_ids}
+
+    @staticmethod
+    def run(category_type=None, as_of=None, window_weeks=None, half_life_weeks=None):
+        """Recompute the rankings of one category type (all when None) at as_of and commit; returns {type: players ranked}"""
+        weights = RankingEngine.weights(as_of, window_weeks, half_life_weeks)
+        ranked = {}
+        for ranked_type in [category_type] if category_type else list(POINTS_COLUMNS):
+            ordered = RankingEngine.rank(RankingEngine._sum(RankingEngine.load(ranked_type), weights))
+            RankingEngine._write(ranked_type, ordered)
+            ranked[ranked_type] = len(ordered)
+        db.session.commit()
+        return ranked
+
+    @staticmethod
+    def rank(totals):
+        """[(player_id, points, rank)] in ranking order from {player_id: weighted points}, with competition ranks"""
+        ordered = sorted((-int(points), player_id) for player_id, points in totals.items() if points >= 1)
+        ranking = []
+        rank, last = 0, None
+        for position, (negative_points, player_id) in enumerate(ordered, 1):
+            if negative_points != last:
+                rank, last = position, negative_points
+            ranking.append((player_id, -negative_points, rank))
+        return ranking
+
+    @staticmethod
+    def _sum(columns, weights):
+        totals = defaultdict(float)
+        for player_id, tournament_id, points in zip(*columns):
+            weight = weights.get(tournament_id)
+            if weight:
+                totals[player_id] += points * weight
+        return totals
+
+    @staticmethod
+    def _write(category_type, ordered):
+        """Bring player_ranking in line with a computed ranking, touching only the rows that change"""
+        table = PlayerRanking.__table__
+        existing = {row.player_id: row for row in db.session.execute(
+            select(table.c.id, table.c.player_id, table.c.points, table.c.rank, table.c.version)
+            .where(table.c.category_type == category_type)
+        )}
+        version = max((row.version for row in existing.values()), default=0) + 1
+        now = datetime.utcnow()
+
+        moved, rescored, added = [], [], []
+        for player_id, points, rank in ordered:
+            row = existing.pop(player_id, None)
+            if row is None:
+                added.append({'category_type': category_type, 'player_id': player_id, 'points': points,
+                              'rank': rank, 'previous_rank': None, 'version': version, 'updated_at': now})
+            elif row.rank != rank:
+                moved.append({'_id': row.id, 'points': points, 'rank': rank, 'previous_rank': row.rank})
+            elif row.points != points:
+                rescored.append({'_id': row.id, 'points': points})
+
+        if moved:
+            db.session.execute(update(table).where(table.c.id == bindparam('_id')).values(
+                points=bindparam('points'), rank=bindparam('rank'), previous_rank=bindparam('previous_rank'),
+                version=version, updated_at=now
+            ), moved)
+        if rescored:
+            db.session.execute(update(table).where(table.c.id == bindparam('_id')).values(
+                points=bindparam('points'), updated_at=now
+            ), rescored)
+        if added:
+            db.session.execute(insert(table), added)
+        # Players left in existing have no results counting any more
+        dropped = [row.id for row in existing.values()]
+        for start in range(0, len(dropped), _DELETE_CHUNK):
+            db.session.execute(delete(table).where(table.c.id.in_(dropped[start:start + _DELETE_CHUNK])))
@@ -0,0 +1,198 @@
+from sqlalchemy import select, update, delete, insert, func, case, and_, or_
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import PlayerProfile, PlayerRanking, CategoryType
+
+# PlayerProfile column holding each ranked category type's running points total
+POINTS_COLUMNS = {
+    CategoryType.MENS_SINGLES: 'mens_singles_points',
+    CategoryType.WOMENS_SINGLES: 'womens_singles_points',
+    CategoryType.MENS_DOUBLES: 'mens_doubles_points',
+    CategoryType.WOMENS_DOUBLES: 'womens_doubles_points',
+    CategoryType.MIXED_DOUBLES: 'mixed_doubles_points',
+}
+
+
+class RankingService:
+    """
+    Player rankings per category type, kept in player_ranking.
+
+    apply_points moves players to new totals incrementally: each mover shifts
+    only the rows whose points lie between its old and new totals, so an
+    award touches the part of the ranking it changes instead of re-sorting
+    every profile. rebuild recomputes a whole ranking from the profile
+    totals in one pass; a ranking with no rows yet (e.g. right after
+    deploy) is rebuilt the first time a page of it is read.
+    """
+
+    PER_PAGE = 50
+
+    @staticmethod
+    def category_type(key):
+        """CategoryType for a /rankings key such as 'mens_singles', or None if it is not ranked"""
+        category_type = CategoryType.__members__.get((key or '').upper())
+        return category_type if category_type in POINTS_COLUMNS else None
+
+    @staticmethod
+    def points_column(category_type):
+        return getattr(PlayerProfile, POINTS_COLUMNS[category_type])
+
+    @staticmethod
+    def latest_version(category_type):
+        """Version of the latest ranking event of a category type (0 before the first)"""
+        return db.session.execute(
+            select(func.coalesce(func.max(PlayerRanking.version), 0))
+            .where(PlayerRanking.category_type == category_type)
+        ).scalar()
+
+    @staticmethod
+    def apply_points(category_type, totals):
+        """
+        Move players to new point totals ({player_id: points}) as one ranking event.
+
+        Players reaching zero points leave the ranking. Flushes but does not
+        commit, so the ranking changes with the points in one transaction.
+        """
+        current = {row.player_id: row for row in db.session.execute(
+            select(PlayerRanking).where(
+                PlayerRanking.category_type == category_type, PlayerRanking.player_id.in_(totals)
+            )
+        ).scalars()}
+        version = RankingService.latest_version(category_type) + 1
+
+        for player_id, points in totals.items():
+            points = points or 0
+            row = current.get(player_id)
+            old_points = row.points if row else 0
+            if points == old_points:
+                continue
+            # Rows between the old and new totals have this player pass them (or drop below them)
+            low, high = sorted((old_points, points))
+            shift = 1 if points > old_points else -1
+            db.session.execute(
+                update(PlayerRanking).where(
+                    PlayerRanking.category_type == category_type,
+                    PlayerRanking.points >= max(low, 1), PlayerRanking.points < high,
+                    PlayerRanking.player_id != player_id
+                ).values(
+                    previous_rank=case((PlayerRanking.version < version, PlayerRanking.rank),
+                                       else_=PlayerRanking.previous_rank),
+                    rank=PlayerRanking.rank + shift,
+                    version=version
+                # 'fetch' keeps the rows of players still to be moved in step with the shift
+                ).execution_options(synchronize_session='fetch')
+            )
+
+            if points <= 0:
+                if row is not None:
+                    db.session.delete(row)
+                    db.session.flush()
+                continue
+            rank = 1 + db.session.execute(
+                select(func.count(PlayerRanking.id)).where(
+                    PlayerRanking.category_type == category_type,
+                    PlayerRanking.points > points, PlayerRanking.player_id != player_id
+                )
+            ).scalar()
+            if row is None:
+                db.session.add(PlayerRanking(category_type=category_type, player_id=player_id, points=points,
+                                             rank=rank, previous_rank=None, version=version))
+            else:
+                if rank != row.rank:
+                    if row.version < version:
+                        row.previous_rank = row.rank
+                    row.rank = rank
+                    row.version = version
+                row.points = points
+            # The next mover counts and shifts against this player's new total
+            db.session.flush()
+
+    @staticmethod
+    def rebuild(category_type=None):
+        """Recompute the ranking of one category type (all when None) from the profile totals and commit"""
+        from app.services.ranking_engine import RankingEngine
+        if RankingEngine.windowed():
+            # A windowed ranking counts recent ledger results, not the running totals
+            RankingEngine.run(category_type)
+            return
+        for ranked_type in [category_type] if category_type else list(POINTS_COLUMNS):
+            RankingService._rebuild(ranked_type)
+        db.session.commit()
+
+    @staticmethod
+    def ensure_ranked(category_type):
+        """Rebuild a category type's ranking if it has no rows while some player has points; True if it did"""
+        if db.session.execute(
+            select(PlayerRanking.id).where(PlayerRanking.category_type == category_type).limit(1)
+        ).first() is not None:
+            return False
+        column = RankingService.points_column(category_type)
+        if db.session.execute(select(PlayerProfile.id).where(column > 0).limit(1)).first() is None:
+            return False
+        RankingService.rebuild(category_type)
+        return True
+
+    @staticmethod
+    def _rebuild(category_type):
+        column = RankingService.points_column(category_type)
+        ranked = db.session.execute(
+            select(PlayerProfile.id, column, func.rank().over(order_by=column.desc()))
+            .where(column > 0)
+        ).all()
+        previous = {row.player_id: (row.rank, row.previous_rank, row.version) for row in db.session.execute(
+            select(PlayerRanking.player_id, PlayerRanking.rank, PlayerRanking.previous_rank, PlayerRanking.version)
+            .where(PlayerRanking.category_type == category_type)
+        )}
+        version = max((entry[2] for entry in previous.values()), default=0) + 1
+
+        rows = []
+        for player_id, points, rank in ranked:
+            old_rank, previous_rank, old_version = previous.get(player_id, (None, None, version))
+            if old_rank is not None and old_rank != rank:
+                previous_rank, old_version = old_rank, version
+            rows.append({'category_type': category_type, 'player_id': player_id, 'points': points,
+                         'rank': rank, 'previous_rank': previous_rank, 'version': old_version})
+        db.session.execute(delete(PlayerRanking).where(PlayerRanking.category_type == category_type))
+        if rows:
+            db.session.execute(insert(PlayerRanking), rows)
+
+    @staticmethod
+    def entry(category_type, player_id):
+        """A player's ranking row (with its rank), from the unique (category type, player) index"""
+        return db.session.execute(
+            select(PlayerRanking).where(
+                PlayerRanking.category_type == category_type, PlayerRanking.player_id == player_id
+            )
+        ).scalar()
+
+    @staticmethod
+    def page(category_type, after=None, per_page=None, include_after=False):
+        """
+        One page of a ranking in (rank, player_id) order, with the players loaded.
+
+        `after` is the (rank, player_id) cursor of the last row of the
+        previous page; with include_after the page starts at that row. Returns
+        (rows, cursor of the next page or None).
+        """
+        per_page = per_page or RankingService.PER_PAGE
+        query = select(PlayerRanking).options(joinedload(PlayerRanking.player)).where(
+            PlayerRanking.category_type == category_type
+        )
+        if after:
+            rank, player_id = after
+            query = query.where(or_(
+                PlayerRanking.rank > rank,
+                and_(PlayerRanking.rank == rank,
+                     PlayerRanking.player_id >= player_id if include_after else PlayerRanking.player_id > player_id)
+            ))
+        rows = db.session.execute(
+            query.order_by(PlayerRanking.rank, PlayerRanking.player_id).limit(per_page + 1)
+        ).scalars().all()
+        if not rows and after is None and RankingService.ensure_ranked(category_type):
+            # First read of a ranking never built from the existing totals
+            return RankingService.page(category_type, per_page=per_page)
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            next_cursor = (rows[-1].rank, rows[-1].player_id)
+        return rows, next_cursor
@@ -0,0 +1,274 @@
+import csv
+import io
+from datetime import date, datetime
+from flask import current_app
+from app import db
+from app.models import Registration
+from app.helpers.registration import generate_payment_reference
+from app.services.account_provisioning import AccountProvisioning, PLAYER_FIELDS
+from app.services.email_queue import EmailQueue
+from app.services.registration_service import RegistrationService
+
+# Per-player columns of the sheet, prefixed player1_/player2_ like the Registration fields
+IMPORT_PLAYER_FIELDS = PLAYER_FIELDS + ('dupr_rating',)
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+
+
+class RegistrationImport:
+    """
+    Registrations entered by an organizer from a CSV or XLSX sheet.
+
+    One row per registration: a 'category' column (the category's name, type
+    or id) and player1_*/player2_* columns named like the Registration fields.
+    The sheet is read row by row and every row is checked with
+    RegistrationService.validate_registrations, the rules web registrations
+    follow; a sheet with any error imports nothing. Otherwise the new
+    accounts' passwords are hashed with no lock held, the rows are checked
+    again under the categories' lock, and accounts are provisioned and
+    registrations inserted a batch at a time in that one transaction, and the confirmation emails are queued in
+    batches. Imported registrations are approved and verified by the
+    organizer, as if entered and paid at the desk.
+    """
+
+    REQUIRED_COLUMNS = ('category', 'player1_name', 'player1_email')
+
+    @staticmethod
+    def run(tournament, stream, filename, imported_by=None, dry_run=False):
+        """
+        Validate and import a sheet for a tournament.
+
+        Returns a dict with 'rows' (registrations read), 'imported' (0 on a
+        dry run or when there are errors) and 'errors', a list of
+        (line number, message) pairs.
+        """
+        categories = RegistrationImport._categories_by_key(tournament)
+        lines, entries, errors = [], [], []
+        row_count = 0
+        for line, row in RegistrationImport.read_rows(stream, filename):
+            row_count += 1
+            entry, row_errors = RegistrationImport.parse_row(row, categories)
+            if row_errors:
+                errors.extend((line, message) for message in row_errors)
+            else:
+                lines.append(line)
+                entries.append(entry)
+
+        errors.extend(RegistrationImport._check(lines, entries))
+        errors.sort(key=lambda error: error[0])
+
+        result = {'rows': row_count, 'imported': 0, 'errors': errors}
+        if errors or dry_run or not entries:
+            db.session.rollback()
+            return result
+
+        # Hash the new accounts' passwords (the slow part) before the categories are locked;
+        # the lock is then only held for the re-check and the inserts
+        passwords = AccountProvisioning.hash_passwords(
+            player['email'] for entry in entries for player in entry['players']
+        )
+        db.session.rollback()  # start the locked transaction afresh
+
+        # Capacity is checked again and used up in one transaction, see RegistrationService.lock_categories
+        RegistrationService.lock_categories({entry['category'].id for entry in entries})
+        errors = sorted(RegistrationImport._check(lines, entries), key=lambda error: error[0])
+        if errors:
+            db.session.rollback()
+            result['errors'] = errors
+            return result
+
+        registrations = RegistrationImport._create(tournament, entries, imported_by, passwords)
+        result['imported'] = len(registrations)
+        current_app.logger.info(f"Imported {len(registrations)} registration(s) into tournament {tournament.id}")
+        RegistrationImport._queue_confirmations(registrations)
+        return result
+
+    @staticmethod
+    def read_rows(stream, filename):
+        """(line number, row dict keyed by column name) for each non-empty row of a binary CSV or XLSX stream"""
+        if filename.lower().endswith('.xlsx'):
+            rows = RegistrationImport._xlsx_rows(stream)
+        else:
+            rows = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+
+        header = None
+        for line, values in enumerate(rows, start=1):
+            if not any(RegistrationImport._cell(value) for value in values):
+                continue
+            if header is None:
+                header = [RegistrationImport._cell(value).lower().replace(' ', '_') for value in values]
+                missing = [column for column in RegistrationImport.REQUIRED_COLUMNS if column not in header]
+                if missing:
+                    raise ValueError(f"Missing column(s): {', '.join(missing)}")
+                continue
+            yield line, dict(zip(header, values))
+
+    @staticmethod
+    def parse_row(row, categories):
+        """(entry, error messages) for one row"""
+        errors = []
+        category_key = RegistrationImport._cell(row.get('category'))
+        category = categories.get(category_key.lower())
+        if category is None:
+            errors.append(f"Unknown category '{category_key}'.")
+
+        players = []
+        for slot in (1, 2):
+            values = {field: row.get(f'player{slot}_{field}') for field in IMPORT_PLAYER_FIELDS}
+            if slot == 2 and not any(RegistrationImport._cell(value) for value in values.values()):
+                continue
+            player = {field: RegistrationImport._cell(value) or None for field, value in values.items()}
+            if not player['email'] or '@' not in player['email']:
+                errors.append(f"Player {slot} needs a valid email.")
+            else:
+                player['email'] = player['email'].lower()
+            if not player['name']:
+                errors.append(f"Player {slot} needs a name.")
+            try:
+                player['date_of_birth'] = RegistrationImport._date(values['date_of_birth'])
+            except ValueError:
+                errors.append(f"Player {slot} date of birth '{player['date_of_birth']}' is not a date (YYYY-MM-DD).")
+            try:
+                player['dupr_rating'] = float(player['dupr_rating']) if player['dupr_rating'] else None
+            except ValueError:
+                errors.append(f"Player {slot} DUPR rating '{player['dupr_rating']}' is not a number.")
+            players.append(player)
+
+        seed = RegistrationImport._cell(row.get('seed'))
+        if seed and not seed.isdigit():
+            errors.append(f"Seed '{seed}' is not a number.")
+        entry = {
+            'category': category,
+            'players': players,
+            'seed': int(seed) if seed.isdigit() else None,
+            'special_requests': RegistrationImport._cell(row.get('special_requests')) or None,
+        }
+        return entry, errors
+
+    @staticmethod
+    def candidate(entry):
+        """An entry as a candidate for RegistrationService.validate_registrations (the players have no profile id yet)"""
+        players = entry['players']
+        return {
+            'category_id': entry['category'].id,
+            'player_id': None,
+            'partner_id': None,
+            'player': players[0],
+            'partner': players[1] if len(players) > 1 else None,
+        }
+
+    @staticmethod
+    def _check(lines, entries):
+        """(line number, message) for each entry that cannot be registered"""
+        checked = RegistrationService.validate_registrations([RegistrationImport.candidate(entry) for entry in entries])
+        return [(line, error) for line, (is_valid, error) in zip(lines, checked) if not is_valid]
+
+    @staticmethod
+    def _create(tournament, entries, imported_by, passwords):
+        batch_size = current_app.config.get('REGISTRATION_IMPORT_BATCH_SIZE', 200)
+        now = datetime.utcnow()
+        registrations = []
+        try:
+            for start in range(0, len(entries), batch_size):
+                batch = entries[start:start + batch_size]
+                # Accounts and profiles for the whole batch, then its registrations in one flush
+                accounts = iter(AccountProvisioning.provision(
+                    [player for entry in batch for player in entry['players']], passwords
+                ))
+                created = []
+                for entry in batch:
+                    category = entry['category']
+                    fee = category.registration_fee or 0.0
+                    registration = Registration(
+                        category=category,
+                        registration_fee=fee,
+                        is_team_registration=category.is_doubles(),
+                        is_approved=True,
+                        payment_status='free' if fee <= 0 else 'paid',
+                        payment_verified=True,
+                        payment_verified_at=now,
+                        payment_verified_by=imported_by.id if imported_by else None,
+                        payment_reference=generate_payment_reference(tournament),
+                        seed=entry['seed'],
+                        special_requests=entry['special_requests']
+                    )
+                    for slot, player in enumerate(entry['players'], start=1):
+                        profile, temp_password = next(accounts)
+                        if slot == 1:
+                            registration.player = profile
+                        else:
+                            registration.partner = profile
+                        for field in IMPORT_PLAYER_FIELDS:
+                            setattr(registration, f'player{slot}_{field}', player[field])
+                        if temp_password:
+                            setattr(registration, f'player{slot}_temp_password', temp_password)
+                            setattr(registration, f'player{slot}_account_created', True)
+                    created.append(registration)
+                db.session.add_all(created)
+                db.session.flush()
+                registrations.extend(created)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return registrations
+
+    @staticmethod
+    def _queue_confirmations(registrations):
+        batch_size = current_app.config.get('REGISTRATION_IMPORT_BATCH_SIZE', 200)
+        try:
+            messages = [message for registration in registrations for message in registration.confirmation_messages()]
+            for start in range(0, len(messages), batch_size):
+                EmailQueue.enqueue(*messages[start:start + batch_size])
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to queue confirmation emails for imported registrations: {e}")
+
+    @staticmethod
+    def _categories_by_key(tournament):
+        """Categories of the tournament by lowercased name, type and id"""
+        categories = {}
+        for category in tournament.categories:
+            if category.name:
+                categories[category.name.lower()] = category
+        for category in tournament.categories:
+            if category.category_type:
+                categories.setdefault(category.category_type.value.lower(), category)
+            categories[str(category.id)] = category
+        return categories
+
+    @staticmethod
+    def _xlsx_rows(stream):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Reading .xlsx files requires openpyxl; upload the sheet as CSV instead.")
+        # Read-only mode streams the rows instead of loading the whole workbook
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            # Spreadsheets hand back whole numbers (phone numbers, seeds) as floats
+            value = int(value)
+        return str(value).strip()
+
+    @staticmethod
+    def _date(value):
+        if value is None or isinstance(value, date):
+            return value.date() if isinstance(value, datetime) else value
+        text = str(value).strip()
+        if not text:
+            return None
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format).date()
+            except ValueError:
+                continue
+        raise ValueError(text)
@@ -1,92 +1,190 @@
 from app import db
 from app.models import Tournament, TournamentCategory, Match, MatchScore, Group, GroupStanding
-from app.models import PlayerProfile, Team, Registration, MatchStage, CategoryType
-from sqlalchemy import func
+from app.models import PlayerProfile, Team, Registration, MatchStage, User
+from app.helpers.registration import calculate_age
+from sqlalchemy import func, null, or_, select, union, update
 from collections import defaultdict
 
 class RegistrationService:
     """Service for tournament registration with DUPR rating validation"""
     
     @staticmethod
-    def validate_registration(player_id, category_id, partner_id=None):
+    def validate_registration(player_id, category_id, partner_id=None, player=None, partner=None):
         """
         Validate if a player/team can register for a category based on restrictions
         Returns (is_valid, error_message)
         """
-        category = TournamentCategory.query.get_or_404(category_id)
-        player = PlayerProfile.query.get_or_404(player_id)
-        
-        # Check if category is full
-        registrations_count = Registration.query.filter_by(category_id=category_id).count()
-        if registrations_count >= category.max_participants:
-            return False, "This category is already full."
-        
-        # Check gender restrictions
-        if category.gender_restriction:
-            if category.gender_restriction != player.gender:
-                return False, f"This category is restricted to {category.gender_restriction} players."
-        
-        # Check age restrictions
-        if category.min_age and player.age < category.min_age:
-            return False, f"Player must be at least {category.min_age} years old."
-        
-        if category.max_age and player.age > category.max_age:
-            return False, f"Player must be under {category.max_age} years old."
-        
-        # Check DUPR rating restrictions for appropriate category
-        category_type = category.category_type
-        if category_type == CategoryType.MENS_SINGLES:
-            player_rating = player.mens_singles_dupr
-        elif category_type == CategoryType.WOMENS_SINGLES:
-            player_rating = player.womens_singles_dupr
-        elif category_type == CategoryType.MENS_DOUBLES:
-            player_rating = player.mens_doubles_dupr
-        elif category_type == CategoryType.WOMENS_DOUBLES:
-            player_rating = player.womens_doubles_dupr
-        elif category_type == CategoryType.MIXED_DOUBLES:
-            player_rating = player.mixed_doubles_dupr
-        else:
-            player_rating = None
-        
-        if category.min_dupr_rating and (not player_rating or player_rating < category.min_dupr_rating):
-            return False, f"Minimum DUPR rating of {category.min_dupr_rating} required."
-        
-        if category.max_dupr_rating and (player_rating and player_rating > category.max_dupr_rating):
-            return False, f"Maximum DUPR rating of {category.max_dupr_rating} allowed."
-        
-        # For doubles, check partner
+        return RegistrationService.validate_registrations([{
+            'category_id': category_id,
+            'player_id': player_id,
+            'partner_id': partner_id,
+            'player': player,
+            'partner': partner,
+        }])[0]
+
+    @staticmethod
+    def validate_registrations(candidates):
+        """
+        Validate many candidate registrations with three queries in total.
+
+        Each candidate is a dict with 'category_id', 'player_id' and
+        'partner_id' (player profile ids), plus optional 'player'/'partner'
+        dicts with 'email', 'date_of_birth' and 'dupr_rating' for players who
+        have no profile yet or whose rating is known. Candidates are checked
+        in order and an accepted one takes its places and players before the
+        next, so a list cannot oversubscribe a category or enter a player
+        twice. Players are matched against existing registrations by profile
+        and by email, so a pending registration typed in by email counts too.
+        Returns an (is_valid, error_message) pair per candidate.
+
+        Rating limits apply to players whose details carry a 'dupr_rating'
+        (None fails a minimum); profiles carry no rating, so players without
+        one are checked on approval (Registration.is_eligible). Call
+        lock_categories first, in the transaction that inserts the accepted
+        registrations, to make the capacity check hold against concurrent
+        registrations.
+        """
+        category_ids = {candidate['category_id'] for candidate in candidates}
+        profile_ids = {candidate[key] for candidate in candidates
+                       for key in ('player_id', 'partner_id') if candidate.get(key)}
+
+        # Categories with the registrations holding a place in them
+        taken_count = select(func.count(Registration.id)).where(
+            Registration.category_id == TournamentCategory.id, RegistrationService.holds_place()
+        ).correlate(TournamentCategory).scalar_subquery()
+        categories, taken = {}, {}
+        for category, count in db.session.query(TournamentCategory, taken_count).filter(
+                TournamentCategory.id.in_(category_ids)):
+            categories[category.id] = category
+            taken[category.id] = count
+
+        # Profiles with their account's email
+        profiles, emails = {}, {}
+        if profile_ids:
+            for profile, email in db.session.query(PlayerProfile, func.lower(User.email)).outerjoin(
+                    User, User.id == PlayerProfile.user_id).filter(PlayerProfile.id.in_(profile_ids)):
+                profiles[profile.id] = profile
+                emails[profile.id] = email
+
+        # Every (category, profile id) and (category, email) already registered in these categories
+        in_categories = Registration.category_id.in_(category_ids)
+        registered_players = union(*[
+            select(Registration.category_id, profile_column, func.lower(User.email)).outerjoin(
+                PlayerProfile, PlayerProfile.id == profile_column
+            ).outerjoin(User, User.id == PlayerProfile.user_id).where(in_categories, profile_column.isnot(None))
+            for profile_column in (Registration.player_id, Registration.partner_id)
+        ], *[
+            select(Registration.category_id, null(), func.lower(email_column)).where(
+                in_categories, email_column.isnot(None))
+            for email_column in (Registration.player1_email, Registration.player2_email)
+        ])
+        registered = set()
+        for category_id, profile_id, email in db.session.execute(registered_players):
+            registered.update((category_id, key) for key in (profile_id, email) if key)
+
+        results = []
+        for candidate in candidates:
+            category = categories.get(candidate['category_id'])
+            keys = RegistrationService._player_keys(candidate, emails)
+            error = RegistrationService._candidate_error(candidate, category, profiles, keys, registered, taken)
+            if error is None:
+                # Later candidates see this one as registered and counted
+                taken[category.id] += 1
+                registered.update((category.id, key) for player_keys in keys for key in player_keys)
+            results.append((error is None, error))
+        return results
+
+    @staticmethod
+    def _player_keys(candidate, emails):
+        """Profile id and lowercased email (those known) of the player and partner"""
+        keys = []
+        for id_key, details_key in (('player_id', 'player'), ('partner_id', 'partner')):
+            profile_id = candidate.get(id_key)
+            email = emails.get(profile_id) or ((candidate.get(details_key) or {}).get('email') or '').lower()
+            keys.append([key for key in (profile_id, email) if key])
+        return keys
+
+    @staticmethod
+    def _candidate_error(candidate, category, profiles, keys, registered, taken):
+        if category is None:
+            return "Category not found."
+        player_id, partner_id = candidate.get('player_id'), candidate.get('partner_id')
+        slots = [('Player', player_id, candidate.get('player') or {}, keys[0])]
         if category.is_doubles():
-            if not partner_id:
-                return False, "Partner required for doubles events."
-            
-            partner = Player.query.get_or_404(partner_id)
-            
-            # Check partner gender restrictions for mixed doubles
-            if category_type == CategoryType.MIXED_DOUBLES:
-                if player.gender == partner.gender:
-                    return False, "Mixed doubles requires partners of different genders."
-            
-            # Check partner age restrictions
-            if category.min_age and partner.age < category.min_age:
-                return False, f"Partner must be at least {category.min_age} years old."
-            
-            if category.max_age and partner.age > category.max_age:
-                return False, f"Partner must be under {category.max_age} years old."
-            
-            # Check partner DUPR rating
-            if category_type == CategoryType.MENS_DOUBLES:
-                partner_rating = partner.mens_doubles_dupr
-            elif category_type == CategoryType.WOMENS_DOUBLES:
-                partner_rating = partner.womens_doubles_dupr
-            elif category_type == CategoryType.MIXED_DOUBLES:
-                partner_rating = partner.mixed_doubles_dupr
-            else:
-                partner_rating = None
-            
-            if category.min_dupr_rating and (not partner_rating or partner_rating < category.min_dupr_rating):
-                return False, f"Partner's minimum DUPR rating of {category.min_dupr_rating} required."
-            
-            if category.max_dupr_rating and (partner_rating and partner_rating > category.max_dupr_rating):
-                return False, f"Partner's maximum DUPR rating of {category.max_dupr_rating} allowed."
-        
-        return True, None
\ No newline at end of file
+            if not partner_id and not candidate.get('partner'):
+                return "Partner required for doubles events."
+            if set(keys[0]) & set(keys[1]):
+                return "You cannot register with yourself as a partner."
+            slots.append(('Partner', partner_id, candidate.get('partner') or {}, keys[1]))
+        elif partner_id or candidate.get('partner'):
+            return f"{category.name} takes one player per registration."
+
+        for label, profile_id, details, player_keys in slots:
+            profile = profiles.get(profile_id)
+            if profile_id and profile is None:
+                return f"{label} profile not found."
+            if any((category.id, key) in registered for key in player_keys):
+                if label == 'Player':
+                    return "You (Player 1) are already registered for this category."
+                return "Your selected partner (Player 2) is already registered for this category."
+
+            date_of_birth = (profile.date_of_birth if profile else None) or details.get('date_of_birth')
+            age = calculate_age(date_of_birth) if date_of_birth else (profile.age if profile else None)
+            if age is not None:
+                if category.min_age is not None and age < category.min_age:
+                    return f"{label} must be at least {category.min_age} years old."
+                if category.max_age is not None and age > category.max_age:
+                    return f"{label} must be under {category.max_age} years old."
+
+            if 'dupr_rating' in details:
+                rating = details['dupr_rating']
+                if category.min_dupr_rating is not None and (rating is None or rating < category.min_dupr_rating):
+                    return f"{label} needs a DUPR rating of at least {category.min_dupr_rating}."
+                if category.max_dupr_rating is not None and rating is not None and rating > category.max_dupr_rating:
+                    return f"{label} has a DUPR rating above {category.max_dupr_rating}."
+
+        if category.max_participants is not None:
+            team_size = len(slots)
+            if (taken[category.id] + 1) * team_size > category.max_participants:
+                return f'Sorry, the category "{category.name}" is full or does not have enough space.'
+        return None
+
+    @staticmethod
+    def lock_categories(category_ids):
+        """
+        Hold the categories' rows until the current transaction ends.
+
+        Registration paths lock before validating and insert in the same
+        transaction, so registrations for one category are serialized and
+        the capacity they checked still holds when they commit. A no-op
+        UPDATE is used rather than SELECT ... FOR UPDATE, which SQLite
+        ignores: it takes the row lock on PostgreSQL/MySQL and the database
+        write lock on SQLite.
+        """
+        if category_ids:
+            db.session.execute(
+                update(TournamentCategory).where(TournamentCategory.id.in_(category_ids))
+                .values(id=TournamentCategory.id).execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    def holds_place():
+        """
+        Criterion for registrations that take a place in their category.
+
+        Paid registrations are inserted before their payment is verified, so
+        every registration that has not been rejected counts towards
+        max_participants; otherwise a paid category would only fill up as
+        payments are verified, after it had been oversubscribed.
+        """
+        return or_(Registration.payment_status.is_(None), Registration.payment_status != 'rejected')
+
+    @staticmethod
+    def places_taken(categories):
+        """Places taken in each category by registrations holding one (two per doubles team), in one query"""
+        counts = dict(db.session.query(Registration.category_id, func.count(Registration.id)).filter(
+            Registration.category_id.in_([category.id for category in categories]),
+            RegistrationService.holds_place()
+        ).group_by(Registration.category_id).all())
+        return {category.id: counts.get(category.id, 0) * (2 if category.is_doubles() else 1)
+                for category in categories}
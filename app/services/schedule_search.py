@@ -0,0 +1,219 @@
+import re
+import unicodedata
+from datetime import datetime
+from itertools import chain
+from sqlalchemy import event, select, union, intersect, delete, update, insert, or_, tuple_, inspect
+from sqlalchemy.orm import Session, joinedload
+from app import db
+from app.models import (
+    Tournament, TournamentCategory, ParticipantSearchToken, Registration, PlayerProfile,
+    Team, Group, Match, MatchStage
+)
+from app.services.score_loader import ScoreLoader
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+# Participant columns indexed when rows of these models are written through the session
+_PARTICIPANT_COLUMNS = {
+    Registration: ('player_id', 'partner_id'),
+    Team: ('player1_id', 'player2_id'),
+    Match: ('player1_id', 'player2_id'),
+}
+
+
+class ScheduleSearch:
+    """
+    Server-side search over a tournament's schedule.
+
+    Participant names are kept as normalized tokens in participant_search_token,
+    so a name search is an indexed prefix lookup folded into the match query
+    together with the category/stage filters and pagination. Tokens are
+    written on flush as registrations, teams and matches gain participants
+    and players are renamed; searches only read. Tournaments created before
+    the index existed are indexed by the rebuild-search-index command and
+    searched by name until then.
+    """
+
+    PER_PAGE = 50
+    MAX_TOKEN_LENGTH = 100
+
+    @staticmethod
+    def init_app(app):
+        """Keep the token table in step with registrations and profile renames"""
+        if not event.contains(Session, 'after_flush', ScheduleSearch._after_flush):
+            event.listen(Session, 'after_flush', ScheduleSearch._after_flush)
+
+    @staticmethod
+    def tokenize(text):
+        """Lowercase, accent-stripped words of a name or search string, without duplicates"""
+        if not text:
+            return []
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+        tokens = (token[:ScheduleSearch.MAX_TOKEN_LENGTH] for token in _TOKEN_RE.findall(text))
+        return list(dict.fromkeys(tokens))
+
+    @staticmethod
+    def backfill(tournament_ids=None):
+        """Rebuild the index of the given tournaments (default: those never indexed); returns their ids"""
+        if tournament_ids is None:
+            tournament_ids = db.session.scalars(
+                select(Tournament.id).where(Tournament.search_indexed_at.is_(None)).order_by(Tournament.id)
+            ).all()
+        for tournament_id in tournament_ids:
+            ScheduleSearch.rebuild(tournament_id)
+        return list(tournament_ids)
+
+    @staticmethod
+    def rebuild(tournament_id):
+        """Re-index every registered, team and match participant of a tournament"""
+        category_ids = select(TournamentCategory.id).where(TournamentCategory.tournament_id == tournament_id)
+        participants = union(
+            select(Registration.player_id.label('player_id')).where(Registration.category_id.in_(category_ids)),
+            select(Registration.partner_id).where(Registration.category_id.in_(category_ids)),
+            select(Team.player1_id).where(Team.category_id.in_(category_ids)),
+            select(Team.player2_id).where(Team.category_id.in_(category_ids)),
+            select(Match.player1_id).where(Match.category_id.in_(category_ids)),
+            select(Match.player2_id).where(Match.category_id.in_(category_ids)),
+        ).subquery()
+        names = db.session.execute(
+            select(PlayerProfile.id, PlayerProfile.full_name)
+            .where(PlayerProfile.id.in_(select(participants.c.player_id)))
+        ).all()
+
+        db.session.execute(
+            delete(ParticipantSearchToken).where(ParticipantSearchToken.tournament_id == tournament_id)
+        )
+        rows = ScheduleSearch._token_rows({(tournament_id, player_id) for player_id, _ in names}, dict(names))
+        if rows:
+            db.session.execute(insert(ParticipantSearchToken), rows)
+        db.session.execute(
+            update(Tournament).where(Tournament.id == tournament_id).values(search_indexed_at=datetime.utcnow())
+        )
+        db.session.commit()
+
+    @staticmethod
+    def search(tournament_id, search_query='', category_id=None, stage_filter='', page=1, per_page=None):
+        """Paginated scheduled matches matching the name search and filters"""
+        query = ScheduleSearch._scheduled_matches(tournament_id, category_id)
+
+        tokens = ScheduleSearch.tokenize(search_query)
+        if tokens:
+            tournament = db.session.get(Tournament, tournament_id)
+            if tournament is not None and tournament.search_indexed_at is None:
+                # Not backfilled yet: match the participants' names directly
+                player_ids = select(PlayerProfile.id.label('player_id')).where(
+                    *[PlayerProfile.full_name.ilike(f'%{token}%') for token in tokens]
+                )
+            else:
+                # Every search word must prefix-match a word of the same participant
+                selects = [
+                    select(ParticipantSearchToken.player_id).where(
+                        ParticipantSearchToken.tournament_id == tournament_id,
+                        ParticipantSearchToken.token.like(f'{token}%')
+                    )
+                    for token in tokens
+                ]
+                player_ids = intersect(*selects) if len(selects) > 1 else selects[0]
+            players = player_ids.cte('matched_players')
+            matched = select(players.c.player_id)
+            team_ids = select(Team.id).where(or_(Team.player1_id.in_(matched), Team.player2_id.in_(matched)))
+            query = query.filter(or_(
+                Match.player1_id.in_(matched), Match.player2_id.in_(matched),
+                Match.team1_id.in_(team_ids), Match.team2_id.in_(team_ids)
+            ))
+
+        if stage_filter.startswith('group:'):
+            query = query.join(Group, Match.group_id == Group.id).filter(
+                Match.stage == MatchStage.GROUP, Group.name == stage_filter[6:]
+            )
+        elif stage_filter.isdigit():
+            query = query.filter(Match.stage == MatchStage.KNOCKOUT, Match.round == int(stage_filter))
+
+        query = query.options(
+            joinedload(Match.category), joinedload(Match.group), *ScoreLoader.participant_options()
+        ).order_by(Match.scheduled_time, Match.id)
+        return query.paginate(page=page, per_page=per_page or ScheduleSearch.PER_PAGE, error_out=False)
+
+    @staticmethod
+    def available_stages(tournament_id, category_id=None):
+        """Group names and knockout rounds that have scheduled matches, for the stage filter"""
+        rows = ScheduleSearch._scheduled_matches(tournament_id, category_id).outerjoin(
+            Group, Match.group_id == Group.id
+        ).with_entities(Match.stage, Match.round, Group.name).distinct().all()
+
+        groups = sorted({name for stage, _, name in rows if stage == MatchStage.GROUP and name})
+        knockout = sorted({rnd for stage, rnd, _ in rows if stage == MatchStage.KNOCKOUT}, reverse=True)
+        return {'groups': groups, 'knockout': knockout}
+
+    @staticmethod
+    def _scheduled_matches(tournament_id, category_id=None):
+        query = Match.query.join(TournamentCategory, Match.category_id == TournamentCategory.id).filter(
+            TournamentCategory.tournament_id == tournament_id,
+            Match.scheduled_time.isnot(None)
+        )
+        if category_id:
+            query = query.filter(TournamentCategory.id == category_id)
+        return query
+
+    @staticmethod
+    def _token_rows(pairs, names):
+        rows = []
+        for tournament_id, player_id in pairs:
+            for token in ScheduleSearch.tokenize(names.get(player_id)):
+                rows.append({'tournament_id': tournament_id, 'player_id': player_id, 'token': token})
+        return rows
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        entries = set()   # (category_id, player_id) of new or moved participants
+        renamed = set()
+        for obj in chain(session.new, session.dirty):
+            columns = _PARTICIPANT_COLUMNS.get(type(obj))
+            if columns:
+                if obj in session.new or _changed(obj, 'category_id', *columns):
+                    entries.update((obj.category_id, getattr(obj, column)) for column in columns
+                                   if getattr(obj, column) and obj.category_id)
+            elif isinstance(obj, PlayerProfile) and obj not in session.new and _changed(obj, 'full_name'):
+                renamed.add(obj.id)
+        if entries or renamed:
+            ScheduleSearch._reindex(session.connection(), entries, renamed)
+
+    @staticmethod
+    def _reindex(connection, entries, renamed):
+        """
+        Rewrite the tokens of the given participants. Tokens left behind by a
+        withdrawn registration are harmless: they only ever select match rows.
+        """
+        pairs = set()
+        if entries:
+            tournaments = dict(connection.execute(
+                select(TournamentCategory.id, TournamentCategory.tournament_id)
+                .where(TournamentCategory.id.in_({category_id for category_id, _ in entries}))
+            ).all())
+            pairs.update((tournaments[category_id], player_id) for category_id, player_id in entries
+                         if category_id in tournaments)
+        if renamed:
+            pairs.update(tuple(row) for row in connection.execute(
+                select(ParticipantSearchToken.tournament_id, ParticipantSearchToken.player_id)
+                .where(ParticipantSearchToken.player_id.in_(renamed)).distinct()
+            ).all())
+        if not pairs:
+            return
+
+        names = dict(connection.execute(
+            select(PlayerProfile.id, PlayerProfile.full_name)
+            .where(PlayerProfile.id.in_({player_id for _, player_id in pairs}))
+        ).all())
+        connection.execute(
+            delete(ParticipantSearchToken).where(
+                tuple_(ParticipantSearchToken.tournament_id, ParticipantSearchToken.player_id).in_(list(pairs))
+            )
+        )
+        rows = ScheduleSearch._token_rows(pairs, names)
+        if rows:
+            connection.execute(insert(ParticipantSearchToken.__table__), rows)
+
+
+def _changed(obj, *attributes):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
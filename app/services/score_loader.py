@@ -0,0 +1,72 @@
+from flask import g, has_request_context, request
+from sqlalchemy.orm import joinedload
+from app.models import Match, MatchScore, Team
+
+
+class ScoreLoader:
+    """
+    Set scores for many matches in one IN query, grouped by match.
+
+    Within a request the loaded scores are kept, so every view helper that
+    needs the scores of an already-loaded match reuses them instead of
+    querying again. Writers call forget() for matches whose scores change.
+    """
+
+    # Keeps IN lists under the bound parameter limit of older SQLite builds
+    CHUNK_SIZE = 900
+
+    @staticmethod
+    def load(match_ids):
+        """Mapping of match id -> list of MatchScore ordered by set number"""
+        match_ids = list(dict.fromkeys(i for i in match_ids if i is not None))
+        cache = ScoreLoader._cache()
+        missing = [i for i in match_ids if i not in cache]
+        for start in range(0, len(missing), ScoreLoader.CHUNK_SIZE):
+            chunk = missing[start:start + ScoreLoader.CHUNK_SIZE]
+            for match_id in chunk:
+                cache[match_id] = []
+            rows = MatchScore.query.filter(MatchScore.match_id.in_(chunk)).order_by(
+                MatchScore.match_id, MatchScore.set_number
+            ).all()
+            for score in rows:
+                cache[score.match_id].append(score)
+        return {match_id: cache[match_id] for match_id in match_ids}
+
+    @staticmethod
+    def for_match(match_id):
+        """Set scores of a single match"""
+        return ScoreLoader.load([match_id])[match_id]
+
+    @staticmethod
+    def prime(scores, match_ids):
+        """Share scores loaded elsewhere (e.g. by a BracketSnapshot) with the rest of the request"""
+        cache = ScoreLoader._cache()
+        for match_id in match_ids:
+            cache[match_id] = list(scores.get(match_id, ()))
+
+    @staticmethod
+    def forget(*match_ids):
+        """Drop cached scores of matches whose scores were just written"""
+        cache = ScoreLoader._cache()
+        for match_id in match_ids:
+            cache.pop(match_id, None)
+
+    @staticmethod
+    def participant_options():
+        """Loader options that bring in a match's players/teams with the match row"""
+        return (
+            joinedload(Match.player1), joinedload(Match.player2),
+            joinedload(Match.team1).joinedload(Team.player1), joinedload(Match.team1).joinedload(Team.player2),
+            joinedload(Match.team2).joinedload(Team.player1), joinedload(Match.team2).joinedload(Team.player2),
+        )
+
+    @staticmethod
+    def _cache():
+        if not has_request_context():
+            return {}
+        # Keyed on the request object: tests may run several requests in one app context
+        current = request._get_current_object()
+        store = g.get('_match_scores')
+        if store is None or store[0] is not current:
+            store = g._match_scores = (current, {})
+        return store[1]
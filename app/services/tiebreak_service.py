@@ -0,0 +1,162 @@
+from collections import defaultdict
+from app.models import Match, MatchScore, MatchStage
+
+
+class TiebreakEngine:
+    """
+    Resolves group positions from a per-group results matrix.
+
+    All completed group matches (and, only when a configured criterion needs
+    them, their set scores) are fetched once per group. Head-to-head wins and
+    set/point differentials between every pair of participants are stored in
+    n x n matrices, so every tied cluster - including multi-way mini-leagues -
+    is resolved by summing rows over the cluster instead of re-querying.
+
+    Participants are first grouped by matches won. Within a cluster the
+    configured criteria are compared in order (all descending); remaining ties
+    keep their input order.
+    """
+
+    # Today's rules: head-to-head wins among the tied participants, then overall point differential
+    DEFAULT_ORDER = ('h2h_wins', 'point_diff')
+
+    # Criteria computed from the head-to-head matrices, restricted to the tied cluster
+    HEAD_TO_HEAD_CRITERIA = ('h2h_wins', 'h2h_set_diff', 'h2h_point_diff')
+
+    # Criteria read straight from the GroupStanding counters
+    STANDING_CRITERIA = {
+        'point_diff': lambda s: (s.points_won or 0) - (s.points_lost or 0),
+        'set_diff': lambda s: (s.sets_won or 0) - (s.sets_lost or 0),
+        'points_won': lambda s: s.points_won or 0,
+        'sets_won': lambda s: s.sets_won or 0,
+    }
+
+    # Match columns needed to fill the matrices
+    RESULT_COLUMNS = (
+        Match.id, Match.player1_id, Match.player2_id, Match.winning_player_id,
+        Match.team1_id, Match.team2_id, Match.winning_team_id
+    )
+
+    def __init__(self, standings, matches=None, scores=None, tiebreak_order=None, group_id=None):
+        """
+        Args:
+            standings: GroupStanding rows of one group
+            matches: completed group matches; fetched lazily from group_id if None
+            scores: dict of match id -> MatchScore list; fetched lazily if needed
+            tiebreak_order: sequence of criteria names (defaults to DEFAULT_ORDER)
+            group_id: group to fetch matches for (defaults to the standings' group)
+        """
+        self.standings = list(standings)
+        self.order = TiebreakEngine.normalize_order(tiebreak_order)
+        self.group_id = group_id if group_id is not None else (
+            self.standings[0].group_id if self.standings else None
+        )
+        self.is_doubles = any(s.team_id and not s.player_id for s in self.standings)
+        self.index = {self._participant_id(s): i for i, s in enumerate(self.standings)}
+
+        self._matches = matches
+        self._scores = scores
+        self._wins = None
+        self._set_diff = None
+        self._point_diff = None
+
+    @staticmethod
+    def normalize_order(tiebreak_order):
+        """Validate a configured order, falling back to DEFAULT_ORDER"""
+        if not tiebreak_order:
+            return TiebreakEngine.DEFAULT_ORDER
+        known = set(TiebreakEngine.HEAD_TO_HEAD_CRITERIA) | set(TiebreakEngine.STANDING_CRITERIA)
+        unknown = [c for c in tiebreak_order if c not in known]
+        if unknown:
+            raise ValueError(f"Unknown tiebreak criteria: {', '.join(unknown)}")
+        return tuple(tiebreak_order)
+
+    def _participant_id(self, standing):
+        return standing.team_id if self.is_doubles else standing.player_id
+
+    @property
+    def needs_scores(self):
+        return any(c in ('h2h_set_diff', 'h2h_point_diff') for c in self.order)
+
+    def _build_matrices(self):
+        """Fill the head-to-head matrices from one fetch of the group's results"""
+        n = len(self.standings)
+        self._wins = [[0] * n for _ in range(n)]
+        self._set_diff = [[0] * n for _ in range(n)]
+        self._point_diff = [[0] * n for _ in range(n)]
+
+        if self._matches is None:
+            # Plain rows of the result columns only - hydrating full Match objects dominates otherwise
+            self._matches = Match.query.filter_by(
+                group_id=self.group_id,
+                completed=True
+            ).filter(Match.stage == MatchStage.GROUP).with_entities(*self.RESULT_COLUMNS).all()
+
+        if self.needs_scores and self._scores is None:
+            self._scores = defaultdict(list)
+            match_ids = [m.id for m in self._matches]
+            if match_ids:
+                for score in MatchScore.query.filter(MatchScore.match_id.in_(match_ids)).with_entities(
+                    MatchScore.match_id, MatchScore.player1_score, MatchScore.player2_score
+                ).all():
+                    self._scores[score.match_id].append(score)
+
+        for match in self._matches:
+            if self.is_doubles:
+                side1, side2, winner = match.team1_id, match.team2_id, match.winning_team_id
+            else:
+                side1, side2, winner = match.player1_id, match.player2_id, match.winning_player_id
+
+            i, j = self.index.get(side1), self.index.get(side2)
+            if i is None or j is None:
+                continue
+
+            if winner == side1:
+                self._wins[i][j] += 1
+            elif winner == side2:
+                self._wins[j][i] += 1
+
+            if self._scores is not None:
+                for score in self._scores.get(match.id, ()):
+                    p1, p2 = score.player1_score or 0, score.player2_score or 0
+                    set_delta = (p1 > p2) - (p2 > p1)
+                    self._set_diff[i][j] += set_delta
+                    self._set_diff[j][i] -= set_delta
+                    self._point_diff[i][j] += p1 - p2
+                    self._point_diff[j][i] -= p1 - p2
+
+    def _cluster_values(self, criterion, cluster):
+        """Values of one criterion for each member of a cluster (list of indices)"""
+        if criterion in self.HEAD_TO_HEAD_CRITERIA:
+            if self._wins is None:
+                self._build_matrices()
+            matrix = {
+                'h2h_wins': self._wins,
+                'h2h_set_diff': self._set_diff,
+                'h2h_point_diff': self._point_diff,
+            }[criterion]
+            return [sum(matrix[i][j] for j in cluster) for i in cluster]
+
+        getter = self.STANDING_CRITERIA[criterion]
+        return [getter(self.standings[i]) for i in cluster]
+
+    def order_cluster(self, cluster):
+        """Order a list of tied standing indices by the configured criteria"""
+        if len(cluster) <= 1:
+            return list(cluster)
+
+        columns = [self._cluster_values(c, cluster) for c in self.order]
+        keys = {i: tuple(column[pos] for column in columns) for pos, i in enumerate(cluster)}
+        return sorted(cluster, key=lambda i: keys[i], reverse=True)
+
+    def rank(self):
+        """Return the standings ordered by final position"""
+        clusters = defaultdict(list)
+        for i, standing in enumerate(self.standings):
+            clusters[standing.matches_won].append(i)
+
+        ordered = []
+        for wins in sorted(clusters, reverse=True):
+            ordered.extend(self.order_cluster(clusters[wins]))
+
+        return [self.standings[i] for i in ordered]
@@ -2,6 +2,19 @@ from flask import request, session
 from flask_login import current_user
 from flask_socketio import emit, join_room, leave_room
 import json
+from app import db
+from app.models import Match
+from app.services.live_score_feed import LiveScoreFeed
+
+def _parse_id(data, key):
+    """Positive integer id sent by the client under key, or None (after telling it) when missing or malformed"""
+    value = data.get(key) if isinstance(data, dict) else None
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    emit('error', {'msg': f'Invalid {key}'})
+    return None
 
 def register_socketio_handlers(socketio):
     @socketio.on('connect')
@@ -43,25 +56,30 @@ def register_socketio_handlers(socketio):
     @socketio.on('join_tournament')
     def join_tournament(data):
         """Join a tournament-specific room."""
-        tournament_id = data.get('tournament_id')
+        tournament_id = _parse_id(data, 'tournament_id')
         if tournament_id:
             room = f'tournament_{tournament_id}'
             join_room(room)
             print(f'Client joined tournament room: {room}')
+            # Send the joining client the current scores; score_delta events follow
+            emit('score_snapshot', LiveScoreFeed.snapshot(tournament_id))
             
     @socketio.on('join_match')
     def join_match(data):
         """Join a match-specific room."""
-        match_id = data.get('match_id')
+        match_id = _parse_id(data, 'match_id')
         if match_id:
             room = f'match_{match_id}'
             join_room(room)
             print(f'Client joined match room: {room}')
+            match = db.session.get(Match, match_id)
+            if match:
+                emit('score_snapshot', LiveScoreFeed.snapshot(match.category.tournament_id, match_id=match.id))
             
     @socketio.on('join_courts_view')
     def join_courts_view(data):
         """Join a courts view room for live updates on all courts."""
-        tournament_id = data.get('tournament_id')
+        tournament_id = _parse_id(data, 'tournament_id')
         if tournament_id:
             room = f'courts_view_{tournament_id}'
             join_room(room)
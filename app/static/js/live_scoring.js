@@ -1,8 +1,10 @@
 /**
  * Live Scoring Module for Pickleball Tournament Platform
  * 
- * This JavaScript file handles real-time updates for tournament match scores
- * using polling to fetch updates from the server and update the display.
+ * This JavaScript file handles real-time updates for tournament match scores.
+ * Scores are pushed over Socket.IO (a snapshot on join, then score_delta
+ * events); polling with ?since=<version> is only used while the socket is
+ * unavailable, and then only fetches matches that changed.
  */
 
 class LiveScoring {
@@ -16,20 +18,69 @@ class LiveScoring {
         this.updateInterval = updateInterval;
         this.apiEndpoint = `/tournament/api/${tournamentId}/scores`;
         this.polling = null;
+        this.socket = null;
+        this.version = 0;
         this.lastUpdate = new Date();
         this.matchData = {};
     }
 
+    /**
+     * Subscribe to pushed score updates, falling back to polling
+     */
+    start() {
+        if (typeof io !== 'undefined') {
+            this.subscribe();
+        }
+        this.startPolling();
+    }
+
+    /**
+     * Join the tournament room; the server answers with a score_snapshot
+     * and then sends score_delta events as scores change
+     */
+    subscribe() {
+        this.socket = io();
+        this.socket.on('connect', () => {
+            this.socket.emit('join_tournament', { tournament_id: this.tournamentId });
+        });
+        this.socket.on('score_snapshot', data => this.applyFeed(data));
+        this.socket.on('score_delta', data => this.applyFeed(data));
+    }
+
+    /**
+     * Apply a snapshot or delta from the feed, ignoring anything already seen
+     * @param {Object} data - {version, full, matches}
+     */
+    applyFeed(data) {
+        if (data.full ? data.version < this.version : data.version <= this.version) {
+            return;
+        }
+        this.version = data.version;
+        this.processScoreData(data.matches);
+        this.lastUpdate = new Date();
+    }
+
+    /**
+     * Whether updates are currently arriving over the socket
+     */
+    isSubscribed() {
+        return this.socket !== null && this.socket.connected;
+    }
+
     /**
      * Start the polling for score updates
      */
     startPolling() {
-        // Initial fetch
-        this.fetchScores();
+        // Initial fetch (the socket delivers its own snapshot once connected)
+        if (!this.socket) {
+            this.fetchScores();
+        }
         
-        // Set up interval for regular updates
+        // Set up interval for regular updates while not subscribed
         this.polling = setInterval(() => {
-            this.fetchScores();
+            if (!this.isSubscribed()) {
+                this.fetchScores();
+            }
         }, this.updateInterval);
         
         // Display the last update time and start the timer
@@ -45,6 +96,10 @@ class LiveScoring {
      * Stop polling for updates
      */
     stopPolling() {
+        if (this.socket) {
+            this.socket.disconnect();
+            this.socket = null;
+        }
         if (this.polling) {
             clearInterval(this.polling);
             this.polling = null;
@@ -53,10 +108,10 @@ class LiveScoring {
     }
 
     /**
-     * Fetch the latest scores from the server
+     * Fetch the scores changed since the last version seen
      */
     fetchScores() {
-        fetch(this.apiEndpoint)
+        fetch(`${this.apiEndpoint}?since=${this.version}`)
             .then(response => {
                 if (!response.ok) {
                     throw new Error(`HTTP error! Status: ${response.status}`);
@@ -64,8 +119,7 @@ class LiveScoring {
                 return response.json();
             })
             .then(data => {
-                this.processScoreData(data);
-                this.lastUpdate = new Date();
+                this.applyFeed(data);
             })
             .catch(error => {
                 console.error('Error fetching live scores:', error);
@@ -172,7 +226,9 @@ class LiveScoring {
         if (statusElement) {
             // Determine if match is in progress based on scores
             const isInProgress = match.scores.length > 0;
-            if (isInProgress) {
+            if (match.completed) {
+                statusElement.innerHTML = '<span class="text-green-600">Completed</span>';
+            } else if (isInProgress) {
                 statusElement.innerHTML = '<span class="text-orange-600">In Progress</span>';
             }
         }
@@ -228,7 +284,7 @@ document.addEventListener('DOMContentLoaded', function() {
     if (liveScoring) {
         const tournamentId = liveScoring.dataset.tournamentId;
         const scorer = new LiveScoring(tournamentId);
-        scorer.startPolling();
+        scorer.start();
         
         // Add manual refresh handler
         const refreshButton = document.getElementById('refresh-scores-btn');
@@ -124,14 +124,17 @@ function initLiveScoring() {
     }
 }
 
+let liveScoreVersion = 0;
+
 /**
- * Fetch live scores from the API
+ * Fetch the live scores changed since the last version seen
  */
 function fetchLiveScores(tournamentId) {
-    fetch(`/tournament/api/${tournamentId}/scores`)
+    fetch(`/tournament/api/${tournamentId}/scores?since=${liveScoreVersion}`)
         .then(response => response.json())
         .then(data => {
-            updateLiveScores(data);
+            liveScoreVersion = data.version;
+            updateLiveScores(data.matches);
         })
         .catch(error => {
             console.error('Error fetching live scores:', error);
@@ -1,9 +1,17 @@
-from .email_tasks import send_match_reminder_email, send_schedule_change_email, send_announcement_email
-from .match_tasks import check_upcoming_matches
+from .email_tasks import (
+    send_match_reminder_email, send_match_reminder_emails, send_schedule_change_email, send_announcement_email,
+    resume_announcements
+)
+from .match_tasks import check_upcoming_matches, reconcile_group_standings
+from .ranking_tasks import recompute_rankings
 
 __all__ = [
     'send_match_reminder_email',
+    'send_match_reminder_emails',
     'send_schedule_change_email',
     'send_announcement_email',
-    'check_upcoming_matches'
+    'resume_announcements',
+    'check_upcoming_matches',
+    'reconcile_group_standings',
+    'recompute_rankings'
 ]
@@ -1,9 +1,25 @@
-from flask import current_app, render_template
-from flask_mail import Message
-from app import mail
-from app.models import Match, Registration, User, Tournament
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from app.helpers.email_utils import render_shared_email, personalize_messages
+from app import db
+from app.services.announcement_service import AnnouncementService
+from app.services.email_queue import EmailQueue
+from app.services.match_recipients import MatchRecipients
+from app.models import Match, Tournament, TournamentCategory
 from datetime import datetime, timedelta
 
+def _personalized_messages(subject, template, users, **context):
+    """
+    One message per user with an email address, rendering `template`.txt/.html
+    only once: the per-recipient greeting is filled in afterwards.
+    """
+    users = [user for user in users if user.email]
+    if not users:
+        return []
+    text, html = render_shared_email(template, **context)
+    return personalize_messages(subject, users, text, html)
+
+
 def send_match_reminder_email(match_id, is_day_before=False):
     """
     Send a reminder email to players about their upcoming match.
@@ -12,101 +28,60 @@ def send_match_reminder_email(match_id, is_day_before=False):
         match_id: The ID of the match to send reminders for
         is_day_before: True if this is a 24-hour reminder, False for a 1-hour reminder
     """
+    send_match_reminder_emails([match_id], is_day_before=is_day_before)
+
+
+def send_match_reminder_emails(match_ids, is_day_before=False):
+    """
+    Send reminder emails for a batch of upcoming matches (e.g. a reminder window).
+    
+    Matches and their recipients are loaded with one query each, each match's
+    email is rendered once, and all messages are queued together.
+    
+    Args:
+        match_ids: IDs of the matches to send reminders for
+        is_day_before: True if this is a 24-hour reminder, False for a 1-hour reminder
+    """
     with current_app.app_context():
-        match = Match.query.get(match_id)
-        if not match or not match.scheduled_time:
-            current_app.logger.error(f"Cannot send reminder for match {match_id}: Match not found or no scheduled time")
-            return
+        matches = Match.query.filter(Match.id.in_(match_ids)).options(
+            joinedload(Match.category).joinedload(TournamentCategory.tournament)
+        ).order_by(Match.scheduled_time, Match.id).all()
+        found = {match.id for match in matches}
+        for match_id in match_ids:
+            if match_id not in found:
+                current_app.logger.error(f"Cannot send reminder for match {match_id}: Match not found")
         
-        # Skip if the match is already completed or scheduled time is in the past
-        if match.completed or match.scheduled_time < datetime.now():
-            return
-            
-        # Get the players involved in the match
-        players = []
+        # Skip matches without a time, already completed or whose scheduled time is in the past
+        now = datetime.now()
+        matches = [m for m in matches if m.scheduled_time and not m.completed and m.scheduled_time >= now]
+        if not matches:
+            return []
         
-        # For singles matches
-        if not match.is_doubles:
-            if match.player1_id:
-                user = User.query.join(User.player_profile).filter(
-                    User.player_profile.has(id=match.player1_id)
-                ).first()
-                if user:
-                    players.append(user)
-                    
-            if match.player2_id:
-                user = User.query.join(User.player_profile).filter(
-                    User.player_profile.has(id=match.player2_id)
-                ).first()
-                if user:
-                    players.append(user)
-        
-        # For doubles matches
-        else:
-            if match.team1_id:
-                team = match.team1_profile
-                if team:
-                    for player_id in [team.player1_id, team.player2_id]:
-                        user = User.query.join(User.player_profile).filter(
-                            User.player_profile.has(id=player_id)
-                        ).first()
-                        if user:
-                            players.append(user)
-            
-            if match.team2_id:
-                team = match.team2_profile
-                if team:
-                    for player_id in [team.player1_id, team.player2_id]:
-                        user = User.query.join(User.player_profile).filter(
-                            User.player_profile.has(id=player_id)
-                        ).first()
-                        if user:
-                            players.append(user)
-        
-        if not players:
-            current_app.logger.error(f"No players found for match {match_id}")
-            return
-            
-        # Get tournament information
-        tournament = match.category.tournament
-        category_name = match.category.category_type.value
+        recipients = MatchRecipients.for_matches([match.id for match in matches])
         
         # Determine reminder time frame for subject line
         time_frame = "24 hours" if is_day_before else "soon"
         
-        # Prepare and send email to each player
-        for player in players:
-            if not player.email:
+        messages = []
+        for match in matches:
+            if not recipients[match.id]:
+                current_app.logger.error(f"No players found for match {match.id}")
                 continue
-                
-            msg = Message(
-                subject=f"Reminder: Your match in {tournament.name} starts in {time_frame}",
-                recipients=[player.email]
-            )
-            
-            msg.body = render_template(
-                'email/match_reminder.txt',
-                user=player,
-                match=match,
-                tournament=tournament,
-                category_name=category_name,
-                is_day_before=is_day_before
-            )
-            
-            msg.html = render_template(
-                'email/match_reminder.html',
-                user=player,
+            tournament = match.category.tournament
+            messages.extend(_personalized_messages(
+                f"Reminder: Your match in {tournament.name} starts in {time_frame}",
+                'email/match_reminder',
+                recipients[match.id],
                 match=match,
                 tournament=tournament,
-                category_name=category_name,
+                category_name=match.category.category_type.value,
                 is_day_before=is_day_before
-            )
-            
-            try:
-                mail.send(msg)
-                current_app.logger.info(f"Sent match reminder to {player.email} for match {match_id}")
-            except Exception as e:
-                current_app.logger.error(f"Failed to send match reminder to {player.email}: {str(e)}")
+            ))
+        
+        EmailQueue.enqueue(*messages)
+        db.session.commit()
+        current_app.logger.info(f"Queued {len(messages)} match reminder(s) for {len(matches)} match(es)")
+        return messages
 
 
 def send_schedule_change_email(match_id, changes):
@@ -123,47 +98,7 @@ def send_schedule_change_email(match_id, changes):
             current_app.logger.error(f"Cannot send schedule change for match {match_id}: Match not found")
             return
             
-        # Get the players involved in the match
-        players = []
-        
-        # For singles matches
-        if not match.is_doubles:
-            if match.player1_id:
-                user = User.query.join(User.player_profile).filter(
-                    User.player_profile.has(id=match.player1_id)
-                ).first()
-                if user:
-                    players.append(user)
-                    
-            if match.player2_id:
-                user = User.query.join(User.player_profile).filter(
-                    User.player_profile.has(id=match.player2_id)
-                ).first()
-                if user:
-                    players.append(user)
-        
-        # For doubles matches
-        else:
-            if match.team1_id:
-                team = match.team1_profile
-                if team:
-                    for player_id in [team.player1_id, team.player2_id]:
-                        user = User.query.join(User.player_profile).filter(
-                            User.player_profile.has(id=player_id)
-                        ).first()
-                        if user:
-                            players.append(user)
-            
-            if match.team2_id:
-                team = match.team2_profile
-                if team:
-                    for player_id in [team.player1_id, team.player2_id]:
-                        user = User.query.join(User.player_profile).filter(
-                            User.player_profile.has(id=player_id)
-                        ).first()
-                        if user:
-                            players.append(user)
-        
+        players = MatchRecipients.for_matches([match_id])[match_id]
         if not players:
             current_app.logger.error(f"No players found for match {match_id}")
             return
@@ -189,45 +124,28 @@ def send_schedule_change_email(match_id, changes):
         tournament = match.category.tournament
         category_name = match.category.category_type.value
         
-        # Prepare and send email to each player
-        for player in players:
-            if not player.email:
-                continue
-                
-            msg = Message(
-                subject=f"Schedule Change: Your match in {tournament.name}",
-                recipients=[player.email]
-            )
-            
-            msg.body = render_template(
-                'email/schedule_change.txt',
-                user=player,
-                match=match,
-                tournament=tournament,
-                category_name=category_name,
-                changes=formatted_changes
-            )
-            
-            msg.html = render_template(
-                'email/schedule_change.html',
-                user=player,
-                match=match,
-                tournament=tournament,
-                category_name=category_name,
-                changes=formatted_changes
-            )
-            
-            try:
-                mail.send(msg)
-                current_app.logger.info(f"Sent schedule change notification to {player.email} for match {match_id}")
-            except Exception as e:
-                current_app.logger.error(f"Failed to send schedule change notification to {player.email}: {str(e)}")
+        # The content only differs in the greeting: render once for all players
+        messages = _personalized_messages(
+            f"Schedule Change: Your match in {tournament.name}",
+            'email/schedule_change',
+            players,
+            match=match,
+            tournament=tournament,
+            category_name=category_name,
+            changes=formatted_changes
+        )
+        
+        EmailQueue.enqueue(*messages)
+        db.session.commit()
+        current_app.logger.info(f"Queued {len(messages)} schedule change notification(s) for match {match_id}")
                 
 
 def send_announcement_email(tournament_id, subject, message, recipients=None):
     """
     Send a general announcement email to tournament participants.
     
+    Runs as a chunked, checkpointed AnnouncementJob (see AnnouncementService).
+    
     Args:
         tournament_id: The ID of the tournament
         subject: Email subject
@@ -235,60 +153,15 @@ def send_announcement_email(tournament_id, subject, message, recipients=None):
         recipients: Optional list of user IDs to send to (if None, sends to all tournament participants)
     """
     with current_app.app_context():
-        tournament = Tournament.query.get(tournament_id)
-        if not tournament:
+        if db.session.get(Tournament, tournament_id) is None:
             current_app.logger.error(f"Cannot send announcement for tournament {tournament_id}: Tournament not found")
             return
-            
-        # Get all participants if no specific recipients list
-        users = []
-        if recipients:
-            users = User.query.filter(User.id.in_(recipients)).all()
-        else:
-            # Get all players registered for this tournament
-            registrations = Registration.query.join(
-                Registration.category
-            ).filter(
-                Registration.status == 'approved',
-                Registration.category.has(tournament_id=tournament_id)
-            ).all()
-            
-            user_ids = set()
-            for registration in registrations:
-                user_ids.add(registration.user_id)
-                
-            users = User.query.filter(User.id.in_(user_ids)).all()
-            
-        if not users:
-            current_app.logger.error(f"No recipients found for announcement for tournament {tournament_id}")
-            return
-            
-        # Prepare and send email to each user
-        for user in users:
-            if not user.email:
-                continue
-                
-            msg = Message(
-                subject=f"{tournament.name}: {subject}",
-                recipients=[user.email]
-            )
-            
-            msg.body = render_template(
-                'email/announcement.txt',
-                user=user,
-                tournament=tournament,
-                message=message
-            )
-            
-            msg.html = render_template(
-                'email/announcement.html',
-                user=user,
-                tournament=tournament,
-                message=message
-            )
-            
-            try:
-                mail.send(msg)
-                current_app.logger.info(f"Sent announcement to {user.email} for tournament {tournament_id}")
-            except Exception as e:
-                current_app.logger.error(f"Failed to send announcement to {user.email}: {str(e)}")
+        return AnnouncementService.start(tournament_id, subject, message, recipients=recipients)
+
+
+def resume_announcements():
+    """Scheduler entry point: finish announcements interrupted by a crash or restart"""
+    from app.scheduler import scheduler
+
+    with scheduler.app.app_context():
+        AnnouncementService.resume_unfinished()
@@ -1,7 +1,8 @@
-from flask import current_app
+from flask import current_app, has_app_context
+from app import db
 from app.models import Match
 from datetime import datetime, timedelta
-from .email_tasks import send_match_reminder_email, send_schedule_change_email
+from .email_tasks import send_match_reminder_email, send_match_reminder_emails, send_schedule_change_email
 
 def check_upcoming_matches():
     """
@@ -14,35 +15,80 @@ def check_upcoming_matches():
         reminder_window_start = now + timedelta(hours=1)
         reminder_window_end = now + timedelta(hours=2)
         
-        upcoming_matches = Match.query.filter(
+        upcoming_ids = [row.id for row in db.session.query(Match.id).filter(
             Match.completed == False,
             Match.scheduled_time.isnot(None),
             Match.scheduled_time >= reminder_window_start,
             Match.scheduled_time <= reminder_window_end
-        ).all()
+        )]
         
-        current_app.logger.info(f"Found {len(upcoming_matches)} matches scheduled in the next 1-2 hours")
+        current_app.logger.info(f"Found {len(upcoming_ids)} matches scheduled in the next 1-2 hours")
         
-        # Send reminder emails for each match
-        for match in upcoming_matches:
-            send_match_reminder_email(match.id)
+        # Send reminder emails for the whole window as one batch
+        if upcoming_ids:
+            send_match_reminder_emails(upcoming_ids)
             
         # Also find matches starting in 24 hours for day-before reminders
         day_reminder_start = now + timedelta(hours=23)
         day_reminder_end = now + timedelta(hours=25)
         
-        day_ahead_matches = Match.query.filter(
+        day_ahead_ids = [row.id for row in db.session.query(Match.id).filter(
             Match.completed == False,
             Match.scheduled_time.isnot(None),
             Match.scheduled_time >= day_reminder_start,
             Match.scheduled_time <= day_reminder_end
-        ).all()
+        )]
         
-        current_app.logger.info(f"Found {len(day_ahead_matches)} matches scheduled in ~24 hours")
+        current_app.logger.info(f"Found {len(day_ahead_ids)} matches scheduled in ~24 hours")
         
         # Send 24-hour reminder emails
-        for match in day_ahead_matches:
-            send_match_reminder_email(match.id, is_day_before=True)
+        if day_ahead_ids:
+            send_match_reminder_emails(day_ahead_ids, is_day_before=True)
+
+# (job id label, time before the match, is_day_before) of each reminder
+REMINDERS = (
+    ('24h', timedelta(hours=24), True),
+    ('1h', timedelta(hours=1), False),
+)
+
+# A reminder whose run time passed while no process was running jobs is still sent within this window
+REMINDER_MISFIRE_GRACE_SECONDS = 15 * 60
+
+
+def reminder_job_id(match_id, label):
+    return f'match_{match_id}_{label}_reminder'
+
+
+def _reminder_jobs(match_id, scheduled_time, now):
+    """(job id, run time, is_day_before) of the reminders still ahead for a match"""
+    jobs = []
+    for label, offset, is_day_before in REMINDERS:
+        run_at = scheduled_time - offset
+        if run_at > now:
+            jobs.append((reminder_job_id(match_id, label), run_at, is_day_before))
+    return jobs
+
+
+def _add_reminder_job(scheduler, job_id, run_at, match_id, is_day_before):
+    scheduler.add_job(
+        id=job_id,
+        func=run_match_reminder,
+        trigger='date',
+        # Match times are naive local times; the scheduler runs in its own timezone
+        run_date=run_at.astimezone(),
+        args=[match_id, is_day_before],
+        misfire_grace_time=REMINDER_MISFIRE_GRACE_SECONDS,
+        replace_existing=True
+    )
+
+
+def run_match_reminder(match_id, is_day_before=False):
+    """Scheduler entry point for a match reminder job"""
+    from app.scheduler import scheduler
+
+    with scheduler.app.app_context():
+        send_match_reminder_email(match_id, is_day_before=is_day_before)
+
 
 def schedule_match_reminders(match_id):
     """
@@ -63,32 +109,54 @@ def schedule_match_reminders(match_id):
             
         scheduler = current_app.scheduler
         
-        # Schedule 24-hour reminder
-        day_before = match.scheduled_time - timedelta(hours=24)
-        if day_before > datetime.now():
-            scheduler.add_job(
-                send_match_reminder_email,
-                'date',
-                run_date=day_before,
-                args=[match_id, True],
-                id=f'match_{match_id}_24h_reminder',
-                replace_existing=True
-            )
-            
-        # Schedule 1-hour reminder
-        hour_before = match.scheduled_time - timedelta(hours=1)
-        if hour_before > datetime.now():
-            scheduler.add_job(
-                send_match_reminder_email,
-                'date',
-                run_date=hour_before,
-                args=[match_id, False],
-                id=f'match_{match_id}_1h_reminder',
-                replace_existing=True
-            )
+        # Job ids are fixed per match and reminder, so rescheduling replaces rather than duplicates
+        for job_id, run_at, is_day_before in _reminder_jobs(match_id, match.scheduled_time, datetime.now()):
+            _add_reminder_job(scheduler, job_id, run_at, match_id, is_day_before)
             
         current_app.logger.info(f"Scheduled reminders for match {match_id}")
 
+
+def sync_match_reminders(target_scheduler=None):
+    """
+    Rebuild the reminder jobs from Match.scheduled_time in one query.
+    
+    Adds jobs for upcoming matches, moves jobs of rescheduled matches and
+    removes jobs of matches that were completed, unscheduled or deleted.
+    Runs at startup and periodically on the process running the jobs.
+    """
+    from app.scheduler import scheduler
+
+    target_scheduler = target_scheduler or scheduler
+    app = current_app._get_current_object() if has_app_context() else scheduler.app
+    with app.app_context():
+        now = datetime.now()
+        rows = db.session.query(Match.id, Match.scheduled_time).filter(
+            Match.completed == False,
+            Match.scheduled_time.isnot(None),
+            Match.scheduled_time > now
+        ).all()
+        wanted = {}
+        for match_id, scheduled_time in rows:
+            for job_id, run_at, is_day_before in _reminder_jobs(match_id, scheduled_time, now):
+                wanted[job_id] = (run_at, match_id, is_day_before)
+        
+        existing = {job.id: job for job in target_scheduler.get_jobs()
+                    if job.id.startswith('match_') and job.id.endswith('_reminder')}
+        removed = 0
+        for job_id in existing.keys() - wanted.keys():
+            target_scheduler.remove_job(job_id)
+            removed += 1
+        added = 0
+        for job_id, (run_at, match_id, is_day_before) in wanted.items():
+            job = existing.get(job_id)
+            if job is not None and getattr(job, 'next_run_time', None) == run_at.astimezone():
+                continue
+            _add_reminder_job(target_scheduler, job_id, run_at, match_id, is_day_before)
+            added += 1
+        
+        current_app.logger.info(f"Reminder jobs in sync: {len(wanted)} upcoming, {added} added or moved, {removed} removed")
+        return wanted
+
 def check_schedule_changes(match_id, original_court, original_time):
     """
     Check if a match's schedule or court has changed and send notification if needed.
@@ -119,3 +187,16 @@ def check_schedule_changes(match_id, original_court, original_time):
             send_schedule_change_email(match_id, changes)
             
             current_app.logger.info(f"Sent schedule change notification for match {match_id}")
+
+def reconcile_group_standings():
+    """
+    Fully recompute group standings for ongoing tournaments.
+    Score submissions update standings incrementally; this periodic job
+    corrects any drift (e.g. from manual database edits).
+    """
+    from app.scheduler import scheduler
+    from app.services import BracketService
+
+    with scheduler.app.app_context():
+        reconciled = BracketService.reconcile_group_standings()
+        current_app.logger.info(f"Reconciled standings for {reconciled} groups")
@@ -0,0 +1,13 @@
+from flask import current_app
+
+
+def recompute_rankings():
+    """Scheduler entry point: re-rank every category type as results age out of the ranking window"""
+    from app.scheduler import scheduler
+    from app.services import RankingEngine
+
+    with scheduler.app.app_context():
+        ranked = RankingEngine.run()
+        current_app.logger.info(
+            "Recomputed rankings: " + ', '.join(f"{category_type.value} {count}" for category_type, count in ranked.items())
+        )
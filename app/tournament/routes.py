@@ -1,10 +1,11 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import current_user, login_required
 from app import db
 from app.tournament import bp
-from app.models import Tournament, TournamentCategory, Match, MatchScore, Registration, PlayerProfile, TournamentStatus, CategoryType, Team, TournamentFormat
-from app.services import BracketService, PlacingService, PrizeService, RegistrationService
+from app.models import Tournament, TournamentCategory, Match, Registration, PlayerProfile, TournamentStatus, CategoryType, Team, TournamentFormat
+from app.services import BracketService, PlacingService, PrizeService, RegistrationService, BracketCache, ScheduleSearch, LiveScoreFeed, ScoreLoader, CourtBoard
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 from app.helpers.tournament import _format_match_for_api
 
 @bp.route('/')
@@ -45,23 +46,20 @@ def bracket(id):
     category_id = request.args.get('category', type=int) or categories[0].id
     selected_category = TournamentCategory.query.get_or_404(category_id)
     
-    # Use BracketService to get comprehensive bracket data
+    # Use BracketService to get comprehensive bracket data (constant number of queries)
     bracket_data = BracketService.get_bracket_data(category_id)
-    # Process scores into a dictionary for easier template access
-    scores = {}
+    snapshot = bracket_data['snapshot']
+
+    # Scores for every match in the category, keyed by match id for template access
+    scores = snapshot.scores_dict()
+    ScoreLoader.prime(scores, scores.keys())
     
     # Generate h2h_records for tiebreakers display
     h2h_records = {}
     
-    # Process group stage match scores and prepare h2h_records
+    # Prepare h2h_records for group stage standings
     if bracket_data['group_stage']:
         for group_data in bracket_data['groups']:
-            # Get match scores
-            for match in group_data['matches']:
-                match_scores = MatchScore.query.filter_by(match_id=match.id).order_by(MatchScore.set_number).all()
-                scores[match.id] = match_scores
-            
-            # Use BracketService to calculate h2h records
             # Group standings with equal matches won for tiebreaker display
             standings_by_wins = {}
             for standing in group_data['standings']:
@@ -70,18 +68,13 @@ def bracket(id):
                     standings_by_wins[wins] = []
                 standings_by_wins[wins].append(standing)
             
-            # Process each group of tied standings using the BracketService method
             for wins, tied_standings in standings_by_wins.items():
                 if len(tied_standings) > 1:  # Only need h2h records for tied standings
-                    # Use the BracketService method to get h2h records
-                    h2h_data = BracketService._apply_tiebreakers(tied_standings)
-                    
-                    # Extract h2h_wins from the method's calculations
                     for standing in tied_standings:
                         # Create record for the standings
                         key = ('player', standing.player_id) if standing.player_id else ('team', standing.team_id)
                         if key[1]:
-                            # We don't get direct access to h2h_wins from the method, but we can use the return order as a proxy
+                            # Positions are already resolved by the tiebreakers; show set diff as a proxy
                             h2h_records[key] = {
                                 'original_standing': standing,
                                 'h2h_wins': standing.sets_won - standing.sets_lost  # Use set diff as a proxy
@@ -93,12 +86,6 @@ def bracket(id):
         has_group_stage = True
     else:
         has_group_stage = False
-
-    # Process knockout stage match scores
-    for round_num, matches in bracket_data['knockout_rounds'].items():
-        for match in matches:
-            match_scores = MatchScore.query.filter_by(match_id=match.id).order_by(MatchScore.set_number).all()
-            scores[match.id] = match_scores
     
     return render_template('tournament/bracket.html',
                           title=f"{tournament.name} - {selected_category.category_type.value} Bracket",
@@ -221,6 +208,16 @@ def prize_distribution(id):
         prize_amounts = {}
         for place_range, percentage in distribution.items():
             prize_amounts[place_range] = category_prize * (percentage / 100)
+
+        # Once the tournament is over, name the winners of each prize from the cached placings
+        winners = {}
+        if tournament.status == TournamentStatus.COMPLETED:
+            placings = PlacingService.get_placings(category.id)
+            for place_range in distribution:
+                winners[place_range] = [
+                    _participant_name(p['participant'], p['is_team']) for p in placings
+                    if p['participant'] and PlacingService._is_in_place_range(p['place'], place_range)
+                ]
         
         prize_info['categories'].append({
             'id': category.id,
@@ -228,7 +225,8 @@ def prize_distribution(id):
             'prize_money': category_prize,
             'percentage': category.prize_percentage if hasattr(category, 'prize_percentage') else 0,
             'distribution': distribution,
-            'prize_amounts': prize_amounts
+            'prize_amounts': prize_amounts,
+            'winners': winners
         })
     
     return render_template('tournament/prize_distribution.html',
@@ -236,16 +234,50 @@ def prize_distribution(id):
                           tournament=tournament,
                           prize_info=prize_info)
 
+def _participant_name(participant, is_team):
+    """Display name of a placed player or team"""
+    if is_team:
+        return ' / '.join(p.full_name for p in (participant.player1, participant.player2) if p)
+    return participant.full_name
+
 @bp.route('/api/<int:id>/bracket_data')
 def api_bracket_data(id):
-    """API endpoint to get bracket data for dynamic rendering"""
+    """
+    API endpoint to get bracket data for dynamic rendering
+
+    Responses are served from BracketCache keyed by the category version, so
+    spectator polls only hit the database after a match in the category
+    changes. Clients revalidating with a current ETag get a 304 straight away.
+    """
     # Get selected category
     category_id = request.args.get('category', type=int)
     if not category_id:
         return jsonify({'error': 'Category ID required'}), 400
+    if not db.session.query(TournamentCategory.query.filter_by(id=category_id, tournament_id=id).exists()).scalar():
+        return jsonify({'error': 'Category not found'}), 404
+    
+    version = BracketCache.get_version(category_id)
+    etag = BracketCache.etag(category_id, version)
     
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    payload = BracketCache.get(category_id, version)
+    if payload is None:
+        payload = _build_bracket_json(category_id)
+        BracketCache.set(category_id, version, payload)
+    
+    response = current_app.response_class(payload, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+def _build_bracket_json(category_id):
+    """Serialize a category's bracket for api_bracket_data"""
     # Get bracket data using our service
     bracket_data = BracketService.get_bracket_data(category_id)
+    snapshot = bracket_data['snapshot']
     
     # Format the response for JSON
     result = {
@@ -292,7 +324,7 @@ def api_bracket_data(id):
         
         # Process matches
         for match in group_data['matches']:
-            match_info = _format_match_for_api(match)
+            match_info = _format_match_for_api(match, scores=snapshot.scores_for(match.id))
             group_info['matches'].append(match_info)
         
         result['groups'].append(group_info)
@@ -302,7 +334,7 @@ def api_bracket_data(id):
         result['knockout_rounds'][round_num] = []
         
         for match in matches:
-            match_info = _format_match_for_api(match)
+            match_info = _format_match_for_api(match, scores=snapshot.scores_for(match.id))
             result['knockout_rounds'][round_num].append(match_info)
     
     # Process placings if tournament is completed
@@ -324,7 +356,8 @@ def api_bracket_data(id):
                 'prize': placing.get('prize', 0)
             })
     
-    return jsonify(result)
+    return current_app.json.dumps(result).encode()
+    
     
 @bp.route('/api/<int:id>/placings')
 def api_placings(id):
@@ -398,78 +431,12 @@ def schedule(id):
     search_query = request.args.get('search', '')
     stage_filter = request.args.get('stage', '')
     
-    # Base query
-    if category_id:
-        matches_query = Match.query.join(TournamentCategory).filter(
-            TournamentCategory.tournament_id == id,
-            TournamentCategory.id == category_id,
-            Match.scheduled_time.isnot(None)
-        )
-    else:
-        matches_query = Match.query.join(TournamentCategory).filter(
-            TournamentCategory.tournament_id == id,
-            Match.scheduled_time.isnot(None)
-        )
-    
-    # Execute the query to get all matches (we'll organize and filter in Python)
-    all_matches = matches_query.all()
-    
-    # Extract available stages for filter options
-    available_stages = {
-        'knockout': set(),  # Set of round numbers
-        'groups': set()     # Set of group names
-    }
-    
-    for match in all_matches:
-        if match.stage.name == 'GROUP' and match.group:
-            available_stages['groups'].add(match.group.name)
-        elif match.stage.name == 'KNOCKOUT':
-            available_stages['knockout'].add(match.round)
+    page = request.args.get('page', 1, type=int)
     
-    # Sort the sets for consistent display
-    available_stages['groups'] = sorted(available_stages['groups'])
-    available_stages['knockout'] = reversed(sorted(available_stages['knockout']))
-    
-    # Filter matches by player name if search is provided
-    if search_query:
-        filtered_matches = []
-        search_query = search_query.lower()
-        
-        for match in all_matches:
-            # Check player names for singles matches
-            if match.player1 and match.player1.full_name.lower().find(search_query) != -1:
-                filtered_matches.append(match)
-                continue
-            if match.player2 and match.player2.full_name.lower().find(search_query) != -1:
-                filtered_matches.append(match)
-                continue
-                
-            # Check player names for doubles matches
-            if match.is_doubles:
-                if match.team1:
-                    if (match.team1.player1 and match.team1.player1.full_name.lower().find(search_query) != -1) or \
-                       (match.team1.player2 and match.team1.player2.full_name.lower().find(search_query) != -1):
-                        filtered_matches.append(match)
-                        continue
-                
-                if match.team2:
-                    if (match.team2.player1 and match.team2.player1.full_name.lower().find(search_query) != -1) or \
-                       (match.team2.player2 and match.team2.player2.full_name.lower().find(search_query) != -1):
-                        filtered_matches.append(match)
-                        continue
-        
-        all_matches = filtered_matches
-    
-    # Filter by stage if specified
-    if stage_filter:
-        if stage_filter.startswith('group:'):
-            # Filter by specific group
-            group_name = stage_filter[6:]  # Remove 'group:' prefix
-            all_matches = [m for m in all_matches if m.stage.name == 'GROUP' and m.group and m.group.name == group_name]
-        elif stage_filter.isdigit():
-            # For knockout rounds (e.g., "1" for finals, "2" for semis)
-            round_num = int(stage_filter)
-            all_matches = [m for m in all_matches if m.stage.name == 'KNOCKOUT' and m.round == round_num]
+    # Name search, category/stage filters and pagination all run in SQL
+    pagination = ScheduleSearch.search(id, search_query, category_id, stage_filter, page=page)
+    available_stages = ScheduleSearch.available_stages(id, category_id)
+    all_matches = pagination.items
     
     # Organize matches by stage and round
     stages = {}
@@ -510,12 +477,13 @@ def schedule(id):
     # Get selected category if filtering
     selected_category = None
     if category_id:
-        selected_category = TournamentCategory.query.get(category_id)
+        selected_category = next((c for c in categories if c.id == category_id), None)
     
     return render_template('tournament/schedule.html',
                           title=f"{tournament.name} - Schedule",
                           tournament=tournament,
                           stages=stages,
+                          pagination=pagination,
                           categories=categories,
                           selected_category=selected_category,
                           search_query=search_query,
@@ -540,13 +508,10 @@ def live_scoring(id):
         # For singles matches OR doubles matches
         ((Match.player1_id.isnot(None) & Match.player2_id.isnot(None)) |
          (Match.team1_id.isnot(None) & Match.team2_id.isnot(None)))
-    ).all()
+    ).options(joinedload(Match.category), *ScoreLoader.participant_options()).all()
     
-    # Get match scores
-    scores = {}
-    for match in ongoing_matches:
-        match_scores = MatchScore.query.filter_by(match_id=match.id).order_by(MatchScore.set_number).all()
-        scores[match.id] = match_scores
+    # Get match scores (one query for all matches)
+    scores = ScoreLoader.load([match.id for match in ongoing_matches])
     
     return render_template('tournament/live_scoring.html',
                            title=f"{tournament.name} - Live Scoring",
@@ -702,7 +667,7 @@ def match_detail(id, match_id):
         return redirect(url_for('main.tournament_detail', id=id))
     
     # Get match scores
-    scores = MatchScore.query.filter_by(match_id=match_id).order_by(MatchScore.set_number).all()
+    scores = ScoreLoader.for_match(match_id)
     
     return render_template('tournament/match_detail.html',
                            title=f"{tournament.name} - Match Details",
@@ -726,77 +691,28 @@ def live_courts(id):
         flash('Live court view is only available for ongoing tournaments.', 'warning')
         return redirect(url_for('main.tournament_detail', id=id))
     
-    # Get all matches with court assignments for this tournament
-    all_assigned_matches = Match.query.join(TournamentCategory).filter(
-        TournamentCategory.tournament_id == id,
-        Match.court.isnot(None)
-    ).order_by(Match.scheduled_time).all()
+    # One board row per court, kept current as matches are scheduled, started and completed
+    states, matches, scores = CourtBoard.load_view(id)
     
-    # Organize matches by court
     courts = {}
-    # Get ongoing matches (not completed, have players/teams assigned, and have a court)
     ongoing_matches = {}
-    # Get upcoming matches by court (next scheduled match for each court)
     upcoming_matches = {}
+    next_etas = {}
+    for state in states:
+        courts[state.court] = state.queue or []
+        ongoing_matches[state.court] = matches.get(state.current_match_id)
+        upcoming_matches[state.court] = matches.get(state.next_match_id)
+        next_etas[state.court] = state.next_eta
     
-    # Current time for comparison
     now = datetime.now()
     
-    # Process all assigned matches to organize them by court
-    for match in all_assigned_matches:
-        court = match.court
-        
-        # Add court to dictionaries if not already present
-        if court not in courts:
-            courts[court] = []
-        if court not in ongoing_matches:
-            ongoing_matches[court] = None
-        if court not in upcoming_matches:
-            upcoming_matches[court] = None
-        
-        # Add match to the court's matches list
-        courts[court].append(match)
-        
-    for court, matches in courts.items():
-
-        ongoing_matches[court] = matches[0] if matches and matches[0].scheduled_time and not matches[0].completed else None 
-        upcoming_matches[court] = matches[1] if len(matches) > 1 and matches[1].scheduled_time and not matches[1].completed else None 
-        # # Check if this is an ongoing match
-        # if not match.completed and (
-        #     (match.is_doubles and match.team1_id and match.team2_id) or
-        #     (not match.is_doubles and match.player1_id and match.player2_id)
-        # ):
-        #     # If no ongoing match for this court or this match is more recent, use this one
-        #     if ongoing_matches[court] is None:
-        #         ongoing_matches[court] = match
-        #     elif match.scheduled_time and ongoing_matches[court].scheduled_time:
-        #         # If match is more recent (closer to now) than the current ongoing match
-        #         if abs((match.scheduled_time - now).total_seconds()) < abs((ongoing_matches[court].scheduled_time - now).total_seconds()):
-        #             ongoing_matches[court] = match
-        
-        # # Check if this is an upcoming match
-        # elif not match.completed and match.scheduled_time and match.scheduled_time > now:
-        #     # If no upcoming match for this court yet or this one is scheduled sooner
-        #     if upcoming_matches[court] is None:
-        #         upcoming_matches[court] = match
-        #     elif match.scheduled_time and upcoming_matches[court].scheduled_time:
-        #         # Use the match that's scheduled earlier as the next match
-        #         if match.scheduled_time < upcoming_matches[court].scheduled_time:
-        #             upcoming_matches[court] = match
-    
-    # Get match scores for ongoing matches
-    scores = {}
-    for court, match in ongoing_matches.items():
-        if match:
-            match_scores = MatchScore.query.filter_by(match_id=match.id).order_by(MatchScore.set_number).all()
-            scores[match.id] = match_scores
-    
     return render_template('tournament/live_courts.html',
                            title=f"{tournament.name} - Live Courts",
                            tournament=tournament,
                            courts=courts,
                            ongoing_matches=ongoing_matches,
                            upcoming_matches=upcoming_matches,
+                           next_etas=next_etas,
                            scores=scores,
                            now=now)
 
@@ -807,52 +723,19 @@ def api_courts_data(id):
     # Get tournament
     tournament = Tournament.query.get_or_404(id)
     
-    # Get all matches with court assignments for this tournament
-    all_assigned_matches = Match.query.join(TournamentCategory).filter(
-        TournamentCategory.tournament_id == id,
-        Match.court.isnot(None)
-    ).order_by(Match.scheduled_time).all()
+    # Read the court board rather than scanning every court-assigned match
+    states, matches, scores = CourtBoard.load_view(id)
     
-    # Organize matches by court
     courts_data = {}
-    now = datetime.now()
-    
-    for match in all_assigned_matches:
-        court = match.court
-        
-        # Initialize court data if not exists
-        if court not in courts_data:
-            courts_data[court] = {
-                'ongoing_match': None,
-                'upcoming_match': None
-            }
-        
-        # Check if match is ongoing (not completed and has players/teams assigned)
-        if not match.completed and (
-            (match.is_doubles and match.team1_id and match.team2_id) or
-            (not match.is_doubles and match.player1_id and match.player2_id)
-        ):
-            current_ongoing = courts_data[court]['ongoing_match']
-            
-            # If no ongoing match yet or this match is scheduled earlier
-            if current_ongoing is None or (
-                match.scheduled_time and current_ongoing.get('scheduled_time') and
-                match.scheduled_time < datetime.fromisoformat(current_ongoing['scheduled_time'])
-            ):
-                # Format match data for JSON
-                courts_data[court]['ongoing_match'] = _format_match_for_api(match)
-        
-        # Check if match is upcoming
-        if not match.completed and match.scheduled_time and match.scheduled_time > now:
-            current_upcoming = courts_data[court]['upcoming_match']
-            
-            # If no upcoming match yet or this match is scheduled earlier
-            if current_upcoming is None or (
-                match.scheduled_time and current_upcoming.get('scheduled_time') and
-                match.scheduled_time < datetime.fromisoformat(current_upcoming['scheduled_time'])
-            ):
-                # Format match data for JSON
-                courts_data[court]['upcoming_match'] = _format_match_for_api(match)
+    for state in states:
+        ongoing = matches.get(state.current_match_id)
+        upcoming = matches.get(state.next_match_id)
+        courts_data[state.court] = {
+            'ongoing_match': _format_match_for_api(ongoing, scores[ongoing.id]) if ongoing else None,
+            'upcoming_match': _format_match_for_api(upcoming, []) if upcoming else None,
+            'next_eta': state.next_eta.strftime('%Y-%m-%d %H:%M') if state.next_eta else None,
+            'queue': state.queue or []
+        }
     
     return jsonify(courts_data)
     
@@ -861,6 +744,12 @@ def api_scores(id):
     # API endpoint to get latest scores for all matches in a tournament
     # This can be used for live updates via AJAX
     
+    # Polling fallback for the live score feed: ?since=<version> returns only
+    # the matches changed after that version (since=0 returns a snapshot)
+    since = request.args.get('since', type=int)
+    if since is not None:
+        return jsonify(LiveScoreFeed.delta(id, since))
+    
     # Get all ongoing matches for this tournament (both singles and doubles)
     ongoing_matches = Match.query.join(TournamentCategory).filter(
         TournamentCategory.tournament_id == id,
@@ -868,11 +757,14 @@ def api_scores(id):
         # For singles matches OR doubles matches
         ((Match.player1_id.isnot(None) & Match.player2_id.isnot(None)) |
          (Match.team1_id.isnot(None) & Match.team2_id.isnot(None)))
-    ).all()
+    ).options(joinedload(Match.category), *ScoreLoader.participant_options()).all()
+    
+    # Scores for all ongoing matches in one query
+    match_scores = ScoreLoader.load([match.id for match in ongoing_matches])
     
     result = []
     for match in ongoing_matches:
-        scores = MatchScore.query.filter_by(match_id=match.id).order_by(MatchScore.set_number).all()
+        scores = match_scores[match.id]
         
         # Handle both singles and doubles matches appropriately
         if match.is_doubles:
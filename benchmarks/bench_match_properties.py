@@ -0,0 +1,175 @@
+"""
+Benchmark Match property access (is_doubles, winner_id, loser_id, round_name,
+winner, loser) on a 500-match tournament.
+
+Compares the previous properties, which walked match.category and
+match.group on every access, with the current ones resolving the category
+type and group name once per session. Reports the SQL issued and time per
+match when the matches were just loaded, on repeated (warm) access, and
+after a commit expired the categories and groups, and checks that both
+return the same values.
+
+Usage:
+    python benchmarks/bench_match_properties.py [--matches 500] [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlalchemy.exc import SAWarning
+from sqlalchemy.orm import joinedload
+from config import Config
+from app import create_app, db
+from app.models import (
+    CategoryType, Group, Match, MatchStage, PlayerProfile, Team, Tournament, TournamentCategory, User
+)
+
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SCHEDULER_ENABLED = False
+    EMAIL_QUEUE_ASYNC = False
+
+
+CATEGORY_TYPES = (CategoryType.MENS_SINGLES, CategoryType.WOMENS_SINGLES, CategoryType.MENS_DOUBLES,
+                  CategoryType.MIXED_DOUBLES)
+
+
+class Legacy:
+    """The Match properties as they were, reaching through the category and group each time"""
+
+    @staticmethod
+    def is_doubles(match):
+        if not match.category:
+            return False
+        return match.category.is_doubles()
+
+    @staticmethod
+    def round_name(match):
+        if match.stage == MatchStage.GROUP:
+            group_name = match.group.name if match.group else ''
+            return f"Group {group_name} Round {match.round}" if match.round else f"Group {group_name}"
+        return match.round_name
+
+    @staticmethod
+    def access(match):
+        doubles = Legacy.is_doubles(match)
+        return (
+            doubles,
+            match.winning_team_id if Legacy.is_doubles(match) else match.winning_player_id,
+            match.losing_team_id if Legacy.is_doubles(match) else match.losing_player_id,
+            Legacy.round_name(match),
+            match.winning_team_profile if Legacy.is_doubles(match) else match.winning_player_profile,
+            match.losing_team_profile if Legacy.is_doubles(match) else match.losing_player_profile,
+        )
+
+
+def current_access(match):
+    return match.is_doubles, match.winner_id, match.loser_id, match.round_name, match.winner, match.loser
+
+
+def build_tournament(matches):
+    """One tournament, four categories, a quarter of each category's matches in groups"""
+    tournament = Tournament(name='Bench Open')
+    categories = [TournamentCategory(tournament=tournament, name=category_type.value, category_type=category_type)
+                  for category_type in CATEGORY_TYPES]
+    db.session.add_all(categories)
+    db.session.flush()
+
+    players = []
+    for i in range(64):
+        user = User(username=f'bench{i}', email=f'bench{i}@example.com')
+        db.session.add(user)
+        db.session.flush()
+        players.append(PlayerProfile(user_id=user.id, full_name=f'Player {i}'))
+    db.session.add_all(players)
+    db.session.flush()
+    teams = [Team(player1_id=players[2 * i].id, player2_id=players[2 * i + 1].id) for i in range(32)]
+    groups = [Group(category_id=category.id, name=name) for category in categories for name in 'ABCD']
+    db.session.add_all(teams + groups)
+    db.session.flush()
+
+    for i in range(matches):
+        category = categories[i % len(categories)]
+        doubles = category.is_doubles()
+        entries = teams if doubles else players
+        first, second = entries[i % len(entries)], entries[(i + 1) % len(entries)]
+        in_group = i % 4 == 0
+        match = Match(category_id=category.id, stage=MatchStage.GROUP if in_group else MatchStage.KNOCKOUT,
+                      group_id=groups[(i // 4) % len(groups)].id if in_group else None,
+                      round=i % 6 + 1, match_order=i, completed=True)
+        if doubles:
+            match.team1_id, match.team2_id = first.id, second.id
+            match.winning_team_id, match.losing_team_id = first.id, second.id
+        else:
+            match.player1_id, match.player2_id = first.id, second.id
+            match.winning_player_id, match.losing_player_id = first.id, second.id
+        db.session.add(match)
+    db.session.commit()
+
+
+def load_matches():
+    """Matches with their participants, as bracket pages and score APIs load them"""
+    return Match.query.options(
+        joinedload(Match.player1), joinedload(Match.player2), joinedload(Match.team1), joinedload(Match.team2)
+    ).order_by(Match.id).all()
+
+
+def measure(access, matches, repeat=1):
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        values = [access(match) for match in matches]
+    elapsed = time.perf_counter() - start
+    event.remove(db.engine, 'before_cursor_execute', count)
+    return values, elapsed / repeat / len(matches) * 1e6, queries[0]
+
+
+def run(access, repeat):
+    """(values, {scenario: (us per match, queries)}) for one implementation, each in a fresh session"""
+    db.session.remove()
+    matches = load_matches()
+    values, cold, cold_queries = measure(access, matches)
+    _, warm, warm_queries = measure(access, matches, repeat)
+    db.session.commit()
+    matches = load_matches()
+    _, committed, committed_queries = measure(access, matches)
+    results = {'just loaded': (cold, cold_queries), 'warm': (warm, warm_queries),
+               'after commit': (committed, committed_queries)}
+    return [(v[0], v[1], v[2], v[3], getattr(v[4], 'id', None), getattr(v[5], 'id', None)) for v in values], results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--matches', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50, help='passes for the warm measurement')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', category=SAWarning)
+    app = create_app(config_class=BenchConfig)
+    with app.app_context():
+        db.create_all()
+        build_tournament(args.matches)
+
+        legacy_values, legacy = run(Legacy.access, args.repeat)
+        current_values, current = run(current_access, args.repeat)
+        print(f'{args.matches} matches, six properties per match')
+        for scenario in legacy:
+            print(f'{scenario:>12}: before {legacy[scenario][0]:6.1f} us/match {legacy[scenario][1]:4d} queries | '
+                  f'after {current[scenario][0]:6.1f} us/match {current[scenario][1]:4d} queries')
+        print(f'identical values: {legacy_values == current_values}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark the batch ranking engine on a large points ledger.
+
+Builds a ledger of --players players x 5 category types x --results results
+spread over two years of tournaments, then times RankingEngine.run() filling
+an empty player_ranking and re-ranking a week later (results ageing out of
+the window). Without decay the ranks are checked against a SQL reference
+(SUM over the window + RANK()).
+
+Usage:
+    python benchmarks/bench_rankings.py [--players 100000] [--results 3] [--weeks 52] [--half-life 0]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, insert, select
+from config import Config
+from app import create_app, db
+from app.models import PlayerRanking, PointsLedgerEntry, Tournament, TournamentTier
+from app.services.ranking_engine import RankingEngine
+from app.services.ranking_service import POINTS_COLUMNS
+
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SCHEDULER_ENABLED = False
+    EMAIL_QUEUE_ASYNC = False
+
+
+# Points a placing can earn: 1st/2nd/3rd-4th/5th-8th shares of the tier base points
+TIER_POINTS = {TournamentTier.SLATE: 2000, TournamentTier.CUP: 3200,
+               TournamentTier.OPEN: 1400, TournamentTier.CHALLENGE: 925}
+SHARES = (100, 70, 50, 25)
+
+
+def build_ledger(players, results, tournaments, as_of, rng):
+    """Insert tournaments and ledger rows with Core (sqlite does not enforce FKs)"""
+    tiers = list(TIER_POINTS)
+    dates = {}
+    db.session.execute(insert(Tournament), [
+        {'id': tournament_id, 'name': f'T{tournament_id}', 'tier': tiers[tournament_id % len(tiers)],
+         'start_date': end - timedelta(days=2), 'end_date': end}
+        for tournament_id, end in (
+            (tournament_id, dates.setdefault(tournament_id, as_of - timedelta(days=rng.randrange(730))))
+            for tournament_id in range(1, tournaments + 1)
+        )
+    ])
+    table = PointsLedgerEntry.__table__
+    category_ids = {category_type: index for index, category_type in enumerate(POINTS_COLUMNS, 1)}
+    batch, rows = [], 0
+    for category_type, offset in category_ids.items():
+        for player_id in range(1, players + 1):
+            for tournament_id in rng.sample(range(1, tournaments + 1), results):
+                share = rng.choice(SHARES)
+                base = TIER_POINTS[tiers[tournament_id % len(tiers)]]
+                batch.append({'player_id': player_id, 'tournament_id': tournament_id,
+                              'category_id': tournament_id * 10 + offset, 'category_type': category_type,
+                              'place': SHARES.index(share) + 1, 'share': share, 'base_points': base,
+                              'points': int(base * (share / 100)), 'awarded_at': dates[tournament_id]})
+                if len(batch) == 50000:
+                    db.session.execute(insert(table), batch)
+                    rows += len(batch)
+                    batch = []
+    if batch:
+        db.session.execute(insert(table), batch)
+        rows += len(batch)
+    db.session.commit()
+    return rows
+
+
+def reference_ranks(category_type, as_of, weeks):
+    """{player_id: (points, rank)} computed in SQL, for rankings without decay"""
+    points = func.sum(PointsLedgerEntry.points)
+    query = select(PointsLedgerEntry.player_id, points, func.rank().over(order_by=points.desc())).join(
+        Tournament, Tournament.id == PointsLedgerEntry.tournament_id
+    ).where(PointsLedgerEntry.category_type == category_type)
+    if weeks:
+        query = query.where(Tournament.end_date > as_of - timedelta(weeks=weeks))
+    return {player_id: (total, rank) for player_id, total, rank in
+            db.session.execute(query.group_by(PointsLedgerEntry.player_id))}
+
+
+def stored_ranks(category_type):
+    return {player_id: (points, rank) for player_id, points, rank in db.session.execute(
+        select(PlayerRanking.player_id, PlayerRanking.points, PlayerRanking.rank)
+        .where(PlayerRanking.category_type == category_type)
+    )}
+
+
+def timed_run(as_of, weeks, half_life):
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    ranked = RankingEngine.run(as_of=as_of, window_weeks=weeks, half_life_weeks=half_life)
+    elapsed = time.perf_counter() - start
+    event.remove(db.engine, 'before_cursor_execute', count)
+    return ranked, elapsed, queries[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=100000)
+    parser.add_argument('--results', type=int, default=3, help='results per player per category type')
+    parser.add_argument('--tournaments', type=int, default=200)
+    parser.add_argument('--weeks', type=int, default=52, help='ranking window (0: none)')
+    parser.add_argument('--half-life', type=float, default=0, help='decay half-life in weeks (0: none)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', module='sqlalchemy')
+    app = create_app(config_class=BenchConfig)
+    with app.app_context():
+        db.create_all()
+        as_of = datetime(2026, 1, 5)
+        start = time.perf_counter()
+        rows = build_ledger(args.players, args.results, args.tournaments, as_of, random.Random(args.seed))
+        print(f'ledger: {rows} rows built in {time.perf_counter() - start:.1f} s')
+
+        for label, when in (('initial', as_of), ('a week later', as_of + timedelta(weeks=1))):
+            ranked, elapsed, queries = timed_run(when, args.weeks, args.half_life)
+            line = (f'{label}: {sum(ranked.values())} ranking rows over {len(ranked)} category types '
+                    f'in {elapsed:.2f} s / {queries} queries')
+            if not args.half_life:
+                identical = all(stored_ranks(category_type) == reference_ranks(category_type, when, args.weeks)
+                                for category_type in ranked)
+                line += f', identical to SQL reference: {identical}'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark group tiebreak resolution for 16- and 32-entry round-robin groups.
+
+Compares the previous per-cluster implementation (one head-to-head query per
+tied cluster) with TiebreakEngine (one results fetch per group), checks that
+both produce identical positions, and reports time and query counts.
+
+Usage:
+    python benchmarks/bench_tiebreakers.py [--groups 50] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from config import Config
+from app import create_app, db
+from app.models import Match, Group, GroupStanding, MatchStage
+from app.services.tiebreak_service import TiebreakEngine
+
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+
+def legacy_positions(standings):
+    """Positions as computed before TiebreakEngine: one query per tied cluster"""
+    by_wins = {}
+    for standing in standings:
+        by_wins.setdefault(standing.matches_won, []).append(standing)
+
+    ordered = []
+    for wins in sorted(by_wins, reverse=True):
+        tied = by_wins[wins]
+        if len(tied) == 1:
+            ordered.extend(tied)
+            continue
+        player_ids = [s.player_id for s in tied]
+        h2h = {pid: 0 for pid in player_ids}
+        matches = Match.query.filter_by(group_id=tied[0].group_id, completed=True).filter(
+            Match.player1_id.in_(player_ids),
+            Match.player2_id.in_(player_ids)
+        ).all()
+        for match in matches:
+            if match.winning_player_id in h2h:
+                h2h[match.winning_player_id] += 1
+        ordered.extend(sorted(
+            tied, key=lambda s: (h2h[s.player_id], s.points_won - s.points_lost), reverse=True
+        ))
+    return [s.player_id for s in ordered]
+
+
+def engine_positions(standings):
+    return [s.player_id for s in TiebreakEngine(standings).rank()]
+
+
+def build_group(group_id, size, rng):
+    """Create a completed round robin with random results (sqlite does not enforce FKs)"""
+    db.session.add(Group(id=group_id, category_id=1, name=f'G{group_id}'))
+    player_ids = [group_id * 1000 + i for i in range(size)]
+    stats = {pid: [0, 0, 0] for pid in player_ids}  # wins, points won, points lost
+    for a_index, a in enumerate(player_ids):
+        for b in player_ids[a_index + 1:]:
+            winner, loser = (a, b) if rng.random() < 0.5 else (b, a)
+            loser_points = rng.randint(0, 9)
+            db.session.add(Match(category_id=1, group_id=group_id, stage=MatchStage.GROUP, round=1,
+                                 player1_id=a, player2_id=b, completed=True,
+                                 winning_player_id=winner, losing_player_id=loser))
+            stats[winner][0] += 1
+            stats[winner][1] += 11
+            stats[winner][2] += loser_points
+            stats[loser][1] += loser_points
+            stats[loser][2] += 11
+    for pid, (wins, won, lost) in stats.items():
+        db.session.add(GroupStanding(group_id=group_id, player_id=pid, matches_won=wins,
+                                     points_won=won, points_lost=lost))
+    db.session.commit()
+
+
+def measure(fn, group_ids):
+    """Run fn over every group from a cold session, excluding the standings load"""
+    db.session.expunge_all()
+    groups = [GroupStanding.query.filter_by(group_id=gid).all() for gid in group_ids]
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    results = [fn(standings) for standings in groups]
+    elapsed = time.perf_counter() - start
+    event.remove(db.engine, 'before_cursor_execute', count)
+    return results, elapsed, queries[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--groups', type=int, default=50, help='groups per size')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', module='sqlalchemy')
+    app = create_app(config_class=BenchConfig)
+    with app.app_context():
+        db.create_all()
+        rng = random.Random(args.seed)
+        next_group_id = 1
+        for size in (16, 32):
+            group_ids = list(range(next_group_id, next_group_id + args.groups))
+            next_group_id += args.groups
+            for group_id in group_ids:
+                build_group(group_id, size, rng)
+
+            legacy, legacy_time, legacy_queries = measure(legacy_positions, group_ids)
+            engine, engine_time, engine_queries = measure(engine_positions, group_ids)
+
+            print(f'{size}-entry groups x{args.groups}: '
+                  f'legacy {legacy_time * 1000:.1f} ms / {legacy_queries} queries, '
+                  f'engine {engine_time * 1000:.1f} ms / {engine_queries} queries, '
+                  f'identical positions: {legacy == engine}')
+
+
+if __name__ == '__main__':
+    main()
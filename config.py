@@ -13,6 +13,15 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB max upload
+    # Uploaded images are stored as-is and resized into thumb/card/full JPEG and WebP variants by a worker pool
+    IMAGE_PROCESSING_ASYNC = os.environ.get('IMAGE_PROCESSING_ASYNC', 'true').lower() in ['true', 'on', '1']
+    IMAGE_PROCESSING_WORKERS = int(os.environ.get('IMAGE_PROCESSING_WORKERS', 2))
+    IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 85))
+    # Content-addressed uploads are served as immutable for this long (seconds)
+    UPLOAD_CACHE_MAX_AGE = int(os.environ.get('UPLOAD_CACHE_MAX_AGE', 365 * 24 * 3600))
+    # Let the front server send upload bodies: nginx internal location prefix, or X-Sendfile
+    UPLOAD_ACCEL_REDIRECT_PREFIX = os.environ.get('UPLOAD_ACCEL_REDIRECT_PREFIX')  # e.g. /protected-uploads
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() in ['true', 'on', '1']
     
     # Email configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.example.com')
@@ -32,7 +41,58 @@ class Config:
     SOCKETIO_CORS_ALLOWED_ORIGINS = os.environ.get('SOCKETIO_CORS_ALLOWED_ORIGINS', '*')
     SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'eventlet')
     
+    # Bracket JSON cache ('memory' per process, or 'filesystem' shared by all workers on a host)
+    BRACKET_CACHE_BACKEND = os.environ.get('BRACKET_CACHE_BACKEND', 'memory')
+    BRACKET_CACHE_DIR = os.environ.get('BRACKET_CACHE_DIR') or os.path.join(basedir, 'instance', 'bracket_cache')
+    BRACKET_CACHE_MAX_ENTRIES = int(os.environ.get('BRACKET_CACHE_MAX_ENTRIES', 256))
+    
+    # Group standings: apply each score change incrementally, with a periodic full reconcile
+    GROUP_STANDINGS_INCREMENTAL = os.environ.get('GROUP_STANDINGS_INCREMENTAL', 'true').lower() in ['true', 'on', '1']
+    STANDINGS_RECONCILE_MINUTES = int(os.environ.get('STANDINGS_RECONCILE_MINUTES', 30))  # 0 disables
+    
+    # "Generate all brackets": plan and write every category in a background thread by default
+    BRACKET_GENERATION_ASYNC = os.environ.get('BRACKET_GENERATION_ASYNC', 'true').lower() in ['true', 'on', '1']
+    
+    # Live court board: expected length of a match, used for the next match's ETA
+    COURT_MATCH_MINUTES = int(os.environ.get('COURT_MATCH_MINUTES', 30))
+    
+    # Outgoing email: every message goes through the email_outbox table and a bounded queue
+    # served by a few workers, each sending a batch over one SMTP connection
+    EMAIL_QUEUE_ASYNC = os.environ.get('EMAIL_QUEUE_ASYNC', 'true').lower() in ['true', 'on', '1']
+    EMAIL_QUEUE_WORKERS = int(os.environ.get('EMAIL_QUEUE_WORKERS', 2))
+    EMAIL_QUEUE_MAXSIZE = int(os.environ.get('EMAIL_QUEUE_MAXSIZE', 1000))
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 60))  # doubles per attempt
+    EMAIL_QUEUE_POLL_SECONDS = int(os.environ.get('EMAIL_QUEUE_POLL_SECONDS', 30))
+    # Worker threads start in the serving process (wsgi.py, run.py); set this for other worker processes
+    EMAIL_QUEUE_START_WORKERS = os.environ.get('EMAIL_QUEUE_START_WORKERS', 'false').lower() in ['true', 'on', '1']
+    # Announcements are queued this many recipients at a time, checkpointing after each chunk
+    ANNOUNCEMENT_CHUNK_SIZE = int(os.environ.get('ANNOUNCEMENT_CHUNK_SIZE', 500))
+    
+    # Registration accounts: temp-password hashing threads, and rows per batch of a bulk sheet import
+    ACCOUNT_PASSWORD_HASH_WORKERS = int(os.environ.get('ACCOUNT_PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    REGISTRATION_IMPORT_BATCH_SIZE = int(os.environ.get('REGISTRATION_IMPORT_BATCH_SIZE', 200))
+    
+    # Organizer dashboard: read registration/payment totals from the registration_summary table,
+    # kept up to date on flush, instead of aggregating every tournament's registrations per page load
+    DASHBOARD_SUMMARY_TABLE = os.environ.get('DASHBOARD_SUMMARY_TABLE', 'true').lower() in ['true', 'on', '1']
+    
+    # Rankings: count only results from the last RANKING_WINDOW_WEEKS (e.g. 52) and/or let them lose half
+    # their weight every RANKING_DECAY_HALF_LIFE_WEEKS; both 0 rank players on their running totals.
+    # A windowed ranking is recomputed from the points ledger every RANKING_RECOMPUTE_HOURS
+    RANKING_WINDOW_WEEKS = int(os.environ.get('RANKING_WINDOW_WEEKS', 0))
+    RANKING_DECAY_HALF_LIFE_WEEKS = float(os.environ.get('RANKING_DECAY_HALF_LIFE_WEEKS', 0))
+    RANKING_RECOMPUTE_HOURS = int(os.environ.get('RANKING_RECOMPUTE_HOURS', 24))  # 0 disables
+    
     # APScheduler configuration
+    # 'sqlalchemy' keeps jobs in the database shared by every process (only the process holding
+    # the scheduler_lock lease runs them); 'memory' keeps them in each process
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    SCHEDULER_JOBSTORE = os.environ.get('SCHEDULER_JOBSTORE', 'sqlalchemy')
+    SCHEDULER_JOBSTORE_URL = os.environ.get('SCHEDULER_JOBSTORE_URL')  # defaults to SQLALCHEMY_DATABASE_URI
+    SCHEDULER_LEADER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEADER_LEASE_SECONDS', 60))
+    SCHEDULER_REMINDER_SYNC_MINUTES = int(os.environ.get('SCHEDULER_REMINDER_SYNC_MINUTES', 15))  # 0 disables
     SCHEDULER_API_ENABLED = False  # Disable the API for security
     SCHEDULER_TIMEZONE = "UTC"
     SCHEDULER_JOB_DEFAULTS = {
@@ -26,5 +26,8 @@ def make_shell_context():
     }
 
 if __name__ == '__main__':
+    # The serving process delivers queued email; CLI commands and scripts only write the outbox
+    from app.services.email_queue import EmailQueue
+    EmailQueue.start_workers(app)
     # Use SocketIO to run the app instead of app.run()
     socketio.run(app, debug=True)
@@ -11,6 +11,9 @@ class TestConfig(Config):
     LOGIN_DISABLED = False # Ensure login is enabled unless specifically disabled in a test
     SERVER_NAME = 'localhost.localdomain' # Required for url_for outside of request context
     SOCKETIO_CORS_ALLOWED_ORIGINS = '*'
+    EMAIL_QUEUE_ASYNC = False # Deliver queued email in the calling thread
+    IMAGE_PROCESSING_ASYNC = False # Write image variants before save_picture returns
+    SCHEDULER_JOBSTORE = 'memory' # No shared job store or leader election in tests
 
 @pytest.fixture(scope='session')
 def app():
@@ -40,8 +43,57 @@ def runner(app):
 def init_database(app):
     """Fixture to initialize the database for each test function."""
     db.create_all()
+    # Category ids are reused after drop_all, so cached brackets must not leak between tests
+    app.extensions['bracket_cache'].clear()
 
     yield db # provide the database instance to the test function
 
     db.session.remove() # Ensure session is closed
     db.drop_all()
+
+
+@pytest.fixture(scope='function')
+def file_app(tmp_path):
+    """An app on a file database, so threads get their own connections"""
+    class ThreadedConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'threaded.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+
+    threaded_app = create_app(config_class=ThreadedConfig)
+    with threaded_app.app_context():
+        db.create_all()
+    yield threaded_app
+    with threaded_app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture(scope='function')
+def query_counter(app):
+    """Count SQL statements executed by the app's engine.
+
+    Usage:
+        with query_counter() as counter:
+            ...
+        assert counter.count == 3
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    class _Counter:
+        count = 0
+
+    @contextmanager
+    def _count():
+        counter = _Counter()
+
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            counter.count += 1
+
+        event.listen(db.engine, 'before_cursor_execute', _before_execute)
+        try:
+            yield counter
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _before_execute)
+
+    return _count
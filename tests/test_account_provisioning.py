@@ -0,0 +1,106 @@
+import threading
+from datetime import date
+from unittest.mock import patch
+from sqlalchemy import event, func
+from app import db
+from app.models import User, PlayerProfile, Registration
+from app.services.account_provisioning import AccountProvisioning
+
+
+def doubles_registration(player1_email, player2_email, **values):
+    return Registration(
+        is_team_registration=True,
+        player1_name='Alex Tan', player1_email=player1_email, player1_date_of_birth=date(1990, 1, 1),
+        player2_name='Sam Lee', player2_email=player2_email, player2_phone='0123',
+        **values
+    )
+
+
+def test_accounts_are_resolved_in_one_query_and_created_in_one_flush(app, init_database):
+    session = init_database.session
+    existing = User(username='alex', email='alex@example.com', password_hash='x')
+    taken = User(username='sam', email='sam@other.com', password_hash='x')
+    existing_profile = PlayerProfile(user=existing, full_name='Alex Tan')
+    session.add_all([existing_profile, taken])
+    registration = doubles_registration('alex@example.com', 'sam@example.com')
+    session.add(registration)
+    session.commit()
+    session.refresh(registration)
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        created = AccountProvisioning.for_registration(registration)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert created
+    assert registration.player_id == existing_profile.id
+    assert not registration.player1_account_created and registration.player1_temp_password is None
+    partner = db.session.get(PlayerProfile, registration.partner_id)
+    assert registration.player2_account_created
+    assert partner.user.check_password(registration.player2_temp_password)
+    assert partner.user.phone == '0123' and partner.full_name == 'Sam Lee'
+    # 'sam' is taken by another user, so the new username gets a suffix
+    assert partner.user.username.startswith('sam') and partner.user.username != 'sam'
+
+    assert not any('count(' in statement.lower() for statement in statements)
+    selects = [statement for statement in statements if statement.lstrip().upper().startswith('SELECT')]
+    inserts = [statement for statement in statements if statement.lstrip().upper().startswith('INSERT')]
+    # Existing users with their profiles, then the usernames already taken
+    assert len(selects) == 2
+    assert len(inserts) == 2
+
+
+def test_username_is_the_email_local_part_when_free(app, init_database):
+    profile, temp_password = AccountProvisioning.provision([{'email': 'jo.lim+club@example.com', 'name': 'Jo'}])[0]
+    assert profile.user.username == 'jo.limclub'
+    assert temp_password
+
+    # Same person again: resolved, not created
+    assert AccountProvisioning.provision([{'email': 'jo.lim+club@example.com'}])[0] == (profile, None)
+
+
+def test_concurrent_registrations_share_accounts_and_get_unique_usernames(file_app):
+    threads = 8
+    with file_app.app_context():
+        # Every team has the same partner and a captain whose email has the same local part
+        registrations = [doubles_registration(f'alex@club{i}.com', 'partner@example.com') for i in range(threads)]
+        db.session.add_all(registrations)
+        db.session.commit()
+        registration_ids = [r.id for r in registrations]
+        db.session.remove()
+
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def register(registration_id):
+        try:
+            with file_app.app_context():
+                registration = db.session.get(Registration, registration_id)
+                barrier.wait()
+                registration.create_user_accounts()
+                db.session.remove()
+        except Exception as e:
+            errors.append(e)
+
+    with patch.object(Registration, 'send_confirmation_emails'):
+        workers = [threading.Thread(target=register, args=(i,)) for i in registration_ids]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+
+    assert errors == []
+    with file_app.app_context():
+        registrations = Registration.query.order_by(Registration.id).all()
+        assert all(r.player_id and r.partner_id for r in registrations)
+        # One account for the shared partner, one per captain
+        assert len({r.partner_id for r in registrations}) == 1
+        assert len({r.player_id for r in registrations}) == threads
+        assert User.query.count() == threads + 1
+        assert db.session.query(func.count(func.distinct(User.username))).scalar() == threads + 1
+        assert PlayerProfile.query.count() == threads + 1
+        # Exactly one registration created the partner's account (and got its password)
+        assert sum(bool(r.player2_account_created) for r in registrations) == 1
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from flask import render_template
+from app.models import Registration, EmailOutbox, AnnouncementJob, JobStatus, CategoryType
+from app.services.announcement_service import AnnouncementService
+from app.services.email_queue import EmailQueue
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+from tests.test_match_recipients import create_profiles
+
+
+def setup_participants(session):
+    """Five approved singles players, one approved doubles pair, plus people who must not be emailed"""
+    tournament = create_test_tournament(session)
+    singles = create_test_category(session, tournament)
+    doubles = create_test_category(session, tournament, name="Mixed Doubles", category_type=CategoryType.MIXED_DOUBLES)
+    players = create_profiles(session, f'announce{tournament.id}x', 9)
+    for player in players[:5]:
+        session.add(Registration(category_id=singles.id, player_id=player.id, is_approved=True))
+    session.add(Registration(category_id=doubles.id, player_id=players[5].id, partner_id=players[6].id,
+                             is_approved=True))
+    # Not approved yet, and registered in another tournament
+    session.add(Registration(category_id=singles.id, player_id=players[7].id, is_approved=False))
+    other = create_test_category(session, create_test_tournament(session, name="Other Tourney"))
+    session.add(Registration(category_id=other.id, player_id=players[8].id, is_approved=True))
+    session.commit()
+    return tournament, [p.user for p in players[:7]]
+
+
+def outbox_recipients():
+    return sorted(entry.recipients[0] for entry in EmailOutbox.query)
+
+
+def test_broadcast_renders_once_and_sends_in_chunks(app, init_database, monkeypatch):
+    tournament, users = setup_participants(init_database.session)
+    monkeypatch.setitem(app.config, 'ANNOUNCEMENT_CHUNK_SIZE', 3)
+
+    with patch('app.helpers.email_utils.render_template', wraps=render_template) as render, \
+            patch.object(EmailQueue, 'enqueue', wraps=EmailQueue.enqueue) as enqueue:
+        job = AnnouncementService.start(tournament.id, 'Court changes', 'Finals move to court 1')
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.queued_count == 7
+    assert job.last_user_id == max(u.id for u in users)
+    # The shared body (txt + html) is rendered once; recipients go out three at a time
+    assert render.call_count == 2
+    assert [len(call.args) for call in enqueue.call_args_list] == [3, 3, 1]
+    assert outbox_recipients() == sorted(u.email for u in users)
+
+    entry = EmailOutbox.query.filter(EmailOutbox.recipients.contains(users[5].email)).one()
+    assert entry.subject == f'{tournament.name}: Court changes'
+    assert f'Hello {users[5].username},' in entry.body
+    assert 'Finals move to court 1' in entry.html
+
+
+def test_interrupted_broadcast_resumes_without_resending(app, init_database, monkeypatch):
+    tournament, users = setup_participants(init_database.session)
+    monkeypatch.setitem(app.config, 'ANNOUNCEMENT_CHUNK_SIZE', 3)
+
+    real_enqueue = EmailQueue.enqueue
+    calls = []
+
+    def crash_on_second_chunk(*messages):
+        calls.append(len(messages))
+        if len(calls) == 2:
+            raise RuntimeError('worker died')
+        return real_enqueue(*messages)
+
+    with patch.object(EmailQueue, 'enqueue', side_effect=crash_on_second_chunk):
+        job = AnnouncementService.start(tournament.id, 'Rain delay', 'Play resumes at 2pm')
+    assert job.status == JobStatus.FAILED
+    # Only the first chunk and its checkpoint were committed
+    assert job.queued_count == 3
+    assert len(outbox_recipients()) == 3
+
+    job = AnnouncementService.run(job.id)
+    assert job.status == JobStatus.COMPLETED
+    assert job.queued_count == 7
+    assert outbox_recipients() == sorted(u.email for u in users)
+
+
+def test_abandoned_running_job_is_picked_up(app, init_database):
+    tournament, users = setup_participants(init_database.session)
+    session = init_database.session
+    # A process died mid-broadcast after queueing the first two users
+    job = AnnouncementJob(tournament_id=tournament.id, subject='Draw', message='Draw is out',
+                          status=JobStatus.RUNNING, last_user_id=users[1].id, queued_count=2)
+    busy = AnnouncementJob(tournament_id=tournament.id, subject='Busy', message='Still being sent',
+                           status=JobStatus.RUNNING)
+    session.add_all([job, busy])
+    session.commit()
+    job.updated_at = datetime.utcnow() - AnnouncementService.STALE_AFTER - timedelta(minutes=1)
+    session.commit()
+
+    resumed = AnnouncementService.resume_unfinished()
+
+    assert [j.id for j in resumed] == [job.id]
+    assert job.status == JobStatus.COMPLETED
+    assert job.queued_count == 7
+    assert outbox_recipients() == sorted(u.email for u in users[2:])
+    assert busy.status == JobStatus.RUNNING
@@ -0,0 +1,170 @@
+from types import SimpleNamespace
+from app import db
+from app.models import (
+    Match, Team, Group, GroupStanding, Registration, MatchStage, TournamentFormat, CategoryType
+)
+from app.services.bracket_builder import BracketBuilder, BracketPlan
+from app.helpers.tournament import _generate_single_elimination, generate_tournament_brackets
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+
+
+def add_registrations(session, category, count, doubles=False, first_player_id=1000):
+    """Approved registrations for made-up player ids (the builder never loads profiles)"""
+    for i in range(count):
+        player_id = first_player_id + i * 2
+        session.add(Registration(
+            category_id=category.id, player_id=player_id,
+            partner_id=player_id + 1 if doubles else None,
+            seed=i + 1, is_approved=True
+        ))
+    session.commit()
+
+
+def test_single_elimination_256_tree_is_linked(init_database, query_counter):
+    entries = [(1000 + i, i + 1) for i in range(256)]
+    plan = BracketBuilder.plan_single_elimination(1, entries, is_doubles=False)
+
+    # 255 knockout matches plus the third place match, computed without any query
+    assert len(plan.matches) == 256
+
+    with query_counter() as counter:
+        BracketBuilder.persist([plan])
+    # Court release of the old matches, delete, insert of the whole tree, batched next-match update
+    assert counter.count == 4
+
+    matches = Match.query.filter_by(category_id=1).all()
+    by_id = {m.id: m for m in matches}
+    knockout = [m for m in matches if m.stage == MatchStage.KNOCKOUT]
+    assert len(knockout) == 255
+    assert len([m for m in knockout if m.round == 8]) == 128
+
+    feeders = {}
+    for match in knockout:
+        if match.round == 1:
+            assert match.next_match_id is None
+            continue
+        next_match = by_id[match.next_match_id]
+        assert next_match.round == match.round - 1
+        assert next_match.match_order == match.match_order // 2
+        feeders.setdefault(next_match.id, []).append(match)
+    assert all(len(f) == 2 for f in feeders.values())
+
+    third_place = [m for m in matches if m.stage == MatchStage.PLAYOFF]
+    assert len(third_place) == 1
+    assert (third_place[0].player1_code, third_place[0].player2_code) == ('L-SF1', 'L-SF2')
+
+
+def test_third_place_match_is_linked_when_round_comes_back_rounded(init_database, monkeypatch):
+    plan = BracketBuilder.plan_single_elimination(1, [(1000 + i, i + 1) for i in range(8)], is_doubles=False)
+    real_execute = db.session.execute
+
+    class RoundedResult:
+        """RETURNING rows as an integer column hands them back on PostgreSQL/MySQL"""
+        def __init__(self, result):
+            self.rows = [SimpleNamespace(**dict(row._mapping, round=round(row.round))) for row in result.all()]
+
+        def all(self):
+            return self.rows
+
+    def execute(statement, *args, **kwargs):
+        result = real_execute(statement, *args, **kwargs)
+        if getattr(statement, '_returning', None) and statement.table.name == 'match':
+            return RoundedResult(result)
+        return result
+
+    monkeypatch.setattr(db.session, 'execute', execute)
+    BracketBuilder.persist([plan])
+    monkeypatch.undo()
+
+    third_place = Match.query.filter_by(category_id=1, stage=MatchStage.PLAYOFF).one()
+    semifinals = Match.query.filter_by(category_id=1, stage=MatchStage.KNOCKOUT, round=2).all()
+    assert len(semifinals) == 2 and third_place.next_match_id is None
+    final = Match.query.filter_by(category_id=1, stage=MatchStage.KNOCKOUT, round=1).one()
+    assert {m.next_match_id for m in semifinals} == {final.id}
+
+
+def test_single_elimination_places_participants_and_byes(init_database):
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament)
+    add_registrations(session, category, 6)
+
+    assert _generate_single_elimination(category, use_seeding=True) is True
+
+    first_round = Match.query.filter_by(category_id=category.id, round=3).order_by(Match.match_order).all()
+    assert len(first_round) == 4
+    placed = [pid for m in first_round for pid in (m.player1_id, m.player2_id) if pid]
+    assert sorted(placed) == [1000 + i * 2 for i in range(6)]
+    # Two byes, each leaving a single seeded entrant in its match
+    bye_matches = [m for m in first_round if m.player1_id is None or m.player2_id is None]
+    assert len(bye_matches) == 2
+    assert all(m.player1_id or m.player2_id for m in bye_matches)
+
+
+def test_load_entries_creates_missing_teams_once(init_database, query_counter):
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament, name="Men's Doubles",
+                                    category_type=CategoryType.MENS_DOUBLES)
+    add_registrations(session, category, 4, doubles=True)
+    existing = Team(player1_id=1000, player2_id=1001, category_id=category.id)
+    session.add(existing)
+    session.commit()
+    existing_id, category_id = existing.id, category.id
+
+    with query_counter() as counter:
+        entries = BracketBuilder.load_entries([category])[category_id]
+    # Registrations, existing teams, one insert for the three missing teams
+    assert counter.count == 3
+
+    assert entries[0] == (existing_id, 1)
+    assert Team.query.filter_by(category_id=category.id).count() == 4
+    assert BracketBuilder.load_entries([category])[category.id] == entries
+
+
+def test_generate_tournament_brackets_in_one_pass(init_database):
+    session = init_database.session
+    tournament = create_test_tournament(session, format=TournamentFormat.SINGLE_ELIMINATION)
+    singles = create_test_category(session, tournament, name="Singles")
+    groups = create_test_category(session, tournament, name="Groups")
+    groups.format = TournamentFormat.GROUP_KNOCKOUT
+    groups.group_count = 2
+    existing = create_test_category(session, tournament, name="Existing")
+    empty = create_test_category(session, tournament, name="Empty")
+    session.add(Match(category_id=existing.id, round=1, match_order=0))
+    add_registrations(session, singles, 8)
+    add_registrations(session, groups, 8, first_player_id=2000)
+
+    result = generate_tournament_brackets(tournament)
+
+    assert sorted(result['succeeded']) == sorted([singles.id, groups.id])
+    assert result['failed'] == [empty.id]
+    assert result['skipped'] == [existing.id]
+
+    assert Match.query.filter_by(category_id=singles.id).count() == 8  # 7 knockout + 3rd place
+    group_rows = Group.query.filter_by(category_id=groups.id).order_by(Group.name).all()
+    assert [g.name for g in group_rows] == ['A', 'B']
+    for group in group_rows:
+        assert GroupStanding.query.filter_by(group_id=group.id).count() == 4
+        matches = Match.query.filter_by(group_id=group.id, stage=MatchStage.GROUP).all()
+        assert len(matches) == 6
+        codes = {(m.player1_code, m.player2_code) for m in matches}
+        assert len(codes) == 6
+    assert Match.query.filter_by(category_id=existing.id).count() == 1
+
+
+def test_plan_knockout_keeps_scope_of_group_stage(init_database):
+    plan = BracketPlan(5, BracketPlan.SCOPE_KNOCKOUT, is_doubles=False)
+    BracketBuilder.plan_knockout(plan, [{'participant_id': None, 'code': f'{g}{p}'}
+                                        for g, p in (('A', 1), ('B', 2), ('B', 1), ('A', 2))])
+    init_database.session.add(Match(category_id=5, group_id=1, stage=MatchStage.GROUP, round=1))
+    init_database.session.add(Match(category_id=5, stage=MatchStage.KNOCKOUT, round=1))
+    init_database.session.commit()
+
+    BracketBuilder.persist([plan])
+
+    assert Match.query.filter_by(category_id=5, stage=MatchStage.GROUP).count() == 1
+    semis = Match.query.filter_by(category_id=5, stage=MatchStage.KNOCKOUT, round=2).order_by(Match.match_order).all()
+    assert [(m.player1_code, m.player2_code) for m in semis] == [('A1', 'B2'), ('B1', 'A2')]
+    assert Match.query.filter_by(category_id=5, stage=MatchStage.KNOCKOUT).count() == 3
@@ -0,0 +1,128 @@
+import pytest
+from app.models import Match, MatchStage, MatchScore
+from app.services.bracket_cache import (
+    MemoryBracketCacheBackend, FileSystemBracketCacheBackend
+)
+from app.services.bracket_service import BracketService
+
+from tests.test_bracket_service import (
+    create_test_tournament, create_test_category, create_test_player
+)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBracketCacheBackend(max_entries=2)
+    backend.set('a', b'1')
+    backend.set('b', b'2')
+    backend.get('a')  # 'a' is now most recently used
+    backend.set('c', b'3')
+
+    assert backend.get('a') == b'1'
+    assert backend.get('b') is None
+    assert backend.get('c') == b'3'
+
+
+@pytest.mark.parametrize('make_backend', [
+    lambda tmp_path: MemoryBracketCacheBackend(),
+    lambda tmp_path: FileSystemBracketCacheBackend(str(tmp_path)),
+])
+def test_backend_versions_are_stable_until_bumped(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    version = backend.get_version(7)
+
+    assert backend.get_version(7) == version
+    assert backend.get_version(8) == version
+    assert backend.bump_version(7) != version
+    assert backend.get_version(8) == version
+    assert backend.get_version(7) != version
+
+
+def test_filesystem_backend_is_shared_between_instances(tmp_path):
+    """Two workers pointing at the same directory see the same versions and entries"""
+    worker1 = FileSystemBracketCacheBackend(str(tmp_path))
+    worker2 = FileSystemBracketCacheBackend(str(tmp_path))
+
+    version = worker1.get_version(3)
+    worker1.set(f'3_{version}', b'{"ok": true}')
+
+    assert worker2.get_version(3) == version
+    assert worker2.get(f'3_{version}') == b'{"ok": true}'
+
+    worker2.bump_version(3)
+    assert worker1.get_version(3) != version
+
+
+def _create_final(session):
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament)
+    p1 = create_test_player(session, "cache1")
+    p2 = create_test_player(session, "cache2")
+    final = Match(category_id=category.id, stage=MatchStage.KNOCKOUT, round=1, match_order=0,
+                  player1_id=p1.id, player2_id=p2.id)
+    session.add(final)
+    session.commit()
+    return tournament, category, final
+
+
+def test_api_bracket_data_serves_cached_payload_and_304(init_database, client, query_counter):
+    tournament, category, final = _create_final(init_database.session)
+    url = f'/tournament/api/{tournament.id}/bracket_data?category={category.id}'
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.get_json()['knockout_rounds']['1'][0]['id'] == final.id
+
+    # A cache hit returns identical bytes, only checking that the category exists
+    with query_counter() as counter:
+        second = client.get(url)
+    assert second.data == first.data
+    assert second.headers['ETag'] == etag
+    assert counter.count == 1
+
+    # Revalidation short-circuits to 304
+    with query_counter() as counter:
+        revalidated = client.get(url, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert counter.count == 1
+
+
+def test_api_bracket_data_rejects_unknown_categories(init_database, client, tmp_path):
+    tournament, category, final = _create_final(init_database.session)
+    other = create_test_category(init_database.session, create_test_tournament(init_database.session))
+    backend = FileSystemBracketCacheBackend(str(tmp_path))
+    client.application.extensions['bracket_cache'], previous = backend, client.application.extensions['bracket_cache']
+    try:
+        for category_id in (other.id, 999999):
+            response = client.get(f'/tournament/api/{tournament.id}/bracket_data?category={category_id}')
+            assert response.status_code == 404
+        # Reading versions never writes them; only invalidation does
+        assert backend.get_version(category.id) == backend.get_version(other.id)
+        assert not [e for e in tmp_path.iterdir() if e.name.startswith('version_')]
+    finally:
+        client.application.extensions['bracket_cache'] = previous
+
+
+def test_api_bracket_data_rebuilds_after_invalidation(init_database, client):
+    tournament, category, final = _create_final(init_database.session)
+    url = f'/tournament/api/{tournament.id}/bracket_data?category={category.id}'
+
+    etag = client.get(url).headers['ETag']
+
+    final.completed = True
+    final.winning_player_id = final.player1_id
+    final.losing_player_id = final.player2_id
+    init_database.session.add(MatchScore(match_id=final.id, set_number=1, player1_score=11, player2_score=4))
+    init_database.session.commit()
+
+    # Without invalidation the old payload is still valid
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    BracketService.advance_winner(final)  # Bumps the category version
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    match_info = response.get_json()['knockout_rounds']['1'][0]
+    assert match_info['completed'] is True
+    assert match_info['scores'] == [{'player1_score': 11, 'player2_score': 4}]
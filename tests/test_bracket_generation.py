@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.models import Match, BracketGenerationJob, JobStatus, UserRole, TournamentFormat, TournamentStatus
+from app.services.bracket_builder import BracketBuilder
+from app.services.bracket_generation import BracketGenerationService
+
+from tests.test_bracket_builder import add_registrations
+from tests.test_bracket_service import create_test_tournament, create_test_category
+from tests.test_permissions import create_test_user, login_user, logout_user
+
+
+def setup_tournament(session, category_count=6, entrants=8):
+    tournament = create_test_tournament(session, format=TournamentFormat.SINGLE_ELIMINATION)
+    categories = [create_test_category(session, tournament, name=f"Category {i}") for i in range(category_count)]
+    for i, category in enumerate(categories):
+        add_registrations(session, category, entrants, first_player_id=1000 * (i + 1))
+    return tournament, categories
+
+
+def test_job_plans_categories_and_records_progress(app, init_database):
+    session = init_database.session
+    tournament, categories = setup_tournament(session)
+    session.add(Match(category_id=categories[0].id, round=1, match_order=0))
+    session.commit()
+
+    # While the plans are written, the status reports every category planned and the writing phase
+    seen = []
+    persist = BracketBuilder.persist
+
+    def record_and_persist(plans):
+        running = BracketGenerationJob.query.filter_by(status=JobStatus.RUNNING).one()
+        seen.append(BracketGenerationService.get_status(running.id))
+        persist(plans)
+
+    with patch('app.services.bracket_generation.BracketBuilder.persist', side_effect=record_and_persist):
+        job = BracketGenerationService.start(tournament, run_async=False)
+
+    assert [(s['phase'], s['completed_categories'], s['total_categories']) for s in seen] == [('writing', 5, 5)]
+    assert job.status == JobStatus.COMPLETED
+    assert job.total_categories == 5
+    assert job.completed_categories == 5
+    assert job.skipped == [categories[0].id]
+    assert job.succeeded == [c.id for c in categories[1:]]
+    assert job.failed == []
+    for category in categories[1:]:
+        assert Match.query.filter_by(category_id=category.id).count() == 8
+
+    status = BracketGenerationService.get_status(job.id, tournament_id=tournament.id)
+    assert status['status'] == 'completed'
+    assert BracketGenerationService.get_status(job.id, tournament_id=tournament.id + 1) is None
+
+
+def test_failed_write_marks_job_failed(init_database):
+    tournament, categories = setup_tournament(init_database.session, category_count=2)
+
+    with patch('app.services.bracket_generation.BracketBuilder.persist', side_effect=RuntimeError('disk full')):
+        job = BracketGenerationService.start(tournament, run_async=False)
+
+    job = BracketGenerationJob.query.get(job.id)
+    assert job.status == JobStatus.FAILED
+    assert job.error == 'disk full'
+    assert Match.query.filter(Match.category_id.in_([c.id for c in categories])).count() == 0
+
+
+def test_generate_all_returns_job_and_status_endpoint(app, client, init_database):
+    session = init_database.session
+    organizer = create_test_user(session, "gen_organizer", UserRole.ORGANIZER)
+    tournament, categories = setup_tournament(session, category_count=2)
+    tournament.organizer_id = organizer.id
+    tournament.status = TournamentStatus.UPCOMING
+    session.commit()
+    with app.test_request_context():
+        logout_user(client)  # whoever an earlier test left logged in
+        login_user(client, organizer)
+
+    app.config['BRACKET_GENERATION_ASYNC'] = False
+    try:
+        response = client.post(f'/organizer/tournament/{tournament.id}/generate_all_brackets',
+                               headers={'Accept': 'application/json'})
+    finally:
+        app.config['BRACKET_GENERATION_ASYNC'] = True
+
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] == 'completed'
+
+    status = client.get(job['status_url'])
+    assert status.status_code == 200
+    assert status.get_json()['succeeded'] == [c.id for c in categories]
+
+    missing = client.get(f'/organizer/tournament/{tournament.id}/bracket_generation/{job["id"] + 100}')
+    assert missing.status_code == 404
+    with app.test_request_context():
+        logout_user(client)
+
+
+def test_one_active_job_per_tournament(init_database):
+    session = init_database.session
+    tournament, categories = setup_tournament(session, category_count=2)
+
+    with patch('app.services.bracket_generation.Thread') as thread:
+        first = BracketGenerationService.start(tournament, run_async=True)
+        second = BracketGenerationService.start(tournament, run_async=True)
+    assert second.id == first.id
+    assert thread.call_count == 1
+    assert BracketGenerationJob.query.count() == 1
+
+    # Only one runner gets to claim the job
+    assert BracketGenerationService.run(first.id).status == JobStatus.COMPLETED
+    assert BracketGenerationService.run(first.id).status == JobStatus.COMPLETED
+    assert Match.query.filter(Match.category_id.in_([c.id for c in categories])).count() == 16
+
+
+def test_abandoned_running_job_is_failed_and_replaced(init_database):
+    session = init_database.session
+    tournament, categories = setup_tournament(session, category_count=1)
+    abandoned = BracketGenerationJob(tournament_id=tournament.id, status=JobStatus.RUNNING,
+                                     updated_at=datetime.utcnow() - timedelta(hours=1))
+    session.add(abandoned)
+    session.commit()
+
+    assert BracketGenerationService.get_status(abandoned.id)['status'] == 'failed'
+    job = BracketGenerationService.start(tournament, run_async=False)
+    assert job.id != abandoned.id
+    assert job.status == JobStatus.COMPLETED
@@ -74,6 +74,7 @@ class TestBracketServiceTiebreakers(unittest.TestCase):
             mock_filter = MagicMock()
             mock_filter.all.return_value = [mock_match]
             mock_filter_by.filter.return_value = mock_filter
+            mock_filter.with_entities.return_value = mock_filter
             mock_query.filter_by.return_value = mock_filter_by
 
             # Call the method under test
@@ -130,6 +131,7 @@ class TestBracketServiceTiebreakers(unittest.TestCase):
             mock_filter = MagicMock()
             mock_filter.all.return_value = [mock_match]
             mock_filter_by.filter.return_value = mock_filter
+            mock_filter.with_entities.return_value = mock_filter
             mock_query.filter_by.return_value = mock_filter_by
 
             # Call the method under test
@@ -172,6 +174,7 @@ class TestBracketServiceTiebreakers(unittest.TestCase):
             mock_filter = MagicMock()
             mock_filter.all.return_value = []
             mock_filter_by.filter.return_value = mock_filter
+            mock_filter.with_entities.return_value = mock_filter
             mock_query.filter_by.return_value = mock_filter_by
 
             # Call the method under test
@@ -252,6 +255,7 @@ class TestBracketServiceTiebreakers(unittest.TestCase):
             mock_filter = MagicMock()
             mock_filter.all.return_value = mock_matches
             mock_filter_by.filter.return_value = mock_filter
+            mock_filter.with_entities.return_value = mock_filter
             mock_query.filter_by.return_value = mock_filter_by
 
             # Call the method under test
@@ -0,0 +1,140 @@
+import pytest
+from app.models import (
+    Match, MatchScore, Group, GroupStanding, Team, TournamentFormat,
+    MatchStage, CategoryType, TournamentStatus
+)
+from app.services.bracket_snapshot import BracketSnapshot
+from app.services.bracket_service import BracketService
+
+from tests.test_bracket_service import (
+    create_test_tournament, create_test_category, create_test_player
+)
+
+
+def build_knockout(db_session, category, size, doubles=False):
+    """Create a full knockout draw of `size` entries with scores on every match"""
+    entries = []
+    for i in range(size):
+        if doubles:
+            p1 = create_test_player(db_session, f"{category.id}_{size}_{i}a")
+            p2 = create_test_player(db_session, f"{category.id}_{size}_{i}b")
+            team = Team(player1_id=p1.id, player2_id=p2.id, category_id=category.id)
+            db_session.add(team)
+            db_session.flush()
+            entries.append(team)
+        else:
+            entries.append(create_test_player(db_session, f"{category.id}_{size}_{i}"))
+
+    round_num = size.bit_length() - 1
+    current = entries
+    while round_num >= 1:
+        winners = []
+        for order in range(len(current) // 2):
+            a, b = current[2 * order], current[2 * order + 1]
+            match = Match(category_id=category.id, stage=MatchStage.KNOCKOUT,
+                          round=round_num, match_order=order, completed=True)
+            if doubles:
+                match.team1_id, match.team2_id = a.id, b.id
+                match.winning_team_id, match.losing_team_id = a.id, b.id
+            else:
+                match.player1_id, match.player2_id = a.id, b.id
+                match.winning_player_id, match.losing_player_id = a.id, b.id
+            db_session.add(match)
+            db_session.flush()
+            db_session.add(MatchScore(match_id=match.id, set_number=1, player1_score=11, player2_score=7))
+            db_session.add(MatchScore(match_id=match.id, set_number=2, player1_score=11, player2_score=9))
+            winners.append(a)
+        current = winners
+        round_num -= 1
+    db_session.commit()
+
+
+def render_bracket_json(snapshot):
+    """Touch every attribute the bracket templates and JSON consumers use"""
+    for match in snapshot.matches:
+        for participant in (match.player1, match.player2, match.winner, match.loser):
+            if participant is not None and not snapshot.is_doubles:
+                participant.full_name
+        for team in (match.team1, match.team2):
+            if team is not None:
+                team.player1.full_name
+                team.player2.full_name
+        match.round_name
+        list(snapshot.scores_for(match.id))
+
+
+@pytest.mark.parametrize('doubles', [False, True])
+def test_snapshot_query_count_independent_of_draw_size(init_database, query_counter, doubles):
+    """Loading and walking a snapshot costs the same number of queries for 4 and 16 entries"""
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    category_type = CategoryType.MENS_DOUBLES if doubles else CategoryType.MENS_SINGLES
+    small = create_test_category(session, tournament, name="Small", category_type=category_type)
+    large = create_test_category(session, tournament, name="Large", category_type=category_type)
+    build_knockout(session, small, 4, doubles=doubles)
+    build_knockout(session, large, 16, doubles=doubles)
+
+    counts = []
+    for category_id in (small.id, large.id):
+        session.expunge_all()
+        with query_counter() as counter:
+            snapshot = BracketSnapshot.load(category_id)
+            render_bracket_json(snapshot)
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1]
+    assert counts[1] <= 5
+
+
+def test_snapshot_indexes_rounds_groups_and_scores(init_database):
+    """Snapshot exposes knockout rounds, group matches, standings and scores"""
+    session = init_database.session
+    tournament = create_test_tournament(session, format=TournamentFormat.GROUP_KNOCKOUT)
+    category = create_test_category(session, tournament)
+    players = [create_test_player(session, f"snap{i}") for i in range(3)]
+
+    group = Group(category_id=category.id, name="A")
+    session.add(group)
+    session.flush()
+    for i, p in enumerate(players):
+        session.add(GroupStanding(group_id=group.id, player_id=p.id, position=3 - i))
+    group_match = Match(category_id=category.id, group_id=group.id, stage=MatchStage.GROUP,
+                        round=1, match_order=0, player1_id=players[0].id, player2_id=players[1].id)
+    final = Match(category_id=category.id, stage=MatchStage.KNOCKOUT, round=1, match_order=0)
+    session.add_all([group_match, final])
+    session.flush()
+    session.add(MatchScore(match_id=group_match.id, set_number=2, player1_score=5, player2_score=11))
+    session.add(MatchScore(match_id=group_match.id, set_number=1, player1_score=11, player2_score=3))
+    session.commit()
+
+    snapshot = BracketSnapshot.load(category.id)
+
+    assert snapshot.has_group_stage
+    assert [m.id for m in snapshot.matches_for_group(group.id)] == [group_match.id]
+    assert [s.position for s in snapshot.standings_for(group.id)] == [1, 2, 3]
+    assert [s.set_number for s in snapshot.scores_for(group_match.id)] == [1, 2]
+    assert snapshot.scores_for(final.id) == ()
+    assert list(snapshot.knockout_rounds) == [1]
+    assert not snapshot.is_complete()
+
+    # Snapshot collections are read-only
+    with pytest.raises(TypeError):
+        snapshot.scores[final.id] = ()
+
+
+def test_get_bracket_data_shares_snapshot_with_placings(init_database):
+    """Completed tournaments get placings computed from the same snapshot"""
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    tournament.status = TournamentStatus.COMPLETED
+    category = create_test_category(session, tournament)
+    category.points_awarded = 100
+    category.points_distribution = {"1": 100, "2": 70, "3-4": 50}
+    build_knockout(session, category, 4)
+
+    bracket_data = BracketService.get_bracket_data(category.id)
+
+    assert bracket_data['snapshot'].category.id == category.id
+    places = sorted(p['place'] for p in bracket_data['placings'])
+    assert places == [1, 2, 3, 3]
+    assert bracket_data['placings'][0]['points'] == 100
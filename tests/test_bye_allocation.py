@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import patch, MagicMock, call
 import random
-from app.helpers.tournament import _distribute_byes_in_bracket, _apply_standard_seeding
+from app.services.bracket_builder import _distribute_byes_in_bracket, _apply_standard_seeding
 
 class TestByeAllocation(unittest.TestCase):
     """Test the bye allocation logic for tournament brackets"""
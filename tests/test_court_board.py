@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+from flask_socketio import SocketIOTestClient
+from app import socketio
+from app.models import PlayerProfile, Match, MatchScore, CourtState, TournamentStatus
+from app.services.bracket_builder import BracketBuilder, BracketPlan
+from app.services.court_board import CourtBoard
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+
+
+def setup_courts(session):
+    """Court 1: three singles matches (the last without players yet); court 2: one match"""
+    tournament = create_test_tournament(session)
+    tournament.status = TournamentStatus.ONGOING
+    category = create_test_category(session, tournament)
+    players = [PlayerProfile(full_name=f'Court Player {i}') for i in range(8)]
+    session.add_all(players)
+    session.flush()
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(hours=1)
+
+    def add(court, minutes, p1, p2):
+        match = Match(category_id=category.id, round=1, court=court,
+                      scheduled_time=start + timedelta(minutes=minutes),
+                      player1_id=players[p1].id if p1 is not None else None,
+                      player2_id=players[p2].id if p2 is not None else None)
+        session.add(match)
+        return match
+
+    court1 = [add('Court 1', 0, 0, 1), add('Court 1', 20, 2, 3), add('Court 1', 40, None, None)]
+    court2 = [add('Court 2', 0, 4, 5)]
+    session.add(Match(category_id=category.id, round=1, court=None, scheduled_time=start,
+                      player1_id=players[6].id, player2_id=players[7].id))
+    session.commit()
+    return tournament, court1, court2
+
+
+def test_board_follows_matches_through_the_court(app, init_database):
+    session = init_database.session
+    tournament, court1, court2 = setup_courts(session)
+
+    states = {s.court: s for s in CourtBoard.states(tournament.id)}
+    assert sorted(states) == ['Court 1', 'Court 2']
+    assert states['Court 1'].current_match_id == court1[0].id
+    assert states['Court 1'].queue == [court1[1].id, court1[2].id]
+    assert states['Court 2'].queue == []
+    # The next match cannot start before the current one is expected to finish
+    expected_free = states['Court 1'].current_since + timedelta(minutes=app.config['COURT_MATCH_MINUTES'])
+    assert states['Court 1'].next_eta == max(court1[1].scheduled_time, expected_free)
+
+    # Scores recorded on the second match: it is the one being played
+    session.add(MatchScore(match_id=court1[1].id, set_number=1, player1_score=3, player2_score=1))
+    session.commit()
+    state = CourtBoard.refresh(tournament.id, ['Court 1'])[0]
+    assert state.current_match_id == court1[1].id
+    assert state.queue == [court1[0].id, court1[2].id]
+
+    # Completing it and moving the first match to court 2 leaves only the unready match
+    court1[1].completed = True
+    court1[0].court = 'Court 2'
+    session.commit()
+    CourtBoard.refresh(tournament.id, ['Court 1', 'Court 2'])
+    states = {s.court: s for s in CourtState.query.filter_by(tournament_id=tournament.id)}
+    assert states['Court 1'].current_match_id is None
+    assert states['Court 1'].queue == [court1[2].id]
+    assert states['Court 2'].current_match_id == court2[0].id
+    assert states['Court 2'].queue == [court1[0].id]
+
+
+def test_reads_do_not_store_the_board(client, init_database, runner):
+    session = init_database.session
+    tournament, court1, _ = setup_courts(session)
+    tournament_id = tournament.id
+
+    states = {s.court: s for s in CourtBoard.states(tournament_id)}
+    assert states['Court 1'].current_match_id == court1[0].id
+    data = client.get(f'/tournament/api/{tournament_id}/courts_data').get_json()
+    assert data['Court 1']['upcoming_match']['id'] == court1[1].id
+    assert CourtState.query.count() == 0
+
+    # The first write stores every court, the CLI backfills the rest
+    CourtBoard.refresh(tournament_id, ['Court 2'])
+    assert CourtState.query.filter_by(tournament_id=tournament_id).count() == 2
+    CourtState.query.delete()
+    session.commit()
+    result = runner.invoke(args=['rebuild-court-boards', str(tournament_id)])
+    assert 'Rebuilt the court board of 1 tournament(s)' in result.output
+    assert CourtState.query.filter_by(tournament_id=tournament_id).count() == 2
+
+
+def test_views_read_board_in_constant_queries(client, init_database, query_counter):
+    session = init_database.session
+    tournament, court1, court2 = setup_courts(session)
+    tournament_id = tournament.id
+    CourtBoard.rebuild(tournament_id)
+
+    with query_counter() as counter:
+        states, matches, scores = CourtBoard.load_view(tournament_id)
+    # Board rows, the matches they point at, scores of the playing matches
+    assert counter.count == 3
+    assert set(matches) == {court1[0].id, court1[1].id, court2[0].id}
+
+    data = client.get(f'/tournament/api/{tournament_id}/courts_data').get_json()
+    assert data['Court 1']['ongoing_match']['id'] == court1[0].id
+    assert data['Court 1']['upcoming_match']['id'] == court1[1].id
+    assert data['Court 2']['upcoming_match'] is None
+
+    response = client.get(f'/tournament/{tournament_id}/live_courts')
+    assert response.status_code == 200
+    assert b'Court Player 2' in response.data
+
+
+def test_publish_pushes_court_state(app, init_database):
+    session = init_database.session
+    tournament, court1, _ = setup_courts(session)
+    subscriber = SocketIOTestClient(app, socketio)
+    subscriber.emit('join_courts_view', {'tournament_id': tournament.id})
+    subscriber.get_received()
+
+    court1[0].completed = True
+    session.commit()
+    CourtBoard.publish(tournament.id, ['Court 1'], match=court1[0])
+
+    updates = [e['args'][0] for e in subscriber.get_received() if e['name'] == 'court_update']
+    assert len(updates) == 1
+    assert updates[0]['status'] == 'completed'
+    assert updates[0]['board']['current_match_id'] == court1[1].id
+    assert updates[0]['board']['queue'] == [court1[2].id]
+
+
+def test_regenerating_a_bracket_frees_the_courts(app, init_database):
+    session = init_database.session
+    tournament, court1, court2 = setup_courts(session)
+    CourtBoard.rebuild(tournament.id)
+
+    BracketBuilder._clear_existing([BracketPlan(court1[0].category_id, BracketPlan.SCOPE_ALL, False)])
+    session.commit()
+
+    states = CourtState.query.filter_by(tournament_id=tournament.id).all()
+    assert len(states) == 2
+    assert all(s.current_match_id is None and s.current_since is None for s in states)
+    assert Match.query.count() == 0
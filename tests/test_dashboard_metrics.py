@@ -0,0 +1,166 @@
+from datetime import date, timedelta
+import pytest
+from app import db
+from app.models import (Registration, RegistrationSummary, Tournament, TournamentCategory, TournamentStatus,
+                        CategoryType, UserRole)
+from app.services.dashboard_metrics import DashboardMetrics
+
+from tests.test_permissions import create_test_user, login_user, logout_user
+
+
+def create_tournament(session, name, status=TournamentStatus.COMPLETED, registrations=()):
+    """A tournament with one category holding registrations given as (payment_status, verified, fee)"""
+    category = TournamentCategory(
+        tournament=Tournament(name=name, status=status, start_date=date.today(),
+                              end_date=date.today() + timedelta(days=1)),
+        name="Men's Singles", category_type=CategoryType.MENS_SINGLES
+    )
+    session.add(category)
+    session.add_all([
+        Registration(category=category, payment_status=payment_status, payment_verified=verified,
+                     registration_fee=fee)
+        for payment_status, verified, fee in registrations
+    ])
+    session.commit()
+    return category.tournament
+
+
+REGISTRATIONS = [
+    ('paid', True, 30.0),
+    ('paid', True, 20.0),
+    ('free', True, 0.0),
+    ('uploaded', False, 30.0),
+    ('pending', False, 30.0),
+]
+
+
+def test_aggregate_groups_every_tournament_in_one_query(app, init_database, query_counter):
+    session = init_database.session
+    first = create_tournament(session, 'First', registrations=REGISTRATIONS)
+    second = create_tournament(session, 'Second', registrations=[('uploaded', False, 10.0)])
+    empty = create_tournament(session, 'Empty')
+
+    tournament_ids = [first.id, second.id, empty.id]
+    with query_counter() as counter:
+        metrics = DashboardMetrics.aggregate(tournament_ids)
+    assert counter.count == 1
+    assert metrics == {
+        first.id: {'total': 5, 'pending': 1, 'approved': 3, 'revenue': 50.0},
+        second.id: {'total': 1, 'pending': 1, 'approved': 0, 'revenue': 0.0},
+        empty.id: {'total': 0, 'pending': 0, 'approved': 0, 'revenue': 0.0},
+    }
+
+
+def test_summary_follows_registration_changes(app, init_database):
+    session = init_database.session
+    tournament = create_tournament(session, 'Open', registrations=REGISTRATIONS)
+    other = create_tournament(session, 'Other')
+
+    def summary(t):
+        row = db.session.get(RegistrationSummary, t.id, populate_existing=True)
+        return (row.total, row.pending, row.approved, row.revenue)
+
+    assert summary(tournament) == (5, 1, 3, 50.0)
+
+    uploaded = Registration.query.filter_by(payment_status='uploaded').one()
+    uploaded.payment_status = 'paid'
+    uploaded.payment_verified = True
+    session.commit()
+    assert summary(tournament) == (5, 0, 4, 80.0)
+
+    # Moved to another tournament's category: both are rewritten
+    uploaded.category = other.categories.first()
+    session.commit()
+    assert summary(tournament) == (4, 0, 3, 50.0)
+    assert summary(other) == (1, 0, 1, 30.0)
+
+    session.delete(uploaded)
+    session.commit()
+    assert summary(other) == (0, 0, 0, 0.0)
+
+    # Unrelated changes leave the summary alone
+    registration = Registration.query.first()
+    registration.special_requests = 'Late arrival'
+    session.commit()
+    assert summary(tournament) == (4, 0, 3, 50.0)
+
+
+def test_summary_is_backfilled_for_tournaments_without_a_row(app, init_database):
+    session = init_database.session
+    tournament = create_tournament(session, 'Open', registrations=REGISTRATIONS)
+    RegistrationSummary.query.delete()
+    session.commit()
+
+    metrics = DashboardMetrics.for_tournaments([tournament])
+    assert metrics[tournament.id]['revenue'] == 50.0
+    assert db.session.get(RegistrationSummary, tournament.id).total == 5
+
+
+@pytest.mark.parametrize('summary_table', [True, False])
+def test_dashboard_query_count_does_not_grow_with_tournaments(app, client, init_database, query_counter,
+                                                              summary_table):
+    app.config['DASHBOARD_SUMMARY_TABLE'] = summary_table
+    session = init_database.session
+    admin = create_test_user(session, 'admin', UserRole.ADMIN)
+    with app.test_request_context():
+        logout_user(client)  # whoever an earlier test left logged in
+        login_user(client, admin)
+
+    counts = []
+    for batch in range(2):
+        for i in range(3):
+            create_tournament(session, f'T{batch}{i}', registrations=REGISTRATIONS)
+        client.get('/organizer/dashboard')  # first load after the new tournaments
+        with query_counter() as counter:
+            response = client.get('/organizer/dashboard')
+        assert response.status_code == 200
+        counts.append(counter.count)
+    with app.test_request_context():
+        logout_user(client)
+
+    assert counts[0] == counts[1]
+    assert b'$150.0' in response.data or b'$300.0' in response.data
+
+
+def test_concurrent_flushes_add_their_deltas(app, init_database):
+    """Two sessions registering in different categories of one tournament both count"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    app.config['DASHBOARD_SUMMARY_TABLE'] = True
+    session = init_database.session
+    tournament = create_tournament(session, 'Open', registrations=REGISTRATIONS)
+    doubles = TournamentCategory(tournament_id=tournament.id, name="Men's Doubles",
+                                 category_type=CategoryType.MENS_DOUBLES)
+    session.add(doubles)
+    session.commit()
+    singles_id, doubles_id = tournament.categories.first().id, doubles.id
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    other = Session(db.engine)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        session.add(Registration(category_id=singles_id, payment_status='paid', payment_verified=True,
+                                 registration_fee=25.0))
+        other.add(Registration(category_id=doubles_id, payment_status='uploaded', payment_verified=False,
+                               registration_fee=40.0))
+        session.flush()
+        other.flush()
+        other.commit()
+        session.commit()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+        other.close()
+
+    row = db.session.get(RegistrationSummary, tournament.id, populate_existing=True)
+    assert (row.total, row.pending, row.approved, row.revenue) == (7, 2, 4, 75.0)
+    assert DashboardMetrics.aggregate([tournament.id])[tournament.id] == {
+        'total': 7, 'pending': 2, 'approved': 4, 'revenue': 75.0}
+    # Each flush adds to the existing row: no rewrite and no aggregate over the tournament
+    summary_writes = [s for s in statements if 'registration_summary' in s]
+    assert summary_writes and all(s.lstrip().upper().startswith('UPDATE') for s in summary_writes)
+    assert not any('GROUP BY' in s.upper() for s in statements)
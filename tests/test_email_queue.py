@@ -0,0 +1,209 @@
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from flask_mail import Message
+from app.models import EmailOutbox, EmailStatus
+from app.services.email_queue import EmailQueue
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 stand-in ready')
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 stand-in')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data_line in self.rfile:
+                    if data_line == b'.\r\n':
+                        break
+                    lines.append(data_line)
+                with server.lock:
+                    rejected = server.reject_next > 0
+                    if rejected:
+                        server.reject_next -= 1
+                    else:
+                        server.messages.append((recipients, b''.join(lines).decode()))
+                self.reply('451 try again later' if rejected else '250 queued')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('502 not implemented')
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInSMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.reject_next = 0
+
+
+@pytest.fixture
+def smtp_server(app, monkeypatch):
+    """Local SMTP server that the app's mail extension actually connects to"""
+    server = StandInSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state = app.extensions['mail']
+    for name, value in (('server', '127.0.0.1'), ('port', server.server_address[1]), ('use_tls', False),
+                        ('use_ssl', False), ('username', None), ('suppress', False)):
+        monkeypatch.setattr(state, name, value)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def worker_pool(app):
+    """Start an asynchronous worker pool with config overrides; restores the test pool afterwards"""
+    original_config = dict(app.config)
+    original_pool = app.extensions['email_queue']
+
+    def start(**config):
+        app.config.update({'EMAIL_QUEUE_ASYNC': True, 'EMAIL_QUEUE_START_WORKERS': True, **config})
+        return EmailQueue.init_app(app)
+
+    yield start
+    EmailQueue.shutdown()
+    app.config.clear()
+    app.config.update(original_config)
+    app.extensions['email_queue'] = original_pool
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def make_messages(count):
+    return [Message(f'Announcement {i}', recipients=[f'player{i}@example.com'], body=f'Hello {i}')
+            for i in range(count)]
+
+
+def test_batch_reuses_one_smtp_connection(app, init_database, smtp_server):
+    entries = EmailQueue.enqueue(*make_messages(5))
+    # Nothing is sent before the caller commits
+    assert smtp_server.connections == 0
+    init_database.session.commit()
+
+    assert smtp_server.connections == 1
+    assert [r for r, _ in smtp_server.messages] == [[f'player{i}@example.com'] for i in range(5)]
+    assert 'Subject: Announcement 3' in smtp_server.messages[3][1]
+    assert all(e.status == EmailStatus.SENT and e.attempts == 1 for e in entries)
+
+
+def test_failed_delivery_is_retried_with_backoff(app, init_database, smtp_server):
+    smtp_server.reject_next = 1
+    entry = EmailQueue.enqueue(*make_messages(1))[0]
+    init_database.session.commit()
+
+    assert entry.status == EmailStatus.PENDING
+    assert entry.attempts == 1
+    assert '451' in entry.last_error
+    delay = entry.next_attempt_at - datetime.utcnow()
+    assert timedelta(seconds=0) < delay <= timedelta(seconds=app.config['EMAIL_RETRY_BASE_SECONDS'])
+    # Not due yet: nothing is sent
+    assert EmailQueue.deliver_due() == 0
+
+    entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    init_database.session.commit()
+    assert EmailQueue.deliver_due() == 1
+    assert entry.status == EmailStatus.SENT
+    assert entry.attempts == 2
+    assert len(smtp_server.messages) == 1
+
+    # A message that keeps failing is given up after EMAIL_MAX_ATTEMPTS
+    smtp_server.reject_next = 100
+    doomed = EmailQueue.enqueue(*make_messages(1))[0]
+    init_database.session.commit()
+    for _ in range(app.config['EMAIL_MAX_ATTEMPTS'] - 1):
+        doomed.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        init_database.session.commit()
+        EmailQueue.deliver_due()
+    assert doomed.status == EmailStatus.FAILED
+    assert doomed.attempts == app.config['EMAIL_MAX_ATTEMPTS']
+
+
+def test_worker_pool_delivers_overflow_from_the_outbox(app, init_database, smtp_server, worker_pool):
+    pool = worker_pool(EMAIL_QUEUE_WORKERS=0, EMAIL_QUEUE_MAXSIZE=2, EMAIL_BATCH_SIZE=10,
+                       EMAIL_QUEUE_POLL_SECONDS=0.05)
+    started = time.monotonic()
+    EmailQueue.enqueue(*make_messages(12))
+    init_database.session.commit()
+    # Enqueueing never waits on SMTP, even with the queue full
+    assert time.monotonic() - started < 1
+    assert pool.queue.qsize() == 2
+
+    # The in-memory test database has a single connection: start the worker once the burst is written
+    pool.worker_count = 1
+    pool.start()
+
+    assert wait_for(lambda: EmailQueue.metrics()['sent'] == 12)
+    metrics = EmailQueue.metrics()
+    assert metrics['enqueued'] == 12
+    assert metrics['overflowed'] == 10
+    assert metrics['connections'] < 12
+    assert metrics['throughput_per_second'] > 0
+    assert len(smtp_server.messages) == 12
+
+
+def test_outbox_survives_restart(app, init_database, smtp_server, worker_pool):
+    session = init_database.session
+    # Left behind by a previous process: never picked up, and claimed by a worker that died
+    session.add(EmailOutbox.from_message(make_messages(1)[0]))
+    abandoned = EmailOutbox.from_message(Message('Abandoned', recipients=['late@example.com'], body='Hi'))
+    abandoned.status = EmailStatus.SENDING
+    abandoned.attempts = 1
+    abandoned.claimed_at = datetime.utcnow() - timedelta(hours=1)
+    session.add(abandoned)
+    session.commit()
+
+    worker_pool(EMAIL_QUEUE_WORKERS=1)
+    assert wait_for(lambda: EmailQueue.metrics()['sent'] == 2)
+    assert sorted(r[0] for r, _ in smtp_server.messages) == ['late@example.com', 'player0@example.com']
+
+
+def test_rolled_back_emails_are_never_sent(app, init_database, smtp_server):
+    EmailQueue.enqueue(*make_messages(2))
+    init_database.session.rollback()
+    init_database.session.commit()
+
+    assert smtp_server.connections == 0
+    assert EmailOutbox.query.count() == 0
+
+
+def test_workers_only_start_when_enabled(app, init_database, worker_pool):
+    assert worker_pool(EMAIL_QUEUE_WORKERS=1, EMAIL_QUEUE_START_WORKERS=False).workers == []
+    assert len(EmailQueue.start_workers(app).workers) == 1
@@ -0,0 +1,140 @@
+from app.models import Match, MatchScore, Group, GroupStanding, MatchStage, TournamentFormat, TournamentStatus
+from app.services.bracket_cache import BracketCache
+from app.services.bracket_service import BracketService
+
+from tests.test_bracket_service import (
+    create_test_tournament, create_test_category, create_test_player
+)
+
+
+def setup_group(session, n_players=4):
+    tournament = create_test_tournament(session, format=TournamentFormat.GROUP_KNOCKOUT)
+    category = create_test_category(session, tournament)
+    group = Group(category_id=category.id, name="A")
+    session.add(group)
+    session.flush()
+    players = [create_test_player(session, f"inc{i}") for i in range(n_players)]
+    for i, p in enumerate(players):
+        session.add(GroupStanding(group_id=group.id, player_id=p.id, position=i + 1))
+    matches = []
+    for i in range(n_players):
+        for j in range(i + 1, n_players):
+            match = Match(category_id=category.id, group_id=group.id, stage=MatchStage.GROUP,
+                          round=1, match_order=len(matches),
+                          player1_id=players[i].id, player2_id=players[j].id)
+            session.add(match)
+            matches.append(match)
+    session.commit()
+    return group, players, matches
+
+
+def record_result(session, match, sets):
+    """Replace a match's scores and winner, returning its previous standings contribution"""
+    previous = BracketService.get_match_contribution(match)
+    MatchScore.query.filter_by(match_id=match.id).delete()
+    p1_sets = p2_sets = 0
+    for number, (s1, s2) in enumerate(sets, 1):
+        session.add(MatchScore(match_id=match.id, set_number=number, player1_score=s1, player2_score=s2))
+        p1_sets += s1 > s2
+        p2_sets += s2 > s1
+    match.completed = bool(sets)
+    if sets:
+        winner_is_p1 = p1_sets > p2_sets
+        match.winning_player_id = match.player1_id if winner_is_p1 else match.player2_id
+        match.losing_player_id = match.player2_id if winner_is_p1 else match.player1_id
+    else:
+        match.winning_player_id = match.losing_player_id = None
+    session.commit()
+    return previous
+
+
+def standings_table(group_id):
+    return {
+        s.player_id: tuple(getattr(s, f) for f in BracketService.STANDING_COUNTERS) + (s.position,)
+        for s in GroupStanding.query.filter_by(group_id=group_id).all()
+    }
+
+
+def test_incremental_updates_match_full_recompute(init_database):
+    session = init_database.session
+    group, players, matches = setup_group(session)
+    BracketService.update_group_standings(group.id)
+
+    results = [
+        [(11, 5), (11, 7)],
+        [(9, 11), (11, 8), (11, 13)],
+        [(11, 2), (11, 3)],
+        [(4, 11), (6, 11)],
+        [(11, 9), (12, 10)],
+        [(11, 6), (8, 11), (11, 9)],
+    ]
+    for match, sets in zip(matches, results):
+        previous = record_result(session, match, sets)
+        BracketService.apply_match_to_standings(match, previous)
+
+    # Correct one score and un-complete another match
+    previous = record_result(session, matches[0], [(5, 11), (7, 11)])
+    BracketService.apply_match_to_standings(matches[0], previous)
+    previous = record_result(session, matches[3], [])
+    BracketService.apply_match_to_standings(matches[3], previous)
+
+    incremental = standings_table(group.id)
+    BracketService.update_group_standings(group.id)
+    assert standings_table(group.id) == incremental
+
+
+def test_incremental_update_touches_only_changed_match(init_database):
+    session = init_database.session
+    group, players, matches = setup_group(session, n_players=3)
+    BracketService.update_group_standings(group.id)
+
+    previous = record_result(session, matches[0], [(11, 4), (11, 6)])
+    assert previous == {}
+    BracketService.apply_match_to_standings(matches[0], previous)
+
+    table = standings_table(group.id)
+    assert table[players[0].id][:7] == (1, 1, 0, 2, 0, 22, 10)
+    assert table[players[1].id][:7] == (1, 0, 1, 0, 2, 10, 22)
+    assert table[players[2].id][:7] == (0, 0, 0, 0, 0, 0, 0)
+    assert table[players[0].id][7] == 1
+
+
+def test_incremental_update_falls_back_when_standing_missing(init_database):
+    session = init_database.session
+    group, players, matches = setup_group(session, n_players=3)
+    GroupStanding.query.filter_by(group_id=group.id, player_id=players[2].id).delete()
+    session.commit()
+
+    previous = record_result(session, matches[1], [(11, 4), (11, 6)])  # players[0] vs players[2]
+    BracketService.apply_match_to_standings(matches[1], previous)
+
+    table = standings_table(group.id)
+    assert players[2].id in table
+    assert table[players[2].id][:3] == (1, 0, 1)
+
+
+def test_reconcile_group_standings_fixes_drift(init_database):
+    session = init_database.session
+    group, players, matches = setup_group(session, n_players=3)
+    previous = record_result(session, matches[0], [(11, 4), (11, 6)])
+    BracketService.apply_match_to_standings(matches[0], previous)
+    expected = standings_table(group.id)
+
+    drifted = GroupStanding.query.filter_by(group_id=group.id, player_id=players[0].id).first()
+    drifted.matches_won = 5
+    session.commit()
+
+    # Only groups of ongoing tournaments are reconciled
+    assert BracketService.reconcile_group_standings() == 0
+    group.category.tournament.status = TournamentStatus.ONGOING
+    session.commit()
+
+    version = BracketCache.get_version(group.category_id)
+    assert BracketService.reconcile_group_standings(group.category_id) == 1
+    assert standings_table(group.id) == expected
+    assert BracketCache.get_version(group.category_id) != version
+
+    # Reconciling a group that has not drifted leaves cached brackets valid
+    version = BracketCache.get_version(group.category_id)
+    assert BracketService.reconcile_group_standings() == 1
+    assert BracketCache.get_version(group.category_id) == version
@@ -0,0 +1,169 @@
+import io
+import os
+import threading
+from unittest.mock import patch
+import pytest
+from flask import url_for
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from app.helpers.registration import save_picture, save_payment_proof
+from app.services.image_pipeline import ImagePipeline, ImageWorkerPool
+
+
+@pytest.fixture
+def upload_folder(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+def make_upload(size=(1200, 600), color='red', image_format='PNG', filename='logo.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=image_format)
+    buffer.seek(0)
+    return FileStorage(stream=buffer, filename=filename)
+
+
+def open_variant(upload_folder, path, variant, ext='jpg'):
+    return Image.open(upload_folder / ImagePipeline.variant_path(path, variant, ext).split('/', 1)[1])
+
+
+def test_upload_is_stored_resized_and_processed_into_variants(app, upload_folder):
+    with patch('PIL.Image._getdecoder', wraps=Image._getdecoder) as decode:
+        path = save_picture(make_upload(), 'sponsor_logos')
+
+    folder, filename = path.split('/')[1:]
+    # The stored path is the resized full variant, never the raw upload
+    assert folder == 'sponsor_logos' and filename.endswith('.full.jpg') and len(filename) == 64 + 9
+    assert Image.open(upload_folder / 'sponsor_logos' / filename).size == (800, 400)
+    # The original bytes are kept beside it
+    assert Image.open(upload_folder / 'sponsor_logos' / (filename[:64] + '.png')).size == (1200, 600)
+    # The pixels are decoded once, by the worker
+    assert decode.call_count == 1
+
+    assert open_variant(upload_folder, path, 'card').size == (480, 240)
+    assert open_variant(upload_folder, path, 'thumb').size == (160, 80)
+    assert open_variant(upload_folder, path, 'full', 'webp').size == (800, 400)
+    assert open_variant(upload_folder, path, 'card', 'webp').format == 'WEBP'
+
+    with app.test_request_context():
+        assert ImagePipeline.variant_url_path(path, 'thumb') == path[:-len('.full.jpg')] + '.thumb.jpg'
+
+
+def test_same_upload_is_stored_and_processed_once(app, upload_folder):
+    with patch.object(ImageWorkerPool, '_write', autospec=True, side_effect=ImageWorkerPool._write) as write:
+        first = save_picture(make_upload(filename='logo.png'), 'sponsor_logos')
+        second = save_picture(make_upload(filename='same-logo-renamed.png'), 'sponsor_logos')
+        other = save_picture(make_upload(color='blue'), 'sponsor_logos')
+
+    assert first == second != other
+    assert len([name for name in os.listdir(upload_folder / 'sponsor_logos') if name.endswith('.png')]) == 2
+    # Three variants in two formats, for each distinct image
+    assert write.call_count == 2 * 6
+
+
+def test_profile_pictures_are_cropped_square(app, upload_folder):
+    path = save_picture(make_upload(size=(900, 300)), 'profile_pics')
+    assert Image.open(upload_folder / path.split('/', 1)[1]).size == (300, 300)
+    assert open_variant(upload_folder, path, 'thumb').size == (160, 160)
+
+
+def test_invalid_upload_is_rejected(app, upload_folder):
+    upload = FileStorage(stream=io.BytesIO(b'not an image'), filename='logo.png')
+    with pytest.raises(ValueError, match='not a valid image'):
+        save_picture(upload, 'sponsor_logos')
+    assert not os.path.exists(upload_folder / 'sponsor_logos')
+
+
+def test_variants_are_written_off_the_request(app, client, upload_folder, monkeypatch):
+    monkeypatch.setitem(app.config, 'IMAGE_PROCESSING_ASYNC', True)
+    previous = app.extensions['image_pipeline']
+    pool = ImagePipeline.init_app(app)
+    release = threading.Event()
+    real_process = ImageWorkerPool.process
+
+    def slow_process(self, path, subfolder):
+        release.wait(5)
+        return real_process(self, path, subfolder)
+
+    try:
+        with patch.object(ImageWorkerPool, 'process', slow_process), \
+                patch('PIL.Image._getdecoder', wraps=Image._getdecoder) as decode:
+            path = save_picture(make_upload(), 'tournament_logos')
+            # Nothing is decoded or resized on the request
+            assert decode.call_count == 0
+            assert not os.path.exists(upload_folder / 'tournament_logos' / path.split('/')[-1])
+            original = path[:-len('.full.jpg')] + '.png'
+            # Until the variants exist pages link the raw upload, and the variant's URL answers with it uncached
+            with app.test_request_context():
+                assert ImagePipeline.variant_url_path(path) == original
+                assert ImagePipeline.variant_url_path(path, 'card') == original
+            response = client.get('/static/' + path)
+            assert response.status_code == 200 and response.mimetype == 'image/png'
+            assert not response.cache_control.immutable
+            # A second upload of the same file while it is being processed is not queued again
+            assert pool.submit(original, 'tournament_logos') is pool._pending[original]
+
+            release.set()
+            assert ImagePipeline.join(timeout=5)
+
+        with app.test_request_context():
+            assert ImagePipeline.variant_url_path(path) == path
+            assert ImagePipeline.variant_url_path(path, 'card').endswith('.card.jpg')
+        assert client.get('/static/' + path).cache_control.immutable
+    finally:
+        pool.stop()
+        app.extensions['image_pipeline'] = previous
+
+
+def test_content_addressed_uploads_are_served_immutable(app, client, upload_folder):
+    path = save_picture(make_upload(), 'sponsor_logos')
+    thumb = ImagePipeline.variant_path(path, 'thumb')
+    with app.test_request_context():
+        url = url_for('static', filename=thumb)
+    assert url.endswith('/static/' + thumb)
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert response.cache_control.immutable and response.cache_control.public
+    assert response.cache_control.max_age == app.config['UPLOAD_CACHE_MAX_AGE']
+    etag, weak = response.get_etag()
+    assert etag == thumb.split('/')[-1] and not weak
+
+    assert client.get(url, headers={'If-None-Match': f'"{etag}"'}).status_code == 304
+
+
+def test_payment_proofs_are_only_cached_privately(client, upload_folder):
+    path = save_payment_proof(make_upload(), 42)
+    assert path.startswith('uploads/payment_proofs/')
+
+    response = client.get('/static/' + path)
+    assert response.status_code == 200
+    assert response.cache_control.private and not response.cache_control.public
+    assert response.cache_control.immutable
+
+
+def test_legacy_uploads_are_revalidated(client, upload_folder):
+    (upload_folder / 'venue_images').mkdir()
+    (upload_folder / 'venue_images' / '_1700000000_court.jpg').write_bytes(b'jpeg bytes')
+
+    response = client.get('/static/uploads/venue_images/_1700000000_court.jpg')
+    assert response.status_code == 200
+    assert not response.cache_control.immutable
+    assert response.cache_control.max_age is None
+
+
+def test_uploads_can_be_handed_to_nginx(app, client, upload_folder, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_ACCEL_REDIRECT_PREFIX', '/protected-uploads/')
+    path = save_picture(make_upload(), 'tournament_logos')
+    filename = path.split('/', 1)[1]
+
+    response = client.get('/static/' + path)
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == '/protected-uploads/' + filename
+    assert response.data == b''
+    assert response.mimetype == 'image/jpeg'
+    assert response.cache_control.immutable
+
+    assert client.get('/static/uploads/tournament_logos/missing.png').status_code == 404
+    assert client.get('/static/uploads/../config.py').status_code == 404
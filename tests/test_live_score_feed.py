@@ -0,0 +1,114 @@
+from flask_socketio import SocketIOTestClient
+from app import socketio
+from app.models import PlayerProfile, Match, MatchScore, Tournament
+from app.services.live_score_feed import LiveScoreFeed
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+
+
+def setup_matches(session, count=3):
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament)
+    players = [PlayerProfile(full_name=f'Feed Player {i}') for i in range(count * 2)]
+    session.add_all(players)
+    session.flush()
+    matches = [Match(category_id=category.id, round=1, match_order=i,
+                     player1_id=players[2 * i].id, player2_id=players[2 * i + 1].id)
+               for i in range(count)]
+    session.add_all(matches)
+    session.commit()
+    return tournament, matches
+
+
+def record_set(session, match, set_number, player1_score, player2_score, completed=False):
+    session.add(MatchScore(match_id=match.id, set_number=set_number,
+                           player1_score=player1_score, player2_score=player2_score))
+    match.completed = completed
+    LiveScoreFeed.touch(match)
+    session.commit()
+
+
+def test_delta_returns_only_matches_changed_since_version(init_database):
+    session = init_database.session
+    tournament, matches = setup_matches(session)
+
+    snapshot = LiveScoreFeed.delta(tournament.id, 0)
+    assert snapshot['full'] is True
+    assert snapshot['version'] == 0
+    assert [m['match_id'] for m in snapshot['matches']] == [m.id for m in matches]
+
+    record_set(session, matches[1], 1, 11, 7)
+    record_set(session, matches[2], 1, 3, 11, completed=True)
+
+    delta = LiveScoreFeed.delta(tournament.id, 1)
+    assert delta['version'] == 2
+    assert [(m['match_id'], m['completed']) for m in delta['matches']] == [(matches[2].id, True)]
+
+    assert LiveScoreFeed.delta(tournament.id, 2)['matches'] == []
+    # Completed matches drop out of a fresh snapshot
+    assert [m['match_id'] for m in LiveScoreFeed.snapshot(tournament.id)['matches']] == [matches[0].id, matches[1].id]
+
+
+def test_api_scores_since_and_legacy_format(client, init_database, query_counter):
+    session = init_database.session
+    tournament, matches = setup_matches(session, count=6)
+    record_set(session, matches[0], 1, 11, 9)
+    tournament_id, match_id = tournament.id, matches[0].id
+
+    legacy = client.get(f'/tournament/api/{tournament_id}/scores').get_json()
+    assert len(legacy) == 6
+
+    with query_counter() as counter:
+        delta = client.get(f'/tournament/api/{tournament_id}/scores?since=0').get_json()
+    # Version, matches with their players, scores in one IN query
+    assert counter.count == 3
+    assert delta['version'] == 1
+    entry = next(m for m in delta['matches'] if m['match_id'] == match_id)
+    assert entry['scores'] == [{'set': 1, 'player1_score': 11, 'player2_score': 9}]
+    assert entry['player1'] == 'Feed Player 0'
+
+    unchanged = client.get(f'/tournament/api/{tournament_id}/scores?since=1').get_json()
+    assert unchanged == {'version': 1, 'full': False, 'matches': []}
+
+
+def test_socket_subscribers_get_snapshot_then_deltas(app, init_database):
+    session = init_database.session
+    tournament, matches = setup_matches(session)
+    tournament_id = tournament.id
+
+    tournament_client = SocketIOTestClient(app, socketio)
+    match_client = SocketIOTestClient(app, socketio)
+    tournament_client.emit('join_tournament', {'tournament_id': tournament_id})
+    match_client.emit('join_match', {'match_id': matches[1].id})
+
+    snapshot = [e for e in tournament_client.get_received() if e['name'] == 'score_snapshot']
+    assert len(snapshot[0]['args'][0]['matches']) == 3
+    match_snapshot = [e for e in match_client.get_received() if e['name'] == 'score_snapshot']
+    assert [m['match_id'] for m in match_snapshot[0]['args'][0]['matches']] == [matches[1].id]
+
+    record_set(session, matches[1], 1, 11, 4)
+    LiveScoreFeed.broadcast(matches[1])
+
+    for client in (tournament_client, match_client):
+        deltas = [e['args'][0] for e in client.get_received() if e['name'] == 'score_delta']
+        assert len(deltas) == 1
+        assert deltas[0]['version'] == Tournament.query.get(tournament_id).score_version
+        assert [m['match_id'] for m in deltas[0]['matches']] == [matches[1].id]
+
+
+def test_socket_join_ignores_malformed_ids(app, init_database):
+    session = init_database.session
+    tournament, matches = setup_matches(session)
+
+    client = SocketIOTestClient(app, socketio)
+    for event, data in (('join_tournament', {'tournament_id': 'abc'}), ('join_match', {'match_id': '1; drop'}),
+                        ('join_match', {'match_id': [1]}), ('join_courts_view', 'not a dict')):
+        client.emit(event, data)
+    received = client.get_received()
+    assert [e['name'] for e in received] == ['error'] * 4
+    assert received[0]['args'][0] == {'msg': 'Invalid tournament_id'}
+
+    # Ids sent as strings are accepted
+    client.emit('join_match', {'match_id': str(matches[0].id)})
+    snapshot = [e for e in client.get_received() if e['name'] == 'score_snapshot']
+    assert [m['match_id'] for m in snapshot[0]['args'][0]['matches']] == [matches[0].id]
@@ -0,0 +1,52 @@
+from app.models import CategoryType, Group, Match, MatchStage
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+from tests.test_bracket_snapshot import build_knockout
+
+
+def test_match_properties_resolve_the_category_once(init_database, query_counter):
+    session = init_database.session
+    category = create_test_category(session, create_test_tournament(session))
+    build_knockout(session, category, 8)
+    group = Group(category_id=category.id, name='A')
+    session.add(group)
+    session.flush()
+    session.add(Match(category_id=category.id, group_id=group.id, stage=MatchStage.GROUP, round=2, match_order=0))
+    session.commit()
+
+    session.expire_all()
+    matches = Match.query.all()
+    with query_counter() as counter:
+        first = [(m.is_doubles, m.winner_id, m.round_name) for m in matches]
+    # One load for the category and one for the group, not one per match
+    assert counter.count == 2
+    assert first[-1] == (False, None, 'Group A Round 2')
+
+    session.commit()
+    matches = Match.query.all()
+    with query_counter() as counter:
+        assert [(m.is_doubles, m.winner_id, m.round_name) for m in matches] == first
+    assert counter.count == 0
+
+
+def test_category_type_and_group_edits_are_picked_up(init_database):
+    session = init_database.session
+    category = create_test_category(session, create_test_tournament(session))
+    group = Group(category_id=category.id, name='A')
+    session.add(group)
+    session.flush()
+    match = Match(category_id=category.id, group_id=group.id, stage=MatchStage.GROUP, round=1, match_order=0)
+    session.add(match)
+    session.commit()
+    assert not match.is_doubles
+    assert match.round_name == 'Group A Round 1'
+
+    category.category_type = CategoryType.MIXED_DOUBLES
+    group.name = 'B'
+    session.commit()
+    assert match.category_type == CategoryType.MIXED_DOUBLES
+    assert match.is_doubles
+    assert match.round_name == 'Group B Round 1'
+
+    # Matches without a category are singles
+    assert not Match(round=1).is_doubles
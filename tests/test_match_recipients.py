@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from flask import render_template
+from app.models import User, PlayerProfile, Team, Match, CategoryType
+from app.services.match_recipients import MatchRecipients
+from app.tasks.email_tasks import send_match_reminder_emails
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+
+
+def create_profiles(session, prefix, count, with_account=True):
+    profiles = []
+    for i in range(count):
+        user = None
+        if with_account:
+            user = User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password_hash='x')
+        profiles.append(PlayerProfile(user=user, full_name=f'{prefix.capitalize()} {i}'))
+    session.add_all(profiles)
+    session.flush()
+    return profiles
+
+
+def setup_window(session, matches_per_category):
+    """Singles and doubles matches starting in about an hour, every player with an account"""
+    tournament = create_test_tournament(session)
+    singles = create_test_category(session, tournament)
+    doubles = create_test_category(session, tournament, name="Mixed Doubles", category_type=CategoryType.MIXED_DOUBLES)
+    singles_players = create_profiles(session, f'single{tournament.id}x', matches_per_category * 2)
+    doubles_players = create_profiles(session, f'double{tournament.id}x', matches_per_category * 4)
+    teams = [Team(category_id=doubles.id, player1_id=doubles_players[i].id, player2_id=doubles_players[i + 1].id)
+             for i in range(0, len(doubles_players), 2)]
+    session.add_all(teams)
+    session.flush()
+
+    start = datetime.now() + timedelta(hours=1, minutes=30)
+    matches = []
+    for i in range(matches_per_category):
+        matches.append(Match(category_id=singles.id, round=1, court='Court 1', scheduled_time=start,
+                             player1_id=singles_players[2 * i].id, player2_id=singles_players[2 * i + 1].id))
+        matches.append(Match(category_id=doubles.id, round=1, court='Court 2', scheduled_time=start,
+                             team1_id=teams[2 * i].id, team2_id=teams[2 * i + 1].id))
+    session.add_all(matches)
+    session.commit()
+    return matches
+
+
+def test_resolves_singles_and_doubles_recipients_in_one_query(app, init_database, query_counter):
+    session = init_database.session
+    singles, doubles = setup_window(session, 1)
+    guest = create_profiles(session, 'guest', 1, with_account=False)[0]
+    pending = Match(category_id=singles.category_id, round=2, player1_id=singles.player1_id, player2_id=guest.id)
+    session.add(pending)
+    session.commit()
+    ids = [singles.id, doubles.id, pending.id, 999]
+
+    with query_counter() as counter:
+        recipients = MatchRecipients.for_matches(ids)
+    assert counter.count == 1
+
+    assert recipients[singles.id] == [singles.player1.user, singles.player2.user]
+    assert recipients[doubles.id] == [doubles.team1.player1.user, doubles.team1.player2.user,
+                                      doubles.team2.player1.user, doubles.team2.player2.user]
+    # Profiles without an account are skipped
+    assert recipients[pending.id] == [singles.player1.user]
+    assert recipients[999] == []
+
+
+def test_reminder_window_is_one_batch(app, init_database, query_counter):
+    session = init_database.session
+    counts = []
+    for size in (1, 4):
+        matches = setup_window(session, size)
+        ids = [m.id for m in matches]
+        session.expire_all()
+        with patch('app.tasks.email_tasks.EmailQueue') as queue, \
+                patch('app.helpers.email_utils.render_template', wraps=render_template) as render:
+            with query_counter() as counter:
+                messages = send_match_reminder_emails(ids)
+        counts.append(counter.count)
+
+        # One txt and one html render per match, whatever the number of recipients
+        assert render.call_count == 2 * len(matches)
+        assert queue.enqueue.call_count == 1
+        assert len(messages) == 6 * size
+        for match in matches:
+            players = [match.player1, match.player2] if match.player1_id else \
+                [match.team1.player1, match.team1.player2, match.team2.player1, match.team2.player2]
+            for player in players:
+                msg = next(m for m in messages if m.recipients == [player.user.email])
+                assert f'Hello {player.user.username},' in msg.body
+                assert f'Hello {player.user.username},' in msg.html
+                assert match.court in msg.html
+    # Matches, then recipients: no per-match or per-recipient queries
+    assert counts[0] == counts[1] == 2
@@ -163,8 +163,8 @@ def notification_test_data(app):
         # Clean up
         db.session.remove()
 
-@patch('app.tasks.email_tasks.mail')
-def test_match_reminder_email(mock_mail, notification_test_data, app):
+@patch('app.tasks.email_tasks.EmailQueue')
+def test_match_reminder_email(mock_queue, notification_test_data, app):
     """Test match reminder email task"""
     with app.app_context():
         match = notification_test_data['match']
@@ -174,11 +174,11 @@ def test_match_reminder_email(mock_mail, notification_test_data, app):
         # Call the reminder task
         send_match_reminder_email(match.id)
         
-        # Verify emails were sent
-        assert mock_mail.send.call_count == 2  # One email for each player
+        # Get the Message objects queued for delivery
+        sent_messages = [msg for call in mock_queue.enqueue.call_args_list for msg in call.args]
         
-        # Get the Message objects passed to mail.send
-        sent_messages = [call.args[0] for call in mock_mail.send.call_args_list]
+        # Verify emails were queued
+        assert len(sent_messages) == 2  # One email for each player
         
         # Check recipient emails
         recipient_emails = [msg.recipients[0] for msg in sent_messages]
@@ -195,8 +195,8 @@ def test_match_reminder_email(mock_mail, notification_test_data, app):
             assert match.scheduled_time.strftime("%d %B %Y") in msg.html
             
 
-@patch('app.tasks.email_tasks.mail')
-def test_schedule_change_email(mock_mail, notification_test_data, app):
+@patch('app.tasks.email_tasks.EmailQueue')
+def test_schedule_change_email(mock_queue, notification_test_data, app):
     """Test match schedule change email task"""
     with app.app_context():
         match = notification_test_data['match']
@@ -217,11 +217,11 @@ def test_schedule_change_email(mock_mail, notification_test_data, app):
             {'court': new_court, 'scheduled_time': new_time}
         )
         
-        # Verify emails were sent
-        assert mock_mail.send.call_count == 2  # One email for each player
+        # Get the Message objects queued for delivery
+        sent_messages = [msg for call in mock_queue.enqueue.call_args_list for msg in call.args]
         
-        # Get the Message objects passed to mail.send
-        sent_messages = [call.args[0] for call in mock_mail.send.call_args_list]
+        # Verify emails were queued
+        assert len(sent_messages) == 2  # One email for each player
         
         # Check recipient emails
         recipient_emails = [msg.recipients[0] for msg in sent_messages]
@@ -237,8 +237,8 @@ def test_schedule_change_email(mock_mail, notification_test_data, app):
             assert str(new_court) in msg.html  # New court
             assert new_time.strftime("%I:%M") in msg.html  # New time
 
-@patch('app.tasks.email_tasks.mail')
-def test_automatic_reminder_scheduling(mock_mail, notification_test_data, app):
+@patch('app.tasks.email_tasks.EmailQueue')
+def test_automatic_reminder_scheduling(mock_queue, notification_test_data, app):
     """Test automatic scheduling of match reminders"""
     with app.app_context():
         match = notification_test_data['match']
@@ -275,8 +275,8 @@ def test_automatic_reminder_scheduling(mock_mail, notification_test_data, app):
             else:
                 delattr(current_app, 'scheduler')
 
-@patch('app.tasks.email_tasks.mail')
-def test_schedule_change_triggers_notification(mock_mail, notification_test_data, app):
+@patch('app.tasks.email_tasks.EmailQueue')
+def test_schedule_change_triggers_notification(mock_queue, notification_test_data, app):
     """Test that changing a match schedule triggers notification"""
     with app.app_context():
         match_id = notification_test_data['match'].id
@@ -0,0 +1,76 @@
+from app.models import CategoryType, Match, MatchStage, Team, TournamentStatus
+from app.services.bracket_cache import BracketCache
+from app.services.placing_service import PlacingService
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+from tests.test_bracket_snapshot import build_knockout
+
+
+def add_playoff(session, category):
+    """A completed third-place playoff between the semifinal losers"""
+    semifinals = Match.query.filter_by(category_id=category.id, stage=MatchStage.KNOCKOUT, round=2).all()
+    first, second = (match.losing_player_id for match in semifinals)
+    session.add(Match(category_id=category.id, stage=MatchStage.PLAYOFF, round=1.5, match_order=0, completed=True,
+                      player1_id=first, player2_id=second, winning_player_id=second, losing_player_id=first))
+    session.commit()
+    return second, first
+
+
+def test_places_of_a_deep_draw_with_a_playoff(init_database):
+    session = init_database.session
+    category = create_test_category(session, create_test_tournament(session))
+    category.points_awarded = 1000
+    category.points_distribution = {'1': 100, '2': 70, '3': 50, '4': 40, '5-8': 25, '9-16': 10}
+    build_knockout(session, category, 16)
+    third, fourth = add_playoff(session, category)
+
+    placings = PlacingService.get_placings(category.id)
+
+    assert [p['place'] for p in placings] == [1, 2, 3, 4] + [5] * 4 + [9] * 8
+    assert [p['points'] for p in placings[:5]] == [1000, 700, 500, 400, 250]
+    assert placings[-1]['points'] == 100
+    assert (placings[2]['participant'].id, placings[3]['participant'].id) == (third, fourth)
+    assert len({p['participant'].id for p in placings}) == 16
+    assert not any(p['is_team'] for p in placings)
+
+
+def test_placings_are_cached_until_the_category_changes(init_database, query_counter):
+    session = init_database.session
+    category = create_test_category(session, create_test_tournament(session), "Men's Doubles",
+                                    CategoryType.MENS_DOUBLES)
+    build_knockout(session, category, 4, doubles=True)
+
+    placings = PlacingService.get_placings(category.id)
+    assert [p['place'] for p in placings] == [1, 2, 3, 3]
+    assert all(isinstance(p['participant'], Team) for p in placings)
+
+    # A cache hit loads the category and the placed teams with their players, not the matches
+    session.expire_all()
+    with query_counter() as counter:
+        placings = PlacingService.get_placings(category.id)
+        names = [p['participant'].player1.full_name for p in placings]
+    assert counter.count == 2
+    assert len(set(names)) == 4
+
+    final = Match.query.filter_by(category_id=category.id, round=1).one()
+    final.completed = False
+    session.commit()
+    # Changes are only picked up once the category is invalidated, as for the cached bracket
+    assert len(PlacingService.get_placings(category.id)) == 4
+    BracketCache.invalidate(category.id)
+    assert PlacingService.get_placings(category.id) == []
+
+
+def test_winners_by_category_reuse_the_placings(init_database):
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament)
+    build_knockout(session, category, 8)
+    final = Match.query.filter_by(category_id=category.id, round=1).one()
+
+    assert tournament.winners_by_category == {}
+    tournament.status = TournamentStatus.COMPLETED
+    session.commit()
+
+    winners = tournament.winners_by_category[category.category_type.value]
+    assert winners == {1: final.winner, 2: final.loser}
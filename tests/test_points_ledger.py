@@ -0,0 +1,131 @@
+from datetime import datetime
+from app import db
+from app.models import (CategoryType, Match, MatchStage, PlayerProfile, PointsLedgerEntry, Tournament,
+                        TournamentCategory, TournamentTier)
+from app.services.bracket_cache import BracketCache
+from app.services.placing_service import PlacingService
+from app.services.points_ledger import PointsLedger
+from app.services.ranking_service import RankingService
+
+from tests.test_rankings import create_profiles, ranking
+
+DISTRIBUTION = {'1': 70, '2': 35}
+
+
+def create_final(session, tier, end_date, winner_id, loser_id, points_awarded):
+    """A completed men's singles category of a one-match tournament"""
+    category = TournamentCategory(
+        tournament=Tournament(name=f'{tier.value} event', tier=tier, start_date=end_date, end_date=end_date),
+        name="Men's Singles", category_type=CategoryType.MENS_SINGLES,
+        points_awarded=points_awarded, points_distribution=DISTRIBUTION
+    )
+    session.add(category)
+    session.flush()
+    session.add(Match(category_id=category.id, round=1, match_order=1, stage=MatchStage.KNOCKOUT, completed=True,
+                      player1_id=winner_id, player2_id=loser_id,
+                      winning_player_id=winner_id, losing_player_id=loser_id))
+    session.commit()
+    return category
+
+
+def mens_singles_points(player_ids):
+    db.session.expire_all()
+    return [db.session.get(PlayerProfile, player_id).mens_singles_points for player_id in player_ids]
+
+
+def test_awarding_writes_the_ledger_and_posts_totals(app, init_database):
+    session = init_database.session
+    a, b, c = create_profiles(session, 3)
+    last_season = datetime(2025, 6, 1)
+    this_season = datetime(2026, 6, 1)
+    old = create_final(session, TournamentTier.OPEN, last_season, a, b, 1400)
+    new = create_final(session, TournamentTier.CUP, this_season, b, c, 3200)
+
+    PlacingService.award_points(old.id)
+    PlacingService.award_points(new.id)
+
+    entries = {(entry.category_id, entry.player_id): (entry.place, entry.share, entry.base_points, entry.points)
+               for entry in PointsLedgerEntry.query}
+    # int(1400 * 0.7) is 979: the ledger keeps the points exactly as PlacingService computes them
+    assert entries == {
+        (old.id, a): (1, 70, 1400, 979), (old.id, b): (2, 35, 1400, 489),
+        (new.id, b): (1, 70, 3200, 2240), (new.id, c): (2, 35, 3200, 1120),
+    }
+    assert mens_singles_points([a, b, c]) == [979, 2729, 1120]
+    assert PointsLedger.totals(CategoryType.MENS_SINGLES) == {a: 979, b: 2729, c: 1120}
+
+
+def test_seasons_and_tier_what_ifs_are_scored_from_the_ledger(app, init_database, query_counter):
+    session = init_database.session
+    a, b, c = create_profiles(session, 3)
+    old = create_final(session, TournamentTier.OPEN, datetime(2025, 6, 1), a, b, 1400)
+    new = create_final(session, TournamentTier.CUP, datetime(2026, 6, 1), b, c, 3200)
+    PlacingService.award_points(old.id)
+    PlacingService.award_points(new.id)
+
+    season = datetime(2026, 1, 1), datetime(2027, 1, 1)
+    with query_counter() as counter:
+        assert PointsLedger.totals(CategoryType.MENS_SINGLES, *season) == {b: 2240, c: 1120}
+        # Unchanged base points reproduce the awarded points; a bigger OPEN base lifts only its rows
+        assert PointsLedger.totals(CategoryType.MENS_SINGLES, tier_points={'OPEN': 1400}) == {
+            a: 979, b: 2729, c: 1120}
+        assert PointsLedger.totals(CategoryType.MENS_SINGLES, tier_points={TournamentTier.OPEN: 2000}) == {
+            a: 1400, b: 2940, c: 1120}
+    assert counter.count == 3
+    assert mens_singles_points([a, b, c]) == [979, 2729, 1120]  # what-ifs write nothing
+
+    PointsLedger.rescore(CategoryType.MENS_SINGLES, *season)
+    assert mens_singles_points([a, b, c]) == [0, 2240, 1120]
+    assert ranking() == {b: (2240, 1), c: (1120, 2)}
+
+    PointsLedger.rescore(tier_points={'OPEN': 2000})
+    assert mens_singles_points([a, b, c]) == [1400, 2940, 1120]
+    assert ranking() == {b: (2940, 1), a: (1400, 2), c: (1120, 3)}
+    assert {entry.player_id: entry.base_points for entry in PointsLedgerEntry.query.filter_by(category_id=old.id)} == {
+        a: 2000, b: 2000}
+
+
+def test_rescore_command_shows_what_if_changes(app, init_database, runner):
+    session = init_database.session
+    a, b = create_profiles(session, 2)
+    category = create_final(session, TournamentTier.OPEN, datetime(2026, 6, 1), a, b, 1400)
+    PlacingService.award_points(category.id)
+
+    result = runner.invoke(args=['rescore-points', 'mens_singles', '--tier', 'OPEN=2000', '--what-if'])
+    assert result.exit_code == 0, result.output
+    assert f'player {a}: 979 -> 1400' in result.output
+    assert mens_singles_points([a]) == [979]
+
+    result = runner.invoke(args=['rescore-points', '--tier', 'GOLD=1'])
+    assert result.exit_code != 0
+    assert RankingService.entry(CategoryType.MENS_SINGLES, a).points == 979
+
+
+def test_reposting_a_corrected_final_moves_the_points(app, init_database):
+    session = init_database.session
+    a, b, c = create_profiles(session, 3)
+    other = create_final(session, TournamentTier.OPEN, datetime(2026, 3, 1), b, c, 1400)
+    category = create_final(session, TournamentTier.OPEN, datetime(2026, 6, 1), a, b, 1400)
+    PlacingService.award_points(other.id)
+    PlacingService.award_points(category.id)
+    assert mens_singles_points([a, b, c]) == [979, 979 + 489, 489]
+
+    # The final's result is corrected after the points were posted
+    final = Match.query.filter_by(category_id=category.id).one()
+    final.winning_player_id, final.losing_player_id = b, a
+    session.commit()
+    BracketCache.invalidate(category.id)
+    assert len(PlacingService.repost_points(category.id)) == 2
+
+    assert mens_singles_points([a, b, c]) == [489, 979 + 979, 489]
+    assert {(e.player_id, e.place) for e in PointsLedgerEntry.query.filter_by(category_id=category.id)} == {
+        (b, 1), (a, 2)}
+    assert ranking() == {b: (1958, 1), a: (489, 2), c: (489, 2)}
+
+    # Reopened: the points stay off until the category is complete again
+    final.completed = False
+    session.commit()
+    BracketCache.invalidate(category.id)
+    assert PlacingService.repost_points(category.id) == []
+    assert mens_singles_points([a, b, c]) == [0, 979, 489]
+    assert db.session.get(TournamentCategory, category.id).points_awarded_at is None
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import CategoryType, PointsLedgerEntry, Tournament, TournamentCategory, TournamentTier
+from app.services.placing_service import PlacingService
+from app.services.ranking_engine import RankingEngine
+from app.services.ranking_service import RankingService
+
+from tests.test_points_ledger import create_final
+from tests.test_rankings import create_profiles, ranking
+
+AS_OF = datetime(2026, 6, 1)
+
+
+@pytest.fixture
+def windowed(app):
+    app.config.update(RANKING_WINDOW_WEEKS=52, RANKING_DECAY_HALF_LIFE_WEEKS=0)
+    yield
+    app.config.update(RANKING_WINDOW_WEEKS=0, RANKING_DECAY_HALF_LIFE_WEEKS=0)
+
+
+def add_results(session, weeks_ago, results, category_type=CategoryType.MENS_SINGLES):
+    """A tournament that ended weeks_ago before AS_OF, with ledger rows {player_id: points}"""
+    end = AS_OF - timedelta(weeks=weeks_ago)
+    category = TournamentCategory(tournament=Tournament(name=f'{weeks_ago} weeks ago', start_date=end, end_date=end),
+                                  name=category_type.value, category_type=category_type)
+    session.add(category)
+    session.flush()
+    session.add_all([
+        PointsLedgerEntry(player_id=player_id, tournament_id=category.tournament_id, category_id=category.id,
+                          category_type=category_type, place=1, share=100, base_points=points, points=points)
+        for player_id, points in results.items()
+    ])
+    session.commit()
+
+
+def test_results_age_out_of_the_window(app, init_database):
+    session = init_database.session
+    a, b, c, d = create_profiles(session, 4)
+    add_results(session, 60, {a: 1000})
+    add_results(session, 40, {a: 300, b: 500, c: 500})
+    add_results(session, 1, {c: 100, d: 200}, CategoryType.MIXED_DOUBLES)
+
+    ranked = RankingEngine.run(as_of=AS_OF, window_weeks=52)
+    assert ranked[CategoryType.MENS_SINGLES] == 3
+    assert ranked[CategoryType.WOMENS_SINGLES] == 0
+    assert ranking() == {b: (500, 1), c: (500, 1), a: (300, 3)}
+    assert ranking(CategoryType.MIXED_DOUBLES) == {d: (200, 1), c: (100, 2)}
+
+    # Without a window the 60-week-old result still counts
+    RankingEngine.run(CategoryType.MENS_SINGLES, as_of=AS_OF, window_weeks=0)
+    assert ranking() == {a: (1300, 1), b: (500, 2), c: (500, 2)}
+    version = RankingService.latest_version(CategoryType.MENS_SINGLES)
+    assert {entry.player_id: entry.movement(version) for entry in RankingService.page(CategoryType.MENS_SINGLES)[0]} == {
+        a: 2, b: -1, c: -1}
+
+    # Thirteen weeks on only the 40-week-old tournament has expired
+    RankingEngine.run(as_of=AS_OF + timedelta(weeks=13), window_weeks=52)
+    assert ranking() == {}
+    assert ranking(CategoryType.MIXED_DOUBLES) == {d: (200, 1), c: (100, 2)}
+
+
+def test_decay_halves_points_every_half_life(app, init_database):
+    session = init_database.session
+    a, b = create_profiles(session, 2)
+    add_results(session, 0, {a: 400})
+    add_results(session, 10, {b: 1000})
+
+    RankingEngine.run(CategoryType.MENS_SINGLES, as_of=AS_OF, window_weeks=0, half_life_weeks=5)
+    assert ranking() == {a: (400, 1), b: (250, 2)}
+
+
+def test_windowed_rankings_follow_awards_and_rebuilds(app, init_database, windowed):
+    session = init_database.session
+    a, b, c = create_profiles(session, 3)
+    now = datetime.utcnow()
+    old = create_final(session, TournamentTier.OPEN, now - timedelta(weeks=70), a, b, 1000)
+    new = create_final(session, TournamentTier.OPEN, now - timedelta(days=1), b, c, 1000)
+    PlacingService.award_points(old.id)
+    PlacingService.award_points(new.id)
+
+    # Running totals keep the expired result; the ranking counts the last 52 weeks only
+    assert ranking() == {b: (700, 1), c: (350, 2)}
+    assert RankingEngine.totals(CategoryType.MENS_SINGLES, [a, b]) == {a: 0, b: 700}
+
+    db.session.execute(db.delete(PointsLedgerEntry).where(PointsLedgerEntry.player_id == c))
+    session.commit()
+    RankingService.rebuild(CategoryType.MENS_SINGLES)
+    assert ranking() == {b: (700, 1)}
@@ -0,0 +1,178 @@
+import random
+from datetime import date, timedelta
+from app import db
+from app.models import (CategoryType, Match, MatchStage, PlayerProfile, PlayerRanking, Team, Tournament,
+                        TournamentCategory, User)
+from app.services.placing_service import PlacingService
+from app.services.ranking_service import RankingService
+
+from tests.test_permissions import logout_user
+
+
+def create_profiles(session, count):
+    profiles = [
+        PlayerProfile(user=User(username=f'r{i}', email=f'r{i}@example.com', password_hash='x'),
+                      full_name=f'Ranked {i}')
+        for i in range(count)
+    ]
+    session.add_all(profiles)
+    session.commit()
+    return [profile.id for profile in profiles]
+
+
+def ranking(category_type=CategoryType.MENS_SINGLES):
+    """{player_id: (points, rank)} as stored"""
+    return {row.player_id: (row.points, row.rank) for row in db.session.execute(
+        db.select(PlayerRanking).where(PlayerRanking.category_type == category_type)
+        .execution_options(populate_existing=True)
+    ).scalars()}
+
+
+def expected_ranking(totals):
+    """Competition ranks (1, 2, 2, 4) of the players with points"""
+    return {player_id: (points, 1 + sum(other > points for other in totals.values()))
+            for player_id, points in totals.items() if points > 0}
+
+
+def test_incremental_updates_match_a_full_rebuild(app, init_database):
+    session = init_database.session
+    player_ids = create_profiles(session, 12)
+    rng = random.Random(7)
+    totals = dict.fromkeys(player_ids, 0)
+
+    for _ in range(15):
+        changes = {player_id: max(0, totals[player_id] + rng.choice([-40, -10, 0, 10, 10, 40, 100]))
+                   for player_id in rng.sample(player_ids, 4)}
+        totals.update(changes)
+        RankingService.apply_points(CategoryType.MENS_SINGLES, changes)
+        session.commit()
+        assert ranking() == expected_ranking(totals)
+
+    PlayerProfile.query.update({PlayerProfile.mens_singles_points: 0})
+    for player_id, points in totals.items():
+        db.session.get(PlayerProfile, player_id).mens_singles_points = points
+    session.commit()
+    RankingService.rebuild(CategoryType.MENS_SINGLES)
+    assert ranking() == expected_ranking(totals)
+
+
+def test_movement_reflects_the_latest_event(app, init_database):
+    session = init_database.session
+    a, b, c, d = create_profiles(session, 4)
+    RankingService.apply_points(CategoryType.MENS_SINGLES, {a: 300, b: 200, c: 100})
+    session.commit()
+
+    # d enters level with b; c passes both of them
+    RankingService.apply_points(CategoryType.MENS_SINGLES, {c: 250, d: 200})
+    session.commit()
+    assert ranking() == {a: (300, 1), c: (250, 2), b: (200, 3), d: (200, 3)}
+
+    version = RankingService.latest_version(CategoryType.MENS_SINGLES)
+    movement = {entry.player_id: entry.movement(version)
+                for entry in RankingService.page(CategoryType.MENS_SINGLES)[0]}
+    assert movement == {a: 0, c: 1, b: -1, d: None}
+
+    # A player losing every point leaves the ranking and the rest close up
+    RankingService.apply_points(CategoryType.MENS_SINGLES, {c: 0})
+    session.commit()
+    assert ranking() == {a: (300, 1), b: (200, 2), d: (200, 2)}
+
+
+def test_pages_follow_rank_then_player(app, init_database):
+    session = init_database.session
+    player_ids = create_profiles(session, 7)
+    RankingService.apply_points(CategoryType.WOMENS_SINGLES,
+                                {player_id: 100 - 10 * (i // 2) for i, player_id in enumerate(player_ids)})
+    session.commit()
+
+    seen, after = [], None
+    while True:
+        rows, after = RankingService.page(CategoryType.WOMENS_SINGLES, after, per_page=3)
+        seen.extend((row.rank, row.player_id) for row in rows)
+        if after is None:
+            break
+    assert seen == sorted(seen)
+    assert [player_id for _, player_id in seen] == player_ids
+
+    entry = RankingService.entry(CategoryType.WOMENS_SINGLES, player_ids[3])
+    rows, _ = RankingService.page(CategoryType.WOMENS_SINGLES, (entry.rank, entry.player_id),
+                                  per_page=2, include_after=True)
+    assert [row.player_id for row in rows] == player_ids[3:5]
+
+
+def test_completed_categories_award_points_once(app, init_database):
+    session = init_database.session
+    p = create_profiles(session, 6)
+    tournament = Tournament(name='Open', start_date=date.today(), end_date=date.today() + timedelta(days=1))
+    distribution = {'1': 100, '2': 50}
+    singles = TournamentCategory(tournament=tournament, name="Men's Singles", category_type=CategoryType.MENS_SINGLES,
+                                 points_awarded=200, points_distribution=distribution)
+    doubles = TournamentCategory(tournament=tournament, name="Mixed Doubles",
+                                 category_type=CategoryType.MIXED_DOUBLES,
+                                 points_awarded=400, points_distribution=distribution)
+    session.add_all([singles, doubles])
+    session.flush()
+    teams = [Team(player1_id=p[2], player2_id=p[3], category_id=doubles.id),
+             Team(player1_id=p[4], player2_id=p[5], category_id=doubles.id)]
+    session.add_all(teams)
+    session.flush()
+    session.add_all([
+        Match(category_id=singles.id, round=1, match_order=1, stage=MatchStage.KNOCKOUT, completed=True,
+              player1_id=p[0], player2_id=p[1], winning_player_id=p[0], losing_player_id=p[1]),
+        Match(category_id=doubles.id, round=1, match_order=1, stage=MatchStage.KNOCKOUT, completed=True,
+              team1_id=teams[0].id, team2_id=teams[1].id, winning_team_id=teams[1].id,
+              losing_team_id=teams[0].id),
+    ])
+    session.commit()
+
+    assert len(PlacingService.award_points(singles.id)) == 2
+    assert PlacingService.award_points(singles.id) == []
+    assert len(PlacingService.award_points(doubles.id)) == 2
+    assert PlacingService.award_points(doubles.id) == []
+
+    assert ranking(CategoryType.MENS_SINGLES) == {p[0]: (200, 1), p[1]: (100, 2)}
+    assert ranking(CategoryType.MIXED_DOUBLES) == {p[4]: (400, 1), p[5]: (400, 1), p[2]: (200, 3), p[3]: (200, 3)}
+    session.expire_all()
+    assert [db.session.get(PlayerProfile, player_id).mixed_doubles_points for player_id in p[2:]] == [
+        200, 200, 400, 400]
+    assert db.session.get(TournamentCategory, singles.id).points_awarded_at is not None
+
+
+def test_rankings_page_opens_at_a_player(app, client, init_database):
+    session = init_database.session
+    player_ids = create_profiles(session, 60)
+    RankingService.apply_points(CategoryType.MENS_DOUBLES,
+                                {player_id: 1000 - i for i, player_id in enumerate(player_ids)})
+    session.commit()
+    with app.test_request_context():
+        logout_user(client)
+
+    response = client.get('/rankings?category=mens_doubles')
+    assert response.status_code == 200
+    assert b'Ranked 0<' in response.data or b'Ranked 0\n' in response.data
+    assert b'Ranked 55' not in response.data
+    assert b'after=50-' in response.data
+
+    response = client.get(f'/rankings?category=mens_doubles&player={player_ids[55]}')
+    assert response.status_code == 200
+    assert b'Ranked 55' in response.data
+    assert b'Ranked 54' not in response.data
+
+
+def test_rankings_page_builds_an_empty_ranking_from_the_totals(app, client, init_database):
+    session = init_database.session
+    player_ids = create_profiles(session, 3)
+    for points, player_id in zip((300, 500, 100), player_ids):
+        db.session.get(PlayerProfile, player_id).womens_singles_points = points
+    session.commit()
+    with app.test_request_context():
+        logout_user(client)
+
+    # Totals from before the ranking table existed show up on the first read
+    response = client.get('/rankings?category=womens_singles')
+    assert response.status_code == 200
+    assert b'Ranked 1' in response.data
+    assert ranking(CategoryType.WOMENS_SINGLES) == {player_ids[1]: (500, 1), player_ids[0]: (300, 2),
+                                                     player_ids[2]: (100, 3)}
+    # A ranking nobody has points in stays empty
+    assert RankingService.ensure_ranked(CategoryType.MIXED_DOUBLES) is False
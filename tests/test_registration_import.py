@@ -0,0 +1,172 @@
+import io
+from unittest.mock import patch
+import pytest
+from app.models import CategoryType, Registration, User, PlayerProfile, UserRole
+from app.services.email_queue import EmailQueue
+from app.services.registration_import import RegistrationImport
+from app.services.registration_service import RegistrationService
+
+from tests.test_bracket_service import create_test_category
+from tests.test_permissions import create_test_user, create_test_tournament, login_user
+
+HEADER = 'category,player1_name,player1_email,player1_date_of_birth,player1_dupr_rating,player2_name,player2_email\n'
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hashes():
+    # Real hashes take a third of a second each; what is stored does not matter here
+    with patch('app.services.account_provisioning.generate_password_hash', side_effect=lambda p: f'hash:{p}'):
+        yield
+
+
+def sheet(*rows):
+    return io.BytesIO((HEADER + ''.join(f'{row}\n' for row in rows)).encode())
+
+
+def setup_tournament(session, organizer=None):
+    tournament = create_test_tournament(session, name='Open', organizer=organizer)
+    singles = create_test_category(session, tournament, name="Men's Singles", category_type=CategoryType.MENS_SINGLES)
+    doubles = create_test_category(session, tournament, name='Mixed Doubles', category_type=CategoryType.MIXED_DOUBLES)
+    return tournament, singles, doubles
+
+
+def test_import_creates_accounts_registrations_and_queues_emails(app, init_database):
+    session = init_database.session
+    tournament, singles, doubles = setup_tournament(session)
+    existing = User(username='alex', email='alex@example.com', password_hash='x')
+    session.add(PlayerProfile(user=existing, full_name='Alex Tan'))
+    session.commit()
+
+    with app.test_request_context(), patch.object(EmailQueue, 'enqueue') as enqueue:
+        result = RegistrationImport.run(tournament, sheet(
+            "Men's Singles,Alex Tan,Alex@Example.com,1990-01-01,,,",
+            'mixed doubles,Sam Lee,sam@example.com,15/06/1995,3.5,Jo Lim,jo@example.com',
+        ), 'players.csv')
+
+    assert result == {'rows': 2, 'imported': 2, 'errors': []}
+    single, team = Registration.query.order_by(Registration.id).all()
+    assert single.category_id == singles.id and single.player.user_id == existing.id
+    assert not single.player1_account_created
+    assert team.category_id == doubles.id and team.is_team_registration
+    assert team.player1_account_created and team.player2_account_created
+    assert team.partner.user.email == 'jo@example.com'
+    assert team.player1_dupr_rating == 3.5
+    assert all(r.is_approved and r.payment_verified and r.payment_status == 'free' for r in (single, team))
+    assert User.query.count() == 3
+    # Every confirmation goes out in one batch
+    enqueue.assert_called_once()
+    assert len(enqueue.call_args.args) == 3
+
+
+def test_sheet_with_errors_imports_nothing(app, init_database):
+    session = init_database.session
+    tournament, singles, doubles = setup_tournament(session)
+    singles.min_age = 18
+    singles.max_participants = 1
+    session.add(Registration(category=doubles, player1_email='taken@example.com', player2_email='other@example.com'))
+    session.commit()
+
+    with app.test_request_context():
+        result = RegistrationImport.run(tournament, sheet(
+            'Unknown,A,a@example.com,,,,',
+            "Men's Singles,B,b@example.com,2015-01-01,,,",
+            "Men's Singles,C,c@example.com,1990-01-01,,,",
+            "Men's Singles,D,d@example.com,1990-01-01,,,",
+            'Mixed Doubles,E,e@example.com,,,F,taken@example.com',
+            'Mixed Doubles,G,g@example.com,,,,',
+            "Men's Singles,H,not-an-email,yesterday,,,",
+        ), 'players.csv')
+
+    assert result['rows'] == 7 and result['imported'] == 0
+    messages = dict(result['errors'])
+    assert "Unknown category" in messages[2]
+    assert 'at least 18' in messages[3]
+    assert 'is full' in messages[5]
+    assert 'partner (Player 2) is already registered' in messages[6]
+    assert 'Partner required' in messages[7]
+    lines = [line for line, _ in result['errors']]
+    assert lines.count(8) == 2 and lines == sorted(lines)
+    assert 4 not in lines
+    assert Registration.query.count() == 1
+    assert User.query.count() == 0
+
+
+def test_passwords_are_hashed_before_the_categories_are_locked(app, init_database):
+    tournament, _, _ = setup_tournament(init_database.session)
+    calls = []
+    lock_categories = RegistrationService.lock_categories
+
+    def lock(category_ids):
+        calls.append('lock')
+        return lock_categories(category_ids)
+
+    def hash_password(password):
+        calls.append('hash')
+        return f'hash:{password}'
+
+    with app.test_request_context(), patch.object(EmailQueue, 'enqueue'), \
+            patch.object(RegistrationService, 'lock_categories', side_effect=lock), \
+            patch('app.services.account_provisioning.generate_password_hash', side_effect=hash_password):
+        result = RegistrationImport.run(tournament, sheet(
+            "Men's Singles,A,a@example.com,,,,",
+            'Mixed Doubles,B,b@example.com,,,C,c@example.com',
+        ), 'players.csv')
+
+    assert result['imported'] == 2
+    assert calls == ['hash'] * 3 + ['lock']
+    assert User.query.filter_by(email='c@example.com').one().password_hash.startswith('hash:')
+
+
+def test_dry_run_and_missing_columns(app, init_database):
+    tournament, _, _ = setup_tournament(init_database.session)
+    with app.test_request_context():
+        result = RegistrationImport.run(tournament, sheet("Men's Singles,A,a@example.com,,,,"), 'players.csv', dry_run=True)
+        assert result == {'rows': 1, 'imported': 0, 'errors': []}
+        assert Registration.query.count() == 0
+
+        with pytest.raises(ValueError, match='player1_email'):
+            RegistrationImport.run(tournament, io.BytesIO(b'category,player1_name\nX,Y\n'), 'players.csv')
+
+
+def test_import_command(app, init_database, runner, tmp_path):
+    tournament, _, _ = setup_tournament(init_database.session)
+    path = tmp_path / 'players.csv'
+    path.write_bytes(sheet("Men's Singles,A,a@example.com,,,,").getvalue())
+
+    with patch.object(EmailQueue, 'enqueue'):
+        result = runner.invoke(args=['import-registrations', str(tournament.id), str(path)])
+    assert result.exit_code == 0, result.output
+    assert '1 registration(s) imported into Open' in result.output
+    assert Registration.query.count() == 1
+
+    result = runner.invoke(args=['import-registrations', str(tournament.id), str(path), '--dry-run'])
+    assert result.exit_code != 0
+    assert 'already registered' in result.output
+
+
+def test_import_route_is_limited_to_the_tournament_organizer(app, client, init_database):
+    session = init_database.session
+    organizer = create_test_user(session, 'importer', UserRole.ORGANIZER)
+    other = create_test_user(session, 'someoneelse', UserRole.ORGANIZER)
+    tournament, _, _ = setup_tournament(session, organizer=organizer)
+    url = f'/organizer/tournament/{tournament.id}/registrations/import'
+
+    with app.test_request_context():
+        login_user(client, other)
+    response = client.get(url)
+    assert response.status_code == 302
+
+    client.get('/auth/logout')
+    with app.test_request_context():
+        login_user(client, organizer)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert b'player1_email' in response.data
+
+    with patch.object(EmailQueue, 'enqueue'):
+        response = client.post(url, data={
+            'sheet': (sheet("Men's Singles,A,a@example.com,,,,"), 'players.csv'),
+        }, content_type='multipart/form-data')
+    assert response.status_code == 302
+    registration = Registration.query.one()
+    assert registration.payment_verified_by == organizer.id
@@ -0,0 +1,171 @@
+import threading
+from datetime import date, timedelta
+from sqlalchemy import event
+from app import db
+from app.models import CategoryType, PlayerProfile, Registration, Tournament, TournamentCategory, User
+from app.services.registration_service import RegistrationService
+
+
+def create_category(session, max_participants=8, category_type=CategoryType.MENS_SINGLES, **limits):
+    tournament = Tournament(name='Open', start_date=date.today(), end_date=date.today() + timedelta(days=1))
+    category = TournamentCategory(tournament=tournament, name=category_type.value, category_type=category_type,
+                                  max_participants=max_participants, **limits)
+    session.add(category)
+    session.commit()
+    return category
+
+
+def create_profiles(session, count, date_of_birth=date(1990, 1, 1)):
+    profiles = [
+        PlayerProfile(user=User(username=f'p{i}', email=f'p{i}@example.com', password_hash='x'),
+                      full_name=f'Player {i}', date_of_birth=date_of_birth)
+        for i in range(count)
+    ]
+    session.add_all(profiles)
+    session.commit()
+    return [profile.id for profile in profiles]
+
+
+def test_candidates_are_validated_together_in_three_queries(app, init_database):
+    session = init_database.session
+    singles = create_category(session, max_participants=3)
+    doubles = create_category(session, max_participants=6, category_type=CategoryType.MIXED_DOUBLES, min_age=18)
+    p = create_profiles(session, 7)
+    session.add_all([
+        Registration(category=singles, player_id=p[0], payment_verified=True),
+        Registration(category=doubles, player_id=p[1], partner_id=p[2], payment_verified=False),
+        Registration(category=singles, player_id=p[6], payment_status='rejected'),
+    ])
+    session.commit()
+
+    candidates = [
+        {'category_id': singles.id, 'player_id': p[0]},                      # already registered
+        {'category_id': singles.id, 'player_id': p[3]},
+        {'category_id': singles.id, 'player_id': p[3]},                      # entered just above
+        {'category_id': singles.id, 'player_id': p[4]},
+        {'category_id': singles.id, 'player_id': p[5]},                      # full: 3 places held now
+        {'category_id': doubles.id, 'player_id': p[3]},                      # no partner
+        {'category_id': doubles.id, 'player_id': p[3], 'partner_id': p[3]},
+        {'category_id': doubles.id, 'player_id': p[4], 'partner_id': p[2]},  # partner registered
+        {'category_id': doubles.id, 'player_id': None, 'partner_id': p[6],
+         'player': {'date_of_birth': date.today() - timedelta(days=365 * 10)}},
+        {'category_id': doubles.id, 'player_id': p[3], 'partner_id': p[6]},
+        {'category_id': doubles.id, 'player_id': p[4], 'partner_id': None,   # full: 3 teams of 2, one unverified
+         'partner': {'date_of_birth': date(1990, 1, 1)}},
+        {'category_id': doubles.id, 'player_id': 9999, 'partner_id': p[5]},
+        {'category_id': 9999, 'player_id': p[5]},
+    ]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        results = RegistrationService.validate_registrations(candidates)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 3
+    assert results == [
+        (False, 'You (Player 1) are already registered for this category.'),
+        (True, None),
+        (False, 'You (Player 1) are already registered for this category.'),
+        (True, None),
+        (False, 'Sorry, the category "Men\'s Singles" is full or does not have enough space.'),
+        (False, 'Partner required for doubles events.'),
+        (False, 'You cannot register with yourself as a partner.'),
+        (False, 'Your selected partner (Player 2) is already registered for this category.'),
+        (False, 'Player must be at least 18 years old.'),
+        (True, None),
+        (True, None),
+        (False, 'Player profile not found.'),
+        (False, 'Category not found.'),
+    ]
+
+
+def test_single_registration_checks_ratings_when_given(app, init_database):
+    session = init_database.session
+    category = create_category(session, min_dupr_rating=3.5, max_dupr_rating=4.5)
+    player_id = create_profiles(session, 1)[0]
+
+    assert RegistrationService.validate_registration(player_id, category.id) == (True, None)
+    assert RegistrationService.validate_registration(player_id, category.id, player={'dupr_rating': 3.0}) == (
+        False, 'Player needs a DUPR rating of at least 3.5.')
+    assert RegistrationService.validate_registration(player_id, category.id, player={'dupr_rating': 5.0}) == (
+        False, 'Player has a DUPR rating above 4.5.')
+
+
+def test_pending_registrations_by_email_and_missing_ratings_are_caught(app, init_database):
+    session = init_database.session
+    category = create_category(session, min_dupr_rating=3.5)
+    doubles = create_category(session, category_type=CategoryType.MIXED_DOUBLES)
+    player_id = create_profiles(session, 1)[0]
+    # Entered anonymously before the player had a profile: no player_id, only the typed email
+    session.add(Registration(category=category, player1_email='p0@example.com'))
+    session.commit()
+
+    assert RegistrationService.validate_registration(player_id, category.id) == (
+        False, 'You (Player 1) are already registered for this category.')
+    assert RegistrationService.validate_registrations([
+        {'category_id': category.id, 'player_id': None, 'player': {'email': 'New@Example.com', 'dupr_rating': None}},
+        {'category_id': doubles.id, 'player_id': player_id, 'partner': {'email': 'P0@example.com'}},
+        {'category_id': category.id, 'player_id': None, 'partner': {'email': 'x@example.com'},
+         'player': {'email': 'y@example.com', 'dupr_rating': 4.0}},
+    ]) == [
+        (False, 'Player needs a DUPR rating of at least 3.5.'),
+        (False, 'You cannot register with yourself as a partner.'),
+        (False, "Men's Singles takes one player per registration."),
+    ]
+
+
+def test_places_taken_counts_registrations_not_rejected(app, init_database):
+    session = init_database.session
+    singles = create_category(session)
+    doubles = create_category(session, category_type=CategoryType.MENS_DOUBLES)
+    session.add_all([
+        Registration(category=singles, payment_verified=True),
+        Registration(category=singles, payment_verified=False),
+        Registration(category=singles, payment_status='rejected'),
+        Registration(category=doubles, payment_verified=True),
+    ])
+    session.commit()
+
+    assert RegistrationService.places_taken([singles, doubles]) == {singles.id: 2, doubles.id: 2}
+
+
+def test_simultaneous_registrations_do_not_oversubscribe(file_app):
+    threads, places = 12, 5
+    with file_app.app_context():
+        category_id = create_category(db.session, max_participants=places).id
+        profile_ids = create_profiles(db.session, threads)
+        db.session.remove()
+
+    barrier = threading.Barrier(threads)
+    outcomes, errors = [], []
+
+    def register(profile_id):
+        try:
+            with file_app.app_context():
+                barrier.wait()
+                # As the registration route does: lock, validate, insert, commit
+                RegistrationService.lock_categories([category_id])
+                is_valid, error = RegistrationService.validate_registration(profile_id, category_id)
+                if is_valid:
+                    db.session.add(Registration(category_id=category_id, player_id=profile_id, payment_verified=True))
+                    db.session.commit()
+                else:
+                    db.session.rollback()
+                outcomes.append(is_valid)
+                db.session.remove()
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=register, args=(profile_id,)) for profile_id in profile_ids]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+
+    assert errors == []
+    assert outcomes.count(True) == places
+    with file_app.app_context():
+        assert Registration.query.filter_by(category_id=category_id, payment_verified=True).count() == places
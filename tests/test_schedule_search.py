@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from app.models import (
+    PlayerProfile, Registration, Team, Group, Match, MatchStage, ParticipantSearchToken, CategoryType
+)
+from app.services.schedule_search import ScheduleSearch
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+
+
+def add_players(session, category, names, doubles=False):
+    """Registered profiles; doubles entries pair consecutive names into a team"""
+    players = [PlayerProfile(full_name=name) for name in names]
+    session.add_all(players)
+    session.flush()
+    teams = []
+    step = 2 if doubles else 1
+    for i in range(0, len(players), step):
+        partner = players[i + 1] if doubles else None
+        session.add(Registration(category_id=category.id, player_id=players[i].id,
+                                 partner_id=partner.id if partner else None, is_approved=True))
+        if doubles:
+            teams.append(Team(player1_id=players[i].id, player2_id=partner.id, category_id=category.id))
+    session.add_all(teams)
+    session.commit()
+    return teams if doubles else players
+
+
+def schedule_round_robin(session, category, sides, doubles=False, group=None, start=None):
+    start = start or datetime(2026, 5, 1, 9, 0)
+    count = 0
+    for i, first in enumerate(sides):
+        for second in sides[i + 1:]:
+            match = Match(category_id=category.id, stage=MatchStage.GROUP if group else MatchStage.KNOCKOUT,
+                          group_id=group.id if group else None, round=1,
+                          scheduled_time=start + timedelta(minutes=count))
+            if doubles:
+                match.team1_id, match.team2_id = first.id, second.id
+            else:
+                match.player1_id, match.player2_id = first.id, second.id
+            session.add(match)
+            count += 1
+    session.commit()
+    return count
+
+
+def test_tokenize_normalizes_names():
+    assert ScheduleSearch.tokenize("  José  O'Brien-Núñez ") == ['jose', 'o', 'brien', 'nunez']
+    assert ScheduleSearch.tokenize('') == []
+
+
+def test_search_matches_name_prefixes_in_singles_and_doubles(init_database):
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    singles = create_test_category(session, tournament)
+    doubles = create_test_category(session, tournament, name="Men's Doubles",
+                                   category_type=CategoryType.MENS_DOUBLES)
+    players = add_players(session, singles, ['Ana Souza', 'Bruno Lima', 'Carla Souza'])
+    teams = add_players(session, doubles, ['Diego Núñez', 'Eva Costa', 'Fabio Lima', 'Gil Rocha'], doubles=True)
+    schedule_round_robin(session, singles, players)
+    schedule_round_robin(session, doubles, teams, doubles=True)
+
+    def search(query, **filters):
+        return ScheduleSearch.search(tournament.id, query, **filters)
+
+    assert search('souza').total == 3
+    assert search('ana sou').total == 2
+    assert search('nunez').total == 1
+    assert search('LIM').total == 3                      # Bruno's two singles matches and Fabio's team
+    assert search('lim', category_id=doubles.id).total == 1
+    assert search('zzz').total == 0
+    assert search('').total == 4
+
+
+def test_index_follows_registrations_and_renames(init_database):
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament)
+    players = add_players(session, category, ['Ana Souza', 'Bruno Lima'])
+    schedule_round_robin(session, category, players)
+
+    late = add_players(session, category, ['Helena Prado'])[0]
+    session.add(Match(category_id=category.id, stage=MatchStage.KNOCKOUT, round=1,
+                      player1_id=players[0].id, player2_id=late.id, scheduled_time=datetime(2026, 5, 2)))
+    session.commit()
+    assert ScheduleSearch.search(tournament.id, 'helena').total == 1
+
+    players[1].full_name = 'Bruno Almeida'
+    session.commit()
+    assert ScheduleSearch.search(tournament.id, 'lima').total == 0
+    assert ScheduleSearch.search(tournament.id, 'almeida').total == 1
+    assert ParticipantSearchToken.query.filter_by(player_id=players[1].id).count() == 2
+
+
+def test_older_tournaments_are_searched_read_only_until_backfilled(init_database, runner):
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament)
+    players = add_players(session, category, ['Ana Souza', 'Bruno Lima', 'Carla Souza'])
+    schedule_round_robin(session, category, players)
+    # As for a tournament created before the index existed
+    ParticipantSearchToken.query.delete()
+    tournament.search_indexed_at = None
+    session.commit()
+    tournament_id = tournament.id
+
+    assert ScheduleSearch.search(tournament_id, 'souza').total == 3
+    session.rollback()
+    assert ParticipantSearchToken.query.count() == 0
+    assert tournament.search_indexed_at is None
+
+    result = runner.invoke(args=['rebuild-search-index'])
+    assert result.exit_code == 0, result.output
+    assert 'of 1 tournament(s)' in result.output
+    assert ParticipantSearchToken.query.filter_by(tournament_id=tournament_id).count() == 6
+    assert ScheduleSearch.search(tournament_id, 'sou').total == 3
+
+
+def test_large_schedule_search_is_one_paginated_query(init_database, query_counter):
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament)
+    groups = [Group(category_id=category.id, name=name) for name in 'AB']
+    session.add_all(groups)
+    session.flush()
+    total = 0
+    for g, group in enumerate(groups):
+        # 25 players per group, 300 matches each
+        players = add_players(session, category, [f'Player{g}_{i} Surname{i}' for i in range(25)])
+        total += schedule_round_robin(session, category, players, group=group)
+    assert total == 600
+    tournament_id = tournament.id
+
+    with query_counter() as counter:
+        page = ScheduleSearch.search(tournament_id, 'surname3', stage_filter='group:B', per_page=20)
+        names = [(m.player1.full_name, m.player2.full_name, m.group.name, m.is_doubles) for m in page.items]
+    # Count and page query; players, group and category come back joined
+    assert counter.count == 2
+
+    assert page.total == 24
+    assert len(names) == 20
+    assert all(group == 'B' and 'Surname3' in p1 + p2 for p1, p2, group, _ in names)
+    assert ScheduleSearch.available_stages(tournament_id) == {'groups': ['A', 'B'], 'knockout': []}
+
+
+def test_schedule_page_renders_paginated_results(client, init_database):
+    session = init_database.session
+    tournament = create_test_tournament(session)
+    category = create_test_category(session, tournament)
+    players = add_players(session, category, [f'Rita Number{i}' for i in range(12)])
+    schedule_round_robin(session, category, players)
+
+    response = client.get(f'/tournament/{tournament.id}/schedule?search=rita&page=2')
+
+    assert response.status_code == 200
+    assert b'of <span class="font-medium">66</span> matches' in response.data
+    assert f'/tournament/{tournament.id}/schedule?page=1&amp;search=rita'.encode() in response.data
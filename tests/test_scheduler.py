@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+import pytest
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+from app.models import SchedulerLock
+from app.scheduler import SchedulerLeader, next_interval_run
+from app.tasks.match_tasks import reconcile_group_standings, sync_match_reminders, reminder_job_id
+
+from tests.test_match_recipients import setup_window
+
+
+def test_only_one_process_holds_the_scheduler_lease(app, init_database):
+    first = SchedulerLeader(app, MagicMock(), lease_seconds=60)
+    second = SchedulerLeader(app, MagicMock(), lease_seconds=60)
+
+    assert first.tick() is True
+    assert second.tick() is False
+    first.scheduler.resume.assert_called_once()
+    second.scheduler.resume.assert_not_called()
+
+    # Renewing keeps the lease and wakes the scheduler for jobs added by other processes
+    assert first.tick() is True
+    first.scheduler.wakeup.assert_called_once()
+    assert second.tick() is False
+
+    # The leader stops renewing (e.g. it died): the lease expires and another process takes over
+    lock = SchedulerLock.query.get(SchedulerLeader.LOCK_NAME)
+    lock.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    init_database.session.commit()
+    assert second.tick() is True
+    second.scheduler.resume.assert_called_once()
+    assert first.tick() is False
+    first.scheduler.pause.assert_called_once()
+
+    second.release()
+    assert first.tick() is True
+
+
+@pytest.fixture
+def paused_scheduler():
+    """A scheduler that computes run times but never runs jobs"""
+    schedulers = []
+
+    def make(**jobstores):
+        target = BackgroundScheduler(timezone='UTC')
+        if jobstores:
+            target.configure(jobstores=jobstores)
+        target.start(paused=True)
+        schedulers.append(target)
+        return target
+
+    yield make
+    for target in schedulers:
+        target.shutdown(wait=False)
+
+
+def test_reminder_jobs_rebuilt_from_match_times(app, init_database, query_counter, paused_scheduler):
+    session = init_database.session
+    matches = setup_window(session, 2)
+    now = datetime.now()
+    day_ahead, soon, completed, imminent = matches
+    day_ahead.scheduled_time = now + timedelta(days=2)
+    soon.scheduled_time = now + timedelta(hours=2)
+    completed.scheduled_time = now + timedelta(days=2)
+    completed.completed = True
+    imminent.scheduled_time = now + timedelta(minutes=30)
+    session.commit()
+    target = paused_scheduler()
+
+    with query_counter() as counter:
+        sync_match_reminders(target)
+    assert counter.count == 1
+    jobs = {job.id: job for job in target.get_jobs()}
+    assert sorted(jobs) == sorted([reminder_job_id(day_ahead.id, '24h'), reminder_job_id(day_ahead.id, '1h'),
+                                   reminder_job_id(soon.id, '1h')])
+    day_job = jobs[reminder_job_id(day_ahead.id, '24h')]
+    assert day_job.next_run_time == (day_ahead.scheduled_time - timedelta(hours=24)).astimezone()
+    assert day_job.args == (day_ahead.id, True)
+
+    # Running it again changes nothing; rescheduled and completed matches are followed
+    sync_match_reminders(target)
+    assert len(target.get_jobs()) == 3
+    day_ahead.scheduled_time = now + timedelta(days=3)
+    soon.completed = True
+    session.commit()
+    sync_match_reminders(target)
+    jobs = {job.id: job for job in target.get_jobs()}
+    assert sorted(jobs) == sorted([reminder_job_id(day_ahead.id, '24h'), reminder_job_id(day_ahead.id, '1h')])
+    assert jobs[reminder_job_id(day_ahead.id, '1h')].next_run_time == \
+        (day_ahead.scheduled_time - timedelta(hours=1)).astimezone()
+
+
+def test_reminder_jobs_survive_restart_without_duplicates(app, init_database, paused_scheduler, tmp_path):
+    session = init_database.session
+    match, other = setup_window(session, 1)
+    match.scheduled_time = datetime.now() + timedelta(days=2)
+    other.completed = True
+    session.commit()
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+
+    # Two processes sharing the job store both rebuild at startup
+    for _ in range(2):
+        sync_match_reminders(paused_scheduler(default=SQLAlchemyJobStore(url=url)))
+
+    # After a restart the jobs are still there, once each
+    restarted = paused_scheduler(default=SQLAlchemyJobStore(url=url))
+    assert sorted(job.id for job in restarted.get_jobs()) == sorted([
+        reminder_job_id(match.id, '1h'), reminder_job_id(match.id, '24h')
+    ])
+
+
+def test_interval_jobs_keep_their_next_run_across_restarts(app, init_database, paused_scheduler, tmp_path):
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    interval = timedelta(hours=24)
+    first = paused_scheduler(default=SQLAlchemyJobStore(url=url))
+    first.add_job(reconcile_group_standings, 'interval', hours=24, id='reconcile_group_standings',
+                  next_run_time=datetime.now().astimezone() + timedelta(hours=1), replace_existing=True)
+    stored = first.get_job('reconcile_group_standings').next_run_time
+
+    # A restart re-adds the job at its stored run time instead of a full interval from now
+    restarted = paused_scheduler(default=SQLAlchemyJobStore(url=url))
+    assert next_interval_run(restarted, 'reconcile_group_standings', interval) == stored
+    # A shortened interval brings it forward; a new job waits one interval
+    assert next_interval_run(restarted, 'reconcile_group_standings', timedelta(minutes=5)) < stored
+    assert next_interval_run(restarted, 'missing', interval) > datetime.now().astimezone() + timedelta(hours=23)
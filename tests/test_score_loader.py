@@ -0,0 +1,90 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models import PlayerProfile, Team, Match, MatchScore, TournamentStatus, CategoryType
+from app.services.score_loader import ScoreLoader
+
+from tests.test_bracket_service import create_test_tournament, create_test_category
+
+
+def setup_live_tournament(session, matches_per_category):
+    """Ongoing tournament with a singles and a doubles category, every match on court with scores"""
+    tournament = create_test_tournament(session)
+    tournament.status = TournamentStatus.ONGOING
+    singles = create_test_category(session, tournament)
+    doubles = create_test_category(session, tournament, name="Mixed Doubles",
+                                   category_type=CategoryType.MIXED_DOUBLES)
+    players = [PlayerProfile(full_name=f'Live Player {i}') for i in range(matches_per_category * 6)]
+    session.add_all(players)
+    session.flush()
+    teams = [Team(category_id=doubles.id, player1_id=players[i].id, player2_id=players[i + 1].id)
+             for i in range(matches_per_category * 2, matches_per_category * 6, 2)]
+    session.add_all(teams)
+    session.flush()
+
+    start = datetime.now() + timedelta(hours=1)
+    matches = []
+    for i in range(matches_per_category):
+        matches.append(Match(category_id=singles.id, round=1, match_order=i, court=str(i % 4 + 1),
+                             scheduled_time=start + timedelta(minutes=i),
+                             player1_id=players[2 * i].id, player2_id=players[2 * i + 1].id))
+        matches.append(Match(category_id=doubles.id, round=1, match_order=i, court=str(i % 4 + 1),
+                             scheduled_time=start + timedelta(minutes=30 + i),
+                             team1_id=teams[2 * i].id, team2_id=teams[2 * i + 1].id))
+    session.add_all(matches)
+    session.flush()
+    for match in matches:
+        session.add(MatchScore(match_id=match.id, set_number=1, player1_score=11, player2_score=8))
+        session.add(MatchScore(match_id=match.id, set_number=2, player1_score=6, player2_score=4))
+    session.commit()
+    return tournament.id, singles.id
+
+
+ENDPOINTS = [
+    '/tournament/api/{id}/scores',
+    '/tournament/{id}/live_scoring',
+    '/tournament/{id}/live_courts',
+    '/tournament/api/{id}/courts_data',
+    '/tournament/{id}/bracket?category={category}',
+]
+
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+def test_endpoint_query_count_independent_of_match_count(client, init_database, query_counter, endpoint):
+    session = init_database.session
+    counts = []
+    for size in (2, 8):
+        tournament_id, category_id = setup_live_tournament(session, size)
+        url = endpoint.format(id=tournament_id, category=category_id)
+        client.get(url)  # warm-up: lazy one-off work such as Flask-Login and template loading
+        session.expire_all()
+        with query_counter() as counter:
+            response = client.get(url)
+        assert response.status_code == 200
+        counts.append(counter.count)
+    assert counts[0] == counts[1]
+
+
+def test_loader_groups_scores_and_reuses_them_within_request(app, init_database, query_counter):
+    session = init_database.session
+    setup_live_tournament(session, 2)
+    ids = [m.id for m in Match.query.order_by(Match.id)]
+
+    with app.test_request_context():
+        with query_counter() as counter:
+            scores = ScoreLoader.load(ids + [999])
+            again = ScoreLoader.for_match(ids[0])
+        assert counter.count == 1
+        assert [s.set_number for s in scores[ids[0]]] == [1, 2]
+        assert scores[999] == []
+        assert again is scores[ids[0]]
+
+        ScoreLoader.forget(ids[0])
+        with query_counter() as counter:
+            ScoreLoader.for_match(ids[0])
+        assert counter.count == 1
+
+    with app.test_request_context():
+        with query_counter() as counter:
+            ScoreLoader.for_match(ids[0])
+        # A new request starts with an empty cache
+        assert counter.count == 1
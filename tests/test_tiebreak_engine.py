@@ -0,0 +1,170 @@
+import pytest
+from types import SimpleNamespace
+from app.models import GroupStanding, TournamentFormat, UserRole
+from app.services.bracket_service import BracketService
+from app.services.tiebreak_service import TiebreakEngine
+
+from tests.test_group_standings_incremental import setup_group, record_result
+from tests.test_permissions import create_test_user, login_user, logout_user
+
+
+def make_standing(participant_id, matches_won, points_won=0, points_lost=0, doubles=False):
+    return SimpleNamespace(
+        id=participant_id, group_id=1,
+        player_id=None if doubles else participant_id,
+        team_id=participant_id if doubles else None,
+        matches_won=matches_won, points_won=points_won, points_lost=points_lost,
+        sets_won=0, sets_lost=0, position=None
+    )
+
+
+def make_match(match_id, side1, side2, winner, doubles=False):
+    if doubles:
+        return SimpleNamespace(id=match_id, player1_id=None, player2_id=None, winning_player_id=None,
+                               team1_id=side1, team2_id=side2, winning_team_id=winner)
+    return SimpleNamespace(id=match_id, player1_id=side1, player2_id=side2, winning_player_id=winner,
+                           team1_id=None, team2_id=None, winning_team_id=None)
+
+
+def make_score(match_id, player1_score, player2_score):
+    return SimpleNamespace(match_id=match_id, player1_score=player1_score, player2_score=player2_score)
+
+
+def test_three_way_tie_resolved_as_mini_league():
+    # Point differential alone would give 2, 3, 1
+    standings = [
+        make_standing(1, 2, points_won=40, points_lost=40),
+        make_standing(2, 2, points_won=60, points_lost=30),
+        make_standing(3, 2, points_won=50, points_lost=35),
+        make_standing(4, 3),
+    ]
+    matches = [make_match(1, 1, 2, 1), make_match(2, 1, 3, 1), make_match(3, 3, 2, 3)]
+
+    ranked = TiebreakEngine(standings, matches=matches).rank()
+
+    assert [s.id for s in ranked] == [4, 1, 3, 2]
+
+
+def test_configured_order_uses_head_to_head_points():
+    # Circular tie: 1 beat 2, 2 beat 3, 3 beat 1
+    standings = [
+        make_standing(1, 1, points_won=30, points_lost=20),
+        make_standing(2, 1, points_won=30, points_lost=25),
+        make_standing(3, 1, points_won=30, points_lost=30),
+    ]
+    matches = [make_match(1, 1, 2, 1), make_match(2, 2, 3, 2), make_match(3, 3, 1, 3)]
+    scores = {
+        1: [make_score(1, 11, 9)],
+        2: [make_score(2, 11, 2)],
+        3: [make_score(3, 11, 8)],
+    }
+
+    default = TiebreakEngine(standings, matches=matches, scores=scores).rank()
+    configured = TiebreakEngine(
+        standings, matches=matches, scores=scores,
+        tiebreak_order=['h2h_wins', 'h2h_point_diff', 'point_diff']
+    ).rank()
+
+    assert [s.id for s in default] == [1, 2, 3]
+    # Head-to-head points: 1 -> -1, 2 -> +7, 3 -> -6
+    assert [s.id for s in configured] == [2, 1, 3]
+
+
+def test_doubles_standings_use_team_results():
+    standings = [make_standing(10, 1, doubles=True), make_standing(20, 1, doubles=True)]
+    matches = [make_match(1, 10, 20, 20, doubles=True)]
+
+    ranked = TiebreakEngine(standings, matches=matches).rank()
+
+    assert [s.id for s in ranked] == [20, 10]
+
+
+def test_unknown_criterion_rejected():
+    with pytest.raises(ValueError):
+        TiebreakEngine([make_standing(1, 0)], matches=[], tiebreak_order=['coin_toss'])
+
+
+def test_group_resolved_from_single_results_fetch(init_database, query_counter):
+    session = init_database.session
+    group, players, matches = setup_group(session)
+    # Two tied clusters: players 0/1 on two wins, players 2/3 on one win
+    results = [
+        [(11, 5), (11, 7)],   # 0 beats 1
+        [(5, 11), (7, 11)],   # 2 beats 0
+        [(11, 2), (11, 3)],   # 0 beats 3
+        [(11, 9), (11, 9)],   # 1 beats 2
+        [(11, 4), (11, 4)],   # 1 beats 3
+        [(4, 11), (6, 11)],   # 3 beats 2
+    ]
+    for match, sets in zip(matches, results):
+        record_result(session, match, sets)
+    BracketService.update_group_standings(group.id)
+    standings = GroupStanding.query.filter_by(group_id=group.id).all()
+
+    with query_counter() as counter:
+        BracketService._calculate_group_positions(standings)
+    assert counter.count == 1
+
+    with query_counter() as counter:
+        BracketService._calculate_group_positions(standings, ['h2h_wins', 'h2h_set_diff', 'point_diff'])
+    assert counter.count == 2
+
+    positions = {s.player_id: s.position for s in GroupStanding.query.filter_by(group_id=group.id)}
+    assert positions[players[0].id] == 1
+    assert positions[players[1].id] == 2
+    assert positions[players[3].id] == 3
+    assert positions[players[2].id] == 4
+
+
+def test_category_tiebreak_order_applied(init_database):
+    session = init_database.session
+    group, players, matches = setup_group(session, n_players=3)
+    # Circular tie where set differential and point differential disagree
+    record_result(session, matches[0], [(11, 0), (0, 11), (11, 0)])   # 0 beats 1
+    record_result(session, matches[1], [(9, 11), (9, 11)])            # 2 beats 0
+    record_result(session, matches[2], [(11, 9), (11, 9)])            # 1 beats 2
+
+    BracketService.update_group_standings(group.id)
+    by_points = {s.player_id: s.position for s in GroupStanding.query.filter_by(group_id=group.id)}
+    assert by_points[players[0].id] == 1
+
+    group.category.tiebreak_order = ['h2h_wins', 'set_diff', 'point_diff']
+    session.commit()
+    BracketService.update_group_standings(group.id)
+    by_sets = {s.player_id: s.position for s in GroupStanding.query.filter_by(group_id=group.id)}
+    # Sets: player 0 is 2-3, players 1 and 2 are 3-2 / 2-2
+    assert by_sets[players[1].id] == 1
+    assert by_sets[players[0].id] == 3
+
+
+def test_organizer_sets_the_tiebreak_order(app, client, init_database):
+    session = init_database.session
+    group, players, matches = setup_group(session, n_players=3)
+    record_result(session, matches[0], [(11, 0), (0, 11), (11, 0)])   # 0 beats 1
+    record_result(session, matches[1], [(9, 11), (9, 11)])            # 2 beats 0
+    record_result(session, matches[2], [(11, 9), (11, 9)])            # 1 beats 2
+    BracketService.update_group_standings(group.id)
+    category = group.category
+    category.format = TournamentFormat.GROUP_KNOCKOUT
+    organizer = create_test_user(session, 'tiebreak_organizer', UserRole.ORGANIZER)
+    category.tournament.organizer_id = organizer.id
+    session.commit()
+    with app.test_request_context():
+        logout_user(client)  # whoever an earlier test left logged in
+        login_user(client, organizer)
+    url = f'/organizer/tournament/{category.tournament_id}/manage_category/{category.id}'
+    assert b'name="tiebreak_order"' in client.get(url).data
+
+    client.post(url, data={'action': 'update_tiebreak_order', 'tiebreak_order': 'h2h_wins, coin_toss'})
+    session.expire_all()
+    assert category.tiebreak_order is None
+
+    client.post(url, data={'action': 'update_tiebreak_order', 'tiebreak_order': 'h2h_wins, set_diff, point_diff'})
+    session.expire_all()
+    assert category.tiebreak_order == ['h2h_wins', 'set_diff', 'point_diff']
+    # Existing groups are re-ranked under the new order
+    positions = {s.player_id: s.position for s in GroupStanding.query.filter_by(group_id=group.id)}
+    assert positions[players[1].id] == 1
+    assert positions[players[0].id] == 3
+    with app.test_request_context():
+        logout_user(client)
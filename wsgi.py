@@ -2,8 +2,11 @@ from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 
 from app import create_app
+from app.services.email_queue import EmailQueue
 
 app = create_app()
+# The serving process delivers queued email; CLI commands and scripts only write the outbox
+EmailQueue.start_workers(app)
 
 if __name__ == "__main__":
     app.run()
\ No newline at end of file